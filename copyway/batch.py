@@ -0,0 +1,434 @@
+"""Modo batch: ejecutar muchos trabajos de copia en un solo proceso.
+
+Este módulo lee un manifiesto de trabajos (YAML o JSONL) y los ejecuta con
+un límite de concurrencia, compartiendo configuración, protocolos y el pool
+de conexiones SSH entre todos ellos.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from .exceptions import ConfigError, CopyWayError
+from .protocols import ProtocolFactory
+from .protocols.base import AsyncProtocol
+from .utils.connections import connection_pool
+from .utils.logger import logger
+from .utils.metrics import TransferMetrics, build_record
+
+DEFAULT_CONCURRENCY = 4
+
+
+def load_manifest(source):
+    """Cargar los trabajos de un manifiesto.
+
+    Un archivo YAML puede ser una lista de trabajos o un mapa con ``jobs`` y
+    ``defaults`` (valores comunes a todos los trabajos). Los archivos
+    ``.jsonl``/``.ndjson`` y la entrada estándar (``-``) se leen como JSONL,
+    un trabajo por línea, sin cargar todo el manifiesto en memoria.
+
+    Args:
+        source (str | file): Ruta al manifiesto, "-" o un archivo abierto
+
+    Returns:
+        iterable: Diccionarios de trabajo con ``protocol``, ``source``,
+            ``destination`` y opciones
+
+    Raises:
+        ConfigError: Si el manifiesto no se puede leer o parsear
+
+    Example:
+        >>> jobs = load_manifest("jobs.yaml")
+        >>> next(iter(jobs))["source"]
+        '/datos/a'
+    """
+    if hasattr(source, "read"):
+        return _read_jsonl(source, "<stdin>")
+
+    path = Path(source)
+    if path.suffix in (".jsonl", ".ndjson"):
+        try:
+            return _read_jsonl(open(path, encoding="utf-8"), str(path))
+        except OSError as e:
+            raise ConfigError(f"Error leyendo manifiesto: {e}") from e
+
+    import yaml
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = yaml.safe_load(f) or []
+    except Exception as e:
+        raise ConfigError(f"Error leyendo manifiesto: {e}") from e
+
+    defaults = {}
+    if isinstance(data, dict):
+        defaults = data.get("defaults") or {}
+        data = data.get("jobs") or []
+    if not isinstance(data, list) or not all(isinstance(j, dict) for j in data):
+        raise ConfigError(
+            f"Manifiesto inválido: {path} (se esperaba una lista de trabajos)"
+        )
+    return [{**defaults, **job} for job in data]
+
+
+def _read_jsonl(f, name):
+    with f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ConfigError(f"{name}:{lineno}: JSON inválido: {e}") from e
+            if not isinstance(job, dict):
+                raise ConfigError(f"{name}:{lineno}: se esperaba un objeto")
+            yield job
+
+
+def validate_job(protocol, instance, source, destination, options):
+    """Validar un trabajo antes de copiar (local, SFTP y SFTP asíncrono).
+
+    En SFTP la conexión abierta al validar queda en el pool y la reutiliza
+    la copia.
+
+    Args:
+        protocol (str): Nombre del protocolo
+        instance (Protocol): Instancia del protocolo
+        source (str): Ruta de origen
+        destination (str): Ruta de destino
+        options (dict): Opciones del trabajo
+
+    Raises:
+        ValidationError: Si la validación falla
+    """
+    if protocol == "local":
+        instance.validate(source, destination)
+    elif protocol in ("sftp", "asftp"):
+        instance.validate(source, destination, **options)
+
+
+class BatchRunner:
+    """Ejecuta una lista de trabajos de copia con concurrencia acotada.
+
+    Cada trabajo se valida y se copia con las mismas reglas que la CLI. Un
+    trabajo fallido no detiene a los demás: su error queda en el reporte.
+    Las conexiones SSH se reutilizan entre trabajos al mismo host a través
+    del pool global.
+
+    Attributes:
+        config (Config): Configuración compartida por todos los trabajos
+        concurrency (int): Trabajos ejecutados en paralelo
+        dry_run (bool): Solo validar, sin copiar
+        throttle (Throttle): Límite de ancho de banda compartido por todos
+            los trabajos, o None
+        reporter (MetricsReporter): Publica las métricas de cada trabajo y
+            del total del batch, o None
+        metrics (TransferMetrics): Métricas sumadas de todos los trabajos
+        results (list): Resultados por trabajo (ver ``run_job``)
+
+    Example:
+        >>> runner = BatchRunner(Config(), concurrency=8)
+        >>> results = runner.run(load_manifest("jobs.yaml"))
+        >>> print(runner.summary())
+    """
+
+    def __init__(
+        self,
+        config,
+        concurrency=DEFAULT_CONCURRENCY,
+        dry_run=False,
+        on_result=None,
+        throttle=None,
+        reporter=None,
+    ):
+        """Inicializa el runner.
+
+        Args:
+            config (Config): Configuración cargada
+            concurrency (int): Trabajos en paralelo. Default: 4
+            dry_run (bool): Solo validar. Default: False
+            on_result (callable, optional): Se llama con cada resultado al
+                terminar su trabajo (desde el hilo que ejecuta ``run``)
+            throttle (Throttle, optional): Límite global de ancho de banda; se
+                suma al que tenga cada trabajo
+            reporter (MetricsReporter, optional): Publicador de métricas; el
+                archivo de Prometheus recibe solo el total del batch
+        """
+        self.config = config
+        self.concurrency = concurrency
+        self.dry_run = dry_run
+        self.on_result = on_result
+        self.throttle = throttle
+        self.reporter = reporter if reporter and reporter.enabled else None
+        self.metrics = TransferMetrics()
+        self.results = []
+        self._lock = threading.Lock()
+        self._started = None
+        self._elapsed = 0.0
+
+    def run(self, jobs):
+        """Ejecutar todos los trabajos.
+
+        Los trabajos de protocolos asíncronos (``AsyncProtocol``, ej: asftp)
+        corren como corrutinas en un solo event loop; los demás, en un pool
+        de hilos. ``concurrency`` acota el total de trabajos en curso.
+
+        Args:
+            jobs (iterable): Diccionarios de trabajo (puede ser un generador)
+
+        Returns:
+            list: Resultados ordenados por índice de trabajo
+        """
+        from .utils.aio import run_sync
+
+        # Conservar una conexión ociosa por trabajo concurrente
+        connection_pool.max_idle = max(connection_pool.max_idle, self.concurrency)
+
+        self._started = time.monotonic()
+        try:
+            run_sync(self._run_async(jobs))
+        finally:
+            self._elapsed = time.monotonic() - self._started
+        if self.reporter and not self.dry_run:
+            self.reporter.report(
+                build_record(
+                    self.metrics,
+                    "batch",
+                    None,
+                    None,
+                    "failed" if self.failed else "completed",
+                    self._elapsed,
+                    retries=sum(r["retries"] for r in self.results),
+                )
+            )
+        return sorted(self.results, key=lambda r: r["index"])
+
+    async def _run_async(self, jobs):
+        import asyncio
+        from .utils.aio import run_parallel_async
+
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+
+            async def run(item):
+                index, job = item
+                if _is_async_job(job):
+                    result = await self.execute_job_async(index, job)
+                else:
+                    result = await loop.run_in_executor(
+                        executor, self.execute_job, index, job
+                    )
+                self._add_result(result)
+
+            await run_parallel_async(run, enumerate(jobs), self.concurrency)
+
+    def run_job(self, index, job):
+        """Validar y copiar un trabajo, capturando su error.
+
+        Args:
+            index (int): Posición del trabajo en el manifiesto
+            job (dict): Trabajo con ``protocol``, ``source``, ``destination``
+                y opciones (ej: ``port``, ``workers``, ``sync``)
+
+        Returns:
+            dict: ``index``, ``protocol``, ``source``, ``destination``,
+                ``status`` ("completed", "failed" o "validated"), ``error``,
+                ``retries`` (operaciones reintentadas) y ``seconds``; con
+                ``destinations`` en el trabajo, también el resultado de cada
+                destino en ``destinations``
+        """
+        result = self.execute_job(index, job)
+        self._add_result(result)
+        return result
+
+    def execute_job(self, index, job):
+        """Como ``run_job``, sin agregar el resultado a ``results``.
+
+        Lo usa el daemon, que guarda sus propios resultados.
+        """
+        result, source, destination, options = self._prepare(index, job)
+        if "destinations" in options:
+            return self._execute_fanout(result, source, options)
+        protocol = result["protocol"]
+        started = time.monotonic()
+        instance = None
+        try:
+            instance = self._create(result)
+            with instance.metrics.phase("validate"):
+                validate_job(protocol, instance, source, destination, options)
+            if self.dry_run:
+                result["status"] = "validated"
+            else:
+                instance.copy(source, destination, **options)
+        except CopyWayError as e:
+            result.update(status="failed", error=str(e))
+        except Exception as e:
+            logger.exception(f"Error inesperado en trabajo {index}")
+            result.update(status="failed", error=f"Error inesperado: {e}")
+        return self._finish(instance, result, started)
+
+    async def execute_job_async(self, index, job):
+        """Como ``execute_job``, para un trabajo de un ``AsyncProtocol``.
+
+        Corre en el event loop del batch; las conexiones del trabajo se
+        cierran al terminar.
+        """
+        result, source, destination, options = self._prepare(index, job)
+        started = time.monotonic()
+        instance = None
+        try:
+            instance = self._create(result)
+            with instance.metrics.phase("validate"):
+                await instance.validate_async(source, destination, **options)
+            if self.dry_run:
+                result["status"] = "validated"
+            else:
+                await instance.copy_async(source, destination, **options)
+        except CopyWayError as e:
+            result.update(status="failed", error=str(e))
+        except Exception as e:
+            logger.exception(f"Error inesperado en trabajo {index}")
+            result.update(status="failed", error=f"Error inesperado: {e}")
+        finally:
+            if instance is not None:
+                await instance.aclose()
+        return self._finish(instance, result, started)
+
+    def _execute_fanout(self, result, source, options):
+        """Trabajo con ``destinations``: el origen se lee una vez para todos.
+
+        Cada destino se valida antes de copiar (ver ``FanOut.validate``). El
+        resultado suma ``destinations`` con el de cada destino (ver
+        ``FanOut.run``); el trabajo falla si falla alguno.
+        """
+        from .fanout import FanOut
+
+        destinations = options.pop("destinations")
+        options.pop("progress", None)
+        names = [d["destination"] if isinstance(d, dict) else d for d in destinations]
+        result["destination"] = ", ".join(names)
+        started = time.monotonic()
+        fanout = None
+        try:
+            if not result["protocol"] or not source or not destinations:
+                raise ConfigError(
+                    "El trabajo debe indicar protocol, source y destinations"
+                )
+            fanout = FanOut(self.config)
+            with fanout.metrics.phase("validate"):
+                fanout.validate(source, destinations, result["protocol"], **options)
+            if self.dry_run:
+                result["status"] = "validated"
+            else:
+                result["destinations"] = fanout.run(
+                    source, destinations, result["protocol"], **options
+                )
+                if fanout.failed:
+                    result.update(
+                        status="failed",
+                        error=f"{fanout.failed} de {len(destinations)} destinos fallaron",
+                    )
+        except CopyWayError as e:
+            result.update(status="failed", error=str(e))
+        except Exception as e:
+            logger.exception(f"Error inesperado en trabajo {result['index']}")
+            result.update(status="failed", error=f"Error inesperado: {e}")
+        return self._finish(fanout, result, started)
+
+    def _prepare(self, index, job):
+        """Resultado inicial, origen, destino y opciones de copia de un trabajo."""
+        options = {k.replace("-", "_"): v for k, v in job.items() if v is not None}
+        protocol = options.pop("protocol", None)
+        source = options.pop("source", None)
+        destination = options.pop("destination", None)
+        # Varias barras de progreso concurrentes se pisarían en la terminal
+        options.setdefault("progress", False)
+        if self.throttle is not None and not self.dry_run:
+            options["throttle"] = self.throttle
+
+        result = {
+            "index": index,
+            "protocol": protocol,
+            "source": source,
+            "destination": destination,
+            "status": "completed",
+            "error": None,
+            "retries": 0,
+        }
+        return result, source, destination, options
+
+    def _create(self, result):
+        """Instancia del protocolo del trabajo, validando los campos obligatorios."""
+        protocol = result["protocol"]
+        if not protocol or not result["source"] or not result["destination"]:
+            raise ConfigError("El trabajo debe indicar protocol, source y destination")
+        return ProtocolFactory.create(
+            protocol, self.config.get_protocol_config(protocol)
+        )
+
+    def _finish(self, instance, result, started):
+        if instance is not None:
+            result["retries"] = instance.retry_stats.retries
+        result["seconds"] = round(time.monotonic() - started, 3)
+        if instance is not None and not self.dry_run:
+            self._record_metrics(instance.metrics, result)
+        return result
+
+    def _add_result(self, result):
+        with self._lock:
+            self.results.append(result)
+        if self.on_result:
+            self.on_result(result)
+
+    def _record_metrics(self, metrics, result):
+        """Suma las métricas del trabajo al total y las publica."""
+        if result["status"] == "failed" and not metrics.errors:
+            metrics.record_error()
+        self.metrics.merge(metrics)
+        if self.reporter:
+            record = build_record(
+                metrics,
+                result["protocol"],
+                result["source"],
+                result["destination"],
+                result["status"],
+                result["seconds"],
+                retries=result["retries"],
+            )
+            self.reporter.report(record, prometheus=False)
+
+    @property
+    def failed(self):
+        """Cantidad de trabajos fallidos."""
+        return sum(1 for r in self.results if r["status"] == "failed")
+
+    def summary(self):
+        """Resumen legible del batch.
+
+        Returns:
+            str: Ej: "Batch: 98 completados, 2 fallidos (5 reintentos) en 12.3 s"
+        """
+        ok = len(self.results) - self.failed
+        label = "validados" if self.dry_run else "completados"
+        retries = sum(r["retries"] for r in self.results)
+        detail = f" ({retries} reintentos)" if retries else ""
+        return (
+            f"Batch: {ok} {label}, {self.failed} fallidos{detail} "
+            f"en {self._elapsed:.1f} s"
+        )
+
+
+def _is_async_job(job):
+    """Indica si el trabajo usa un ``AsyncProtocol`` (sin fallar si no existe).
+
+    Los trabajos con ``destinations`` corren en un hilo: el fan-out escribe
+    cada destino con su protocolo sincrónico.
+    """
+    if "destinations" in job:
+        return False
+    try:
+        return issubclass(ProtocolFactory.get(job.get("protocol")), AsyncProtocol)
+    except CopyWayError:
+        return False
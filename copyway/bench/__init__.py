@@ -0,0 +1,27 @@
+"""Benchmarks de rendimiento de CopyWay (``copyway bench``).
+
+Generan árboles sintéticos (pocos archivos grandes, muchos chicos o una
+mezcla), los copian con cada protocolo contra servidores del mismo proceso y
+reportan MB/s, archivos/s, latencia por archivo (p50/p99) y pico de memoria
+en JSON, junto con el tiempo de arranque de la CLI, para comparar corridas y
+detectar regresiones.
+"""
+
+from .runner import (
+    PROTOCOLS,
+    compare,
+    environment,
+    measure_startup,
+    run_benchmarks,
+)
+from .trees import PROFILES, make_tree
+
+__all__ = [
+    "PROFILES",
+    "PROTOCOLS",
+    "compare",
+    "environment",
+    "make_tree",
+    "measure_startup",
+    "run_benchmarks",
+]
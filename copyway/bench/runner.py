@@ -0,0 +1,416 @@
+"""Ejecución y medición de los benchmarks.
+
+Cada escenario copia un árbol sintético con un protocolo real contra un
+servidor del mismo proceso (SFTP por paramiko, WebHDFS por HTTP) y mide
+caudal, archivos por segundo, latencia por archivo y pico de memoria. La
+latencia se obtiene de las llamadas a ``mark_done`` que los protocolos hacen
+al terminar cada archivo (la misma interfaz que ``JobState``).
+"""
+
+import gc
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from .. import __version__
+from ..protocols import ProtocolFactory
+from ..utils.connections import connection_pool
+from ..utils.logger import logger
+from .trees import PROFILES, make_tree
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+PROTOCOLS = ("local", "sftp", "hdfs")
+# Métricas donde un valor menor es una regresión
+THROUGHPUT_METRICS = ("mb_per_s", "files_per_s")
+# Métricas donde un valor mayor es una regresión
+LATENCY_METRICS = ("startup_ms",)
+DEFAULT_TOLERANCE = 0.10
+DEFAULT_STARTUP_RUNS = 10
+BENCH_USER = "bench"
+
+
+class FileRecorder:
+    """Reemplazo de ``JobState`` que registra cuándo termina cada archivo.
+
+    La latencia de un archivo es el tiempo desde que su hilo terminó el
+    anterior (o desde el inicio de la copia, para el primero).
+
+    Attributes:
+        latencies (list): Segundos por archivo, en orden de llegada
+        bytes (int): Bytes de los archivos terminados
+        failed (int): Archivos fallidos
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.bytes = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._last = {}
+        self._started = time.perf_counter()
+
+    def is_done(self, path, size=None, mtime=None):
+        return False
+
+    def mark_done(self, path, size=None, mtime=None, checksum=None):
+        now = time.perf_counter()
+        thread = threading.get_ident()
+        with self._lock:
+            self.latencies.append(now - self._last.get(thread, self._started))
+            self._last[thread] = now
+            self.bytes += size or 0
+
+    def mark_failed(self, path, error):
+        with self._lock:
+            self.failed += 1
+
+
+def run_benchmarks(
+    protocols=PROTOCOLS,
+    profiles=tuple(PROFILES),
+    workdir=None,
+    scale=1.0,
+    workers=1,
+    on_result=None,
+):
+    """Ejecuta los benchmarks de cada protocolo sobre cada perfil.
+
+    Los remotos se copian en ambos sentidos (subida y descarga del árbol
+    subido). Un escenario que falla queda en los resultados con ``error``
+    y no detiene a los demás.
+
+    Args:
+        protocols (iterable): Protocolos a medir ("local", "sftp", "hdfs")
+        profiles (iterable): Nombres de ``PROFILES`` a generar
+        workdir (str, optional): Directorio de trabajo (árboles, destinos y
+            raíz de los servidores). Default: uno temporal que se borra al
+            terminar
+        scale (float): Factor sobre la cantidad de archivos de cada perfil
+        workers (int): Opción ``workers`` de cada copia
+        on_result (callable, optional): Se llama con cada resultado
+
+    Returns:
+        list: Un diccionario por escenario (ver ``measure``)
+    """
+    results = []
+    temporary = workdir is None
+    workdir = Path(tempfile.mkdtemp(prefix="copyway-bench-") if temporary else workdir)
+    try:
+        with ExitStack() as stack:
+            servers = {}
+            for protocol in protocols:
+                try:
+                    servers[protocol] = _start_server(protocol, workdir, stack)
+                except ImportError as e:
+                    logger.warning(f"Benchmark {protocol} omitido: {e}")
+                    servers[protocol] = e
+
+            for profile in profiles:
+                src = workdir / "src" / profile
+                files, nbytes = make_tree(src, profile, scale)
+                for protocol in protocols:
+                    if isinstance(servers[protocol], ImportError):
+                        scenarios = [("copy", servers[protocol])]
+                    else:
+                        scenarios = _scenarios(
+                            protocol, servers[protocol], src, workdir, profile
+                        )
+                    for direction, run in scenarios:
+                        result = {
+                            "protocol": protocol,
+                            "direction": direction,
+                            "profile": profile,
+                            "workers": workers,
+                            **measure(run, files, nbytes, workers),
+                        }
+                        results.append(result)
+                        if on_result:
+                            on_result(result)
+            connection_pool.close_all()
+    finally:
+        if temporary:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def measure(run, files, nbytes, workers=1):
+    """Mide una copia.
+
+    Args:
+        run (callable | Exception): Recibe ``state`` y ``workers`` y hace la
+            copia; una excepción se informa como error sin ejecutar nada
+        files (int): Archivos que debería copiar
+        nbytes (int): Bytes que debería copiar
+        workers (int): Opción ``workers`` de la copia
+
+    Returns:
+        dict: ``files``, ``bytes``, ``seconds``, ``mb_per_s``,
+            ``files_per_s``, ``latency_ms`` (p50, p99, max), ``peak_rss_mb``
+            y ``error`` (None si la copia terminó completa; con error solo
+            se informa ``seconds``)
+    """
+    result = {"files": files, "bytes": nbytes, "error": None}
+    if isinstance(run, Exception):
+        return {**result, "error": str(run)}
+
+    recorder = FileRecorder()
+    gc.collect()
+    _reset_peak_rss()
+    started = time.perf_counter()
+    try:
+        run(recorder, workers)
+    except Exception as e:
+        result["error"] = str(e)
+    seconds = time.perf_counter() - started
+    if result["error"] is None and len(recorder.latencies) != files:
+        result["error"] = f"Se copiaron {len(recorder.latencies)} de {files} archivos"
+
+    latencies = sorted(recorder.latencies)
+    rss = peak_rss()
+    result.update(seconds=round(seconds, 4))
+    if result["error"] is not None:
+        return result
+    result.update(
+        mb_per_s=round(nbytes / seconds / 1024**2, 2),
+        files_per_s=round(files / seconds, 1),
+        latency_ms={
+            "p50": _ms(percentile(latencies, 50)),
+            "p99": _ms(percentile(latencies, 99)),
+            "max": _ms(latencies[-1] if latencies else None),
+        },
+        peak_rss_mb=round(rss / 1024**2, 1) if rss else None,
+    )
+    return result
+
+
+def measure_startup(runs=DEFAULT_STARTUP_RUNS, workdir=None):
+    """Mide el arranque de la CLI: ``copyway -p local --dry-run`` en un proceso nuevo.
+
+    Es el costo que pagan los cron que invocan CopyWay miles de veces al
+    día: intérprete, imports, configuración y validación. Se informa el
+    mínimo de ``runs`` ejecuciones (el menos afectado por el ruido) como
+    ``startup_ms``.
+
+    Args:
+        runs (int): Ejecuciones a medir
+        workdir (str, optional): Directorio para el archivo de prueba
+
+    Returns:
+        dict: Resultado con ``startup_ms`` y ``latency_ms`` (p50, p99, max),
+            o ``error`` si la CLI falló
+    """
+    result = {
+        "protocol": "cli",
+        "direction": "startup",
+        "profile": "local",
+        "workers": 1,
+        "runs": runs,
+        "error": None,
+    }
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        source = os.path.join(tmp, "origen")
+        with open(source, "wb"):
+            pass
+        cmd = [
+            sys.executable,
+            "-m",
+            "copyway",
+            "-p",
+            "local",
+            "--dry-run",
+            "--no-progress",
+            source,
+            os.path.join(tmp, "destino"),
+        ]
+        times = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            proc = subprocess.run(cmd, capture_output=True, text=True)
+            times.append(time.perf_counter() - started)
+            if proc.returncode != 0:
+                return {**result, "error": proc.stderr.strip() or proc.stdout.strip()}
+    times.sort()
+    result.update(
+        startup_ms=_ms(times[0]),
+        latency_ms={
+            "p50": _ms(percentile(times, 50)),
+            "p99": _ms(percentile(times, 99)),
+            "max": _ms(times[-1]),
+        },
+    )
+    return result
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Compara resultados con los de una corrida anterior.
+
+    Args:
+        results (list): Resultados actuales
+        baseline (list): Resultados de referencia (mismo formato)
+        tolerance (float): Caída relativa admitida (0.10 = 10 %)
+
+    Returns:
+        list: Mensajes de las métricas que empeoraron más que ``tolerance``
+    """
+    previous = {_scenario_key(r): r for r in baseline if not r.get("error")}
+    regressions = []
+    for result in results:
+        before = previous.get(_scenario_key(result))
+        if before is None or result.get("error"):
+            continue
+        for metric in THROUGHPUT_METRICS:
+            old, new = before.get(metric), result.get(metric)
+            if old and new is not None and new < old * (1 - tolerance):
+                regressions.append(_regression(result, metric, new, "<", old))
+        for metric in LATENCY_METRICS:
+            old, new = before.get(metric), result.get(metric)
+            if old and new is not None and new > old * (1 + tolerance):
+                regressions.append(_regression(result, metric, new, ">", old))
+    return regressions
+
+
+def _regression(result, metric, new, op, old):
+    return (
+        f"{'/'.join(map(str, _scenario_key(result)))}: {metric} "
+        f"{new} {op} {old} ({(new - old) / old:+.0%})"
+    )
+
+
+def environment():
+    """Datos del entorno para acompañar los resultados."""
+    return {
+        "copyway": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def percentile(values, pct):
+    """Percentil ``pct`` (rango más cercano) de una lista ordenada."""
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, math.ceil(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+def peak_rss():
+    """Pico de memoria residente del proceso en bytes, o None.
+
+    En Linux se lee ``VmHWM``, que ``_reset_peak_rss`` puede reiniciar entre
+    escenarios; en otros sistemas es el pico desde que arrancó el proceso.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS informa bytes; Linux y los BSD, KiB
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def _scenario_key(result):
+    return (
+        result.get("protocol"),
+        result.get("direction"),
+        result.get("profile"),
+        result.get("workers"),
+    )
+
+
+def _start_server(protocol, workdir, stack):
+    """Inicia el servidor de un protocolo remoto.
+
+    Raises:
+        ImportError: Si falta la dependencia del protocolo
+    """
+    root = workdir / protocol
+    root.mkdir(parents=True, exist_ok=True)
+    if protocol == "sftp":
+        from .sftp_server import SFTPBenchServer
+
+        return stack.enter_context(SFTPBenchServer(root))
+    if protocol == "hdfs":
+        from .webhdfs_server import WebHDFSBenchServer
+
+        return stack.enter_context(WebHDFSBenchServer(root))
+    return None
+
+
+def _scenarios(protocol, server, src, workdir, profile):
+    """Copias a medir de un protocolo: lista de (sentido, función)."""
+    local_copy = workdir / "dst" / f"{protocol}-{profile}"
+
+    def fresh(path):
+        shutil.rmtree(path, ignore_errors=True)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return str(path)
+
+    if protocol == "local":
+        instance = ProtocolFactory.create("local", {})
+
+        def copy(state, workers):
+            instance.copy(
+                str(src),
+                fresh(local_copy),
+                progress=False,
+                state=state,
+                workers=workers,
+            )
+
+        return [("copy", copy)]
+
+    if protocol == "sftp":
+        instance = ProtocolFactory.create(
+            "sftp", {"port": server.port, "password": BENCH_USER}
+        )
+        remote = f"{BENCH_USER}@127.0.0.1:/{profile}"
+        options = {"progress": False, "retries": 0}
+    else:
+        instance = ProtocolFactory.create(
+            "hdfs", {"backend": "webhdfs", "url": server.url, "overwrite": True}
+        )
+        remote = f"/copyway-bench-{profile}"
+        options = {"progress": False, "retries": 0}
+    remote_copy = Path(server.root) / remote.rsplit(":", 1)[-1].lstrip("/")
+
+    def upload(state, workers):
+        fresh(remote_copy)
+        instance.copy(str(src), remote, state=state, workers=workers, **options)
+
+    def download(state, workers):
+        # Un destino local existente: HDFS toma las rutas absolutas
+        # inexistentes como remotas
+        fresh(local_copy)
+        local_copy.mkdir()
+        instance.copy(remote, str(local_copy), state=state, workers=workers, **options)
+
+    return [("upload", upload), ("download", download)]
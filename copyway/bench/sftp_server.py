@@ -0,0 +1,178 @@
+"""Servidor SFTP en el mismo proceso para los benchmarks.
+
+Atiende conexiones paramiko en 127.0.0.1 sobre un directorio local: la
+copia SFTP recorre el mismo camino que contra un servidor real (pool de
+conexiones, canales, pipelining, renombres) sin depender de sshd. Acepta
+cualquier usuario y password.
+"""
+
+import os
+import socket
+import threading
+import paramiko
+from paramiko import SFTPAttributes, SFTPHandle, SFTPServer, SFTPServerInterface
+
+
+class SFTPBenchServer:
+    """Servidor SFTP sobre ``root`` escuchando en un puerto libre.
+
+    Attributes:
+        root (str): Directorio que se expone como "/"
+        port (int): Puerto TCP en 127.0.0.1
+
+    Example:
+        >>> with SFTPBenchServer("/tmp/remoto") as server:
+        ...     SFTPProtocol().copy(
+        ...         "/datos", "bench@127.0.0.1:/", port=server.port, password="x"
+        ...     )
+    """
+
+    def __init__(self, root):
+        """Inicia el servidor.
+
+        Args:
+            root (str | Path): Directorio que se expone como "/"
+        """
+        self.root = os.fspath(root)
+        self._key = paramiko.RSAKey.generate(2048)
+        self._transports = []
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen(16)
+        self.port = self._sock.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def close(self):
+        """Deja de aceptar conexiones y cierra las abiertas."""
+        self._sock.close()
+        for transport in self._transports:
+            transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _serve(self):
+        while True:
+            try:
+                sock, _ = self._sock.accept()
+            except OSError:
+                return
+            # Sin Nagle: las respuestas chicas no esperan el ACK retrasado
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            transport = paramiko.Transport(sock)
+            transport.add_server_key(self._key)
+            transport.set_subsystem_handler("sftp", SFTPServer, _FolderSFTP, self.root)
+            self._transports.append(transport)
+            try:
+                transport.start_server(server=_AcceptAll())
+            except (paramiko.SSHException, EOFError):
+                transport.close()
+
+
+class _AcceptAll(paramiko.ServerInterface):
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+
+class _Handle(SFTPHandle):
+    def stat(self):
+        try:
+            return SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def chattr(self, attr):
+        try:
+            SFTPServer.set_file_attr(self.filename, attr)
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+
+class _FolderSFTP(SFTPServerInterface):
+    """Operaciones SFTP sobre un directorio local."""
+
+    def __init__(self, server, root, *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self.root = root
+
+    def _local(self, path):
+        return os.path.join(self.root, self.canonicalize(path).lstrip("/"))
+
+    def list_folder(self, path):
+        local = self._local(path)
+        try:
+            entries = []
+            for name in os.listdir(local):
+                attr = SFTPAttributes.from_stat(os.lstat(os.path.join(local, name)))
+                attr.filename = name
+                entries.append(attr)
+            return entries
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def stat(self, path):
+        try:
+            return SFTPAttributes.from_stat(os.stat(self._local(path)))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def lstat(self, path):
+        try:
+            return SFTPAttributes.from_stat(os.lstat(self._local(path)))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def open(self, path, flags, attr):
+        local = self._local(path)
+        mode = getattr(attr, "st_mode", None)
+        try:
+            fd = os.open(local, flags, 0o666 if mode is None else mode)
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        if flags & os.O_WRONLY:
+            fmode = "ab" if flags & os.O_APPEND else "wb"
+        elif flags & os.O_RDWR:
+            fmode = "a+b" if flags & os.O_APPEND else "r+b"
+        else:
+            fmode = "rb"
+        handle = _Handle(flags)
+        handle.filename = local
+        handle.readfile = handle.writefile = os.fdopen(fd, fmode)
+        return handle
+
+    def remove(self, path):
+        return self._call(os.remove, self._local(path))
+
+    def rename(self, oldpath, newpath):
+        return self._call(os.rename, self._local(oldpath), self._local(newpath))
+
+    def posix_rename(self, oldpath, newpath):
+        return self._call(os.replace, self._local(oldpath), self._local(newpath))
+
+    def mkdir(self, path, attr):
+        return self._call(os.mkdir, self._local(path))
+
+    def rmdir(self, path):
+        return self._call(os.rmdir, self._local(path))
+
+    def chattr(self, path, attr):
+        return self._call(SFTPServer.set_file_attr, self._local(path), attr)
+
+    def _call(self, func, *args):
+        try:
+            func(*args)
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
@@ -0,0 +1,83 @@
+"""Árboles sintéticos para los benchmarks.
+
+Cada perfil es una lista de grupos (cantidad de archivos, tamaño en bytes).
+Los archivos se reparten en subdirectorios de hasta ``FILES_PER_DIR``
+archivos y su contenido es pseudoaleatorio, para que ni el disco ni la
+compresión lo reduzcan.
+"""
+
+import os
+from pathlib import Path
+
+KIB = 1024
+MIB = 1024 * KIB
+
+PROFILES = {
+    # Pocos archivos grandes: mide el caudal
+    "large": [(4, 64 * MIB)],
+    # Muchos archivos chicos: mide el costo por archivo
+    "small": [(5000, 4 * KIB)],
+    "mixed": [(2000, 2 * KIB), (200, 256 * KIB), (4, 16 * MIB)],
+}
+FILES_PER_DIR = 100
+# Mtime fijo: los árboles se pueden comparar entre corridas
+TREE_MTIME = 1_700_000_000
+
+
+def profile_files(profile, scale=1.0):
+    """Tamaños de los archivos de un perfil.
+
+    Args:
+        profile (str | list): Nombre en ``PROFILES`` o lista de grupos
+            (cantidad, tamaño)
+        scale (float): Factor sobre la cantidad de archivos de cada grupo
+            (al menos uno por grupo)
+
+    Returns:
+        list: Tamaño de cada archivo en bytes
+
+    Raises:
+        KeyError: Si el perfil no existe
+    """
+    groups = PROFILES[profile] if isinstance(profile, str) else profile
+    sizes = []
+    for count, size in groups:
+        sizes.extend([size] * max(1, round(count * scale)))
+    return sizes
+
+
+def make_tree(root, profile, scale=1.0):
+    """Genera el árbol de un perfil en ``root``.
+
+    Si ``root`` ya tiene un árbol con los mismos archivos se reutiliza.
+
+    Args:
+        root (str | Path): Directorio a crear
+        profile (str | list): Perfil (ver ``profile_files``)
+        scale (float): Factor sobre la cantidad de archivos
+
+    Returns:
+        tuple: (cantidad de archivos, bytes totales)
+    """
+    root = Path(root)
+    sizes = profile_files(profile, scale)
+    block = os.urandom(MIB)
+    for i, size in enumerate(sizes):
+        path = root / f"d{i // FILES_PER_DIR:04d}" / f"f{i:06d}.bin"
+        try:
+            if path.stat().st_size == size:
+                continue
+        except FileNotFoundError:
+            path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            remaining = size
+            # Empezar en otra posición del bloque en cada archivo evita que
+            # dos archivos tengan el mismo contenido
+            pos = (i * 4099) % len(block)
+            while remaining:
+                chunk = block[pos : pos + remaining]
+                f.write(chunk)
+                remaining -= len(chunk)
+                pos = 0
+        os.utime(path, (TREE_MTIME, TREE_MTIME))
+    return len(sizes), sum(sizes)
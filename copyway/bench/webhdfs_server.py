@@ -0,0 +1,171 @@
+"""NameNode/DataNode WebHDFS mínimo en el mismo proceso para los benchmarks.
+
+Implementa las operaciones que usa ``WebHDFSClient`` (CREATE y OPEN con la
+redirección al DataNode, MKDIRS, GETFILESTATUS, LISTSTATUS, SETREPLICATION y
+SETPERMISSION) sobre un directorio local, leyendo y escribiendo los datos en
+bloques.
+"""
+
+import json
+import os
+import shutil
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+BUFFER_SIZE = 1024 * 1024
+
+
+class WebHDFSBenchServer:
+    """Servidor WebHDFS sobre ``root`` escuchando en un puerto libre.
+
+    Attributes:
+        root (str): Directorio que se expone como "/"
+        url (str): URL base para ``backend: webhdfs``
+
+    Example:
+        >>> with WebHDFSBenchServer("/tmp/hdfs") as server:
+        ...     HDFSProtocol({"backend": "webhdfs", "url": server.url})
+    """
+
+    def __init__(self, root):
+        """Inicia el servidor.
+
+        Args:
+            root (str | Path): Directorio que se expone como "/"
+        """
+        self.root = os.fspath(root)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.root = self.root
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            daemon=True,
+        ).start()
+
+    def close(self):
+        """Detiene el servidor."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Encabezados y cuerpo van en escrituras separadas: con Nagle cada
+    # respuesta esperaría el ACK retrasado del cliente
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_PUT(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        parts = urlsplit(self.path)
+        params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        op = params.get("op")
+        datanode = parts.path.startswith("/datanode")
+        hdfs_path = parts.path.split("/v1", 1)[1] or "/"
+        local = os.path.join(self.server.root, hdfs_path.lstrip("/"))
+
+        if op in ("CREATE", "OPEN") and not datanode:
+            if op == "CREATE" and os.path.exists(local):
+                if params.get("overwrite") != "true":
+                    return self._error(403, "FileAlreadyExistsException", hdfs_path)
+            if op == "OPEN" and not os.path.isfile(local):
+                return self._error(404, "FileNotFoundException", hdfs_path)
+            port = self.server.server_address[1]
+            self.send_response(307)
+            self.send_header(
+                "Location",
+                f"http://127.0.0.1:{port}/datanode/v1{hdfs_path}?{parts.query}",
+            )
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif op == "CREATE":
+            os.makedirs(os.path.dirname(local), exist_ok=True)
+            with open(local, "wb") as f:
+                self._receive(f)
+            self._reply(201, b"")
+        elif op == "OPEN":
+            self._send_file(local)
+        elif op == "MKDIRS":
+            os.makedirs(local, exist_ok=True)
+            self._json({"boolean": True})
+        elif not os.path.exists(local):
+            self._error(404, "FileNotFoundException", hdfs_path)
+        elif op == "GETFILESTATUS":
+            self._json({"FileStatus": _status(local, "")})
+        elif op == "LISTSTATUS":
+            entries = [
+                _status(os.path.join(local, name), name)
+                for name in sorted(os.listdir(local))
+            ]
+            self._json({"FileStatuses": {"FileStatus": entries}})
+        elif op in ("SETREPLICATION", "SETPERMISSION"):
+            self._json({"boolean": True})
+        else:
+            self._error(400, "IllegalArgumentException", f"Invalid op: {op}")
+
+    def _receive(self, f):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if not size:
+                    self.rfile.readline()
+                    return
+                f.write(self.rfile.read(size))
+                self.rfile.readline()
+        remaining = int(self.headers.get("Content-Length", 0))
+        while remaining:
+            data = self.rfile.read(min(remaining, BUFFER_SIZE))
+            if not data:
+                return
+            f.write(data)
+            remaining -= len(data)
+
+    def _send_file(self, local):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(os.path.getsize(local)))
+        self.end_headers()
+        with open(local, "rb") as f:
+            shutil.copyfileobj(f, self.wfile, BUFFER_SIZE)
+
+    def _json(self, data):
+        self._reply(200, json.dumps(data).encode(), "application/json")
+
+    def _error(self, code, exception, message):
+        body = {"RemoteException": {"exception": exception, "message": message}}
+        self._reply(code, json.dumps(body).encode(), "application/json")
+
+    def _reply(self, code, body, content_type=None):
+        self.send_response(code)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _status(path, suffix):
+    st = os.stat(path)
+    is_dir = os.path.isdir(path)
+    return {
+        "pathSuffix": suffix,
+        "type": "DIRECTORY" if is_dir else "FILE",
+        "length": 0 if is_dir else st.st_size,
+        "modificationTime": int(st.st_mtime * 1000),
+    }
@@ -5,19 +5,102 @@ opciones y orquestando la ejecución de protocolos de copia.
 """
 
 import click
+import json
 import logging
+import os
+import signal
+import sys
+import threading
+import time
+from click.core import ParameterSource
+from .batch import DEFAULT_CONCURRENCY, BatchRunner, load_manifest, validate_job
+from .bench import (
+    PROFILES,
+    PROTOCOLS,
+    compare,
+    environment,
+    measure_startup,
+    run_benchmarks,
+)
+from .bench.runner import DEFAULT_STARTUP_RUNS, DEFAULT_TOLERANCE
 from .protocols import ProtocolFactory
 from .config import Config
+from .daemon import (
+    DEFAULT_QUEUE_SIZE,
+    DEFAULT_WORKERS,
+    FINISHED,
+    CopyDaemon,
+    DaemonClient,
+    job_route,
+)
 from .exceptions import CopyWayError
+from .utils.compression import CODECS
+from .utils.integrity import VERIFY_MODES
 from .utils.logger import logger, setup_logger
+from .utils.metrics import MetricsReporter, build_record
+from .utils.progress import format_size, format_speed
+from .utils.throttle import Throttle, install_reload_signal, parse_rate
+
+
+class DefaultGroup(click.Group):
+    """Grupo de comandos que ejecuta ``copy`` si no se indica un subcomando.
+
+    Mantiene la sintaxis original ``copyway -p local origen destino`` junto
+    a subcomandos como ``copyway batch jobs.yaml``.
+    """
+
+    default_command = "copy"
+
+    def parse_args(self, ctx, args):
+        if not args or args[0] not in self.commands:
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
+
+
+class ProtocolChoice(click.ParamType):
+    """Tipo de ``-p`` con los protocolos del registro, resueltos al usarse.
+
+    Listar los entry points instalados cuesta decenas de milisegundos: solo
+    se hace para la ayuda, el autocompletado o ante un nombre que no es un
+    protocolo incluido.
+    """
+
+    name = "choice"
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, str) and ProtocolFactory.is_registered(value):
+            return value
+        choice = click.Choice(ProtocolFactory.list_protocols())
+        return choice.convert(value, param, ctx)
 
+    def get_metavar(self, param, ctx=None):
+        return f"[{'|'.join(ProtocolFactory.list_protocols())}]"
 
-@click.command()
+    def shell_complete(self, ctx, param, incomplete):
+        from click.shell_completion import CompletionItem
+
+        return [
+            CompletionItem(name)
+            for name in ProtocolFactory.list_protocols()
+            if name.startswith(incomplete)
+        ]
+
+    def to_info_dict(self):
+        info = super().to_info_dict()
+        info["choices"] = list(ProtocolFactory.list_protocols())
+        return info
+
+
+@click.group(cls=DefaultGroup)
+def main():
+    """CopyWay: copiar archivos/directorios usando diferentes protocolos."""
+
+
+@main.command("copy")
 @click.option(
     "-p",
     "--protocol",
-    type=click.Choice(ProtocolFactory.list_protocols()),
-    required=True,
+    type=ProtocolChoice(),
     help="Protocolo de copia",
 )
 @click.option("--config", type=click.Path(exists=True), help="Archivo de configuración")
@@ -29,7 +112,18 @@ from .utils.logger import logger, setup_logger
 @click.option(
     "--key-file", type=click.Path(exists=True), help="Archivo de clave privada SSH/SFTP"
 )
-@click.option("--compress", is_flag=True, help="Comprimir transferencia SSH")
+@click.option("--compress", is_flag=True, help="Comprimir transferencia (SSH, SFTP)")
+@click.option(
+    "--compression",
+    type=click.Choice(("ssh",) + CODECS),
+    help="Compresión SFTP: del transporte SSH o en streaming con un codec",
+)
+@click.option(
+    "--bundle",
+    is_flag=True,
+    default=None,
+    help="Transferir directorios como un stream tar (SSH, SFTP)",
+)
 @click.option("--replication", type=int, help="Factor de replicación HDFS")
 @click.option("--overwrite", is_flag=True, help="Sobrescribir archivos existentes")
 @click.option("--permission", help="Permisos HDFS (ej: 755)")
@@ -37,10 +131,88 @@ from .utils.logger import logger, setup_logger
     "--preserve-metadata", is_flag=True, default=True, help="Preservar metadata (local)"
 )
 @click.option("--follow-symlinks", is_flag=True, help="Seguir symlinks (local)")
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    help="Archivos transferidos en paralelo (local, SFTP, HDFS)",
+)
+@click.option("--sync", is_flag=True, help="Copiar solo archivos nuevos o modificados")
+@click.option("--checksum", is_flag=True, help="Comparar por checksum en modo --sync")
 @click.option("--progress/--no-progress", default=True, help="Mostrar progreso")
-@click.argument("source")
-@click.argument("destination")
-def main(protocol, source, destination, config, dry_run, verbose, progress, **options):
+@click.option(
+    "--stall-timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    metavar="SEGUNDOS",
+    help="Abortar si la transferencia no avanza en N segundos (SSH, HDFS)",
+)
+@click.option(
+    "--verify",
+    type=click.Choice(VERIFY_MODES),
+    help="Verificar cada archivo copiado por tamaño o checksum (local, SFTP, HDFS)",
+)
+@click.option(
+    "--retries",
+    type=click.IntRange(min=0),
+    help="Reintentos por archivo ante errores transitorios (default: 2)",
+)
+@click.option(
+    "--bwlimit",
+    metavar="RATE",
+    callback=lambda ctx, param, value: _check_rate(value),
+    help="Límite de ancho de banda por segundo (ej: 500K, 10M)",
+)
+@click.option(
+    "--bwlimit-file",
+    type=click.Path(dir_okay=False),
+    help="Archivo con el límite de ancho de banda, releído durante la copia",
+)
+@click.option(
+    "--metrics",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Agregar las métricas de la copia (fases, bytes, errores) como línea JSON",
+)
+@click.option(
+    "--daemon",
+    "use_daemon",
+    is_flag=True,
+    envvar="COPYWAY_DAEMON",
+    help="Enviar la copia a `copyway serve` en lugar de ejecutarla",
+)
+@click.option(
+    "--socket",
+    "socket_file",
+    type=click.Path(dir_okay=False),
+    help="Socket del daemon (default: $COPYWAY_SOCKET o ~/.copyway.sock)",
+)
+@click.option(
+    "--detach",
+    is_flag=True,
+    help="Con --daemon, no esperar: mostrar el id del trabajo y salir",
+)
+@click.option(
+    "--track", is_flag=True, help="Registrar estado del trabajo para poder reanudarlo"
+)
+@click.option(
+    "--resume", "resume_job", metavar="JOB_ID", help="Reanudar un trabajo interrumpido"
+)
+@click.argument("source", required=False)
+@click.argument("destinations", nargs=-1)
+def copy_command(
+    protocol,
+    source,
+    destinations,
+    config,
+    dry_run,
+    verbose,
+    progress,
+    metrics,
+    use_daemon,
+    socket_file,
+    detach,
+    track,
+    resume_job,
+    **options,
+):
     """Copiar archivos/directorios usando diferentes protocolos.
 
     CopyWay soporta múltiples protocolos de transferencia con validación
@@ -49,17 +221,32 @@ def main(protocol, source, destination, config, dry_run, verbose, progress, **op
     Args:
         protocol (str): Protocolo a usar (local, ssh, sftp, hdfs)
         source (str): Ruta de origen
-        destination (str): Ruta de destino
+        destinations (tuple): Rutas de destino; con más de una el origen se
+            lee una sola vez y se escribe en todas (ver ``copyway.fanout``)
         config (str): Ruta a archivo de configuración YAML
         dry_run (bool): Si True, simula sin ejecutar
         verbose (bool): Si True, activa logging detallado
         progress (bool): Si True, muestra barra de progreso
+        metrics (str): Archivo JSON lines donde agregar las métricas
+        use_daemon (bool): Si True, envía la copia a ``copyway serve``
+        socket_file (str): Socket del daemon
+        detach (bool): Si True, no espera a que el daemon termine la copia
+        track (bool): Si True, registra el estado de cada archivo
+        resume_job (str): Id de un trabajo registrado a reanudar
         **options: Opciones específicas del protocolo
 
     Examples:
         $ copyway -p local /origen /destino
+        $ copyway -p local --workers 8 /origen /destino
         $ copyway -p sftp --password secret archivo.txt user@host:/ruta/
         $ copyway -p ssh --dry-run archivo.txt user@host:/ruta/
+        $ copyway -p sftp --sync /datos user@host:/backup/
+        $ copyway -p sftp release.tar u@edge01:/srv/ u@edge02:/srv/ /mnt/nfs/
+        $ copyway -p local --track /origen /destino
+        $ copyway -p sftp --metrics /var/log/copyway.jsonl /datos user@host:/bk/
+        $ copyway --resume 3f2a9c1d0b7e
+        $ copyway --daemon -p sftp /datos/a.csv user@host:/ruta/
+        $ copyway batch jobs.yaml
 
     Raises:
         click.Abort: Si ocurre algún error durante la ejecución
@@ -68,24 +255,79 @@ def main(protocol, source, destination, config, dry_run, verbose, progress, **op
     if verbose:
         setup_logger(level=logging.DEBUG)
 
+    destination = destinations[0] if len(destinations) == 1 else None
+    if not resume_job:
+        if not protocol:
+            raise click.UsageError("Falta la opción '-p' / '--protocol'")
+        if not source or not destinations:
+            raise click.UsageError("Debe indicar SOURCE y DESTINATION")
+    if len(destinations) > 1 and (track or resume_job):
+        raise click.UsageError(
+            "--track y --resume no se pueden usar con varios destinos"
+        )
+
+    if use_daemon and not dry_run:
+        if track or resume_job:
+            raise click.UsageError("--track y --resume no se pueden usar con --daemon")
+        job = {k: v for k, v in options.items() if v is not None}
+        job.update(protocol=protocol, source=_daemon_path(protocol, source))
+        if destination is None:
+            job["destinations"] = [_daemon_path(protocol, d) for d in destinations]
+        else:
+            job["destination"] = _daemon_path(protocol, destination)
+        _forward_to_daemon(job, socket_file, detach)
+        return
+
+    if len(destinations) > 1:
+        _run_fanout(
+            protocol, source, destinations, config, dry_run, progress, metrics, options
+        )
+        return
+
+    state = None
+    protocol_instance = None
+    reporter = None
+    started = time.perf_counter()
     try:
         cfg = Config(config)
-        protocol_config = cfg.get_protocol_config(protocol)
-
-        protocol_instance = ProtocolFactory.create(protocol, protocol_config)
+        reporter = MetricsReporter.from_config(cfg.get("metrics"), jsonl=metrics)
 
         # Filtrar opciones None
         filtered_options = {k: v for k, v in options.items() if v is not None}
 
+        if resume_job:
+            from .utils.state import JobState
+
+            state = JobState(cfg.get_state_db(), resume_job)
+            protocol = protocol or state.protocol
+            source = source or state.source
+            destination = destination or state.destination
+            # Las opciones guardadas se respetan salvo las pasadas explícitamente
+            ctx = click.get_current_context()
+            explicit = {
+                k: v
+                for k, v in filtered_options.items()
+                if ctx.get_parameter_source(k) == ParameterSource.COMMANDLINE
+            }
+            filtered_options = {**state.options, **explicit}
+            click.echo(f"Reanudando trabajo {state.job_id}: {source} -> {destination}")
+
+        protocol_config = cfg.get_protocol_config(protocol)
+
+        protocol_instance = ProtocolFactory.create(protocol, protocol_config)
+        protocol_instance.metrics.add_phase("config", time.perf_counter() - started)
+
         # Validar siempre (incluso en dry-run)
-        if protocol == "local":
-            if progress and not dry_run:
+        with protocol_instance.metrics.phase("validate"):
+            if protocol == "local" and progress and not dry_run:
                 with click.progressbar(length=1, label="Validando") as bar:
-                    protocol_instance.validate(source, destination)
+                    validate_job(protocol, protocol_instance, source, destination, {})
                     bar.update(1)
-            else:
+            elif protocol in ("local", "sftp", "asftp"):
                 click.echo("Validando...")
-                protocol_instance.validate(source, destination)
+                validate_job(
+                    protocol, protocol_instance, source, destination, filtered_options
+                )
                 click.secho("✓ Validación exitosa", fg="green")
 
         if dry_run:
@@ -97,23 +339,635 @@ def main(protocol, source, destination, config, dry_run, verbose, progress, **op
                 click.echo(f"  Opciones: {filtered_options}")
             click.secho("\n✓ Dry-run completado. No se copiaron archivos.", fg="yellow")
             return
+
+        if state is None and (track or cfg.get("track_jobs", False)):
+            from .utils.state import JobState
+
+            state = JobState.create(
+                cfg.get_state_db(), protocol, source, destination, filtered_options
+            )
+            click.echo(f"Trabajo registrado: {state.job_id}")
+
+        copy_options = dict(filtered_options)
+        if state:
+            copy_options["state"] = state
+        install_reload_signal()
+
         # Ejecutar copia con progress
         if progress and protocol == "local":
             with click.progressbar(length=1, label="Copiando") as bar:
-                protocol_instance.copy(source, destination, **filtered_options)
+                protocol_instance.copy(source, destination, **copy_options)
                 bar.update(1)
         else:
-            protocol_instance.copy(source, destination, **filtered_options)
+            protocol_instance.copy(source, destination, **copy_options)
 
+        if state:
+            state.finish("completed")
         click.secho(f"✓ Copia completada: {source} -> {destination}", fg="green")
+        _echo_retries(protocol_instance)
+        _report_metrics(
+            reporter, protocol_instance, protocol, source, destination, started, state
+        )
 
     except CopyWayError as e:
+        _fail_job(state)
+        _echo_retries(protocol_instance)
+        _report_metrics(
+            reporter,
+            protocol_instance,
+            protocol,
+            source,
+            destination,
+            started,
+            state,
+            failed=True,
+        )
         click.secho(f"✗ Error: {e}", fg="red", err=True)
         raise click.Abort()
     except Exception as e:
+        _fail_job(state)
+        _echo_retries(protocol_instance)
+        _report_metrics(
+            reporter,
+            protocol_instance,
+            protocol,
+            source,
+            destination,
+            started,
+            state,
+            failed=True,
+        )
         logger.exception("Error inesperado")
         click.secho(f"✗ Error inesperado: {e}", fg="red", err=True)
         raise click.Abort()
+    except KeyboardInterrupt:
+        # Ctrl-C: el trabajo queda reanudable, no "running"
+        _fail_job(state)
+        raise
+
+
+@main.command("batch")
+@click.argument("manifest", type=click.Path(exists=True, allow_dash=True))
+@click.option("--config", type=click.Path(exists=True), help="Archivo de configuración")
+@click.option(
+    "--concurrency",
+    "-j",
+    type=click.IntRange(min=1),
+    help=f"Trabajos en paralelo (default: {DEFAULT_CONCURRENCY})",
+)
+@click.option(
+    "--report",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Escribir el resultado de cada trabajo en JSONL",
+)
+@click.option(
+    "--bwlimit",
+    metavar="RATE",
+    callback=lambda ctx, param, value: _check_rate(value),
+    help="Límite de ancho de banda total de todos los trabajos (ej: 50M)",
+)
+@click.option(
+    "--bwlimit-file",
+    type=click.Path(dir_okay=False),
+    help="Archivo con el límite total, releído durante el batch",
+)
+@click.option(
+    "--metrics",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Agregar las métricas de cada trabajo y del total como líneas JSON",
+)
+@click.option("--dry-run", is_flag=True, help="Validar los trabajos sin copiar")
+@click.option("--verbose", "-v", is_flag=True, help="Modo verbose")
+def batch(
+    manifest,
+    config,
+    concurrency,
+    report,
+    bwlimit,
+    bwlimit_file,
+    metrics,
+    dry_run,
+    verbose,
+):
+    """Ejecutar los trabajos de copia de un manifiesto en un solo proceso.
+
+    MANIFEST es un archivo YAML (lista de trabajos, o ``jobs`` + ``defaults``)
+    o JSONL con un trabajo por línea; con "-" se lee JSONL de la entrada
+    estándar. Cada trabajo indica ``protocol``, ``source``, ``destination`` y
+    opcionalmente las mismas opciones que la CLI (``port``, ``workers``,
+    ``sync``...). Las conexiones SSH se reutilizan entre trabajos y
+    ``--bwlimit`` reparte un único límite de ancho de banda entre todos.
+
+    Examples:
+        $ copyway batch jobs.yaml
+        $ copyway batch -j 16 --report resultado.jsonl jobs.jsonl
+        $ copyway batch --bwlimit 50M jobs.yaml
+        $ copyway batch --metrics /var/log/copyway.jsonl jobs.yaml
+        $ generar-trabajos | copyway batch -
+
+    Raises:
+        click.Abort: Si el manifiesto es inválido
+        SystemExit: Con código 1 si algún trabajo falló
+    """
+    if verbose:
+        setup_logger(level=logging.DEBUG)
+
+    report_file = None
+    try:
+        cfg = Config(config)
+        jobs = load_manifest(sys.stdin if manifest == "-" else manifest)
+        concurrency = concurrency or cfg.get("batch_concurrency", DEFAULT_CONCURRENCY)
+        report_file = open(report, "w", encoding="utf-8") if report else None
+
+        def on_result(result):
+            _echo_result(result)
+            if report_file:
+                report_file.write(json.dumps(result) + "\n")
+
+        throttle = Throttle.from_config(
+            {
+                "bwlimit": cfg.get("batch_bwlimit"),
+                "bwlimit_file": cfg.get("batch_bwlimit_file"),
+            },
+            {
+                k: v
+                for k, v in (("bwlimit", bwlimit), ("bwlimit_file", bwlimit_file))
+                if v is not None
+            },
+        )
+        install_reload_signal()
+
+        runner = BatchRunner(
+            cfg,
+            concurrency,
+            dry_run=dry_run,
+            on_result=on_result,
+            throttle=throttle,
+            reporter=MetricsReporter.from_config(cfg.get("metrics"), jsonl=metrics),
+        )
+        runner.run(jobs)
+    except CopyWayError as e:
+        click.secho(f"✗ Error: {e}", fg="red", err=True)
+        raise click.Abort()
+    finally:
+        if report_file:
+            report_file.close()
+
+    click.secho(runner.summary(), fg="red" if runner.failed else "green")
+    if runner.failed:
+        sys.exit(1)
+
+
+@main.command("serve")
+@click.option("--config", type=click.Path(exists=True), help="Archivo de configuración")
+@click.option(
+    "--socket",
+    "socket_file",
+    type=click.Path(dir_okay=False),
+    help="Socket Unix (default: $COPYWAY_SOCKET o ~/.copyway.sock)",
+)
+@click.option(
+    "--workers",
+    "-j",
+    type=click.IntRange(min=1),
+    help=f"Trabajos en paralelo (default: {DEFAULT_WORKERS})",
+)
+@click.option(
+    "--queue-size",
+    type=click.IntRange(min=1),
+    help=f"Trabajos en espera admitidos (default: {DEFAULT_QUEUE_SIZE})",
+)
+@click.option(
+    "--max-per-host",
+    type=click.IntRange(min=1),
+    help="Trabajos simultáneos por host remoto (default: sin límite)",
+)
+@click.option(
+    "--metrics",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Agregar las métricas de cada trabajo como línea JSON",
+)
+@click.option("--verbose", "-v", is_flag=True, help="Modo verbose")
+def serve(config, socket_file, workers, queue_size, max_per_host, metrics, verbose):
+    """Atender trabajos de copia por un socket Unix hasta recibir SIGTERM.
+
+    El daemon mantiene cargados la configuración, los protocolos y las
+    conexiones SSH entre trabajos, que llegan con ``copyway --daemon``. Los
+    trabajos esperan en una cola acotada; ``--max-per-host`` limita cuántos
+    copian a la vez contra un mismo host. Los valores default se toman de la
+    sección ``daemon`` de la configuración.
+
+    Examples:
+        $ copyway serve -j 8 --max-per-host 2
+        $ copyway --daemon -p sftp /datos/a.csv user@host:/ruta/
+        $ copyway status
+
+    Raises:
+        click.Abort: Si la configuración es inválida o el socket está en uso
+    """
+    if verbose:
+        setup_logger(level=logging.DEBUG)
+
+    try:
+        cfg = Config(config)
+        settings = cfg.get("daemon") or {}
+        daemon = CopyDaemon(
+            cfg,
+            path=socket_file,
+            workers=workers or settings.get("workers", DEFAULT_WORKERS),
+            queue_size=queue_size or settings.get("queue_size", DEFAULT_QUEUE_SIZE),
+            max_per_host=max_per_host or settings.get("max_per_host"),
+            reporter=MetricsReporter.from_config(cfg.get("metrics"), jsonl=metrics),
+        )
+        daemon.start()
+    except CopyWayError as e:
+        click.secho(f"✗ Error: {e}", fg="red", err=True)
+        raise click.Abort()
+
+    def stop(signum, frame):
+        # shutdown() espera al bucle del servidor: no puede correr en su hilo
+        threading.Thread(target=daemon.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    install_reload_signal()
+    click.echo(f"Escuchando en {daemon.path} ({daemon.workers} workers)")
+    daemon.serve_forever()
+    click.echo("Daemon detenido")
+
+
+@main.command("status")
+@click.argument("job_id", required=False)
+@click.option(
+    "--socket",
+    "socket_file",
+    type=click.Path(dir_okay=False),
+    help="Socket del daemon (default: $COPYWAY_SOCKET o ~/.copyway.sock)",
+)
+@click.option("--wait", is_flag=True, help="Esperar a que el trabajo termine")
+@click.option("--json", "as_json", is_flag=True, help="Mostrar el estado en JSON")
+def status(job_id, socket_file, wait, as_json):
+    """Consultar los trabajos de ``copyway serve``.
+
+    Sin JOB_ID lista los trabajos del historial del daemon.
+
+    Examples:
+        $ copyway status
+        $ copyway status --wait 3f2a9c1d0b7e
+
+    Raises:
+        click.Abort: Si no hay daemon o el trabajo no existe
+        SystemExit: Con código 1 si el trabajo consultado falló
+    """
+    client = DaemonClient(socket_file)
+    try:
+        if job_id is None:
+            jobs = client.list_jobs()
+        else:
+            jobs = [client.wait(job_id) if wait else client.status(job_id)]
+    except CopyWayError as e:
+        click.secho(f"✗ Error: {e}", fg="red", err=True)
+        raise click.Abort()
+
+    for job in jobs:
+        click.echo(json.dumps(job) if as_json else _format_job(job))
+    if job_id is not None and jobs[0]["status"] == "failed":
+        sys.exit(1)
+
+
+@main.command("bench")
+@click.option(
+    "-p",
+    "--protocol",
+    "protocols",
+    multiple=True,
+    type=click.Choice(PROTOCOLS),
+    help="Protocolo a medir (repetible; default: todos)",
+)
+@click.option(
+    "--profile",
+    "profiles",
+    multiple=True,
+    type=click.Choice(tuple(PROFILES)),
+    help="Árbol sintético (repetible; default: todos)",
+)
+@click.option(
+    "--scale",
+    type=click.FloatRange(min=0, min_open=True),
+    default=1.0,
+    show_default=True,
+    help="Factor sobre la cantidad de archivos de cada árbol",
+)
+@click.option("--workers", type=click.IntRange(min=1), default=1, show_default=True)
+@click.option(
+    "--workdir",
+    type=click.Path(file_okay=False),
+    help="Directorio de trabajo (default: uno temporal)",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Escribir el JSON en un archivo en lugar de la salida estándar",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    help="JSON de una corrida anterior contra el que comparar",
+)
+@click.option(
+    "--tolerance",
+    type=click.FloatRange(min=0, max=1),
+    default=DEFAULT_TOLERANCE,
+    show_default=True,
+    help="Empeoramiento relativo admitido respecto de --baseline",
+)
+@click.option(
+    "--startup-runs",
+    type=click.IntRange(min=0),
+    default=DEFAULT_STARTUP_RUNS,
+    show_default=True,
+    help="Ejecuciones para medir el arranque de la CLI (0 no lo mide)",
+)
+@click.option("--verbose", "-v", is_flag=True, help="Modo verbose")
+def bench(
+    protocols,
+    profiles,
+    scale,
+    workers,
+    workdir,
+    output,
+    baseline,
+    tolerance,
+    startup_runs,
+    verbose,
+):
+    """Medir el rendimiento de los protocolos con árboles sintéticos.
+
+    Copia árboles de pocos archivos grandes (large), muchos chicos (small) y
+    mixtos con cada protocolo: local en disco, SFTP contra un servidor
+    paramiko y HDFS contra un WebHDFS del mismo proceso. Reporta MB/s,
+    archivos/s, latencia por archivo (p50/p99) y pico de memoria en JSON,
+    además del tiempo de arranque de ``copyway -p local --dry-run``.
+
+    Examples:
+        $ copyway bench --scale 0.1
+        $ copyway bench -p sftp --profile small --workers 8 -o actual.json
+        $ copyway bench -o actual.json --baseline anterior.json
+
+    Raises:
+        SystemExit: Con código 1 si un escenario falló o hubo una regresión
+    """
+    setup_logger(level=logging.DEBUG if verbose else logging.WARNING)
+
+    def on_result(result):
+        click.echo(_format_bench(result), err=True)
+
+    results = []
+    if startup_runs:
+        results.append(measure_startup(startup_runs, workdir))
+        on_result(results[-1])
+    results += run_benchmarks(
+        protocols=protocols or PROTOCOLS,
+        profiles=profiles or tuple(PROFILES),
+        workdir=workdir,
+        scale=scale,
+        workers=workers,
+        on_result=on_result,
+    )
+    report = json.dumps({"environment": environment(), "results": results}, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        click.echo(report)
+
+    failed = any(r["error"] for r in results)
+    if baseline:
+        with open(baseline, encoding="utf-8") as f:
+            previous = json.load(f)
+        regressions = compare(results, previous.get("results", []), tolerance)
+        for regression in regressions:
+            click.secho(f"✗ Regresión: {regression}", fg="red", err=True)
+        failed = failed or bool(regressions)
+    if failed:
+        sys.exit(1)
+
+
+def _format_bench(result):
+    """Línea de resumen de un escenario del benchmark."""
+    name = f"{result['protocol']} {result['direction']} {result['profile']}"
+    if result["error"]:
+        return click.style(f"✗ {name}: {result['error']}", fg="red")
+    latency = result["latency_ms"]
+    if "startup_ms" in result:
+        return (
+            f"✓ {name}: {result['startup_ms']} ms "
+            f"(p50 {latency['p50']} ms en {result['runs']} ejecuciones)"
+        )
+    return (
+        f"✓ {name}: {result['mb_per_s']} MB/s, {result['files_per_s']} archivos/s, "
+        f"p50 {latency['p50']} ms, p99 {latency['p99']} ms"
+    )
+
+
+def _daemon_path(protocol, path):
+    """Ruta absoluta para el daemon, que no comparte el directorio actual."""
+    if protocol == "local" or os.path.exists(path):
+        return os.path.abspath(path)
+    return path
+
+
+def _forward_to_daemon(job, socket_file, detach):
+    """Envía una copia a ``copyway serve`` y, salvo ``detach``, espera su fin."""
+    client = DaemonClient(socket_file)
+    try:
+        record = client.submit(job)
+        if detach:
+            click.echo(f"Trabajo enviado al daemon: {record['id']}")
+            return
+        while record["status"] not in FINISHED:
+            record = client.wait(record["id"])
+    except CopyWayError as e:
+        click.secho(f"✗ Error: {e}", fg="red", err=True)
+        raise click.Abort()
+
+    result = record["result"]
+    if result["status"] == "failed":
+        click.secho(f"✗ Error: {result['error']}", fg="red", err=True)
+        raise click.Abort()
+    click.secho(
+        f"✓ Copia completada: {job_route(record)} "
+        f"({result['seconds']} s en el daemon)",
+        fg="green",
+    )
+
+
+def _format_job(job):
+    """Línea de estado de un trabajo del daemon."""
+    line = f"{job['id']} {job['status']}: {job_route(job)}"
+    result = job.get("result")
+    if result and result.get("error"):
+        line += f" ({result['error']})"
+    elif result:
+        line += f" ({result['seconds']} s)"
+    color = {"failed": "red", "completed": "green"}.get(job["status"])
+    return click.style(line, fg=color)
+
+
+def _check_rate(value):
+    """Valida un ``--bwlimit`` sin convertirlo, para guardarlo tal cual."""
+    try:
+        parse_rate(value)
+    except CopyWayError as e:
+        raise click.BadParameter(str(e))
+    return value
+
+
+def _echo_result(result):
+    """Muestra el resultado de un trabajo del batch."""
+    route = f"{result['source']} -> {result['destination']}"
+    if result["status"] == "failed":
+        click.secho(f"✗ [{result['index']}] {route}: {result['error']}", fg="red")
+    else:
+        click.secho(
+            f"✓ [{result['index']}] {route} ({result['seconds']:.1f} s)", fg="green"
+        )
+
+
+def _run_fanout(
+    protocol, source, destinations, config, dry_run, progress, metrics, options
+):
+    """Copia ``source`` a varios destinos leyéndolo una sola vez."""
+    from .fanout import FanOut, fanout_protocol
+
+    options = {k: v for k, v in options.items() if v is not None}
+    fanout = None
+    reporter = None
+    started = time.perf_counter()
+    try:
+        cfg = Config(config)
+        reporter = MetricsReporter.from_config(cfg.get("metrics"), jsonl=metrics)
+        fanout = FanOut(cfg, progress=progress)
+        click.echo("Validando...")
+        with fanout.metrics.phase("validate"):
+            fanout.validate(source, list(destinations), protocol, **options)
+        click.secho("✓ Validación exitosa", fg="green")
+
+        if dry_run:
+            click.echo("\n[DRY-RUN] Operación que se ejecutaría:")
+            click.echo(f"  Origen: {source}")
+            for destination in destinations:
+                click.echo(
+                    f"  Destino: {destination} "
+                    f"({fanout_protocol(destination, protocol)})"
+                )
+            if options:
+                click.echo(f"  Opciones: {options}")
+            click.secho("\n✓ Dry-run completado. No se copiaron archivos.", fg="yellow")
+            return
+
+        install_reload_signal()
+        results = fanout.run(source, list(destinations), protocol, **options)
+    except CopyWayError as e:
+        _report_metrics(
+            reporter,
+            fanout,
+            protocol,
+            source,
+            ", ".join(destinations),
+            started,
+            None,
+            failed=True,
+        )
+        click.secho(f"✗ Error: {e}", fg="red", err=True)
+        raise click.Abort()
+    except Exception as e:
+        _report_metrics(
+            reporter,
+            fanout,
+            protocol,
+            source,
+            ", ".join(destinations),
+            started,
+            None,
+            failed=True,
+        )
+        logger.exception("Error inesperado")
+        click.secho(f"✗ Error inesperado: {e}", fg="red", err=True)
+        raise click.Abort()
+
+    for result in results:
+        _echo_destination(result)
+    _echo_retries(fanout)
+    _report_metrics(
+        reporter,
+        fanout,
+        protocol,
+        source,
+        ", ".join(destinations),
+        started,
+        None,
+        failed=bool(fanout.failed),
+    )
+    if fanout.failed:
+        click.secho(
+            f"✗ {fanout.failed} de {len(results)} destinos fallaron", fg="red", err=True
+        )
+        raise click.Abort()
+    click.secho(f"✓ Copia completada: {source} -> {len(results)} destinos", fg="green")
+
+
+def _echo_destination(result):
+    """Muestra el resultado de un destino de una copia con varios destinos."""
+    if result["status"] == "failed":
+        click.secho(f"  ✗ {result['destination']}: {result['error']}", fg="red")
+        return
+    seconds = result["seconds"]
+    speed = format_speed(result["bytes"] / seconds) if seconds else "-"
+    detail = f", {format_size(result['reread'])} releídos" if result["reread"] else ""
+    click.secho(
+        f"  ✓ {result['destination']}: {result['files']} archivos, "
+        f"{format_size(result['bytes'])} en {seconds:.1f}s ({speed}){detail}",
+        fg="green",
+    )
+
+
+def _echo_retries(protocol_instance):
+    """Muestra los reintentos de la copia, si hubo alguno."""
+    if protocol_instance is not None and protocol_instance.retry_stats.retries:
+        click.secho(protocol_instance.retry_stats.summary(), fg="yellow")
+
+
+def _report_metrics(
+    reporter, instance, protocol, source, destination, started, state, failed=False
+):
+    """Publica las métricas de la copia si hay algún destino configurado."""
+    if reporter is None or instance is None or not reporter.enabled:
+        return
+    if failed and not instance.metrics.errors:
+        # La falla no vino de un archivo (conexión, validación, configuración)
+        instance.metrics.record_error()
+    reporter.report(
+        build_record(
+            instance.metrics,
+            protocol,
+            source,
+            destination,
+            "failed" if failed else "completed",
+            time.perf_counter() - started,
+            retries=instance.retry_stats.retries,
+            job_id=state.job_id if state else None,
+        )
+    )
+
+
+def _fail_job(state):
+    """Marca el trabajo como fallido e indica cómo reanudarlo."""
+    if state is None:
+        return
+    state.finish("failed")
+    click.secho(f"Reanudar con: copyway --resume {state.job_id}", fg="yellow", err=True)
 
 
 if __name__ == "__main__":
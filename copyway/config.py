@@ -5,7 +5,6 @@ Soporta configuración global y específica por protocolo.
 """
 
 import os
-import yaml
 from pathlib import Path
 from .exceptions import ConfigError
 
@@ -50,6 +49,8 @@ class Config:
         path = Path(self.config_file)
         if not path.exists():
             return {}
+        import yaml
+
         try:
             with open(path, encoding="utf-8") as f:
                 return yaml.safe_load(f) or {}
@@ -84,3 +85,19 @@ class Config:
             22
         """
         return self.data.get("protocols", {}).get(protocol, {})
+
+    def get_state_db(self):
+        """Obtiene la ruta de la base de estado de trabajos.
+
+        Por defecto es ``.copyway-jobs.db`` junto al archivo de configuración;
+        se puede cambiar con la clave ``state_db``.
+
+        Returns:
+            str: Ruta al archivo SQLite
+
+        Example:
+            >>> Config('/etc/copyway/config.yml').get_state_db()
+            '/etc/copyway/.copyway-jobs.db'
+        """
+        default = Path(self.config_file).expanduser().with_name(".copyway-jobs.db")
+        return str(Path(self.data.get("state_db", default)).expanduser())
@@ -0,0 +1,478 @@
+"""Daemon de CopyWay: trabajos de copia recibidos por un socket Unix.
+
+``copyway serve`` mantiene cargados en un solo proceso la configuración, las
+clases de protocolo y el pool de conexiones SSH, y recibe trabajos de
+``copyway --daemon`` (o de ``DaemonClient``) por un socket Unix. Cada pedido
+y cada respuesta es un objeto JSON en una línea. Los trabajos esperan en una
+cola acotada y se ejecutan con las mismas reglas que el modo batch, con un
+límite opcional de trabajos simultáneos por host.
+"""
+
+import itertools
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from urllib.parse import urlsplit
+from .batch import BatchRunner
+from .exceptions import CopyWayError, DaemonError
+from .utils.connections import connection_pool
+from .utils.logger import logger
+
+DEFAULT_SOCKET = "~/.copyway.sock"
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 100
+# Trabajos terminados que se conservan para consultar su estado
+HISTORY_SIZE = 1000
+FINISHED = ("completed", "failed")
+
+
+def socket_path(path=None):
+    """Ruta del socket: ``path``, ``$COPYWAY_SOCKET`` o ``~/.copyway.sock``."""
+    return os.path.expanduser(path or os.getenv("COPYWAY_SOCKET") or DEFAULT_SOCKET)
+
+
+def job_destinations(job):
+    """Rutas de destino de un trabajo con ``destinations`` (fan-out).
+
+    Args:
+        job (dict): Trabajo; cada elemento de ``destinations`` es una ruta o
+            un diccionario con ``destination``
+
+    Returns:
+        list: Rutas de destino, o None si el trabajo no tiene ``destinations``
+
+    Example:
+        >>> job_destinations({"destinations": ["/a", {"destination": "h:/b"}]})
+        ['/a', 'h:/b']
+    """
+    destinations = job.get("destinations")
+    if not isinstance(destinations, list):
+        return None
+    return [d.get("destination") if isinstance(d, dict) else d for d in destinations]
+
+
+def job_host(job):
+    """Host remoto de un trabajo, para el límite de trabajos por host.
+
+    Args:
+        job (dict): Trabajo con ``protocol``, ``source`` y ``destination``
+            (o ``destinations``)
+
+    Returns:
+        str: Host de la primera ruta remota (``[usuario@]host:ruta`` o
+            ``hdfs://host/ruta``), o el nombre del protocolo si ninguna lo es
+
+    Example:
+        >>> job_host({"protocol": "sftp", "source": "/a", "destination": "u@srv:/b"})
+        'srv'
+    """
+    paths = [job.get("source"), job.get("destination")]
+    paths += job_destinations(job) or []
+    for path in paths:
+        if not isinstance(path, str):
+            continue
+        if path.startswith("hdfs://"):
+            return urlsplit(path).hostname or "hdfs"
+        head, sep, _ = path.partition(":")
+        if sep and head and "/" not in head and not os.path.exists(path):
+            return head.rsplit("@", 1)[-1]
+    return job.get("protocol") or "local"
+
+
+def job_route(record):
+    """``origen -> destino`` de un trabajo del daemon, con todos sus destinos.
+
+    Example:
+        >>> job_route({"source": "/a", "destination": None, "destinations": ["/b", "/c"]})
+        '/a -> /b, /c'
+    """
+    destinations = record.get("destinations")
+    if destinations:
+        return f"{record['source']} -> {', '.join(map(str, destinations))}"
+    return f"{record['source']} -> {record['destination']}"
+
+
+class CopyDaemon:
+    """Cola de trabajos de copia atendida por un socket Unix.
+
+    Los trabajos se ejecutan en ``workers`` hilos con un ``BatchRunner``
+    compartido (misma configuración, mismas conexiones SSH). Un trabajo
+    cuyo host ya tiene ``max_per_host`` trabajos en curso espera sin ocupar
+    un hilo. Es seguro entre hilos.
+
+    Attributes:
+        path (str): Ruta del socket Unix
+        workers (int): Trabajos ejecutados en paralelo
+        queue_size (int): Trabajos en espera admitidos; los pedidos que la
+            superan se rechazan
+        max_per_host (int): Trabajos simultáneos por host, o None sin límite
+        runner (BatchRunner): Ejecuta cada trabajo
+
+    Example:
+        >>> daemon = CopyDaemon(Config(), workers=8, max_per_host=2)
+        >>> daemon.serve_forever()
+    """
+
+    def __init__(
+        self,
+        config,
+        path=None,
+        workers=DEFAULT_WORKERS,
+        queue_size=DEFAULT_QUEUE_SIZE,
+        max_per_host=None,
+        reporter=None,
+    ):
+        """Inicializa el daemon (sin abrir el socket ni iniciar los hilos).
+
+        Args:
+            config (Config): Configuración compartida por todos los trabajos
+            path (str, optional): Ruta del socket (ver ``socket_path``)
+            workers (int): Trabajos en paralelo. Default: 4
+            queue_size (int): Trabajos en espera admitidos. Default: 100
+            max_per_host (int, optional): Trabajos simultáneos por host
+            reporter (MetricsReporter, optional): Publicador de métricas
+        """
+        self.path = socket_path(path)
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_per_host = max_per_host
+        self.runner = BatchRunner(config, workers, reporter=reporter)
+        self.jobs = OrderedDict()
+        # Trabajo original de cada pendiente, fuera de los estados que se
+        # devuelven: sus opciones pueden incluir passwords
+        self._job_options = {}
+        self._ready = deque()
+        self._waiting = {}
+        self._running = {}
+        self._pending = 0
+        self._index = itertools.count()
+        self._stopping = False
+        self._threads = []
+        self._server = None
+        self._cond = threading.Condition()
+
+    def submit(self, job):
+        """Encola un trabajo.
+
+        Args:
+            job (dict): Trabajo con ``protocol``, ``source``, ``destination``
+                y opciones, como una línea de un manifiesto batch
+
+        Returns:
+            dict: Estado del trabajo (ver ``status``)
+
+        Raises:
+            DaemonError: Si la cola está llena o el daemon se está deteniendo
+        """
+        if not isinstance(job, dict):
+            raise DaemonError("El trabajo debe ser un objeto JSON")
+        with self._cond:
+            if self._stopping:
+                raise DaemonError("El daemon se está deteniendo")
+            if self._pending >= self.queue_size:
+                raise DaemonError(
+                    f"Cola de trabajos llena ({self.queue_size} en espera)"
+                )
+            record = {
+                "id": uuid.uuid4().hex[:12],
+                "index": next(self._index),
+                "protocol": job.get("protocol"),
+                "source": job.get("source"),
+                "destination": job.get("destination"),
+                "destinations": job_destinations(job),
+                "host": job_host(job),
+                "status": "queued",
+                "submitted": round(time.time(), 3),
+                "result": None,
+            }
+            self.jobs[record["id"]] = record
+            self._job_options[record["id"]] = job
+            self._pending += 1
+            self._ready.append(record)
+            self._cond.notify_all()
+            queued = dict(record)
+        logger.info(f"Trabajo {queued['id']} encolado: {job_route(queued)}")
+        return queued
+
+    def status(self, job_id):
+        """Estado de un trabajo.
+
+        Returns:
+            dict: ``id``, ``protocol``, ``source``, ``destination``,
+                ``destinations`` (rutas de un fan-out, o None), ``host``,
+                ``status`` ("queued", "running", "completed" o "failed"),
+                ``submitted`` y ``result`` (el de ``BatchRunner.run_job``
+                al terminar)
+
+        Raises:
+            DaemonError: Si el trabajo no existe (o ya salió del historial)
+        """
+        with self._cond:
+            if job_id not in self.jobs:
+                raise DaemonError(f"Trabajo desconocido: {job_id}")
+            return dict(self.jobs[job_id])
+
+    def wait(self, job_id, timeout=None):
+        """Espera a que termine un trabajo y devuelve su estado.
+
+        Args:
+            job_id (str): Id del trabajo
+            timeout (float, optional): Segundos máximos de espera; al
+                vencer se devuelve el estado actual
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                record = self.status(job_id)
+                if record["status"] in FINISHED:
+                    return record
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return record
+                self._cond.wait(remaining)
+
+    def list_jobs(self):
+        """Estado de todos los trabajos del historial, del más antiguo al último."""
+        with self._cond:
+            return [dict(record) for record in self.jobs.values()]
+
+    def handle(self, request):
+        """Atiende un pedido del socket.
+
+        Args:
+            request (dict): ``action`` ("submit", "status", "wait", "list" o
+                "shutdown") y sus datos (``job``, ``id``, ``timeout``)
+
+        Returns:
+            dict: Datos de la respuesta
+
+        Raises:
+            DaemonError: Si el pedido es inválido o no se puede atender
+        """
+        action = request.get("action")
+        if action == "submit":
+            return {"job": self.submit(request.get("job"))}
+        if action == "status":
+            return {"job": self.status(request.get("id"))}
+        if action == "wait":
+            return {"job": self.wait(request.get("id"), request.get("timeout"))}
+        if action == "list":
+            return {"jobs": self.list_jobs()}
+        if action == "shutdown":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {}
+        raise DaemonError(f"Acción desconocida: {action}")
+
+    def start(self):
+        """Abre el socket e inicia los hilos de trabajo.
+
+        Raises:
+            DaemonError: Si ya hay otro daemon escuchando en el socket
+        """
+        if os.path.exists(self.path):
+            try:
+                DaemonClient(self.path, timeout=1).request("list")
+            except DaemonError:
+                # Socket huérfano de un daemon que no terminó limpio
+                os.unlink(self.path)
+            else:
+                raise DaemonError(f"Ya hay un daemon escuchando en {self.path}")
+        # Una conexión ociosa por trabajo concurrente, como en el batch
+        connection_pool.max_idle = max(connection_pool.max_idle, self.workers)
+        self._server = _make_server(self.path)
+        self._server.copy_daemon = self
+        os.chmod(self.path, 0o600)
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Daemon escuchando en {self.path} con {self.workers} workers")
+
+    def serve_forever(self):
+        """Atiende pedidos hasta ``shutdown``; luego espera los trabajos en curso."""
+        if self._server is None:
+            self.start()
+        try:
+            self._server.serve_forever(poll_interval=0.2)
+        finally:
+            self._stop_workers()
+            self._server.server_close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            connection_pool.close_all()
+
+    def shutdown(self):
+        """Deja de aceptar trabajos: los en espera fallan, los en curso terminan."""
+        with self._cond:
+            self._stopping = True
+            for record in list(self._ready) + [
+                r for waiting in self._waiting.values() for r in waiting
+            ]:
+                self._finish(record, {"status": "failed", "error": "Daemon detenido"})
+            self._ready.clear()
+            self._waiting.clear()
+            self._cond.notify_all()
+        if self._server is not None:
+            self._server.shutdown()
+
+    def _stop_workers(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._ready and not self._stopping:
+                    self._cond.wait()
+                if not self._ready:
+                    return
+                record = self._ready.popleft()
+                if not self._acquire_host(record):
+                    continue
+            while record is not None:
+                self._run(record)
+                record = self._release_host(record)
+
+    def _acquire_host(self, record):
+        """Toma un lugar del host o deja el trabajo esperando (con el lock)."""
+        host = record["host"]
+        if self.max_per_host and self._running.get(host, 0) >= self.max_per_host:
+            self._waiting.setdefault(host, deque()).append(record)
+            return False
+        self._running[host] = self._running.get(host, 0) + 1
+        return True
+
+    def _release_host(self, record):
+        """Cede el lugar del host al siguiente trabajo que lo espera, si hay."""
+        host = record["host"]
+        with self._cond:
+            waiting = self._waiting.get(host)
+            if waiting and not self._stopping:
+                return waiting.popleft()
+            self._waiting.pop(host, None)
+            self._running[host] -= 1
+            if not self._running[host]:
+                del self._running[host]
+            return None
+
+    def _run(self, record):
+        with self._cond:
+            self._pending -= 1
+            record["status"] = "running"
+            job = self._job_options.pop(record["id"])
+        try:
+            result = self.runner.execute_job(record["index"], job)
+        except Exception as e:
+            # Un hilo de trabajo no puede morir con el trabajo en curso
+            logger.exception(f"Error inesperado en trabajo {record['id']}")
+            result = {"status": "failed", "error": f"Error inesperado: {e}"}
+        with self._cond:
+            self._finish(record, result)
+        logger.info(f"Trabajo {record['id']}: {result['status']}")
+
+    def _finish(self, record, result):
+        """Registra el resultado de un trabajo (con el lock)."""
+        if record["status"] == "queued":
+            self._pending -= 1
+            self._job_options.pop(record["id"], None)
+        record["status"] = "failed" if result["status"] == "failed" else "completed"
+        record["result"] = result
+        finished = [j for j, r in self.jobs.items() if r["status"] in FINISHED]
+        for job_id in finished[: max(0, len(finished) - HISTORY_SIZE)]:
+            del self.jobs[job_id]
+        self._cond.notify_all()
+
+
+class DaemonClient:
+    """Cliente del socket de ``copyway serve``.
+
+    Example:
+        >>> client = DaemonClient()
+        >>> job = client.submit({"protocol": "sftp", "source": "/a", "destination": "h:/b"})
+        >>> client.wait(job["id"])["status"]
+        'completed'
+    """
+
+    def __init__(self, path=None, timeout=None):
+        """Inicializa el cliente.
+
+        Args:
+            path (str, optional): Ruta del socket (ver ``socket_path``)
+            timeout (float, optional): Timeout de conexión y lectura
+        """
+        self.path = socket_path(path)
+        self.timeout = timeout
+
+    def request(self, action, **fields):
+        """Envía un pedido y devuelve la respuesta.
+
+        Raises:
+            DaemonError: Si no hay daemon, la respuesta es inválida o el
+                daemon rechazó el pedido
+        """
+        message = json.dumps({"action": action, **fields}) + "\n"
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.path)
+                sock.sendall(message.encode())
+                with sock.makefile("rb") as f:
+                    line = f.readline()
+        except OSError as e:
+            raise DaemonError(f"No hay un daemon escuchando en {self.path}: {e}")
+        try:
+            response = json.loads(line)
+        except ValueError:
+            raise DaemonError(f"Respuesta inválida del daemon: {line[:200]!r}")
+        if not response.get("ok"):
+            raise DaemonError(response.get("error") or "Error desconocido del daemon")
+        return response
+
+    def submit(self, job):
+        return self.request("submit", job=job)["job"]
+
+    def status(self, job_id):
+        return self.request("status", id=job_id)["job"]
+
+    def wait(self, job_id, timeout=None):
+        return self.request("wait", id=job_id, timeout=timeout)["job"]
+
+    def list_jobs(self):
+        return self.request("list")["jobs"]
+
+    def shutdown(self):
+        self.request("shutdown")
+
+
+def _make_server(path):
+    """Servidor del socket Unix.
+
+    ``socketserver`` se importa aquí para que el CLI no lo cargue al iniciar.
+    """
+    import socketserver
+
+    class Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise DaemonError("El pedido debe ser un objeto JSON")
+                    response = {"ok": True, **self.server.copy_daemon.handle(request)}
+                except ValueError as e:
+                    response = {"ok": False, "error": f"JSON inválido: {e}"}
+                except CopyWayError as e:
+                    response = {"ok": False, "error": str(e)}
+                self.wfile.write((json.dumps(response) + "\n").encode())
+
+    return Server(path, Handler)
@@ -25,6 +25,36 @@ class ProtocolError(CopyWayError):
     pass
 
 
+class TransientError(ProtocolError):
+    """Error transitorio de red o del servidor remoto.
+
+    Se lanza cuando la operación falló por una causa pasajera (conexión
+    cortada, servidor sobrecargado) y tiene sentido reintentarla.
+    """
+
+    pass
+
+
+class StallError(TransientError):
+    """Transferencia detenida.
+
+    Se lanza cuando una transferencia no avanza durante más de
+    ``stall_timeout`` segundos; el proceso de copia se aborta.
+    """
+
+    pass
+
+
+class IntegrityError(TransientError):
+    """El destino no coincide con el origen tras la copia.
+
+    Se lanza cuando ``--verify`` detecta un tamaño o checksum distinto; la
+    copia del archivo se reintenta desde cero.
+    """
+
+    pass
+
+
 class ValidationError(CopyWayError):
     """Error de validación de entrada.
 
@@ -43,3 +73,14 @@ class ConfigError(CopyWayError):
     """
 
     pass
+
+
+class DaemonError(CopyWayError):
+    """Error de comunicación con el daemon de CopyWay.
+
+    Se lanza cuando no hay un daemon escuchando en el socket, cuando
+    rechaza un pedido (cola llena, trabajo desconocido) o cuando su
+    respuesta es inválida.
+    """
+
+    pass
@@ -0,0 +1,532 @@
+"""Copias con varios destinos: leer el origen una vez y escribir en muchos.
+
+``FanOut`` recorre un origen local una sola vez y reparte cada bloque leído
+entre los destinos (cualquier combinación de local, SFTP y HDFS), cada uno
+escrito por su propio hilo a través de un ``Sink`` del protocolo (ver
+``Protocol.open_sink``).
+
+Cada destino recibe los bloques de un archivo por una cola acotada y el
+origen se lee al ritmo del destino más rápido. Un destino que se atrasa
+(su cola se llena mientras otro todavía recibe) se "desprende": deja de
+recibir bloques de ese archivo y su hilo lee lo que falta directamente del
+origen (en general desde la caché de páginas del sistema). Así un destino
+lento no frena a los rápidos y la memoria queda acotada a ``buffer_blocks``
+bloques por archivo en cola de cada destino. Un destino que falla (agotados
+sus reintentos) no afecta a los demás.
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+from .exceptions import CopyWayError, ValidationError
+from .protocols import ProtocolFactory
+from .utils.logger import logger
+from .utils.metrics import TransferMetrics
+from .utils.progress import format_size, format_speed
+from .utils.retry import RetryStats
+from .utils.validators import validate_destination, validate_disk_space
+from .utils.walker import tree_size, walk_tree
+
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+# Bloques en cola por destino antes de desprenderlo (16 MB con el bloque default)
+DEFAULT_BUFFER_BLOCKS = 16
+# Archivos en cola de un destino; con más, el destino relee los siguientes
+MAX_PENDING_FEEDS = 2
+# Espera del lector cuando todos los destinos están ocupados
+READER_WAIT = 0.05
+# Opciones que requieren comparar o reescribir cada destino por separado
+UNSUPPORTED_OPTIONS = ("sync", "checksum", "verify", "bundle", "state")
+
+
+def fanout_protocol(destination, default):
+    """Protocolo de un destino de un fan-out.
+
+    Args:
+        destination (str): Ruta de destino
+        default (str): Protocolo indicado para la copia (``-p``)
+
+    Returns:
+        str: ``hdfs`` para ``hdfs://``; ``sftp`` para ``[usuario@]host:ruta``;
+            si no, ``local`` (o ``hdfs`` si ese es el protocolo indicado y la
+            ruta es absoluta)
+
+    Example:
+        >>> fanout_protocol("deploy@edge01:/srv", "local")
+        'sftp'
+    """
+    if destination.startswith("hdfs://"):
+        return "hdfs"
+    head, sep, _ = destination.partition(":")
+    if sep and head and "/" not in head and not os.path.exists(destination):
+        return "sftp"
+    if default == "hdfs" and destination.startswith("/"):
+        return "hdfs"
+    return "local"
+
+
+class _Feed:
+    """Bloques de un archivo para un destino, en una cola acotada.
+
+    ``detached_at`` es el offset desde el que el destino lee el archivo por
+    su cuenta (None mientras recibe bloques); ``closed`` indica que el
+    destino ya no los espera (falló).
+    """
+
+    def __init__(self, maxsize, detached_at=None):
+        self.blocks = queue.Queue(maxsize)
+        self.detached_at = detached_at
+        self.closed = False
+
+    @property
+    def active(self):
+        return self.detached_at is None and not self.closed
+
+    def put(self, data, timeout=None):
+        """Encola ``data`` (None marca el fin); False si la cola está llena."""
+        try:
+            if timeout is None:
+                self.blocks.put_nowait(data)
+            else:
+                self.blocks.put(data, timeout=timeout)
+        except queue.Full:
+            return False
+        return True
+
+
+class _Target:
+    """Un destino del fan-out: su protocolo, su hilo y sus contadores."""
+
+    def __init__(self, destination, protocol, instance, total):
+        self.destination = destination
+        self.protocol = protocol
+        self.instance = instance
+        self.total = total
+        self.jobs = queue.Queue()
+        self.thread = None
+        self.error = None
+        self.files = 0
+        self.completed = 0
+        self.current = 0
+        self.reread = 0
+        self.retries = 0
+        self.seconds = 0.0
+
+    @property
+    def done(self):
+        return self.completed + self.current
+
+    @property
+    def percent(self):
+        return min(100.0, self.done / self.total * 100) if self.total else 100.0
+
+    def result(self):
+        return {
+            "destination": self.destination,
+            "protocol": self.protocol,
+            "status": "failed" if self.error else "completed",
+            "error": _describe(self.error) if self.error else None,
+            "files": self.files,
+            "bytes": self.completed,
+            "retries": self.retries,
+            "seconds": round(self.seconds, 3),
+            "reread": self.reread,
+        }
+
+
+class FanOut:
+    """Copia un origen local a varios destinos leyéndolo una sola vez.
+
+    Attributes:
+        config (Config): Configuración (sección de cada protocolo)
+        block_size (int): Bytes por lectura del origen
+        buffer_blocks (int): Bloques en cola por destino
+        progress (bool): Mostrar una línea de progreso por segundo
+        metrics (TransferMetrics): Métricas sumadas de todos los destinos
+        retry_stats (RetryStats): Reintentos de todos los destinos
+        results (list): Resultado por destino (ver ``run``)
+
+    Example:
+        >>> fanout = FanOut(Config())
+        >>> results = fanout.run("release.tar", ["/mnt/a", "u@edge01:/srv"], "sftp")
+        >>> [r["status"] for r in results]
+        ['completed', 'completed']
+    """
+
+    def __init__(
+        self,
+        config,
+        block_size=DEFAULT_BLOCK_SIZE,
+        buffer_blocks=DEFAULT_BUFFER_BLOCKS,
+        progress=False,
+        interval=1.0,
+    ):
+        self.config = config
+        self.block_size = block_size
+        self.buffer_blocks = buffer_blocks
+        self.progress = progress
+        self.interval = interval
+        self.metrics = TransferMetrics()
+        self.retry_stats = RetryStats()
+        self.results = []
+
+    def validate(self, source, destinations, protocol=None, **options):
+        """Validar el origen y cada destino antes de copiar.
+
+        Aplica a cada destino la misma validación que una copia simple (ver
+        ``batch.validate_job``); en los destinos locales el espacio libre se
+        compara con el tamaño del origen, que se calcula una sola vez.
+
+        Args:
+            source (str): Archivo o directorio local
+            destinations (list): Destinos, como en ``run``
+            protocol (str, optional): Protocolo indicado para la copia
+            **options: Opciones de la copia
+
+        Raises:
+            ValidationError: Si el origen, una opción o algún destino no es
+                válido; el mensaje indica el destino
+        """
+        from .batch import validate_job
+
+        self._check(source, destinations, options)
+        size = None
+        for destination in destinations:
+            target = self._target(destination, protocol, 0)
+            try:
+                if target.protocol != "local":
+                    validate_job(
+                        target.protocol,
+                        target.instance,
+                        source,
+                        target.destination,
+                        options,
+                    )
+                    continue
+                if size is None:
+                    size = tree_size(source, options.get("follow_symlinks", False))
+                # Un archivo existente se reemplaza (no es un error en fan-out)
+                if not os.path.isfile(target.destination):
+                    validate_destination(target.destination, "local")
+                validate_disk_space(source, target.destination, "local", size=size)
+            except CopyWayError as e:
+                raise ValidationError(f"{target.destination}: {e}")
+
+    def run(self, source, destinations, protocol=None, **options):
+        """Copiar ``source`` a todos los destinos.
+
+        Args:
+            source (str): Archivo o directorio local
+            destinations (list): Rutas de destino, o diccionarios con
+                ``destination`` y opcionalmente ``protocol``
+            protocol (str, optional): Protocolo indicado para la copia; el de
+                cada destino se deduce de su ruta (ver ``fanout_protocol``)
+            **options: Opciones de la copia (``user``, ``port``,
+                ``replication``, ``retries``, ``bwlimit``...)
+
+        Returns:
+            list: Por destino: ``destination``, ``protocol``, ``status``,
+                ``error``, ``files``, ``bytes``, ``retries``, ``seconds`` y
+                ``reread`` (bytes que releyó del origen por ir más lento)
+
+        Raises:
+            ValidationError: Si el origen no es local o una opción no se
+                puede usar con varios destinos
+        """
+        self._check(source, destinations, options)
+        dirs, files = self._scan(source, options.get("follow_symlinks", False))
+        total = sum(st.st_size for _, _, st in files)
+        targets = [self._target(d, protocol, total) for d in destinations]
+        logger.info(
+            f"Fan-out de {len(files)} archivos ({format_size(total)}) "
+            f"a {len(targets)} destinos"
+        )
+
+        for target in targets:
+            target.thread = threading.Thread(
+                target=self._work,
+                args=(target, source, dirs, options),
+                name=f"fanout-{target.destination}",
+                daemon=True,
+            )
+            target.thread.start()
+
+        stop = threading.Event()
+        monitor = None
+        if self.progress:
+            monitor = threading.Thread(
+                target=self._monitor, args=(targets, total, stop), daemon=True
+            )
+            monitor.start()
+        try:
+            for entry in files:
+                self._read(entry, targets)
+        finally:
+            for target in targets:
+                target.jobs.put(None)
+            for target in targets:
+                target.thread.join()
+            stop.set()
+            if monitor is not None:
+                monitor.join()
+
+        self.results = [target.result() for target in targets]
+        for target in targets:
+            if target.error:
+                target.instance.metrics.record_error()
+            self.metrics.merge(target.instance.metrics)
+        return self.results
+
+    @property
+    def failed(self):
+        """Cantidad de destinos fallidos."""
+        return sum(1 for r in self.results if r["status"] == "failed")
+
+    def _check(self, source, destinations, options):
+        """Opciones, origen y destinos que el fan-out no admite."""
+        unsupported = [name for name in UNSUPPORTED_OPTIONS if options.get(name)]
+        if options.get("compression") not in (None, "ssh"):
+            unsupported.append("compression")
+        if unsupported:
+            raise ValidationError(
+                f"Opciones no disponibles con varios destinos: {', '.join(unsupported)}"
+            )
+        if not os.path.exists(source):
+            raise ValidationError(
+                f"El origen debe ser local con varios destinos: {source}"
+            )
+        if not destinations:
+            raise ValidationError("Debe indicar al menos un destino")
+
+    def _scan(self, source, follow_symlinks):
+        """Directorios y archivos (rel, ruta, stat) del origen."""
+        if not os.path.isdir(source):
+            return [], [("", source, os.stat(source))]
+        dirs, files = [], []
+        for entry in walk_tree(source, follow_symlinks):
+            if entry.kind == "dir":
+                dirs.append(entry.rel)
+            elif entry.kind == "file":
+                files.append((entry.rel, entry.path, entry.stat))
+            else:
+                logger.warning(f"Symlink omitido en fan-out: {entry.path}")
+        return dirs, files
+
+    def _target(self, destination, default, total):
+        if isinstance(destination, dict):
+            protocol = destination.get("protocol")
+            destination = destination["destination"]
+        else:
+            protocol = None
+        protocol = protocol or fanout_protocol(destination, default)
+        instance = ProtocolFactory.create(
+            protocol, self.config.get_protocol_config(protocol)
+        )
+        # Los reintentos se cuentan también en el total del fan-out
+        instance.retry_stats = self.retry_stats
+        return _Target(destination, protocol, instance, total)
+
+    def _read(self, entry, targets):
+        """Lee un archivo del origen y reparte sus bloques entre los destinos."""
+        rel, path, st = entry
+        # Si todos los destinos tienen archivos en cola, esperar al más rápido
+        while all(
+            t.jobs.qsize() >= MAX_PENDING_FEEDS for t in targets if t.error is None
+        ) and any(t.error is None for t in targets):
+            time.sleep(READER_WAIT)
+
+        feeds = []
+        for target in targets:
+            if target.error is not None:
+                continue
+            # Con archivos en cola el destino va atrasado: que relea este
+            backlog = target.jobs.qsize() >= MAX_PENDING_FEEDS
+            feed = _Feed(self.buffer_blocks, 0 if backlog else None)
+            target.jobs.put((rel, path, st, feed))
+            feeds.append(feed)
+
+        offset = 0
+        try:
+            with open(path, "rb") as f:
+                while any(feed.active for feed in feeds):
+                    data = f.read(self.block_size)
+                    if not data:
+                        break
+                    self._deliver(feeds, data, offset)
+                    offset += len(data)
+        except OSError as e:
+            # Cada destino lo relee y reporta el error por su cuenta
+            logger.warning(f"Error leyendo {path}: {e}")
+            for feed in feeds:
+                if feed.active:
+                    feed.detached_at = offset
+            return
+        self._deliver(feeds, None, offset)
+
+    def _deliver(self, feeds, data, offset):
+        """Encola un bloque en cada destino; los que están llenos se desprenden.
+
+        Si todas las colas están llenas espera a que alguna libere lugar: el
+        más rápido marca el ritmo de lectura del origen.
+        """
+        while True:
+            waiting = [feed for feed in feeds if feed.active]
+            if not waiting:
+                return
+            full = [feed for feed in waiting if not feed.put(data)]
+            if len(full) == len(waiting):
+                if not full[0].put(data, READER_WAIT):
+                    continue
+                full = [feed for feed in full[1:] if not feed.put(data)]
+            for feed in full:
+                feed.detached_at = offset
+            return
+
+    def _work(self, target, source, dirs, options):
+        """Hilo de un destino: abre el sink y escribe cada archivo."""
+        instance = target.instance
+        policy = instance.retry_policy(options)
+        throttle = instance.bandwidth_limit(options)
+        started = time.monotonic()
+        sink = None
+
+        def open_sink(attempt):
+            sink = instance.open_sink(source, target.destination, **options)
+            if os.path.isdir(source):
+                sink.makedirs(dirs)
+            return sink
+
+        try:
+            sink = self._call(policy, target, open_sink, target.destination)
+        except Exception as e:
+            self._fail(target, e)
+
+        while True:
+            job = target.jobs.get()
+            if job is None:
+                break
+            rel, path, st, feed = job
+            if target.error is not None:
+                feed.closed = True
+                continue
+            try:
+                self._send(target, sink, policy, throttle, path, rel, st, feed)
+            except Exception as e:
+                feed.closed = True
+                self._fail(target, e)
+
+        if sink is not None:
+            try:
+                sink.close()
+            except Exception as e:
+                if target.error is None:
+                    self._fail(target, e)
+        target.seconds = time.monotonic() - started
+        instance.metrics.add_phase("transfer", target.seconds)
+
+    def _send(self, target, sink, policy, throttle, path, rel, st, feed):
+        """Escribe un archivo en un destino, reintentando desde el origen."""
+
+        def attempt_write(attempt):
+            target.current = 0
+            if attempt:
+                feed.closed = True
+                sink.reconnect()
+            out = sink.open(rel, st)
+            try:
+                if attempt:
+                    self._copy_range(target, throttle, path, 0, out)
+                else:
+                    self._receive(target, throttle, path, feed, out)
+                out.commit()
+            except BaseException:
+                out.abort()
+                raise
+
+        self._call(policy, target, attempt_write, sink.path(rel))
+        target.current = 0
+        target.completed += st.st_size
+        target.files += 1
+        target.instance.metrics.count_file(st.st_size)
+
+    def _call(self, policy, target, func, what):
+        """``policy.call`` contando los reintentos del destino."""
+
+        def counted(attempt):
+            if attempt:
+                target.retries += 1
+            return func(attempt)
+
+        return policy.call(counted, what)
+
+    def _receive(self, target, throttle, path, feed, out):
+        """Escribe los bloques de ``feed``; si se desprendió, sigue del origen."""
+        offset = 0
+        while True:
+            try:
+                data = feed.blocks.get(timeout=0.1)
+            except queue.Empty:
+                # detached_at se fija después del último bloque encolado
+                if feed.detached_at is not None and feed.blocks.empty():
+                    target.reread += self._copy_range(
+                        target, throttle, path, offset, out
+                    )
+                    return
+                continue
+            if data is None:
+                return
+            self._write(target, throttle, out, data)
+            offset += len(data)
+
+    def _copy_range(self, target, throttle, path, offset, out):
+        """Copia ``path`` desde ``offset`` a ``out``; retorna los bytes leídos."""
+        copied = 0
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while True:
+                data = f.read(self.block_size)
+                if not data:
+                    return copied
+                self._write(target, throttle, out, data)
+                copied += len(data)
+
+    def _write(self, target, throttle, out, data):
+        if throttle is not None:
+            throttle.consume(len(data))
+        out.write(data)
+        target.current += len(data)
+
+    def _fail(self, target, error):
+        target.error = error
+        logger.error(f"Destino {target.destination} fallido: {_describe(error)}")
+
+    def _monitor(self, targets, total, stop):
+        """Muestra el avance y la velocidad de cada destino en una línea."""
+        started = time.monotonic()
+        while not stop.wait(self.interval):
+            self._print_progress(targets, total, time.monotonic() - started)
+        self._print_progress(targets, total, time.monotonic() - started)
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+
+    def _print_progress(self, targets, total, elapsed):
+        parts = []
+        for target in targets:
+            if target.error is not None:
+                parts.append(f"{target.destination} ✗")
+                continue
+            speed = format_speed(target.done / elapsed) if elapsed > 0 else "-"
+            parts.append(f"{target.destination} {target.percent:.0f}% ({speed})")
+        sys.stdout.write(f"\r⇉ {format_size(total)}: " + " | ".join(parts))
+        sys.stdout.flush()
+
+
+def _describe(error):
+    """Mensaje de un error, con la salida de error de un comando si la tiene."""
+    stderr = getattr(error, "stderr", None)
+    if stderr:
+        return f"{error}: {stderr.strip()}"
+    if isinstance(error, CopyWayError):
+        return str(error)
+    return f"{type(error).__name__}: {error}"
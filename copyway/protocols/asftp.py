@@ -0,0 +1,640 @@
+"""Protocolo SFTP asíncrono (asyncssh).
+
+Variante de ``sftp`` sobre asyncio: una copia mueve muchos archivos a la vez
+por una sola conexión SSH, y el modo batch lleva en un mismo event loop los
+trabajos a cientos de hosts, sin un hilo ni un proceso por archivo o host.
+Cada archivo se transfiere con requests SFTP en vuelo (pipelining) a través
+de un parcial que se renombra al terminar.
+"""
+
+import asyncio
+import os
+import shlex
+import stat
+import time
+from collections import deque
+from pathlib import Path, PurePosixPath
+from .base import PARTIAL_SUFFIX, AsyncProtocol
+from ..exceptions import (
+    CopyWayError,
+    IntegrityError,
+    ProtocolError,
+    TransientError,
+    ValidationError,
+)
+from ..utils.aio import run_parallel_async
+from ..utils.integrity import REMOTE_COMMANDS, new_hasher, verify_mode
+from ..utils.logger import logger
+from ..utils.progress import format_size
+from ..utils.sync import Synchronizer, file_checksum
+from ..utils.walker import walk_tree
+
+try:
+    import asyncssh
+except ImportError:
+    asyncssh = None
+
+# Archivos transferidos a la vez por copia (sección `asftp`, clave `workers`):
+# comparten una conexión, así que el costo de cada uno es una corrutina
+DEFAULT_WORKERS = 16
+# Pipelining por archivo (claves `block_size` y `max_requests`), como en sftp
+DEFAULT_BLOCK_SIZE = 32768
+DEFAULT_MAX_REQUESTS = 64
+# Comandos remotos simultáneos por conexión (checksums): OpenSSH admite 10
+# sesiones por conexión y una la ocupa el canal SFTP
+MAX_EXEC_SESSIONS = 8
+DEFAULT_CONNECT_TIMEOUT = 15
+
+
+class AsyncSFTPProtocol(AsyncProtocol):
+    """Copias SFTP con asyncssh: subida y descarga de archivos y árboles.
+
+    Respeta las opciones de ``sftp`` que no dependen de paramiko: ``port``,
+    ``user``, ``password``, ``key_file``, ``workers`` (archivos a la vez,
+    default 16), ``sync``/``checksum``, ``verify``, ``retries`` y
+    ``bwlimit``. Las conexiones se abren una vez por host y se cierran con
+    ``aclose``.
+
+    Example:
+        >>> protocol = ProtocolFactory.create("asftp", {"workers": 64})
+        >>> protocol.copy("/datos", "deploy@edge01:/srv/")
+    """
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self._sessions = {}
+        self._session_locks = {}
+
+    async def validate_async(self, source, destination, **options):
+        _require_asyncssh()
+        upload = Path(source).exists()
+        remote = destination if upload else source
+        if not upload and ":" not in source:
+            raise ValidationError(f"Source no existe: {source}")
+        target = self._target(remote, options)
+        try:
+            await self._session(target)
+        except Exception as e:
+            raise ValidationError(f"No se puede conectar a {target[0]}: {e}")
+        return True
+
+    async def list_async(self, path, **options):
+        if Path(path).exists():
+            if os.path.isfile(path):
+                return [(Path(path).name, os.path.getsize(path))]
+            return [
+                (Path(entry.rel).as_posix(), entry.stat.st_size)
+                for entry in walk_tree(path, follow_symlinks=True)
+                if entry.kind == "file"
+            ]
+        _require_asyncssh()
+        target = self._target(path, options)
+        session = await self._session(target)
+        remote_path = target[-1]
+        attrs = await _stat_or_none(session.sftp, remote_path)
+        if attrs is None:
+            raise ProtocolError(f"Ruta remota no existe: {remote_path}")
+        if not _is_dir(attrs):
+            return [(PurePosixPath(remote_path).name, attrs.size)]
+        files, _ = await self._walk_remote(session.sftp, remote_path)
+        return [(rel, attrs.size) for rel, attrs in files]
+
+    async def copy_async(self, source, destination, **options):
+        _require_asyncssh()
+        show_progress = options.get("progress", True)
+        sync = None
+        if options.get("sync", self.config.get("sync", False)):
+            sync = Synchronizer(
+                checksum=options.get("checksum", self.config.get("checksum", False))
+            )
+        state = options.get("state")
+        workers = options.get("workers", self.config.get("workers", DEFAULT_WORKERS))
+        retry = self.retry_policy(options)
+        verify = verify_mode(options, self.config)
+        self.throttle = self.bandwidth_limit(options)
+        started = time.time()
+
+        try:
+            if Path(source).exists():
+                target = self._target(destination, options)
+                session = await self._session(target)
+                tasks = await self._plan_upload(
+                    session, source, target[-1], sync, state
+                )
+                transfer = self._upload_task
+            else:
+                target = self._target(source, options)
+                session = await self._session(target)
+                tasks = await self._plan_download(
+                    session, target[-1], destination, sync, state
+                )
+                transfer = self._download_task
+
+            async def run(task):
+                current = None
+
+                async def attempt(n):
+                    nonlocal current
+                    # El reintento reabre la conexión si era la del intento fallido
+                    current = await self._session(target, stale=current if n else None)
+                    if show_progress and len(tasks) > 1:
+                        print(f"Copiando {task[0]}...")
+                    await transfer(current, task, sync, verify)
+
+                try:
+                    await retry.call_async(attempt, str(task[0]))
+                except Exception:
+                    self.metrics.record_error()
+                    raise
+                if state:
+                    state.mark_done(str(task[0]), task[2].size, task[2].mtime)
+
+            await run_parallel_async(run, tasks, max(1, int(workers)))
+        except CopyWayError as e:
+            logger.error(f"Error en copia SFTP: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Error en copia SFTP: {e}")
+            raise ProtocolError(f"Error en copia SFTP: {e}")
+
+        if show_progress:
+            total = sum(task[2].size for task in tasks)
+            elapsed = time.time() - started
+            print(
+                f"✓ Completado: {len(tasks)} archivos, {format_size(total)} "
+                f"en {elapsed:.1f}s"
+            )
+        if sync:
+            print(sync.summary())
+            logger.info(sync.summary())
+        logger.info("Copia SFTP completada exitosamente")
+
+    async def aclose(self):
+        sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            await session.close()
+
+    def is_retryable(self, exc):
+        """Reintenta cortes y timeouts de la conexión, no los de autenticación."""
+        if asyncssh is not None:
+            if isinstance(exc, asyncssh.PermissionDenied):
+                return False
+            if isinstance(
+                exc,
+                (
+                    asyncssh.ConnectionLost,
+                    asyncssh.DisconnectError,
+                    asyncssh.SFTPConnectionLost,
+                    asyncssh.SFTPNoConnection,
+                ),
+            ):
+                return True
+        if isinstance(exc, asyncio.TimeoutError):
+            return True
+        return super().is_retryable(exc)
+
+    def _target(self, path, options):
+        """(host, puerto, usuario, password, key_file, ruta remota) de ``path``."""
+        user = options.get("user", self.config.get("user"))
+        host_part, sep, remote_path = path.partition(":")
+        if not sep or not host_part:
+            raise ProtocolError(
+                f"Formato inválido: {path}. Usar host:/ruta con --user o usuario@host:/ruta"
+            )
+        if "@" in host_part:
+            user, host = host_part.split("@", 1)
+        else:
+            host = host_part
+            if not user:
+                raise ProtocolError(
+                    "Debe especificar --user o usar formato usuario@host:/ruta"
+                )
+        return (
+            host,
+            int(options.get("port", self.config.get("port", 22))),
+            user,
+            options.get("password", self.config.get("password")),
+            options.get("key_file", self.config.get("key_file")),
+            remote_path or ".",
+        )
+
+    async def _session(self, target, stale=None):
+        """Conexión y canal SFTP compartidos por las transferencias a un host.
+
+        Con ``stale`` (la sesión de un intento fallido) se abre una nueva solo
+        si sigue siendo la vigente: varios archivos que fallan a la vez por el
+        mismo corte reconectan una sola vez.
+        """
+        key = target[:5]
+        lock = self._session_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            session = self._sessions.get(key)
+            if session is not None and session is stale:
+                logger.warning(f"Reconectando a {target[0]}")
+                await session.close()
+                session = None
+            if session is None:
+                with self.metrics.phase("connect"):
+                    session = await _open_session(*key, self._connect_timeout())
+                self._sessions[key] = session
+            return session
+
+    async def _plan_upload(self, session, source, remote_path, sync, state):
+        """Crea los directorios remotos y lista los archivos a subir."""
+        sftp = session.sftp
+        src = Path(source)
+        attrs = await _stat_or_none(sftp, remote_path)
+        if attrs is not None and _is_dir(attrs):
+            remote_path = f"{remote_path.rstrip('/')}/{src.name}"
+            attrs = await _stat_or_none(sftp, remote_path)
+        elif attrs is None:
+            parent = str(PurePosixPath(remote_path).parent)
+            if await _stat_or_none(sftp, parent) is None:
+                raise ProtocolError(f"Directorio remoto no existe: {parent}")
+
+        remote_attrs = {}
+        if src.is_file():
+            files = [(src, remote_path, src.stat())]
+            if attrs is not None:
+                remote_attrs[remote_path] = attrs
+        else:
+            with self.metrics.phase("walk"):
+                dirs, files = [], []
+                # Como sftp, los symlinks se siguen: se sube el contenido de su
+                # destino (archivo o directorio)
+                for entry in walk_tree(src, follow_symlinks=True):
+                    rel = Path(entry.rel).as_posix()
+                    if entry.kind == "dir":
+                        dirs.append(rel)
+                    else:
+                        files.append(
+                            (Path(entry.path), f"{remote_path}/{rel}", entry.stat)
+                        )
+                if sync and attrs is not None:
+                    remote_files, _ = await self._walk_remote(sftp, remote_path)
+                    remote_attrs = {
+                        f"{remote_path}/{rel}": a for rel, a in remote_files
+                    }
+                await self._make_dirs(sftp, remote_path, dirs)
+
+        tasks = []
+        for local_path, remote_item, local_stat in files:
+            if state and state.is_done(
+                str(local_path), local_stat.st_size, local_stat.st_mtime
+            ):
+                continue
+            if sync:
+                dst = remote_attrs.get(remote_item)
+                if await self._is_unchanged(
+                    session,
+                    local_stat.st_size,
+                    local_stat.st_mtime,
+                    dst.size if dst else None,
+                    dst.mtime if dst else None,
+                    lambda: file_checksum(local_path),
+                    lambda: session.digest(remote_item, "sha256"),
+                    sync,
+                ):
+                    continue
+            tasks.append((local_path, remote_item, _LocalAttrs(local_stat)))
+        return tasks
+
+    async def _plan_download(self, session, remote_path, destination, sync, state):
+        """Lista el origen remoto y crea los directorios locales."""
+        sftp = session.sftp
+        attrs = await _stat_or_none(sftp, remote_path)
+        if attrs is None:
+            raise ProtocolError(f"Ruta remota no existe: {remote_path}")
+        local = Path(destination)
+        if local.is_dir():
+            local = local / PurePosixPath(remote_path.rstrip("/")).name
+
+        if _is_dir(attrs):
+            with self.metrics.phase("walk"):
+                remote_files, dirs = await self._walk_remote(sftp, remote_path)
+                local.mkdir(parents=True, exist_ok=True)
+                for rel in dirs:
+                    (local / rel).mkdir(parents=True, exist_ok=True)
+            files = [
+                (f"{remote_path.rstrip('/')}/{rel}", local / rel, a)
+                for rel, a in remote_files
+            ]
+        else:
+            if not local.parent.is_dir():
+                raise ProtocolError(f"Directorio local no existe: {local.parent}")
+            files = [(remote_path, local, attrs)]
+
+        tasks = []
+        for remote_item, local_path, item in files:
+            if state and state.is_done(remote_item, item.size, item.mtime):
+                continue
+            if sync:
+                dst = local_path.stat() if local_path.exists() else None
+                if await self._is_unchanged(
+                    session,
+                    item.size,
+                    item.mtime,
+                    dst.st_size if dst else None,
+                    dst.st_mtime if dst else None,
+                    lambda: session.digest(remote_item, "sha256"),
+                    lambda: file_checksum(local_path),
+                    sync,
+                ):
+                    continue
+            tasks.append((remote_item, local_path, item))
+        return tasks
+
+    async def _is_unchanged(
+        self, session, src_size, src_mtime, dst_size, dst_mtime, src, dst, sync
+    ):
+        """``Synchronizer.should_copy`` con checksums que pueden ser remotos.
+
+        ``src``/``dst`` retornan el checksum de cada lado (un valor o una
+        corrutina); solo se calculan si ``sync.checksum`` y los tamaños
+        coinciden. Registra el archivo como copiado u omitido.
+        """
+        src_digest = dst_digest = None
+        if sync.checksum and dst_size is not None and src_size == dst_size:
+            digests = [src(), dst()]
+            for i, digest in enumerate(digests):
+                if asyncio.iscoroutine(digest):
+                    digests[i] = await digest
+            src_digest, dst_digest = (lambda: digests[0]), (lambda: digests[1])
+        if sync.should_copy(
+            src_size, src_mtime, dst_size, dst_mtime, src_digest, dst_digest
+        ):
+            sync.record_copied(src_size)
+            return False
+        sync.record_skipped(src_size)
+        return True
+
+    async def _upload_task(self, session, task, sync, verify):
+        local_path, remote_path, local_attrs = task
+        await self._put_file(session, str(local_path), remote_path, verify)
+        if sync:
+            with self.metrics.phase("metadata"):
+                await session.sftp.utime(
+                    remote_path, (local_attrs.atime, local_attrs.mtime)
+                )
+
+    async def _download_task(self, session, task, sync, verify):
+        remote_path, local_path, attrs = task
+        await self._get_file(session, remote_path, str(local_path), attrs.size, verify)
+        if sync:
+            with self.metrics.phase("metadata"):
+                os.utime(local_path, (attrs.atime or attrs.mtime, attrs.mtime))
+
+    async def _put_file(self, session, local_path, remote_path, verify=None):
+        """Sube un archivo a un parcial remoto y lo renombra al destino.
+
+        Con ``verify`` el checksum se calcula mientras se envía y se compara
+        con el del parcial calculado en el servidor antes de renombrarlo.
+        """
+        sftp = session.sftp
+        hasher = new_hasher(verify)
+        size = os.path.getsize(local_path)
+        partial = remote_path + PARTIAL_SUFFIX
+        block_size = self._block_size()
+
+        with self.metrics.phase("transfer"), open(local_path, "rb") as local_file:
+
+            def blocks():
+                # Lecturas locales chicas y secuenciales: el hash sigue el orden
+                offset = 0
+                while True:
+                    data = local_file.read(block_size)
+                    if not data:
+                        return
+                    if hasher is not None:
+                        hasher.update(data)
+                    yield offset, data
+                    offset += len(data)
+
+            async with sftp.open(partial, "wb") as remote_file:
+
+                async def write(block):
+                    offset, data = block
+                    if self.throttle is not None:
+                        await self.throttle.consume_async(len(data))
+                    await remote_file.write(data, offset)
+
+                await run_parallel_async(write, blocks(), self._max_requests())
+
+        attrs = await sftp.stat(partial)
+        if attrs.size != size:
+            raise TransientError(f"Tamaño remoto incorrecto tras subir {local_path}")
+        if hasher is not None:
+            with self.metrics.phase("verify"):
+                remote_digest = await session.digest(partial, verify)
+            if remote_digest != hasher.hexdigest():
+                await sftp.remove(partial)
+                raise IntegrityError(f"Checksum {verify} no coincide en {remote_path}")
+        await _rename_remote(sftp, partial, remote_path)
+        self.metrics.count_file(size)
+
+    async def _get_file(self, session, remote_path, local_path, size, verify=None):
+        """Descarga un archivo a un parcial local y lo renombra al destino.
+
+        Mantiene ``max_requests`` lecturas en vuelo y escribe los bloques en
+        orden a medida que llegan.
+        """
+        hasher = new_hasher(verify)
+        partial = local_path + PARTIAL_SUFFIX
+        block_size = self._block_size()
+
+        with self.metrics.phase("transfer"):
+            async with session.sftp.open(remote_path, "rb") as remote_file:
+                offsets = iter(range(0, size, block_size))
+                window = deque()
+
+                def request_next():
+                    offset = next(offsets, None)
+                    if offset is not None:
+                        length = min(block_size, size - offset)
+                        window.append(
+                            (
+                                offset,
+                                length,
+                                asyncio.ensure_future(remote_file.read(length, offset)),
+                            )
+                        )
+
+                for _ in range(self._max_requests()):
+                    request_next()
+                try:
+                    with open(partial, "wb") as local_file:
+                        while window:
+                            offset, length, request = window.popleft()
+                            data = await request
+                            request_next()
+                            # El servidor puede responder menos de lo pedido
+                            while len(data) < length:
+                                more = await remote_file.read(
+                                    length - len(data), offset + len(data)
+                                )
+                                if not more:
+                                    break
+                                data += more
+                            if self.throttle is not None:
+                                await self.throttle.consume_async(len(data))
+                            local_file.write(data)
+                            if hasher is not None:
+                                hasher.update(data)
+                finally:
+                    for _, _, request in window:
+                        request.cancel()
+
+        if os.path.getsize(partial) != size:
+            raise TransientError(f"Tamaño local incorrecto tras bajar {remote_path}")
+        if hasher is not None:
+            with self.metrics.phase("verify"):
+                remote_digest = await session.digest(remote_path, verify)
+            if remote_digest != hasher.hexdigest():
+                os.remove(partial)
+                raise IntegrityError(f"Checksum {verify} no coincide en {local_path}")
+        os.replace(partial, local_path)
+        self.metrics.count_file(size)
+
+    async def _walk_remote(self, sftp, root):
+        """Recorre un árbol remoto listando cada nivel en paralelo.
+
+        Returns:
+            tuple: (archivos como (ruta relativa, atributos), directorios
+                relativos en orden top-down)
+        """
+        files, dirs = [], []
+        root = root.rstrip("/") or "/"
+
+        async def scan(rel):
+            path = f"{root}/{rel}" if rel else root
+            subdirs = []
+            for entry in await sftp.readdir(path):
+                if entry.filename in (".", ".."):
+                    continue
+                child = f"{rel}/{entry.filename}" if rel else entry.filename
+                attrs = entry.attrs
+                if stat.S_ISLNK(attrs.permissions or 0):
+                    attrs = await _stat_or_none(sftp, f"{root}/{child}")
+                    if attrs is None:
+                        continue
+                if _is_dir(attrs):
+                    subdirs.append(child)
+                elif stat.S_ISREG(attrs.permissions or 0):
+                    files.append((child, attrs))
+            return subdirs
+
+        level = [""]
+        while level:
+            found = await asyncio.gather(*(scan(rel) for rel in level))
+            level = [d for subdirs in found for d in subdirs]
+            dirs.extend(level)
+        return files, dirs
+
+    async def _make_dirs(self, sftp, root, dirs):
+        """Crea ``root`` y sus subdirectorios, un nivel a la vez en paralelo."""
+        await _mkdir(sftp, root)
+        levels = {}
+        for rel in dirs:
+            levels.setdefault(rel.count("/"), []).append(f"{root}/{rel}")
+        for depth in sorted(levels):
+            await asyncio.gather(*(_mkdir(sftp, d) for d in levels[depth]))
+
+    def _block_size(self):
+        return int(self.config.get("block_size", DEFAULT_BLOCK_SIZE))
+
+    def _max_requests(self):
+        return max(1, int(self.config.get("max_requests", DEFAULT_MAX_REQUESTS)))
+
+    def _connect_timeout(self):
+        return float(self.config.get("connect_timeout", DEFAULT_CONNECT_TIMEOUT))
+
+
+class _Session:
+    """Conexión SSH con su canal SFTP, compartida por las transferencias."""
+
+    def __init__(self, conn, sftp):
+        self.conn = conn
+        self.sftp = sftp
+        self._exec_slots = asyncio.Semaphore(MAX_EXEC_SESSIONS)
+
+    async def digest(self, remote_path, mode):
+        """Checksum remoto de ``mode`` (``sha256sum``/``xxh128sum`` en el host)."""
+        command = f"{REMOTE_COMMANDS[mode]} {shlex.quote(remote_path)}"
+        async with self._exec_slots:
+            result = await self.conn.run(command, check=False)
+        output = (result.stdout or "").strip()
+        if result.exit_status != 0 or not output:
+            raise ProtocolError(
+                f"No se pudo calcular checksum remoto de {remote_path}: "
+                f"{(result.stderr or '').strip()}"
+            )
+        return output.split()[0]
+
+    async def close(self):
+        try:
+            self.sftp.exit()
+            self.conn.close()
+            await self.conn.wait_closed()
+        except Exception as e:
+            logger.debug(f"Error cerrando conexión SSH: {e}")
+
+
+class _LocalAttrs:
+    """``os.stat_result`` con los nombres de los atributos de asyncssh."""
+
+    def __init__(self, st):
+        self.size = st.st_size
+        self.mtime = st.st_mtime
+        self.atime = st.st_atime
+
+
+async def _open_session(host, port, user, password, key_file, timeout):
+    # Sin verificación de host keys, como la política AutoAdd del pool paramiko
+    kwargs = {"port": port, "username": user, "known_hosts": None}
+    if key_file:
+        kwargs["client_keys"] = [os.path.expanduser(key_file)]
+    if password:
+        kwargs["password"] = password
+    conn = await asyncio.wait_for(asyncssh.connect(host, **kwargs), timeout)
+    try:
+        sftp = await conn.start_sftp_client()
+    except BaseException:
+        conn.close()
+        raise
+    logger.debug(f"Conexión SSH (asyncssh) abierta a {host}:{port}")
+    return _Session(conn, sftp)
+
+
+async def _stat_or_none(sftp, remote_path):
+    try:
+        return await sftp.stat(remote_path)
+    except asyncssh.SFTPNoSuchFile:
+        return None
+
+
+async def _mkdir(sftp, path):
+    try:
+        await sftp.mkdir(path)
+    except asyncssh.SFTPError:
+        attrs = await _stat_or_none(sftp, path)
+        if attrs is None or not _is_dir(attrs):
+            raise
+
+
+async def _rename_remote(sftp, source, target):
+    """Renombra reemplazando el destino (posix-rename si el servidor lo admite)."""
+    try:
+        await sftp.posix_rename(source, target)
+    except asyncssh.SFTPOpUnsupported:
+        if await _stat_or_none(sftp, target) is not None:
+            await sftp.remove(target)
+        await sftp.rename(source, target)
+
+
+def _is_dir(attrs):
+    return stat.S_ISDIR(attrs.permissions or 0)
+
+
+def _require_asyncssh():
+    if asyncssh is None:
+        raise ProtocolError("asyncssh no instalado. Ejecutar: pip install asyncssh")
@@ -5,6 +5,14 @@ de transferencia en CopyWay.
 """
 
 from abc import ABC, abstractmethod
+from ..exceptions import ProtocolError
+from ..utils.metrics import TransferMetrics
+from ..utils.retry import RetryPolicy, RetryStats, is_transient
+from ..utils.throttle import Throttle
+
+# Sufijo de los archivos parciales (transferencias reanudables y fan-out);
+# se renombran al completarse
+PARTIAL_SUFFIX = ".copyway-part"
 
 
 class Protocol(ABC):
@@ -15,6 +23,12 @@ class Protocol(ABC):
 
     Attributes:
         config (dict): Configuración específica del protocolo
+        retry_stats (RetryStats): Reintentos hechos por las copias de esta
+            instancia
+        throttle (Throttle): Límite de ancho de banda de la copia en curso,
+            o None sin límite
+        metrics (TransferMetrics): Duración por fase y contadores de las
+            copias de esta instancia
 
     Example:
         >>> class CustomProtocol(Protocol):
@@ -32,6 +46,74 @@ class Protocol(ABC):
             config (dict, optional): Configuración del protocolo. Default: {}
         """
         self.config = config or {}
+        self.retry_stats = RetryStats()
+        self.throttle = None
+        self.metrics = TransferMetrics()
+
+    def is_retryable(self, exc):
+        """Indica si un error de una operación de copia es transitorio.
+
+        Los protocolos la redefinen para clasificar sus propios errores
+        (códigos de salida, mensajes de la herramienta, excepciones de red).
+
+        Args:
+            exc (Exception): Error de la operación
+
+        Returns:
+            bool: True si conviene reintentar la operación
+        """
+        return is_transient(exc)
+
+    def retry_policy(self, options):
+        """Política de reintentos de una copia (``retries``, ``retry_delay``...).
+
+        Args:
+            options (dict): Opciones de la copia
+
+        Returns:
+            RetryPolicy: Con el clasificador del protocolo y ``retry_stats``
+        """
+        return RetryPolicy.from_config(
+            self.config, options, self.is_retryable, self.retry_stats
+        )
+
+    def bandwidth_limit(self, options):
+        """Límite de ancho de banda de una copia (``bwlimit``, ``bwlimit_file``).
+
+        Un ``Throttle`` compartido en ``options["throttle"]`` (ej: el límite
+        global de un batch) se respeta además del propio de la copia.
+
+        Args:
+            options (dict): Opciones de la copia
+
+        Returns:
+            Throttle: Limitador a consultar por cada bloque, o None sin límite
+        """
+        return Throttle.from_config(
+            self.config, options, parent=options.get("throttle")
+        )
+
+    def open_sink(self, source, destination, **options):
+        """Abre ``destination`` para recibir una copia con varios destinos.
+
+        En un fan-out (``copyway.fanout``) el origen se lee una sola vez y
+        cada destino recibe sus bloques por un ``Sink``. Los protocolos que
+        no pueden escribir un stream no lo redefinen.
+
+        Args:
+            source (str): Origen local (para resolver el nombre en destino)
+            destination (str): Ruta de destino
+            **options: Opciones de la copia
+
+        Returns:
+            Sink: Destino abierto
+
+        Raises:
+            ProtocolError: Si el protocolo no admite varios destinos
+        """
+        raise ProtocolError(
+            f"{type(self).__name__} no admite copias a varios destinos: {destination}"
+        )
 
     @abstractmethod
     def copy(self, source, destination, **options):
@@ -65,3 +147,112 @@ class Protocol(ABC):
             ValidationError: Si la validación falla
         """
         pass
+
+
+class Sink(ABC):
+    """Destino de una copia con varios destinos (ver ``Protocol.open_sink``).
+
+    Recibe los archivos de un origen que se lee una sola vez. Las rutas son
+    relativas al origen: "" es el origen mismo (un archivo o la raíz del
+    árbol), que en destino es ``base``. Cada ``open`` devuelve un archivo
+    con ``write(data)``, ``commit()`` (lo deja en su lugar, aplicando
+    ``stat`` si corresponde) y ``abort()`` (descarta lo escrito). Un sink lo
+    usa un solo hilo a la vez.
+
+    Attributes:
+        base (str): Ruta destino del origen
+    """
+
+    def __init__(self, base):
+        self.base = base
+
+    def path(self, rel):
+        """Ruta destino de ``rel``."""
+        return f"{self.base.rstrip('/')}/{rel}" if rel else self.base
+
+    @abstractmethod
+    def makedirs(self, rels):
+        """Crea ``base`` y los directorios ``rels`` (en orden top-down)."""
+
+    @abstractmethod
+    def open(self, rel, stat):
+        """Abre el archivo ``rel`` (con el ``os.stat_result`` del origen)."""
+
+    def reconnect(self):
+        """Prepara un reintento tras un error (ej: reabrir la conexión)."""
+
+    def close(self):
+        """Cierra el destino y aplica lo pendiente (ej: replicación HDFS)."""
+
+
+class AsyncProtocol(Protocol):
+    """Protocolo con operaciones asíncronas (asyncio).
+
+    Un protocolo asíncrono puede mover cientos de archivos, de muchos hosts,
+    en un solo event loop y sin un hilo por archivo. Implementa
+    ``copy_async``, ``validate_async`` y ``list_async``; ``copy`` y
+    ``validate`` son envoltorios sincrónicos para la CLI y el daemon. El
+    modo batch ejecuta los trabajos asíncronos en un único event loop.
+
+    Las conexiones que abra una instancia duran mientras corre su event
+    loop: ``aclose`` las cierra y los envoltorios la llaman al terminar.
+
+    Example:
+        >>> protocol = ProtocolFactory.create("asftp")
+        >>> await protocol.copy_async("/datos", "edge01:/srv/datos")
+        >>> await protocol.aclose()
+    """
+
+    def copy(self, source, destination, **options):
+        """Ejecuta ``copy_async`` en un event loop propio."""
+        return self._run(self.copy_async(source, destination, **options))
+
+    def validate(self, source, destination, **options):
+        """Ejecuta ``validate_async`` en un event loop propio."""
+        return self._run(self.validate_async(source, destination, **options))
+
+    def _run(self, coro):
+        from ..utils.aio import run_sync
+
+        async def run():
+            try:
+                return await coro
+            finally:
+                await self.aclose()
+
+        return run_sync(run())
+
+    async def aclose(self):
+        """Cierra las conexiones abiertas por la instancia."""
+
+    @abstractmethod
+    async def copy_async(self, source, destination, **options):
+        """Versión asíncrona de ``copy``.
+
+        Raises:
+            ProtocolError: Si ocurre un error durante la copia
+        """
+
+    @abstractmethod
+    async def validate_async(self, source, destination, **options):
+        """Versión asíncrona de ``validate``.
+
+        Returns:
+            bool: True si la validación es exitosa
+
+        Raises:
+            ValidationError: Si la validación falla
+        """
+
+    @abstractmethod
+    async def list_async(self, path, **options):
+        """Lista recursivamente los archivos bajo ``path``.
+
+        Args:
+            path (str): Ruta (local o remota, según el protocolo)
+            **options: Opciones específicas del protocolo
+
+        Returns:
+            list: Tuplas (ruta relativa con "/", tamaño en bytes); para un
+                archivo, una sola tupla con su nombre
+        """
@@ -4,18 +4,35 @@ Este módulo implementa el patrón Factory para gestionar el registro
 y creación de protocolos de transferencia.
 """
 
+from importlib import import_module
 from ..exceptions import ProtocolError
 from ..utils.logger import logger
 
+# Protocolos incluidos, como rutas "módulo:Clase" (las mismas que los entry
+# points de pyproject.toml): cada módulo, y sus dependencias pesadas como
+# paramiko, se importa recién al crear el primer protocolo de ese tipo
+BUILTIN_PROTOCOLS = {
+    "local": "copyway.protocols.local:LocalProtocol",
+    "ssh": "copyway.protocols.ssh:SSHProtocol",
+    "hdfs": "copyway.protocols.hdfs:HDFSProtocol",
+    "sftp": "copyway.protocols.sftp:SFTPProtocol",
+    "asftp": "copyway.protocols.asftp:AsyncSFTPProtocol",
+}
+ENTRY_POINT_GROUP = "copyway.protocols"
+
 
 class ProtocolFactory:
     """Factory para crear y gestionar protocolos de transferencia.
 
     Implementa el patrón Factory para registrar y crear instancias de
-    protocolos. Soporta protocolos built-in y personalizados.
+    protocolos. Soporta protocolos built-in y personalizados, registrados
+    con ``register`` o como entry points del grupo ``copyway.protocols``
+    de otros paquetes. Las clases se resuelven de forma diferida: un
+    protocolo no se importa hasta que se crea una instancia.
 
     Attributes:
-        _protocols (dict): Registro de protocolos disponibles
+        _protocols (dict): Registro de protocolos disponibles (clase o ruta
+            "módulo:Clase")
 
     Example:
         >>> from copyway.protocols import ProtocolFactory
@@ -23,7 +40,8 @@ class ProtocolFactory:
         >>> protocol.copy('/origen', '/destino')
     """
 
-    _protocols = {}
+    _protocols = dict(BUILTIN_PROTOCOLS)
+    _entry_points_loaded = False
 
     @classmethod
     def register(cls, name, protocol_class):
@@ -31,12 +49,14 @@ class ProtocolFactory:
 
         Args:
             name (str): Nombre del protocolo (ej: 'local', 'ssh', 'sftp')
-            protocol_class (type): Clase del protocolo que hereda de Protocol
+            protocol_class (type | str): Clase del protocolo que hereda de
+                Protocol, o su ruta "módulo:Clase" para importarla al usarla
 
         Example:
             >>> class S3Protocol(Protocol):
             ...     pass
             >>> ProtocolFactory.register('s3', S3Protocol)
+            >>> ProtocolFactory.register('gcs', 'copyway_gcs:GCSProtocol')
         """
         cls._protocols[name] = protocol_class
         logger.debug(f"Protocolo registrado: {name}")
@@ -53,37 +73,78 @@ class ProtocolFactory:
             Protocol: Instancia del protocolo solicitado
 
         Raises:
-            ProtocolError: Si el protocolo no está registrado
+            ProtocolError: Si el protocolo no está registrado o no se puede
+                importar
 
         Example:
             >>> protocol = ProtocolFactory.create('sftp', {'port': 22})
         """
-        if name not in cls._protocols:
+        return cls.get(name)(config)
+
+    @classmethod
+    def get(cls, name):
+        """Clase de un protocolo, importándola si hace falta.
+
+        Args:
+            name (str): Nombre del protocolo registrado
+
+        Returns:
+            type: Clase del protocolo
+
+        Raises:
+            ProtocolError: Si el protocolo no está registrado o no se puede
+                importar
+        """
+        if not cls.is_registered(name):
             raise ProtocolError(f"Protocolo no soportado: {name}")
-        return cls._protocols[name](config)
+        protocol_class = cls._protocols[name]
+        if isinstance(protocol_class, str):
+            protocol_class = _import_class(name, protocol_class)
+            cls._protocols[name] = protocol_class
+        return protocol_class
+
+    @classmethod
+    def is_registered(cls, name):
+        """Indica si hay un protocolo ``name``, sin importarlo.
+
+        Los entry points solo se consultan si no es uno ya registrado.
+        """
+        if name not in cls._protocols:
+            cls._load_entry_points()
+        return name in cls._protocols
 
     @classmethod
     def list_protocols(cls):
         """Lista todos los protocolos registrados.
 
+        Incluye los entry points instalados, sin importarlos.
+
         Returns:
             list: Lista de nombres de protocolos disponibles
 
         Example:
             >>> protocols = ProtocolFactory.list_protocols()
             >>> print(protocols)
-            ['local', 'ssh', 'sftp', 'hdfs']
+            ['local', 'ssh', 'hdfs', 'sftp']
         """
+        cls._load_entry_points()
         return list(cls._protocols.keys())
 
-
-# Registro de protocolos built-in
-from .local import LocalProtocol
-from .ssh import SSHProtocol
-from .hdfs import HDFSProtocol
-from .sftp import SFTPProtocol
-
-ProtocolFactory.register("local", LocalProtocol)
-ProtocolFactory.register("ssh", SSHProtocol)
-ProtocolFactory.register("hdfs", HDFSProtocol)
-ProtocolFactory.register("sftp", SFTPProtocol)
+    @classmethod
+    def _load_entry_points(cls):
+        """Agrega (una vez) los entry points que no estén ya registrados."""
+        if cls._entry_points_loaded:
+            return
+        cls._entry_points_loaded = True
+        from importlib.metadata import entry_points
+
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            cls._protocols.setdefault(entry_point.name, entry_point.value)
+
+
+def _import_class(name, path):
+    module_name, _, class_name = path.partition(":")
+    try:
+        return getattr(import_module(module_name), class_name)
+    except (ImportError, AttributeError) as e:
+        raise ProtocolError(f"No se pudo cargar el protocolo {name} ({path}): {e}")
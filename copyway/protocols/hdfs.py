@@ -1,10 +1,46 @@
+import os
+import queue
 import subprocess
-import time
+import tempfile
+import threading
+from datetime import datetime
 from pathlib import Path
-from .base import Protocol
-from ..exceptions import ProtocolError
+from .base import Protocol, Sink
+from ..exceptions import (
+    CopyWayError,
+    IntegrityError,
+    ProtocolError,
+    StallError,
+    TransientError,
+    ValidationError,
+)
 from ..utils.logger import logger
-from ..utils.progress import get_file_size, format_size, format_speed
+from ..utils.monitor import (
+    LocalSizeMeter,
+    SourceReadMeter,
+    run_monitored,
+    stall_settings,
+)
+from ..utils.progress import AttemptProgress, ProgressCallback, get_file_size
+from ..utils.sync import Synchronizer
+from ..utils.concurrency import run_parallel
+from ..utils.integrity import verify_mode
+from ..utils.walker import walk_tree
+from ..utils.webhdfs import DEFAULT_CHUNK_SIZE, DEFAULT_TIMEOUT, get_client
+
+# Errores de HDFS que reintentar no resuelve
+PERMANENT_ERRORS = (
+    "No such file or directory",
+    "Permission denied",
+    "AccessControlException",
+    "FileAlreadyExistsException",
+    "File exists",
+    "QuotaExceededException",
+    "Is a directory",
+    "is not a directory",
+)
+# Rutas por invocación de -mkdir/-setrep/-chmod (límite de longitud de la línea de comandos)
+BULK_ARGS = 1000
 
 
 class HDFSProtocol(Protocol):
@@ -12,7 +48,14 @@ class HDFSProtocol(Protocol):
         from ..utils.validators import validate_source, validate_destination
 
         validate_source(source, "hdfs")
-        validate_destination(destination, "hdfs")
+        client = self._webhdfs_client()
+        if client is None:
+            validate_destination(destination, "hdfs")
+            return True
+        try:
+            client.status("/")
+        except CopyWayError as e:
+            raise ValidationError(f"No se puede conectar a WebHDFS: {e}")
         return True
 
     def copy(self, source, destination, **options):
@@ -28,35 +71,147 @@ class HDFSProtocol(Protocol):
             if not is_hdfs_source and Path(source).exists():
                 total_size = get_file_size(source)
 
-            if show_progress and total_size > 0:
-                print(f"Copiando {format_size(total_size)}...", flush=True)
-                start_time = time.time()
+            progress = (
+                ProgressCallback(total_size, "Copiando") if show_progress else None
+            )
+            callback = progress.update if progress else None
+
+            sync = None
+            if options.get("sync", self.config.get("sync", False)):
+                if options.get("checksum", self.config.get("checksum", False)):
+                    logger.warning(
+                        "HDFS no expone checksums comparables con archivos locales; "
+                        "el sync usa tamaño + mtime"
+                    )
+                # `hdfs dfs -ls` tiene resolución de minutos y el destino no
+                # conserva el mtime del origen: basta con que no sea más antiguo
+                sync = Synchronizer(mtime_tolerance=60, newer=True)
+
+            verify = verify_mode(options, self.config)
+            if verify in ("xxhash", "sha256"):
+                logger.warning(
+                    "HDFS no expone checksums comparables con un hash del archivo "
+                    "local; --verify compara tamaños"
+                )
+
+            # Con sync, estado de trabajo, varios workers o verificación se
+            # transfiere archivo por archivo
+            workers = int(options.get("workers", self.config.get("workers", 1)))
+            incremental = (
+                sync is not None
+                or options.get("state") is not None
+                or workers > 1
+                or verify is not None
+            )
+            client = self._webhdfs_client()
+            retry = self.retry_policy(options)
+            self.throttle = self.bandwidth_limit(options)
+            if self.throttle is not None and not client:
+                logger.warning(
+                    "`hdfs dfs` no permite limitar el ancho de banda; "
+                    "--bwlimit requiere backend: webhdfs"
+                )
 
             if is_hdfs_source and not is_hdfs_dest:
                 # Descargar desde HDFS a local
-                self._download_from_hdfs(source, destination, **options)
+                if client:
+                    self._webhdfs_download(
+                        client,
+                        source,
+                        destination,
+                        synchronizer=sync,
+                        callback=callback,
+                        retry=retry,
+                        **options,
+                    )
+                elif incremental:
+                    self._incremental_download(
+                        source,
+                        destination,
+                        synchronizer=sync,
+                        callback=callback,
+                        retry=retry,
+                        **options,
+                    )
+                else:
+                    self._download_from_hdfs(
+                        source, destination, callback=callback, retry=retry, **options
+                    )
             elif not is_hdfs_source and is_hdfs_dest:
                 # Subir desde local a HDFS
-                self._upload_to_hdfs(source, destination, **options)
+                if client:
+                    self._webhdfs_upload(
+                        client,
+                        source,
+                        destination,
+                        synchronizer=sync,
+                        callback=callback,
+                        retry=retry,
+                        **options,
+                    )
+                elif incremental:
+                    self._incremental_upload(
+                        source,
+                        destination,
+                        synchronizer=sync,
+                        callback=callback,
+                        retry=retry,
+                        **options,
+                    )
+                else:
+                    self._upload_to_hdfs(
+                        source, destination, callback=callback, retry=retry, **options
+                    )
             else:
                 raise ProtocolError("Debe especificar una ruta HDFS y una local")
 
-            if show_progress and total_size > 0:
-                elapsed = time.time() - start_time
-                speed = total_size / elapsed if elapsed > 0 else 0
-                print(
-                    f"✓ Completado: {format_size(total_size)} en {elapsed:.1f}s ({format_speed(speed)})"
-                )
+            if sync:
+                print(sync.summary())
+                logger.info(sync.summary())
+
+            if progress:
+                progress.update(max(0, total_size - progress.copied))
+                progress.finish()
 
             logger.info("Copia HDFS completada exitosamente")
 
         except subprocess.CalledProcessError as e:
             logger.error(f"Error en copia HDFS: {e.stderr}")
             raise ProtocolError(f"Error en copia HDFS: {e.stderr}")
+        except StallError:
+            raise
         except Exception as e:
             logger.error(f"Error en copia HDFS: {e}")
             raise ProtocolError(f"Error en copia HDFS: {e}")
 
+    def open_sink(self, source, destination, **options):
+        """Destino HDFS de un fan-out (ver ``Protocol.open_sink``).
+
+        Con WebHDFS cada archivo es un CREATE cuyo cuerpo se alimenta con los
+        bloques del fan-out; con el backend ``cli`` cada archivo es un
+        ``hdfs dfs -put -f -`` que los recibe por stdin. Los destinos
+        existentes se reemplazan.
+        """
+        client = self._webhdfs_client()
+        dest = destination.rstrip("/") or "/"
+        if client is not None:
+            status = client.status(dest)
+            is_dir = bool(status) and status["type"] == "DIRECTORY"
+        else:
+            is_dir = (
+                subprocess.run(
+                    ["hdfs", "dfs", "-test", "-d", dest], capture_output=True
+                ).returncode
+                == 0
+            )
+        base = f"{dest.rstrip('/')}/{Path(source).name}" if is_dir else dest
+        return _HDFSSink(
+            base,
+            client,
+            options.get("replication", self.config.get("replication")),
+            options.get("permission", self.config.get("permission")),
+        )
+
     def _is_hdfs_path(self, path):
         """Detecta si una ruta es HDFS (empieza con / o hdfs://)"""
         import os
@@ -67,7 +222,43 @@ class HDFSProtocol(Protocol):
             return True
         return False
 
-    def _upload_to_hdfs(self, source, destination, **options):
+    def is_retryable(self, exc):
+        """Reintenta las fallas de ``hdfs dfs`` salvo errores permanentes.
+
+        Las excepciones de la JVM (NameNode en standby o en safe mode,
+        DataNodes caídos, timeouts) son muy variadas, así que se reintenta
+        todo salvo los errores conocidos de rutas, permisos o cuota. Del
+        backend WebHDFS solo se reintentan los ``TransientError``.
+        """
+        if isinstance(exc, subprocess.CalledProcessError):
+            stderr = exc.stderr or ""
+            return not any(error in stderr for error in PERMANENT_ERRORS)
+        if isinstance(exc, ProtocolError) and not isinstance(exc, TransientError):
+            return False
+        return super().is_retryable(exc)
+
+    def _webhdfs_client(self):
+        """Cliente WebHDFS compartido si la configuración usa ``backend: webhdfs``.
+
+        Returns:
+            WebHDFSClient: Cliente del pool, o None con el backend ``cli``
+                (``hdfs dfs``)
+        """
+        if self.config.get("backend", "cli") != "webhdfs":
+            return None
+        url = self.config.get("url")
+        if not url:
+            raise ProtocolError("El backend webhdfs requiere 'url' en la sección hdfs")
+        return get_client(
+            url,
+            user=self.config.get("user"),
+            timeout=self.config.get("timeout", DEFAULT_TIMEOUT),
+            chunk_size=int(self.config.get("chunk_size", DEFAULT_CHUNK_SIZE)),
+        )
+
+    def _upload_to_hdfs(
+        self, source, destination, callback=None, retry=None, **options
+    ):
         """Subir archivo/directorio desde local a HDFS"""
         replication = options.get("replication", self.config.get("replication"))
         overwrite = options.get("overwrite", self.config.get("overwrite", False))
@@ -81,19 +272,37 @@ class HDFSProtocol(Protocol):
         cmd.extend([source, destination])
 
         logger.info(f"Subiendo a HDFS: {' '.join(cmd)}")
-        subprocess.run(cmd, check=True, capture_output=True, text=True)
+        meter = AttemptProgress(callback)
 
-        if replication:
-            subprocess.run(
-                ["hdfs", "dfs", "-setrep", str(replication), destination], check=True
+        def attempt_put(attempt):
+            # Un reintento reemplaza lo que llegó a subir el intento fallido
+            retry_cmd = cmd if overwrite or not attempt else [*cmd[:3], "-f", *cmd[3:]]
+            run_monitored(
+                retry_cmd,
+                measure=SourceReadMeter(source),
+                callback=meter.attempt(),
+                **stall_settings(self.config, options),
             )
 
-        if permission:
-            subprocess.run(
-                ["hdfs", "dfs", "-chmod", permission, destination], check=True
-            )
+        with self.metrics.phase("transfer"):
+            self._retry(retry, attempt_put, source)
+        self.metrics.count_path(source)
+
+        with self.metrics.phase("metadata"):
+            if replication:
+                subprocess.run(
+                    ["hdfs", "dfs", "-setrep", str(replication), destination],
+                    check=True,
+                )
+
+            if permission:
+                subprocess.run(
+                    ["hdfs", "dfs", "-chmod", permission, destination], check=True
+                )
 
-    def _download_from_hdfs(self, source, destination, **options):
+    def _download_from_hdfs(
+        self, source, destination, callback=None, retry=None, **options
+    ):
         """Descargar archivo/directorio desde HDFS a local"""
         overwrite = options.get("overwrite", self.config.get("overwrite", False))
 
@@ -104,5 +313,638 @@ class HDFSProtocol(Protocol):
 
         cmd.extend([source, destination])
 
+        target = Path(destination)
+        if target.is_dir():
+            target = target / source.rstrip("/").rsplit("/", 1)[-1]
+
         logger.info(f"Descargando desde HDFS: {' '.join(cmd)}")
-        subprocess.run(cmd, check=True, capture_output=True, text=True)
+        meter = AttemptProgress(callback)
+        with self.metrics.phase("transfer"):
+            self._retry(
+                retry,
+                lambda attempt: run_monitored(
+                    cmd,
+                    measure=LocalSizeMeter(str(target)),
+                    callback=meter.attempt(),
+                    **stall_settings(self.config, options),
+                ),
+                source,
+            )
+        self.metrics.count_path(target)
+
+    def _list_hdfs(self, *paths):
+        """Lista recursivamente los archivos bajo una o más rutas HDFS.
+
+        Returns:
+            dict: {ruta: (tamaño, mtime)}; sin las rutas que no existen
+        """
+        result = subprocess.run(
+            ["hdfs", "dfs", "-ls", "-R", *paths], capture_output=True, text=True
+        )
+
+        files = {}
+        for line in result.stdout.splitlines():
+            # -rw-r--r--   3 user group   1234 2024-01-01 12:00 /ruta/archivo
+            parts = line.split(None, 7)
+            if len(parts) < 8 or parts[0].startswith("d"):
+                continue
+            mtime = datetime.strptime(f"{parts[5]} {parts[6]}", "%Y-%m-%d %H:%M")
+            files[parts[7]] = (int(parts[4]), mtime.timestamp())
+        return files
+
+    def _incremental_upload(
+        self,
+        source,
+        destination,
+        synchronizer=None,
+        callback=None,
+        retry=None,
+        **options,
+    ):
+        """Sube archivo por archivo a HDFS, opcionalmente en paralelo.
+
+        Omite los archivos sin cambios (``synchronizer``) y los ya completados
+        en el estado del trabajo (``state``). Lista el destino una vez, crea
+        todos los directorios destino con un solo ``-mkdir -p`` y agrupa los
+        archivos por directorio; con ``workers`` > 1 cada grupo se reparte en
+        lotes que se suben con ``hdfs dfs -put`` concurrentes, y cada lote se
+        reintenta según ``retry`` (con ``-f``, para reemplazar lo que subió el
+        intento fallido). La replicación y los permisos se aplican
+        al final, en bloque.
+        """
+        replication = options.get("replication", self.config.get("replication"))
+        permission = options.get("permission", self.config.get("permission"))
+        overwrite = options.get("overwrite", self.config.get("overwrite", False))
+        state = options.get("state")
+        workers = max(1, int(options.get("workers", self.config.get("workers", 1))))
+        force = overwrite or synchronizer is not None or state is not None
+        verify = options.get("verify", self.config.get("verify"))
+        stall = stall_settings(self.config, options)
+
+        src = Path(source)
+        dest = destination.rstrip("/") or "/"
+        with self.metrics.phase("walk"):
+            dest_is_dir = (
+                subprocess.run(["hdfs", "dfs", "-test", "-d", dest]).returncode == 0
+            )
+            base = f"{dest.rstrip('/')}/{src.name}" if dest_is_dir else dest
+            remote = self._list_hdfs(base) if synchronizer else {}
+
+            pending, stats = self._plan_upload(src, base, remote, synchronizer, state)
+
+        if not pending:
+            return
+
+        if src.is_file():
+            groups = {base: [src]}
+        else:
+            groups = {}
+            for target, local in pending.items():
+                groups.setdefault(target.rsplit("/", 1)[0], []).append(local)
+            dirs = list(groups)
+            for i in range(0, len(dirs), BULK_ARGS):
+                subprocess.run(
+                    ["hdfs", "dfs", "-mkdir", "-p", *dirs[i : i + BULK_ARGS]],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                )
+
+        remote_of = {local: target for target, local in pending.items()}
+
+        # Cada directorio se parte en hasta `workers` lotes para repartir la carga
+        batches = []
+        for target, files in groups.items():
+            size = -(-len(files) // workers)
+            batches.extend(
+                (target, files[i : i + size]) for i in range(0, len(files), size)
+            )
+
+        def put(batch):
+            target, files = batch
+            logger.info(f"Subiendo {len(files)} archivos a HDFS: {target}")
+            meter = AttemptProgress(callback)
+
+            def attempt_put(attempt):
+                flags = ["-f"] if force or attempt > 0 else []
+                with self.metrics.phase("transfer"):
+                    run_monitored(
+                        ["hdfs", "dfs", "-put", *flags, *map(str, files), target],
+                        measure=SourceReadMeter(source),
+                        callback=meter.attempt(),
+                        **stall,
+                    )
+                if verify:
+                    with self.metrics.phase("verify"):
+                        self._verify_sizes(
+                            {remote_of[local]: stats[local].st_size for local in files}
+                        )
+
+            self._retry(retry, attempt_put, target)
+            self.metrics.count_file(
+                sum(stats[local].st_size for local in files), len(files)
+            )
+            if state:
+                for local in files:
+                    st = stats[local]
+                    state.mark_done(str(local), st.st_size, st.st_mtime)
+
+        if workers == 1:
+            for batch in batches:
+                put(batch)
+        else:
+            logger.debug(f"Subiendo {len(batches)} lotes con {workers} hilos")
+            run_parallel(put, batches, workers)
+
+        paths = list(pending)
+        with self.metrics.phase("metadata"):
+            for i in range(0, len(paths), BULK_ARGS):
+                chunk = paths[i : i + BULK_ARGS]
+                if replication:
+                    subprocess.run(
+                        ["hdfs", "dfs", "-setrep", str(replication), *chunk],
+                        check=True,
+                    )
+                if permission:
+                    subprocess.run(
+                        ["hdfs", "dfs", "-chmod", permission, *chunk], check=True
+                    )
+
+    def _verify_sizes(self, expected, listing=None):
+        """Compara los tamaños en HDFS con los esperados (``--verify``).
+
+        Args:
+            expected (dict): {ruta HDFS: tamaño esperado}
+            listing (dict, optional): Listado ya obtenido; si falta se lista
+
+        Raises:
+            IntegrityError: Si algún archivo falta o tiene otro tamaño
+        """
+        if listing is None:
+            listing = self._list_hdfs(*expected)
+        wrong = [
+            path
+            for path, size in expected.items()
+            if listing.get(path, (None,))[0] != size
+        ]
+        if wrong:
+            raise IntegrityError(
+                f"Tamaño incorrecto en HDFS ({len(wrong)} archivos): "
+                f"{', '.join(wrong[:5])}"
+            )
+
+    def _verify_local_sizes(self, expected):
+        """Compara archivos locales con los tamaños de HDFS (``--verify``).
+
+        Args:
+            expected (dict): {Path local: tamaño en HDFS}
+
+        Raises:
+            IntegrityError: Si algún archivo falta o tiene otro tamaño
+        """
+        wrong = [
+            str(local)
+            for local, size in expected.items()
+            if not local.is_file() or local.stat().st_size != size
+        ]
+        if wrong:
+            raise IntegrityError(
+                f"Tamaño incorrecto tras descargar ({len(wrong)} archivos): "
+                f"{', '.join(wrong[:5])}"
+            )
+
+    def _throttled(self, callback):
+        """``callback`` con el límite de ancho de banda (WebHDFS), si hay uno.
+
+        Se aplica por intento: los bytes que reenvía un reintento también
+        cuentan para el límite, aunque no para el progreso.
+        """
+        if self.throttle is None:
+            return callback
+        return self.throttle.callback(callback)
+
+    def _retry(self, retry, func, what):
+        """Ejecuta ``func(intento)`` con la política ``retry`` o una vez sin ella."""
+        try:
+            return retry.call(func, what) if retry else func(0)
+        except Exception:
+            self.metrics.record_error()
+            raise
+
+    def _plan_upload(self, src, base, remote, synchronizer, state):
+        """Decide qué archivos locales subir.
+
+        Args:
+            src (Path): Archivo o directorio local
+            base (str): Ruta HDFS que corresponde a ``src``
+            remote (dict): Archivos existentes bajo ``base`` ({ruta: (tamaño, mtime)})
+            synchronizer (Synchronizer): Sync activo o None
+            state (JobState): Estado del trabajo o None
+
+        Returns:
+            tuple: ({ruta HDFS: Path local} pendientes, {Path local: stat})
+        """
+        if src.is_file():
+            local_files = [(src, base, src.stat())]
+        else:
+            # Como ``hdfs dfs -put``, los symlinks (a archivos o directorios)
+            # se siguen
+            local_files = [
+                (Path(e.path), f"{base}/{Path(e.rel).as_posix()}", e.stat)
+                for e in walk_tree(src, follow_symlinks=True)
+                if e.kind == "file"
+            ]
+
+        pending, stats = {}, {}
+        for local, target, st in local_files:
+            stats[local] = st
+            if state and state.is_done(str(local), st.st_size, st.st_mtime):
+                continue
+            if synchronizer:
+                size, mtime = remote.get(target, (None, None))
+                if not synchronizer.should_copy(st.st_size, st.st_mtime, size, mtime):
+                    synchronizer.record_skipped(st.st_size)
+                    continue
+                synchronizer.record_copied(st.st_size)
+            pending[target] = local
+        return pending, stats
+
+    def _plan_download(self, src, destination, remote, synchronizer, state):
+        """Decide qué archivos HDFS descargar.
+
+        Args:
+            src (str): Archivo o directorio HDFS (sin "/" final)
+            destination (str): Ruta local destino
+            remote (dict): Archivos bajo ``src`` ({ruta: (tamaño, mtime)})
+            synchronizer (Synchronizer): Sync activo o None
+            state (JobState): Estado del trabajo o None
+
+        Returns:
+            tuple: ({ruta HDFS: Path local} pendientes, True si ``src`` es archivo)
+        """
+        dest = Path(destination)
+        name = src.rsplit("/", 1)[-1]
+        is_file = list(remote) == [src]
+        if is_file:
+            targets = {src: dest / name if dest.is_dir() else dest}
+        else:
+            base = dest / name if dest.is_dir() else dest
+            targets = {
+                path: base / path[len(src) + 1 :]
+                for path in remote
+                if path.startswith(src + "/")
+            }
+
+        pending = {}
+        for path, local in targets.items():
+            size, mtime = remote[path]
+            if state and state.is_done(path, size, mtime):
+                continue
+            if synchronizer:
+                local_stat = local.stat() if local.exists() else None
+                if local_stat and not synchronizer.should_copy(
+                    size, mtime, local_stat.st_size, local_stat.st_mtime
+                ):
+                    synchronizer.record_skipped(size)
+                    continue
+                synchronizer.record_copied(size)
+            pending[path] = local
+        return pending, is_file
+
+    def _incremental_download(
+        self,
+        source,
+        destination,
+        synchronizer=None,
+        callback=None,
+        retry=None,
+        **options,
+    ):
+        """Descarga solo los archivos HDFS pendientes (sync y/o estado)."""
+        state = options.get("state")
+        verify = options.get("verify", self.config.get("verify"))
+        src = source.rstrip("/") or "/"
+        with self.metrics.phase("walk"):
+            remote = self._list_hdfs(src)
+            if not remote:
+                raise ProtocolError(f"Ruta HDFS no existe o está vacía: {source}")
+
+            pending, is_file = self._plan_download(
+                src, destination, remote, synchronizer, state
+            )
+
+        groups = {}
+        for path, local in pending.items():
+            target = local if is_file else local.parent
+            groups.setdefault(str(target), []).append(path)
+
+        for target, paths in groups.items():
+            if not is_file:
+                Path(target).mkdir(parents=True, exist_ok=True)
+            logger.info(f"Descargando {len(paths)} archivos desde HDFS: {target}")
+            meter = AttemptProgress(callback)
+
+            def attempt_get(attempt, target=target, paths=paths, meter=meter):
+                with self.metrics.phase("transfer"):
+                    run_monitored(
+                        ["hdfs", "dfs", "-get", "-f", *paths, target],
+                        measure=LocalSizeMeter(target),
+                        callback=meter.attempt(),
+                        **stall_settings(self.config, options),
+                    )
+                if verify:
+                    with self.metrics.phase("verify"):
+                        self._verify_local_sizes(
+                            {pending[p]: remote[p][0] for p in paths}
+                        )
+
+            self._retry(retry, attempt_get, target)
+            self.metrics.count_file(sum(remote[p][0] for p in paths), len(paths))
+            if state:
+                for path in paths:
+                    state.mark_done(path, *remote[path])
+
+    def _webhdfs_upload(
+        self,
+        client,
+        source,
+        destination,
+        synchronizer=None,
+        callback=None,
+        retry=None,
+        **options,
+    ):
+        """Sube a HDFS por WebHDFS, un CREATE por archivo.
+
+        La replicación y los permisos viajan en cada CREATE; los directorios
+        destino se crean antes de subir los archivos, que se reparten entre
+        ``workers`` hilos y se reintentan según ``retry``.
+        """
+        replication = options.get("replication", self.config.get("replication"))
+        permission = options.get("permission", self.config.get("permission"))
+        overwrite = options.get("overwrite", self.config.get("overwrite", False))
+        state = options.get("state")
+        workers = max(1, int(options.get("workers", self.config.get("workers", 1))))
+        verify = options.get("verify", self.config.get("verify"))
+        # Como `-put -f` del modo incremental: lo pendiente se reemplaza
+        overwrite = overwrite or synchronizer is not None or state is not None
+
+        src = Path(source)
+        dest = destination.rstrip("/") or "/"
+        with self.metrics.phase("walk"):
+            dest_status = client.status(dest)
+            if dest_status and dest_status["type"] == "DIRECTORY":
+                base = f"{dest.rstrip('/')}/{src.name}"
+            else:
+                base = dest
+            remote = client.list_files(base) if synchronizer else {}
+
+            pending, stats = self._plan_upload(src, base, remote, synchronizer, state)
+            if not src.is_file():
+                directories = {t.rsplit("/", 1)[0] for t in pending} | {base}
+                for directory in sorted(directories):
+                    client.mkdirs(directory)
+
+        logger.info(f"Subiendo {len(pending)} archivos por WebHDFS: {base}")
+
+        def create(item):
+            target, local = item
+            meter = AttemptProgress(callback)
+
+            def attempt_create(attempt):
+                with self.metrics.phase("transfer"), open(local, "rb") as f:
+                    # Un reintento reemplaza lo que escribió el intento fallido
+                    client.create(
+                        target,
+                        f,
+                        overwrite or attempt > 0,
+                        replication,
+                        permission,
+                        callback=self._throttled(meter.attempt()),
+                    )
+                if verify:
+                    with self.metrics.phase("verify"):
+                        status = client.status(target) or {}
+                        self._verify_sizes(
+                            {target: stats[local].st_size},
+                            {target: (status.get("length"),)},
+                        )
+
+            self._retry(retry, attempt_create, target)
+            st = stats[local]
+            self.metrics.count_file(st.st_size)
+            if state:
+                state.mark_done(str(local), st.st_size, st.st_mtime)
+
+        if workers == 1:
+            for item in pending.items():
+                create(item)
+        else:
+            client.max_idle = max(client.max_idle, workers)
+            run_parallel(create, pending.items(), workers)
+
+    def _webhdfs_download(
+        self,
+        client,
+        source,
+        destination,
+        synchronizer=None,
+        callback=None,
+        retry=None,
+        **options,
+    ):
+        """Descarga desde HDFS por WebHDFS, un OPEN por archivo."""
+        overwrite = options.get("overwrite", self.config.get("overwrite", False))
+        state = options.get("state")
+        verify = options.get("verify", self.config.get("verify"))
+        overwrite = overwrite or synchronizer is not None or state is not None
+
+        src = source.rstrip("/") or "/"
+        with self.metrics.phase("walk"):
+            remote = client.list_files(src)
+            if not remote:
+                raise ProtocolError(f"Ruta HDFS no existe o está vacía: {source}")
+
+            pending, _ = self._plan_download(
+                src, destination, remote, synchronizer, state
+            )
+        logger.info(f"Descargando {len(pending)} archivos por WebHDFS: {destination}")
+        for path, local in pending.items():
+            if local.exists() and not overwrite:
+                raise ProtocolError(f"El destino ya existe: {local}")
+            local.parent.mkdir(parents=True, exist_ok=True)
+
+            meter = AttemptProgress(callback)
+
+            def attempt_open(attempt, path=path, local=local, meter=meter):
+                with self.metrics.phase("transfer"), open(local, "wb") as f:
+                    client.open(path, f, callback=self._throttled(meter.attempt()))
+                if verify:
+                    with self.metrics.phase("verify"):
+                        self._verify_local_sizes({local: remote[path][0]})
+
+            self._retry(retry, attempt_open, path)
+            self.metrics.count_file(remote[path][0])
+            if state:
+                state.mark_done(path, *remote[path])
+
+
+class _HDFSSink(Sink):
+    """Destino HDFS de un fan-out (WebHDFS o ``hdfs dfs``)."""
+
+    def __init__(self, base, client, replication=None, permission=None):
+        super().__init__(base)
+        self.client = client
+        self.replication = replication
+        self.permission = permission
+
+    def makedirs(self, rels):
+        paths = [self.base] + [self.path(rel) for rel in rels]
+        if self.client is not None:
+            for path in paths:
+                self.client.mkdirs(path)
+            return
+        for i in range(0, len(paths), BULK_ARGS):
+            subprocess.run(
+                ["hdfs", "dfs", "-mkdir", "-p", *paths[i : i + BULK_ARGS]],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+
+    def open(self, rel, stat):
+        if self.client is not None:
+            return _WebHDFSSinkFile(self, self.path(rel), stat.st_size)
+        return _CLISinkFile(self.path(rel))
+
+    def close(self):
+        # Con WebHDFS viajan en cada CREATE; `-put` no los admite
+        if self.client is not None:
+            return
+        if self.replication:
+            subprocess.run(
+                ["hdfs", "dfs", "-setrep", str(self.replication), self.base],
+                check=True,
+            )
+        if self.permission:
+            subprocess.run(
+                ["hdfs", "dfs", "-chmod", self.permission, self.base], check=True
+            )
+
+
+class _StreamReader:
+    """Cuerpo de un CREATE que lee los bloques encolados por el fan-out."""
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.pending = b""
+
+    def read(self, size=-1):
+        while not self.pending:
+            block = self.blocks.get()
+            if block is None:
+                return b""
+            if isinstance(block, BaseException):
+                raise block
+            self.pending = block
+        if size is None or size < 0:
+            size = len(self.pending)
+        data, self.pending = self.pending[:size], self.pending[size:]
+        return data
+
+
+class _WebHDFSSinkFile:
+    """Archivo de un fan-out a WebHDFS: el CREATE corre en un hilo propio."""
+
+    def __init__(self, sink, target, size):
+        self.target = target
+        self.error = None
+        self._blocks = queue.Queue(maxsize=4)
+        client = sink.client
+        args = (target, _StreamReader(self._blocks), True)
+        kwargs = {
+            "replication": sink.replication,
+            "permission": sink.permission,
+            "size": size,
+        }
+
+        def create():
+            try:
+                client.create(*args, **kwargs)
+            except BaseException as e:
+                self.error = e
+
+        self._thread = threading.Thread(target=create, daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while self._thread.is_alive():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise self.error or TransientError(
+            f"WebHDFS cerró la escritura de {self.target}"
+        )
+
+    def write(self, data):
+        self._put(data)
+
+    def commit(self):
+        self._put(None)
+        self._thread.join()
+        if self.error:
+            raise self.error
+
+    def abort(self):
+        if self._thread.is_alive():
+            try:
+                self._blocks.put_nowait(OSError("copia abortada"))
+            except queue.Full:
+                pass
+        self._thread.join(1)
+
+
+class _CLISinkFile:
+    """Archivo de un fan-out por ``hdfs dfs -put -f -`` (contenido por stdin)."""
+
+    def __init__(self, target):
+        self.cmd = ["hdfs", "dfs", "-put", "-f", "-", target]
+        self._stderr = tempfile.TemporaryFile(mode="w+")
+        self.proc = subprocess.Popen(
+            self.cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=self._stderr,
+        )
+
+    def write(self, data):
+        try:
+            self.proc.stdin.write(data)
+        except BrokenPipeError:
+            self.proc.wait()
+            raise self._error()
+
+    def commit(self):
+        try:
+            self.proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.proc.wait()
+        if self.proc.returncode:
+            raise self._error()
+        self._stderr.close()
+
+    def abort(self):
+        self.proc.kill()
+        self.proc.wait()
+        self._stderr.close()
+
+    def _error(self):
+        self._stderr.seek(0)
+        stderr = self._stderr.read()
+        self._stderr.close()
+        return subprocess.CalledProcessError(
+            self.proc.returncode, self.cmd, stderr=stderr
+        )
@@ -1,21 +1,176 @@
+import errno
+import os
 import shutil
+import stat as stat_module
 from pathlib import Path
-from .base import Protocol
-from ..exceptions import ProtocolError
+from .base import PARTIAL_SUFFIX, Protocol, Sink
+from ..exceptions import IntegrityError, ProtocolError
 from ..utils.logger import logger
 from ..utils.validators import (
     validate_source,
     validate_destination,
     validate_disk_space,
 )
-from ..utils.progress import get_file_size, ProgressCallback
+from ..utils.progress import AttemptProgress, ProgressCallback
+from ..utils.sync import Synchronizer, file_checksum
+from ..utils.throttle import THROTTLE_CHUNK_SIZE
+from ..utils.concurrency import run_parallel
+from ..utils.integrity import file_digest, new_hasher, verify_mode
+from ..utils.walker import TreeScan
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# ioctl FICLONE de Linux (_IOW(0x94, 9, int)): reflink en btrfs/XFS
+FICLONE = 0x40049409
+
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+# Errores que indican que el mecanismo no está soportado para ese par de
+# archivos/filesystems y hay que probar el siguiente
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.EBADF,
+    errno.EPERM,
+}
+
+
+def fast_copy(
+    src,
+    dst,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    reflink=True,
+    callback=None,
+    hasher=None,
+    throttle=None,
+):
+    """Copia el contenido de un archivo usando el camino más rápido disponible.
+
+    Prueba en orden: reflink (FICLONE), ``os.copy_file_range``, ``os.sendfile``
+    y por último un bucle de lectura/escritura en user-space. Los tres primeros
+    mueven los datos dentro del kernel sin pasar por memoria de Python; con
+    ``hasher`` se usa directamente el bucle en user-space, que calcula el
+    checksum del origen en la misma lectura. Con ``throttle`` cada bloque
+    (de hasta ``THROTTLE_CHUNK_SIZE``) espera el permiso del limitador.
+
+    Args:
+        src (str): Archivo de origen
+        dst (str): Archivo de destino (se crea o trunca)
+        chunk_size (int): Bytes por llamada al kernel / por bloque
+        reflink (bool): Si True, intenta clonar con FICLONE primero
+        callback (callable, optional): Se llama con los bytes de cada bloque
+        hasher (hashlib hash, optional): Se actualiza con cada bloque copiado
+        throttle (Throttle, optional): Límite de ancho de banda
+
+    Returns:
+        str: Mecanismo usado ("reflink", "copy_file_range", "sendfile", "userspace")
+
+    Example:
+        >>> fast_copy('/data/imagen.raw', '/backup/imagen.raw')
+        'copy_file_range'
+    """
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+        size = os.fstat(in_fd).st_size
+
+        # El reflink no mueve datos: solo los demás caminos pasan por el límite
+        copy_callback = callback
+        if throttle is not None:
+            chunk_size = min(chunk_size, THROTTLE_CHUNK_SIZE)
+            copy_callback = throttle.callback(callback)
+
+        if hasher is not None:
+            _copy_userspace(fsrc, fdst, chunk_size, copy_callback, hasher)
+            return "userspace"
+
+        if reflink and fcntl is not None and size > 0:
+            try:
+                fcntl.ioctl(out_fd, FICLONE, in_fd)
+                if callback:
+                    callback(size)
+                return "reflink"
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+
+        for method, kernel_copy in (
+            ("copy_file_range", _copy_file_range),
+            ("sendfile", _sendfile),
+        ):
+            try:
+                if kernel_copy(in_fd, out_fd, chunk_size, copy_callback):
+                    return method
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+                # Reiniciar por si hubo una copia parcial antes del fallo
+                os.lseek(in_fd, 0, os.SEEK_SET)
+                os.ftruncate(out_fd, 0)
+                os.lseek(out_fd, 0, os.SEEK_SET)
+
+        _copy_userspace(fsrc, fdst, chunk_size, copy_callback)
+        return "userspace"
+
+
+def _copy_file_range(in_fd, out_fd, chunk_size, callback):
+    if not hasattr(os, "copy_file_range"):
+        return False
+    while True:
+        copied = os.copy_file_range(in_fd, out_fd, chunk_size)
+        if copied == 0:
+            return True
+        if callback:
+            callback(copied)
+
+
+def _sendfile(in_fd, out_fd, chunk_size, callback):
+    if not hasattr(os, "sendfile"):
+        return False
+    offset = 0
+    while True:
+        sent = os.sendfile(out_fd, in_fd, offset, chunk_size)
+        if sent == 0:
+            return True
+        offset += sent
+        if callback:
+            callback(sent)
+
+
+def _copy_userspace(fsrc, fdst, chunk_size, callback, hasher=None):
+    buf = bytearray(min(chunk_size, 1024 * 1024))
+    view = memoryview(buf)
+    while True:
+        n = fsrc.readinto(buf)
+        if not n:
+            break
+        fdst.write(view[:n])
+        if hasher is not None:
+            hasher.update(view[:n])
+        if callback:
+            callback(n)
 
 
 class LocalProtocol(Protocol):
+    def __init__(self, config=None):
+        super().__init__(config)
+        # Recorridos hechos al validar, que la copia siguiente reutiliza
+        self._scans = {}
+
     def validate(self, source, destination):
         validate_source(source, "local")
         validate_destination(destination, "local")
-        validate_disk_space(source, destination, "local")
+        size = None
+        if Path(source).is_dir():
+            scan = TreeScan(source)
+            self._scans[(str(source), False)] = scan
+            size = scan.total_size
+        validate_disk_space(source, destination, "local", size=size)
 
     def copy(self, source, destination, **options):
         try:
@@ -23,42 +178,309 @@ class LocalProtocol(Protocol):
             preserve_metadata = options.get("preserve_metadata", True)
             follow_symlinks = options.get("follow_symlinks", False)
             show_progress = options.get("progress", True)
+            workers = options.get("workers", self.config.get("workers", 1))
+            self.throttle = self.bandwidth_limit(options)
+            engine = {
+                "chunk_size": int(
+                    options.get(
+                        "chunk_size", self.config.get("chunk_size", DEFAULT_CHUNK_SIZE)
+                    )
+                ),
+                "reflink": options.get("reflink", self.config.get("reflink", True)),
+                "throttle": self.throttle,
+            }
+
+            sync = None
+            if options.get("sync", self.config.get("sync", False)):
+                sync = Synchronizer(
+                    checksum=options.get("checksum", self.config.get("checksum", False))
+                )
+            state = options.get("state")
+            retry = self.retry_policy(options)
+            verify = verify_mode(options, self.config)
 
             logger.info(f"Copiando {source} -> {destination}")
 
+            scan = None
+            if not src.is_file():
+                # Un solo recorrido alimenta validación, progreso y plan de copia
+                with self.metrics.phase("walk"):
+                    scan = self._scans.pop(
+                        (str(source), follow_symlinks), None
+                    ) or TreeScan(src, follow_symlinks)
+
+            progress = None
             if show_progress:
-                total_size = get_file_size(source)
+                total_size = scan.total_size if scan else src.stat().st_size
                 progress = ProgressCallback(total_size, "Copiando")
 
             if src.is_file():
-                if preserve_metadata:
-                    shutil.copy2(source, destination, follow_symlinks=follow_symlinks)
-                else:
-                    shutil.copy(source, destination, follow_symlinks=follow_symlinks)
-
-                if show_progress:
-                    progress.update(total_size, Path(source).name)
-                    progress.finish()
+                self._copy_file(
+                    src,
+                    Path(destination),
+                    preserve_metadata=preserve_metadata,
+                    follow_symlinks=follow_symlinks,
+                    progress=progress,
+                    engine=engine,
+                    sync=sync,
+                    state=state,
+                    retry=retry,
+                    verify=verify,
+                )
             else:
-
-                def copy_with_progress(src, dst, *args, **kwargs):
-                    shutil.copy2(src, dst, *args, **kwargs)
-                    if show_progress:
-                        file_size = Path(src).stat().st_size
-                        progress.update(file_size, Path(src).name)
-
-                shutil.copytree(
-                    source,
-                    destination,
-                    symlinks=not follow_symlinks,
-                    dirs_exist_ok=True,
-                    copy_function=copy_with_progress,
+                self._copy_tree(
+                    scan,
+                    Path(destination),
+                    workers=max(1, int(workers)),
+                    preserve_metadata=preserve_metadata,
+                    progress=progress,
+                    engine=engine,
+                    sync=sync,
+                    state=state,
+                    retry=retry,
+                    verify=verify,
                 )
 
-                if show_progress:
-                    progress.finish()
+            if progress:
+                progress.finish()
+
+            if sync:
+                print(sync.summary())
+                logger.info(sync.summary())
 
             logger.info("Copia completada exitosamente")
         except Exception as e:
             logger.error(f"Error en copia local: {e}")
             raise ProtocolError(f"Error en copia local: {e}")
+
+    def open_sink(self, source, destination, **options):
+        """Destino local de un fan-out (ver ``Protocol.open_sink``)."""
+        dst = Path(destination)
+        if dst.is_dir():
+            dst = dst / Path(source).name
+        return LocalSink(str(dst), options.get("preserve_metadata", True))
+
+    def _copy_tree(
+        self,
+        scan,
+        dst_root,
+        workers,
+        preserve_metadata,
+        progress,
+        engine,
+        sync=None,
+        state=None,
+        retry=None,
+        verify=None,
+    ):
+        """Copia un árbol a partir de su ``TreeScan``.
+
+        Los directorios se crean antes que sus archivos, los archivos se copian
+        en un pool de ``workers`` hilos (con el stat del recorrido) y la
+        metadata de los directorios se aplica al final, para que escribir
+        archivos no altere sus mtimes.
+        """
+        src_root, dirs, files, links = scan.root, scan.dirs, scan.files, scan.links
+
+        dst_root.mkdir(parents=True, exist_ok=True)
+        for rel in dirs:
+            (dst_root / rel).mkdir(exist_ok=True)
+
+        for rel in links:
+            target = dst_root / rel
+            if target.is_symlink() or target.exists():
+                target.unlink()
+            os.symlink(os.readlink(src_root / rel), target)
+
+        def copy_one(item):
+            rel, src_stat = item
+            self._copy_file(
+                src_root / rel,
+                dst_root / rel,
+                preserve_metadata=preserve_metadata,
+                follow_symlinks=True,
+                progress=progress,
+                engine=engine,
+                sync=sync,
+                state=state,
+                src_stat=src_stat,
+                retry=retry,
+                verify=verify,
+            )
+
+        if workers == 1:
+            for item in files:
+                copy_one(item)
+        else:
+            logger.debug(f"Copiando {len(files)} archivos con {workers} hilos")
+            run_parallel(copy_one, files, workers)
+
+        if preserve_metadata:
+            with self.metrics.phase("metadata"):
+                for rel in reversed(dirs):
+                    shutil.copystat(src_root / rel, dst_root / rel)
+                shutil.copystat(src_root, dst_root)
+
+    def _copy_file(
+        self,
+        src,
+        dst,
+        preserve_metadata,
+        follow_symlinks,
+        progress,
+        engine,
+        sync=None,
+        state=None,
+        src_stat=None,
+        retry=None,
+        verify=None,
+    ):
+        """Copia un archivo con ``fast_copy`` y replica permisos/metadata.
+
+        ``engine`` contiene los parámetros de ``fast_copy`` (chunk_size, reflink,
+        throttle).
+        Mantiene la semántica de ``shutil.copy``/``copy2``: si ``dst`` es un
+        directorio, el archivo se copia dentro con el mismo nombre. Con
+        ``sync`` se omiten los archivos que no cambiaron y con ``state`` los ya
+        completados en una ejecución anterior del trabajo. ``src_stat`` evita
+        repetir el stat si el recorrido ya lo obtuvo. Con ``retry`` (una
+        ``RetryPolicy``) los errores de E/S transitorios (ej: NFS) se reintentan
+        por archivo. Con ``verify`` se compara el destino con el origen y una
+        diferencia (``IntegrityError``) también se reintenta.
+        """
+        if dst.is_dir():
+            dst = dst / src.name
+
+        if not follow_symlinks and src.is_symlink():
+            os.symlink(os.readlink(src), dst)
+            return
+
+        src_stat = src_stat or src.stat()
+        if state and state.is_done(str(src), src_stat.st_size, src_stat.st_mtime):
+            if progress:
+                progress.update(src_stat.st_size)
+            return
+        if sync:
+            if self._is_unchanged(src, dst, src_stat, sync):
+                sync.record_skipped(src_stat.st_size)
+                if progress:
+                    progress.update(src_stat.st_size)
+                return
+            sync.record_copied(src_stat.st_size)
+
+        callback = None
+        if progress:
+
+            def callback(nbytes):
+                progress.update(nbytes, src.name)
+
+        # Un reintento recopia el archivo: solo cuenta lo que supera al anterior
+        meter = AttemptProgress(callback)
+        try:
+
+            def copy_verified(attempt):
+                hasher = new_hasher(verify)
+                with self.metrics.phase("transfer"):
+                    method = fast_copy(
+                        src, dst, callback=meter.attempt(), hasher=hasher, **engine
+                    )
+                if verify:
+                    with self.metrics.phase("verify"):
+                        self._verify(src_stat, dst, hasher, verify)
+                return method
+
+            if retry:
+                method = retry.call(copy_verified, str(src))
+            else:
+                method = copy_verified(0)
+            logger.debug(f"{src} copiado con {method}")
+
+            with self.metrics.phase("metadata"):
+                if preserve_metadata:
+                    shutil.copystat(src, dst)
+                else:
+                    shutil.copymode(src, dst)
+                    if sync:
+                        # El sync compara mtimes: conservarlo aunque no se pida
+                        # metadata
+                        os.utime(dst, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+        except Exception as e:
+            self.metrics.record_error()
+            if state:
+                state.mark_failed(str(src), e)
+            raise
+
+        self.metrics.count_file(src_stat.st_size)
+        if state:
+            state.mark_done(str(src), src_stat.st_size, src_stat.st_mtime)
+
+    def _verify(self, src_stat, dst, hasher, mode):
+        """Compara el destino con el tamaño y el checksum calculado al copiar.
+
+        Raises:
+            IntegrityError: Si no coinciden
+        """
+        size = dst.stat().st_size
+        if size != src_stat.st_size:
+            raise IntegrityError(
+                f"Tamaño incorrecto en {dst}: {size} bytes, se esperaban "
+                f"{src_stat.st_size}"
+            )
+        if hasher is not None and file_digest(dst, mode) != hasher.hexdigest():
+            raise IntegrityError(f"Checksum {mode} no coincide en {dst}")
+
+    def _is_unchanged(self, src, dst, src_stat, sync):
+        try:
+            dst_stat = dst.stat()
+        except FileNotFoundError:
+            return False
+        return not sync.should_copy(
+            src_stat.st_size,
+            src_stat.st_mtime,
+            dst_stat.st_size,
+            dst_stat.st_mtime,
+            src_digest=lambda: file_checksum(src),
+            dst_digest=lambda: file_checksum(dst),
+        )
+
+
+class LocalSink(Sink):
+    """Destino local de un fan-out: cada archivo pasa por un parcial."""
+
+    def __init__(self, base, preserve_metadata=True):
+        super().__init__(base)
+        self.preserve_metadata = preserve_metadata
+
+    def makedirs(self, rels):
+        os.makedirs(self.base, exist_ok=True)
+        for rel in rels:
+            os.makedirs(self.path(rel), exist_ok=True)
+
+    def open(self, rel, stat):
+        return _LocalSinkFile(self.path(rel), stat, self.preserve_metadata)
+
+
+class _LocalSinkFile:
+    def __init__(self, target, stat, preserve_metadata):
+        self.target = target
+        self.partial = target + PARTIAL_SUFFIX
+        self.stat = stat
+        self.preserve_metadata = preserve_metadata
+        self._file = open(self.partial, "wb")
+
+    def write(self, data):
+        self._file.write(data)
+
+    def commit(self):
+        self._file.close()
+        os.chmod(self.partial, stat_module.S_IMODE(self.stat.st_mode))
+        if self.preserve_metadata:
+            os.utime(self.partial, ns=(self.stat.st_atime_ns, self.stat.st_mtime_ns))
+        os.replace(self.partial, self.target)
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.remove(self.partial)
+        except FileNotFoundError:
+            pass
@@ -4,11 +4,39 @@ Implementa transferencias bidireccionales usando paramiko con soporte para
 autenticación por password o key file, y progress bar en tiempo real.
 """
 
+import os
+import shlex
+import threading
 from pathlib import Path
-from .base import Protocol
-from ..exceptions import ProtocolError
+from .base import PARTIAL_SUFFIX, Protocol, Sink
+from ..exceptions import IntegrityError, ProtocolError, TransientError
+from ..utils.bundle import extract_tar, split_bundles, write_tar
+from ..utils.compression import (
+    CODECS,
+    DECOMPRESS_COMMANDS,
+    CompressingWriter,
+    DecompressingReader,
+    check_codec,
+    compress_command,
+)
 from ..utils.logger import logger
-from ..utils.progress import format_size, format_speed
+from ..utils.progress import (
+    AttemptProgress,
+    ProgressCallback,
+    format_size,
+    format_speed,
+)
+from ..utils.sync import Synchronizer, file_checksum
+from ..utils.concurrency import run_parallel
+from ..utils.connections import connection_pool
+from ..utils.integrity import (
+    REMOTE_COMMANDS,
+    file_digest,
+    hash_prefix,
+    new_hasher,
+    verify_mode,
+)
+from ..utils.walker import walk_tree
 import time
 
 try:
@@ -16,6 +44,21 @@ try:
 except ImportError:
     paramiko = None
 
+# Bytes finales del parcial que se comparan antes de reanudar
+TAIL_CHECK_SIZE = 64 * 1024
+
+# Parámetros de pipelining (sección `sftp` de la configuración). 32 KB es el
+# tamaño de request que acepta cualquier servidor; OpenSSH admite hasta 256 KB.
+DEFAULT_BLOCK_SIZE = 32768
+DEFAULT_MAX_REQUESTS = 64
+DEFAULT_WINDOW_SIZE = 16 * 1024 * 1024
+# Archivos más chicos se transfieren sin comprimir: lanzar el proceso remoto
+# del codec cuesta más de lo que ahorra
+DEFAULT_COMPRESS_MIN_SIZE = 256 * 1024
+
+# paramiko informa el canal o la conexión perdidos como OSError sin errno
+CONNECTION_LOST_MESSAGES = ("Socket is closed", "Connection lost", "connection dropped")
+
 
 class SFTPProtocol(Protocol):
     def validate(self, source, destination, **options):
@@ -33,6 +76,9 @@ class SFTPProtocol(Protocol):
         user = options.get("user", self.config.get("user"))
 
         validate_destination_sftp(destination, password, key_file, port, user)
+        if not Path(source).exists() and self._is_remote(destination):
+            # Copia entre dos servidores: también hay que llegar al origen
+            validate_destination_sftp(source, password, key_file, port, user)
         return True
 
     def copy(self, source, destination, **options):
@@ -46,37 +92,152 @@ class SFTPProtocol(Protocol):
             key_file = options.get("key_file", self.config.get("key_file"))
             show_progress = options.get("progress", True)
 
+            sync = None
+            if options.get("sync", self.config.get("sync", False)):
+                sync = Synchronizer(
+                    checksum=options.get("checksum", self.config.get("checksum", False))
+                )
+            state = options.get("state")
+            workers = options.get("workers", self.config.get("workers", 1))
+            retry = self.retry_policy(options)
+            verify = verify_mode(options, self.config)
+            compression = self._compression(options)
+            bundle = options.get("bundle", self.config.get("bundle", False))
+            self.throttle = self.bandwidth_limit(options)
+
             is_upload = Path(source).exists()
 
-            if is_upload:
+            if not is_upload and self._is_remote(destination):
+                if bundle or compression not in (None, "ssh"):
+                    logger.warning(
+                        "Entre dos servidores los archivos viajan sin --bundle ni "
+                        "compresión en streaming"
+                    )
+                self._relay(
+                    source,
+                    destination,
+                    port,
+                    user,
+                    password,
+                    key_file,
+                    show_progress,
+                    sync=sync,
+                    state=state,
+                    workers=workers,
+                    retry=retry,
+                    verify=verify,
+                    compress=compression == "ssh",
+                )
+            elif is_upload:
                 self._upload(
-                    source, destination, port, user, password, key_file, show_progress
+                    source,
+                    destination,
+                    port,
+                    user,
+                    password,
+                    key_file,
+                    show_progress,
+                    sync=sync,
+                    state=state,
+                    workers=workers,
+                    retry=retry,
+                    verify=verify,
+                    compression=compression,
+                    bundle=bundle,
                 )
             else:
                 self._download(
-                    source, destination, port, user, password, key_file, show_progress
+                    source,
+                    destination,
+                    port,
+                    user,
+                    password,
+                    key_file,
+                    show_progress,
+                    sync=sync,
+                    state=state,
+                    workers=workers,
+                    retry=retry,
+                    verify=verify,
+                    compression=compression,
+                    bundle=bundle,
                 )
 
+            if sync:
+                print(sync.summary())
+                logger.info(sync.summary())
+
         except Exception as e:
             logger.error(f"Error en copia SFTP: {e}")
             raise ProtocolError(f"Error en copia SFTP: {e}")
 
+    def open_sink(self, source, destination, **options):
+        """Destino SFTP de un fan-out (ver ``Protocol.open_sink``).
+
+        Usa una conexión del pool y un canal SFTP propio; los archivos se
+        escriben en pipeline a un parcial que se renombra al completarse.
+        """
+        if paramiko is None:
+            raise ProtocolError("paramiko no instalado. Ejecutar: pip install paramiko")
+        user = options.get("user", self.config.get("user"))
+        host, remote_path, remote_user = self._parse_remote(destination, user)
+        settings = (
+            host,
+            options.get("port", self.config.get("port", 22)),
+            remote_user,
+            options.get("password", self.config.get("password")),
+            options.get("key_file", self.config.get("key_file")),
+            # Los codecs en streaming no aplican: el sink escribe los bloques tal cual
+            self._compression(options) == "ssh",
+        )
+        ssh = self._connect(*settings)
+        try:
+            sftp = self._open_sftp(ssh)
+            stat = self._stat_or_none(sftp, remote_path)
+            if stat is not None and self._is_dir_stat(stat):
+                remote_path = f"{remote_path.rstrip('/')}/{Path(source).name}"
+        except Exception:
+            self._disconnect(ssh)
+            raise
+        return _SFTPSink(self, settings, ssh, sftp, remote_path)
+
     def _upload(
-        self, source, destination, port, user, password, key_file, show_progress
+        self,
+        source,
+        destination,
+        port,
+        user,
+        password,
+        key_file,
+        show_progress,
+        sync=None,
+        state=None,
+        workers=1,
+        retry=None,
+        verify=None,
+        compression=None,
+        bundle=False,
     ):
         host, remote_path, remote_user = self._parse_remote(destination, user)
-        ssh = self._connect(host, port, remote_user, password, key_file)
+        compress = compression == "ssh"
+        ssh = self._connect(host, port, remote_user, password, key_file, compress)
+
+        def connect():
+            return self._connect(host, port, remote_user, password, key_file, compress)
 
         try:
-            sftp = ssh.open_sftp()
+            sftp = self._open_sftp(ssh)
             src_path = Path(source)
 
             # Verificar si remote_path es un directorio o archivo destino
+            remote_stat = None
             try:
                 stat = sftp.stat(remote_path)
                 # Si existe y es directorio, copiar dentro
                 if self._is_dir_stat(stat):
                     remote_path = f"{remote_path}/{src_path.name}"
+                else:
+                    remote_stat = stat
             except IOError:
                 # No existe, verificar si el directorio padre existe
                 parent_dir = "/".join(remote_path.rsplit("/", 1)[:-1]) or "/"
@@ -86,13 +247,35 @@ class SFTPProtocol(Protocol):
                     raise ProtocolError(f"Directorio remoto no existe: {parent_dir}")
 
             if src_path.is_file():
-                total_size = src_path.stat().st_size
+                local_stat = src_path.stat()
+                total_size = local_stat.st_size
+
+                if state and state.is_done(
+                    str(src_path), total_size, local_stat.st_mtime
+                ):
+                    sftp.close()
+                    return
+                if sync:
+                    if remote_stat is None:
+                        remote_stat = self._stat_or_none(sftp, remote_path)
+                    if self._is_unchanged(
+                        ssh, str(src_path), local_stat, remote_path, remote_stat, sync
+                    ):
+                        sync.record_skipped(total_size)
+                        sftp.close()
+                        return
+                    sync.record_copied(total_size)
+
                 start_time = time.time()
 
                 def callback(bytes_transferred, total_bytes):
                     if show_progress:
                         elapsed = time.time() - start_time
-                        percent = (bytes_transferred / total_bytes) * 100
+                        percent = (
+                            (bytes_transferred / total_bytes * 100)
+                            if total_bytes > 0
+                            else 100.0
+                        )
                         speed = bytes_transferred / elapsed if elapsed > 0 else 0
                         print(
                             f"\r[{'=' * int(percent/2)}{' ' * (50-int(percent/2))}] {percent:.1f}% - {format_size(bytes_transferred)}/{format_size(total_bytes)} - {format_speed(speed)}",
@@ -100,18 +283,47 @@ class SFTPProtocol(Protocol):
                             flush=True,
                         )
 
-                sftp.put(
-                    str(src_path),
-                    remote_path,
-                    callback=callback if show_progress else None,
+                def upload(client, task):
+                    self._put_file(
+                        client,
+                        str(src_path),
+                        remote_path,
+                        callback=callback if show_progress else None,
+                        verify=verify,
+                        compression=compression,
+                    )
+                    if sync:
+                        with self.metrics.phase("metadata"):
+                            client.utime(
+                                remote_path, (local_stat.st_atime, local_stat.st_mtime)
+                            )
+
+                self._run_transfers(
+                    sftp, ssh, [(src_path, remote_path)], upload, 1, connect, retry
                 )
+                if state:
+                    state.mark_done(str(src_path), total_size, local_stat.st_mtime)
 
                 if show_progress:
                     print()
                     elapsed = time.time() - start_time
                     print(f"✓ Completado: {format_size(total_size)} en {elapsed:.1f}s")
             else:
-                self._upload_dir(sftp, src_path, remote_path, show_progress)
+                self._upload_dir(
+                    sftp,
+                    src_path,
+                    remote_path,
+                    show_progress,
+                    sync=sync,
+                    ssh=ssh,
+                    state=state,
+                    workers=workers,
+                    connect=connect,
+                    retry=retry,
+                    verify=verify,
+                    compression=compression,
+                    bundle=bundle,
+                )
 
             sftp.close()
             logger.info("Copia SFTP completada exitosamente")
@@ -121,27 +333,85 @@ class SFTPProtocol(Protocol):
                 f"Error SFTP: {e}. Verifica que el directorio remoto existe y tienes permisos"
             )
         finally:
-            ssh.close()
+            self._disconnect(ssh)
 
     def _download(
-        self, source, destination, port, user, password, key_file, show_progress
+        self,
+        source,
+        destination,
+        port,
+        user,
+        password,
+        key_file,
+        show_progress,
+        sync=None,
+        state=None,
+        workers=1,
+        retry=None,
+        verify=None,
+        compression=None,
+        bundle=False,
     ):
         host, remote_path, remote_user = self._parse_remote(source, user)
-        ssh = self._connect(host, port, remote_user, password, key_file)
+        compress = compression == "ssh"
+        ssh = self._connect(host, port, remote_user, password, key_file, compress)
+
+        def connect():
+            return self._connect(host, port, remote_user, password, key_file, compress)
 
         try:
-            sftp = ssh.open_sftp()
+            sftp = self._open_sftp(ssh)
             dest_path = Path(destination)
 
             try:
                 stat = sftp.stat(remote_path)
+            except IOError:
+                raise ProtocolError(f"Ruta remota no existe: {remote_path}")
+
+            if self._is_dir_stat(stat):
+                self._download_dir(
+                    sftp,
+                    remote_path,
+                    dest_path,
+                    show_progress,
+                    sync=sync,
+                    ssh=ssh,
+                    state=state,
+                    workers=workers,
+                    connect=connect,
+                    retry=retry,
+                    verify=verify,
+                    compression=compression,
+                    bundle=bundle,
+                )
+            else:
                 total_size = stat.st_size
+
+                if dest_path.is_dir():
+                    dest_path = dest_path / Path(remote_path).name
+                if state and state.is_done(remote_path, total_size, stat.st_mtime):
+                    sftp.close()
+                    return
+                if sync:
+                    local_stat = dest_path.stat() if dest_path.exists() else None
+                    if self._is_unchanged(
+                        ssh, str(dest_path), stat, remote_path, local_stat, sync
+                    ):
+                        sync.record_skipped(total_size)
+                        sftp.close()
+                        return
+                    sync.record_copied(total_size)
+
                 start_time = time.time()
 
                 def callback(bytes_transferred, total_bytes):
                     if show_progress:
                         elapsed = time.time() - start_time
-                        percent = (bytes_transferred / total_bytes) * 100
+                        percent = (
+                            (bytes_transferred / total_bytes * 100)
+                            if total_bytes > 0
+                            else 100.0
+                        )
                         speed = bytes_transferred / elapsed if elapsed > 0 else 0
                         print(
                             f"\r[{'=' * int(percent/2)}{' ' * (50-int(percent/2))}] {percent:.1f}% - {format_size(bytes_transferred)}/{format_size(total_bytes)} - {format_speed(speed)}",
@@ -149,65 +419,1246 @@ class SFTPProtocol(Protocol):
                             flush=True,
                         )
 
-                sftp.get(
-                    remote_path,
-                    str(dest_path),
-                    callback=callback if show_progress else None,
+                def download(client, task):
+                    self._get_file(
+                        client,
+                        remote_path,
+                        str(dest_path),
+                        callback=callback if show_progress else None,
+                        verify=verify,
+                        compression=compression,
+                    )
+
+                self._run_transfers(
+                    sftp, ssh, [(remote_path, dest_path)], download, 1, connect, retry
                 )
+                if sync:
+                    with self.metrics.phase("metadata"):
+                        os.utime(dest_path, (stat.st_atime, stat.st_mtime))
+                if state:
+                    state.mark_done(remote_path, total_size, stat.st_mtime)
 
                 if show_progress:
                     print()
                     elapsed = time.time() - start_time
                     print(f"✓ Completado: {format_size(total_size)} en {elapsed:.1f}s")
-            except IOError:
-                self._download_dir(sftp, remote_path, dest_path, show_progress)
 
             sftp.close()
             logger.info("Copia SFTP completada exitosamente")
         finally:
-            ssh.close()
+            self._disconnect(ssh)
+
+    def _relay(
+        self,
+        source,
+        destination,
+        port,
+        user,
+        password,
+        key_file,
+        show_progress,
+        sync=None,
+        state=None,
+        workers=1,
+        retry=None,
+        verify=None,
+        compress=False,
+    ):
+        """Copia entre dos servidores SFTP sin pasar por el disco local.
 
-    def _upload_dir(self, sftp, local_dir, remote_dir, show_progress):
+        Los bloques se leen del origen con prefetch y se escriben en el destino
+        en pipeline: en memoria quedan a lo sumo ``max_requests`` lecturas en
+        vuelo y lo que admite la ventana del canal de escritura. Los archivos
+        usan el mismo parcial reanudable que una subida; con ``workers > 1``
+        cada hilo abre un canal en cada servidor.
+        """
+        src_host, src_path, src_user = self._parse_remote(source, user)
+        dst_host, dst_path, dst_user = self._parse_remote(destination, user)
+        src_settings = (src_host, port, src_user, password, key_file, compress)
+        dst_settings = (dst_host, port, dst_user, password, key_file, compress)
+        src_ssh = self._connect(*src_settings)
         try:
-            sftp.mkdir(remote_dir)
-        except IOError:
-            pass
+            dst_ssh = self._connect(*dst_settings)
+        except Exception:
+            self._disconnect(src_ssh)
+            raise
+        # Conexión actual al destino; las reconexiones y los canales abiertos
+        # por los hilos se cierran al final
+        dst = [dst_ssh]
+        dst_owned, dst_channels = [], []
+        dst_local = threading.local()
+        lock = threading.Lock()
 
-        for item in local_dir.iterdir():
-            remote_item = "{}/{}".format(remote_dir, item.name)
-            if item.is_file():
-                if show_progress:
-                    print(f"Copiando {item.name}...")
-                sftp.put(str(item), remote_item)
+        def dst_client():
+            if getattr(dst_local, "sftp", None) is None:
+                with lock:
+                    if not self._is_connected(dst[0]):
+                        logger.warning("Conexión SSH al destino perdida, reconectando")
+                        dst[0] = self._connect(*dst_settings)
+                        dst_owned.append(dst[0])
+                    dst_local.sftp = self._open_sftp(dst[0])
+                    dst_channels.append(dst_local.sftp)
+            return dst_local.sftp
+
+        try:
+            src_sftp = self._open_sftp(src_ssh)
+            dst_local.sftp = self._open_sftp(dst[0])
+            dst_channels.append(dst_local.sftp)
+            dst_sftp = dst_local.sftp
+
+            try:
+                stat = src_sftp.stat(src_path)
+            except IOError:
+                raise ProtocolError(f"Ruta remota no existe: {src_host}:{src_path}")
+            dst_stat = self._stat_or_none(dst_sftp, dst_path)
+            if dst_stat is not None and self._is_dir_stat(dst_stat):
+                dst_path = f"{dst_path.rstrip('/')}/{Path(src_path).name}"
+                dst_stat = self._stat_or_none(dst_sftp, dst_path)
+
+            def unchanged(src_item, src_attr, dst_item, dst_attr):
+                if dst_attr is None:
+                    return False
+                return not sync.should_copy(
+                    src_attr.st_size,
+                    src_attr.st_mtime,
+                    dst_attr.st_size,
+                    dst_attr.st_mtime,
+                    src_digest=lambda: self._remote_checksum(src_ssh, src_item),
+                    dst_digest=lambda: self._remote_checksum(dst[0], dst_item),
+                )
+
+            if self._is_dir_stat(stat):
+                tasks = self._plan_relay(
+                    src_sftp, dst_sftp, src_path, dst_path, sync, state, unchanged
+                )
             else:
-                self._upload_dir(sftp, item, remote_item, show_progress)
+                tasks = [(src_path, dst_path, stat)]
+                if state and state.is_done(src_path, stat.st_size, stat.st_mtime):
+                    tasks = []
+                elif sync:
+                    if unchanged(src_path, stat, dst_path, dst_stat):
+                        sync.record_skipped(stat.st_size)
+                        tasks = []
+                    else:
+                        sync.record_copied(stat.st_size)
+
+            logger.info(
+                f"Copiando {len(tasks)} archivos de {src_host} a {dst_host} "
+                f"sin pasar por disco local"
+            )
+            progress = None
+            if show_progress and tasks:
+                progress = ProgressCallback(sum(t[2].st_size for t in tasks))
+
+            # Bytes ya informados por archivo: un reintento retoma desde el
+            # parcial y vuelve a informar desde su offset
+            shown = {}
+
+            def relay(client, task):
+                src_item, dst_item, attr = task
+
+                def callback(transferred, size):
+                    done = shown.get(src_item, 0)
+                    if transferred > done:
+                        progress.update(transferred - done)
+                        shown[src_item] = transferred
+
+                target = dst_client()
+                try:
+                    self._relay_file(
+                        client,
+                        target,
+                        src_item,
+                        dst_item,
+                        callback=callback if progress else None,
+                        verify=verify,
+                    )
+                    if sync:
+                        with self.metrics.phase("metadata"):
+                            target.utime(dst_item, (attr.st_atime, attr.st_mtime))
+                except Exception:
+                    # El reintento abre un canal nuevo (y reconecta si hace falta)
+                    self._close_quietly(target)
+                    dst_local.sftp = None
+                    raise
+                if state:
+                    state.mark_done(src_item, attr.st_size, attr.st_mtime)
+
+            if tasks:
+                self._run_transfers(
+                    src_sftp,
+                    src_ssh,
+                    tasks,
+                    relay,
+                    workers,
+                    lambda: self._connect(*src_settings),
+                    retry,
+                )
+            if progress:
+                progress.finish()
+            src_sftp.close()
+            logger.info("Copia SFTP entre servidores completada exitosamente")
+        finally:
+            for channel in dst_channels:
+                self._close_quietly(channel)
+            for extra in dst_owned:
+                self._disconnect(extra)
+            self._disconnect(dst_ssh)
+            self._disconnect(src_ssh)
+
+    def _plan_relay(self, src_sftp, dst_sftp, src_dir, dst_dir, sync, state, unchanged):
+        """Recorre el origen, crea sus directorios en destino y lista los archivos."""
+        tasks = []
+        stack = [(src_dir, dst_dir)]
+        with self.metrics.phase("walk"):
+            while stack:
+                sdir, ddir = stack.pop()
+                try:
+                    dst_sftp.mkdir(ddir)
+                    existing = {}
+                except IOError:
+                    stat = self._stat_or_none(dst_sftp, ddir)
+                    if stat is None or not self._is_dir_stat(stat):
+                        raise ProtocolError(f"No se puede crear el directorio: {ddir}")
+                    existing = (
+                        {a.filename: a for a in dst_sftp.listdir_attr(ddir)}
+                        if sync
+                        else {}
+                    )
+                for item in src_sftp.listdir_attr(sdir):
+                    src_item = f"{sdir.rstrip('/')}/{item.filename}"
+                    dst_item = f"{ddir.rstrip('/')}/{item.filename}"
+                    if self._is_dir(item):
+                        stack.append((src_item, dst_item))
+                        continue
+                    if state and state.is_done(src_item, item.st_size, item.st_mtime):
+                        continue
+                    if sync:
+                        if unchanged(
+                            src_item, item, dst_item, existing.get(item.filename)
+                        ):
+                            sync.record_skipped(item.st_size)
+                            continue
+                        sync.record_copied(item.st_size)
+                    tasks.append((src_item, dst_item, item))
+        return tasks
+
+    def _upload_dir(
+        self,
+        sftp,
+        local_dir,
+        remote_dir,
+        show_progress,
+        sync=None,
+        ssh=None,
+        state=None,
+        workers=1,
+        connect=None,
+        retry=None,
+        verify=None,
+        compression=None,
+        bundle=False,
+    ):
+        """Sube un árbol local: planifica en una pasada y transfiere en paralelo.
+
+        Los directorios remotos se crean primero, en una sola pasada; solo se
+        listan los que ya existían (y solo si ``sync`` lo necesita). Los archivos
+        se reparten entre ``workers`` canales SFTP, o con ``bundle`` entre
+        ``workers`` streams tar (ver ``_upload_bundles``).
+        """
+        with self.metrics.phase("walk"):
+            dirs, files = [], []
+            # Como antes de usar walk_tree, los symlinks se siguen: se sube el
+            # contenido de su destino (archivo o directorio)
+            for entry in walk_tree(local_dir, follow_symlinks=True):
+                if entry.kind == "dir":
+                    dirs.append(Path(entry.rel).as_posix())
+                else:
+                    files.append((Path(entry.path), entry.stat))
+
+            remote_attrs = {}
+            for rdir in [remote_dir] + [f"{remote_dir}/{d}" for d in dirs]:
+                try:
+                    sftp.mkdir(rdir)
+                except IOError:
+                    if sync:
+                        for attr in sftp.listdir_attr(rdir):
+                            remote_attrs[f"{rdir}/{attr.filename}"] = attr
+
+        tasks = []
+        for item, local_stat in files:
+            remote_item = f"{remote_dir}/{item.relative_to(local_dir).as_posix()}"
+            if state and state.is_done(
+                str(item), local_stat.st_size, local_stat.st_mtime
+            ):
+                continue
+            if sync:
+                if self._is_unchanged(
+                    ssh,
+                    str(item),
+                    local_stat,
+                    remote_item,
+                    remote_attrs.get(remote_item),
+                    sync,
+                ):
+                    sync.record_skipped(local_stat.st_size)
+                    continue
+                sync.record_copied(local_stat.st_size)
+            tasks.append((item, remote_item, local_stat))
+
+        if bundle:
+            files = [(item.relative_to(local_dir), st) for item, _, st in tasks]
+            self._upload_bundles(
+                sftp,
+                ssh,
+                local_dir,
+                remote_dir,
+                files,
+                show_progress,
+                state=state,
+                workers=workers,
+                connect=connect,
+                retry=retry,
+                verify=verify,
+                compression=compression,
+            )
+            return
+
+        def upload(client, task):
+            item, remote_item, local_stat = task
+            if show_progress:
+                print(f"Copiando {item.name}...")
+            self._put_file(
+                client, str(item), remote_item, verify=verify, compression=compression
+            )
+            if sync:
+                with self.metrics.phase("metadata"):
+                    client.utime(
+                        remote_item, (local_stat.st_atime, local_stat.st_mtime)
+                    )
+            if state:
+                state.mark_done(str(item), local_stat.st_size, local_stat.st_mtime)
+
+        self._run_transfers(sftp, ssh, tasks, upload, workers, connect, retry)
+
+    def _download_dir(
+        self,
+        sftp,
+        remote_dir,
+        local_dir,
+        show_progress,
+        sync=None,
+        ssh=None,
+        state=None,
+        workers=1,
+        connect=None,
+        retry=None,
+        verify=None,
+        compression=None,
+        bundle=False,
+    ):
+        """Descarga un árbol remoto: lo lista una vez y transfiere en paralelo."""
+        tasks = []
+        stack = [(remote_dir, local_dir)]
+        with self.metrics.phase("walk"):
+            while stack:
+                rdir, ldir = stack.pop()
+                ldir.mkdir(parents=True, exist_ok=True)
+                for item in sftp.listdir_attr(rdir):
+                    remote_item = f"{rdir}/{item.filename}"
+                    local_item = ldir / item.filename
+                    if self._is_dir(item):
+                        stack.append((remote_item, local_item))
+                        continue
+                    if state and state.is_done(
+                        remote_item, item.st_size, item.st_mtime
+                    ):
+                        continue
+                    if sync:
+                        local_stat = local_item.stat() if local_item.exists() else None
+                        if self._is_unchanged(
+                            ssh, str(local_item), item, remote_item, local_stat, sync
+                        ):
+                            sync.record_skipped(item.st_size)
+                            continue
+                        sync.record_copied(item.st_size)
+                    tasks.append((remote_item, local_item, item))
+
+        if bundle:
+            files = [
+                (local_item.relative_to(local_dir), item)
+                for _, local_item, item in tasks
+            ]
+            self._download_bundles(
+                sftp,
+                ssh,
+                remote_dir,
+                local_dir,
+                files,
+                show_progress,
+                state=state,
+                workers=workers,
+                connect=connect,
+                retry=retry,
+                verify=verify,
+                compression=compression,
+            )
+            return
+
+        def download(client, task):
+            remote_item, local_item, item = task
+            if show_progress:
+                print(f"Copiando {item.filename}...")
+            self._get_file(
+                client,
+                remote_item,
+                str(local_item),
+                verify=verify,
+                compression=compression,
+            )
+            if sync:
+                with self.metrics.phase("metadata"):
+                    os.utime(local_item, (item.st_atime, item.st_mtime))
+            if state:
+                state.mark_done(remote_item, item.st_size, item.st_mtime)
+
+        self._run_transfers(sftp, ssh, tasks, download, workers, connect, retry)
+
+    def _upload_bundles(
+        self,
+        sftp,
+        ssh,
+        local_dir,
+        remote_dir,
+        files,
+        show_progress,
+        state=None,
+        workers=1,
+        connect=None,
+        retry=None,
+        verify=None,
+        compression=None,
+    ):
+        """Sube ``files`` como streams tar que se desempaquetan en el host.
+
+        Cada grupo de archivos (uno por worker) viaja por un canal exec con
+        ``tar -x``, comprimido si ``compression`` es un codec. El tar conserva
+        los mtime. Un reintento reenvía el grupo completo.
+
+        Args:
+            files (list): Tuplas (ruta relativa a ``local_dir``, os.stat_result)
+        """
+        codec = compression if compression in CODECS else None
+        command = f"tar -xf - -C {shlex.quote(remote_dir)}"
+        if codec:
+            command = f"{DECOMPRESS_COMMANDS[codec]} | {command}"
+        progress = self._bundle_progress(files, show_progress)
+        # Un reintento reenvía el grupo completo: un medidor por grupo
+        meters = {}
+
+        def upload(client, task):
+            name, group = task
+            meter = meters.setdefault(
+                name, AttemptProgress(progress.update if progress else None)
+            )
+            callback = meter.attempt()
+            channel = self._exec(client, command)
+            send = self._wire_writer(channel)
+
+            def produce():
+                if not codec:
+                    write_tar(send, local_dir, group, callback=callback)
+                    return
+                level = self.config.get("compression_level")
+                writer = CompressingWriter(send, codec, level)
+                write_tar(writer.write, local_dir, group, callback=callback)
+                writer.close()
+
+            try:
+                with self.metrics.phase("transfer"):
+                    self._feed(channel, command, produce)
+            finally:
+                channel.close()
+            if verify:
+                with self.metrics.phase("verify"):
+                    self._verify_bundle(client, remote_dir, local_dir, group, verify)
+            self.metrics.count_file(sum(st.st_size for _, st in group), len(group))
+            if state:
+                for rel, st in group:
+                    state.mark_done(str(local_dir / rel), st.st_size, st.st_mtime)
 
-    def _download_dir(self, sftp, remote_dir, local_dir, show_progress):
-        local_dir.mkdir(parents=True, exist_ok=True)
+        self._run_bundles(sftp, ssh, remote_dir, files, upload, workers, connect, retry)
+        if progress:
+            progress.finish()
 
-        for item in sftp.listdir_attr(remote_dir):
-            remote_item = f"{remote_dir}/{item.filename}"
-            local_item = local_dir / item.filename
+    def _download_bundles(
+        self,
+        sftp,
+        ssh,
+        remote_dir,
+        local_dir,
+        files,
+        show_progress,
+        state=None,
+        workers=1,
+        connect=None,
+        retry=None,
+        verify=None,
+        compression=None,
+    ):
+        """Descarga ``files`` como streams tar generados en el host.
+
+        El host recibe la lista de archivos por stdin (``tar -T``) y los
+        envía empaquetados (y comprimidos si ``compression`` es un codec);
+        CopyWay los desempaqueta en ``local_dir`` a medida que llegan.
+
+        Args:
+            files (list): Tuplas (ruta relativa a ``local_dir``, SFTPAttributes)
+        """
+        codec = compression if compression in CODECS else None
+        # -h: los symlinks viajan como el archivo al que apuntan, como con get
+        command = f"tar -chf - -C {shlex.quote(remote_dir)} --null -T -"
+        if codec:
+            level = self.config.get("compression_level")
+            command = f"{command} | {compress_command(codec, level)}"
+        progress = self._bundle_progress(files, show_progress)
+        # Un reintento reenvía el grupo completo: un medidor por grupo
+        meters = {}
+
+        def download(client, task):
+            name, group = task
+            meter = meters.setdefault(
+                name, AttemptProgress(progress.update if progress else None)
+            )
+            callback = meter.attempt()
+            names = b"".join(rel.as_posix().encode() + b"\0" for rel, _ in group)
+            channel = self._exec_with_input(client, command, names)
+            try:
+                read = self._wire_reader(channel)
+                if codec:
+                    read = DecompressingReader(read, codec).read
+                try:
+                    with self.metrics.phase("transfer"):
+                        extracted = extract_tar(read, local_dir, callback=callback)
+                except Exception:
+                    # Un tar cortado suele deberse a que el comando remoto falló
+                    if channel.exit_status_ready():
+                        self._check_exit(channel, command)
+                    raise
+                self._check_exit(channel, command)
+                if len(extracted) != len(group):
+                    # tarfile acepta un stream cortado justo entre dos archivos
+                    raise TransientError(
+                        f"Bundle incompleto: {len(extracted)} de {len(group)} archivos"
+                    )
+            finally:
+                channel.close()
+            if verify:
+                with self.metrics.phase("verify"):
+                    self._verify_bundle(client, remote_dir, local_dir, group, verify)
+            self.metrics.count_file(sum(item.st_size for _, item in group), len(group))
+            if state:
+                for rel, item in group:
+                    state.mark_done(
+                        f"{remote_dir}/{rel.as_posix()}", item.st_size, item.st_mtime
+                    )
+
+        self._run_bundles(
+            sftp, ssh, remote_dir, files, download, workers, connect, retry
+        )
+        if progress:
+            progress.finish()
+
+    def _run_bundles(self, sftp, ssh, remote_dir, files, func, workers, connect, retry):
+        """Reparte ``files`` en un grupo por worker y los transfiere."""
+        groups = split_bundles(files, workers)
+        tasks = [
+            (f"{remote_dir} (bundle {i + 1}/{len(groups)})", group)
+            for i, group in enumerate(groups)
+        ]
+        logger.debug(f"Transfiriendo {len(files)} archivos en {len(tasks)} bundles")
+        self._run_transfers(sftp, ssh, tasks, func, len(tasks), connect, retry)
+
+    def _bundle_progress(self, files, show_progress):
+        if not show_progress or not files:
+            return None
+        return ProgressCallback(sum(st.st_size for _, st in files), "Copiando")
+
+    def _verify_bundle(self, sftp, remote_dir, local_dir, files, mode):
+        """Compara los archivos de un bundle ya transferido con el origen.
+
+        ``size`` compara con el tamaño del recorrido inicial; los checksums se
+        calculan en el host en un solo comando (``xargs sha256sum``) y
+        localmente releyendo los archivos.
+
+        Raises:
+            IntegrityError: Si algún archivo no coincide
+        """
+        if mode == "size":
+            mismatched = self._bundle_sizes_mismatch(sftp, remote_dir, local_dir, files)
+        else:
+            names = [rel.as_posix() for rel, _ in files]
+            remote = self._bundle_digests(sftp, remote_dir, names, mode)
+            mismatched = [
+                name
+                for name, digest in zip(names, remote)
+                if file_digest(os.path.join(local_dir, name), mode) != digest
+            ]
+        if mismatched:
+            raise IntegrityError(
+                f"{len(mismatched)} archivos no coinciden ({mode}) en {remote_dir}: "
+                f"{', '.join(mismatched[:5])}"
+            )
 
-            if self._is_dir(item):
-                self._download_dir(sftp, remote_item, local_item, show_progress)
+    def _bundle_sizes_mismatch(self, sftp, remote_dir, local_dir, files):
+        """Archivos cuyo tamaño en destino difiere del esperado."""
+        mismatched = []
+        listings = {}
+        for rel, st in files:
+            local = Path(local_dir) / rel
+            if isinstance(st, os.stat_result):
+                # Subida: se lista cada directorio remoto una vez
+                parent = rel.parent.as_posix()
+                if parent not in listings:
+                    rdir = remote_dir if parent == "." else f"{remote_dir}/{parent}"
+                    listings[parent] = {
+                        a.filename: a.st_size for a in sftp.listdir_attr(rdir)
+                    }
+                size = listings[parent].get(rel.name)
             else:
-                if show_progress:
-                    print(f"Copiando {item.filename}...")
-                sftp.get(remote_item, str(local_item))
+                size = local.stat().st_size if local.exists() else None
+            if size != st.st_size:
+                mismatched.append(rel.as_posix())
+        return mismatched
+
+    def _bundle_digests(self, sftp, remote_dir, names, mode):
+        """Checksums remotos de ``names`` (relativos a ``remote_dir``), en orden."""
+        command = f"cd {shlex.quote(remote_dir)} && xargs -0 {REMOTE_COMMANDS[mode]} --"
+        data = b"".join(name.encode() + b"\0" for name in names)
+        channel = self._exec_with_input(sftp, command, data)
+        try:
+            output = channel.makefile("rb").read().decode(errors="replace")
+            self._check_exit(channel, command)
+        finally:
+            channel.close()
+        # sha256sum antepone "\" a las líneas de nombres con caracteres escapados
+        digests = [line.split()[0].lstrip("\\") for line in output.splitlines()]
+        if len(digests) != len(names):
+            raise ProtocolError(
+                f"No se pudo calcular checksums remotos en {remote_dir}"
+            )
+        return digests
+
+    def _run_transfers(self, sftp, ssh, tasks, func, workers, connect=None, retry=None):
+        """Ejecuta ``func(cliente_sftp, tarea)`` para cada tarea.
+
+        Con ``workers > 1`` cada hilo abre su propio canal SFTP. Los canales se
+        reparten entre ``connections`` transportes SSH (config, default 1): el
+        actual y, si se indica ``connect``, conexiones adicionales.
+
+        Con ``retry`` (una ``RetryPolicy``) cada tarea se reintenta ante errores
+        transitorios: el reintento abre un canal nuevo y, si la conexión SSH se
+        cayó, la reemplaza por otra de ``connect``. Como las transferencias
+        usan parciales, el reintento continúa donde quedó el intento fallido.
+        """
+        workers = min(max(1, int(workers)), len(tasks))
+        transports = [ssh]
+        if workers > 1:
+            connections = min(int(self.config.get("connections", 1)), workers)
+            if connect is not None:
+                transports.extend(connect() for _ in range(connections - 1))
+            logger.debug(
+                f"Transfiriendo {len(tasks)} archivos con {workers} canales "
+                f"en {len(transports)} conexiones"
+            )
+        # Conexiones abiertas aquí (adicionales o reconexiones), a liberar al final
+        owned = transports[1:]
+        local = threading.local()
+        clients = []
+        lock = threading.Lock()
+
+        def client(fresh=False):
+            if fresh and getattr(local, "sftp", None) is not None:
+                self._close_quietly(local.sftp)
+                local.sftp = None
+            if getattr(local, "sftp", None) is None:
+                with lock:
+                    if not hasattr(local, "slot"):
+                        local.slot = len(clients) % len(transports)
+                    if connect is not None and not self._is_connected(
+                        transports[local.slot]
+                    ):
+                        logger.warning("Conexión SSH perdida, reconectando")
+                        transports[local.slot] = connect()
+                        owned.append(transports[local.slot])
+                    local.sftp = self._open_sftp(transports[local.slot])
+                    clients.append(local.sftp)
+            return local.sftp
+
+        def run(task):
+            try:
+                if retry is None:
+                    return func(client(), task)
+                return retry.call(
+                    lambda attempt: func(client(fresh=attempt > 0), task), str(task[0])
+                )
+            except Exception:
+                self.metrics.record_error()
+                raise
 
-    def _connect(self, host, port, user, password, key_file):
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            if workers <= 1:
+                # Sin hilos (o sin tareas) se usa el canal que ya abrió el llamador
+                local.sftp, local.slot = sftp, 0
+                for task in tasks:
+                    run(task)
+            else:
+                run_parallel(run, tasks, workers)
+        finally:
+            for c in clients:
+                c.close()
+            for extra in owned:
+                self._disconnect(extra)
+
+    def _put_file(
+        self,
+        sftp,
+        local_path,
+        remote_path,
+        callback=None,
+        verify=None,
+        compression=None,
+    ):
+        """Sube un archivo vía un parcial remoto reanudable.
+
+        Escribe en ``remote_path + PARTIAL_SUFFIX``; si ya existe un parcial de
+        un intento anterior y sus últimos bytes coinciden con el origen, continúa
+        desde su tamaño. Al terminar lo renombra atómicamente al destino.
+
+        Con ``verify`` ("xxhash"/"sha256") el checksum del origen se calcula
+        mientras se envía y se compara con el del parcial calculado en el
+        servidor antes de renombrarlo; si difiere, el parcial se borra. Con
+        ``compression`` (un codec) el archivo viaja comprimido por un canal exec
+        (ver ``_send_compressed``).
+        """
+        hasher = new_hasher(verify)
+        size = os.path.getsize(local_path)
+        partial = remote_path + PARTIAL_SUFFIX
+
+        offset = 0
+        if self.config.get("partial_resume", True):
+            try:
+                offset = sftp.stat(partial).st_size
+            except IOError:
+                offset = 0
+            if offset > size:
+                offset = 0
+
+        with self.metrics.phase("transfer"), open(local_path, "rb") as local_file:
+            if offset:
+                with sftp.open(partial, "r") as remote_file:
+                    matches = self._tail_matches(local_file, remote_file, offset)
+                if matches:
+                    logger.info(
+                        f"Reanudando subida de {local_path} desde byte {offset}"
+                    )
+                else:
+                    logger.warning(
+                        f"Parcial remoto no coincide, reiniciando: {partial}"
+                    )
+                    offset = 0
+
+            if hasher is not None:
+                hash_prefix(local_file, offset, hasher)
+            local_file.seek(offset)
+
+            codec = self._stream_codec(compression, size - offset)
+            if codec:
+                self._send_compressed(
+                    sftp, local_file, partial, offset, size, callback, hasher, codec
+                )
+            else:
+                with sftp.open(partial, "r+" if offset else "w") as remote_file:
+                    # Escrituras sin esperar cada ACK: el límite de bytes en
+                    # vuelo lo impone la ventana del canal SSH
+                    remote_file.MAX_REQUEST_SIZE = self._block_size()
+                    remote_file.set_pipelined(True)
+                    remote_file.seek(offset)
+                    self._pump(
+                        local_file,
+                        remote_file,
+                        offset,
+                        size,
+                        callback,
+                        hasher,
+                        throttle=self.throttle,
+                    )
+
+        if sftp.stat(partial).st_size != size:
+            raise TransientError(f"Tamaño remoto incorrecto tras subir {local_path}")
+        if hasher is not None:
+            with self.metrics.phase("verify"):
+                remote_digest = self._remote_digest(sftp, partial, verify)
+            if remote_digest != hasher.hexdigest():
+                sftp.remove(partial)
+                raise IntegrityError(f"Checksum {verify} no coincide en {remote_path}")
+        self._rename_remote(sftp, partial, remote_path)
+        self.metrics.count_file(size - offset)
+
+    def _get_file(
+        self,
+        sftp,
+        remote_path,
+        local_path,
+        callback=None,
+        verify=None,
+        compression=None,
+    ):
+        """Descarga un archivo vía un parcial local reanudable.
+
+        Equivalente a ``_put_file`` en sentido inverso: reanuda desde el tamaño
+        de ``local_path + PARTIAL_SUFFIX`` si la cola coincide y renombra al final.
+        Con ``verify`` el checksum se calcula sobre los bytes recibidos y con
+        ``compression`` el servidor envía el archivo comprimido.
+        """
+        partial = local_path + PARTIAL_SUFFIX
+        hasher = new_hasher(verify)
+
+        with self.metrics.phase("transfer"), sftp.open(remote_path, "r") as remote_file:
+            size = remote_file.stat().st_size
+
+            offset = 0
+            if self.config.get("partial_resume", True) and os.path.exists(partial):
+                offset = os.path.getsize(partial)
+                if offset > size:
+                    offset = 0
+                elif offset:
+                    with open(partial, "rb") as local_file:
+                        matches = self._tail_matches(local_file, remote_file, offset)
+                    if matches:
+                        logger.info(
+                            f"Reanudando descarga de {remote_path} desde byte {offset}"
+                        )
+                    else:
+                        logger.warning(
+                            f"Parcial local no coincide, reiniciando: {partial}"
+                        )
+                        offset = 0
+
+            with open(partial, "r+b" if offset else "wb") as local_file:
+                if hasher is not None:
+                    hash_prefix(local_file, offset, hasher)
+                local_file.seek(offset)
+                local_file.truncate()
+                codec = self._stream_codec(compression, size - offset)
+                if codec:
+                    self._receive_compressed(
+                        sftp,
+                        remote_path,
+                        local_file,
+                        offset,
+                        size,
+                        callback,
+                        hasher,
+                        codec,
+                    )
+                else:
+                    remote_file.seek(offset)
+                    # Mantener hasta max_requests lecturas en vuelo por adelantado
+                    remote_file.MAX_REQUEST_SIZE = self._block_size()
+                    remote_file.prefetch(
+                        size,
+                        max_concurrent_requests=self.config.get(
+                            "max_requests", DEFAULT_MAX_REQUESTS
+                        ),
+                    )
+                    self._pump(
+                        remote_file,
+                        local_file,
+                        offset,
+                        size,
+                        callback,
+                        hasher,
+                        throttle=self.throttle,
+                    )
+
+        if os.path.getsize(partial) != size:
+            raise TransientError(
+                f"Tamaño local incorrecto tras descargar {remote_path}"
+            )
+        if hasher is not None:
+            with self.metrics.phase("verify"):
+                remote_digest = self._remote_digest(sftp, remote_path, verify)
+            if remote_digest != hasher.hexdigest():
+                os.remove(partial)
+                raise IntegrityError(f"Checksum {verify} no coincide en {local_path}")
+        os.replace(partial, local_path)
+        self.metrics.count_file(size - offset)
+
+    def _relay_file(
+        self, src_sftp, dst_sftp, src_path, dst_path, callback=None, verify=None
+    ):
+        """Copia un archivo de un servidor a otro vía un parcial reanudable.
+
+        Como ``_put_file``, con el origen en otro servidor: reanuda desde el
+        parcial de destino si sus últimos bytes coinciden, y con ``verify``
+        compara el checksum de los bytes que pasaron contra el que calcula el
+        destino sobre el parcial.
+        """
+        hasher = new_hasher(verify)
+        partial = dst_path + PARTIAL_SUFFIX
+
+        with self.metrics.phase("transfer"), src_sftp.open(src_path, "r") as src_file:
+            size = src_file.stat().st_size
+            offset = 0
+            if self.config.get("partial_resume", True):
+                stat = self._stat_or_none(dst_sftp, partial)
+                offset = stat.st_size if stat is not None else 0
+                if offset > size:
+                    offset = 0
+                elif offset:
+                    with dst_sftp.open(partial, "r") as dst_file:
+                        matches = self._tail_matches(src_file, dst_file, offset)
+                    if matches:
+                        logger.info(
+                            f"Reanudando copia de {src_path} desde byte {offset}"
+                        )
+                    else:
+                        logger.warning(
+                            f"Parcial remoto no coincide, reiniciando: {partial}"
+                        )
+                        offset = 0
+            if hasher is not None and offset:
+                hash_prefix(src_file, offset, hasher)
+
+            src_file.seek(offset)
+            src_file.MAX_REQUEST_SIZE = self._block_size()
+            src_file.prefetch(
+                size,
+                max_concurrent_requests=self.config.get(
+                    "max_requests", DEFAULT_MAX_REQUESTS
+                ),
+            )
+            with dst_sftp.open(partial, "r+" if offset else "w") as dst_file:
+                dst_file.MAX_REQUEST_SIZE = self._block_size()
+                dst_file.set_pipelined(True)
+                dst_file.seek(offset)
+                self._pump(
+                    src_file,
+                    dst_file,
+                    offset,
+                    size,
+                    callback,
+                    hasher,
+                    throttle=self.throttle,
+                )
+
+        if dst_sftp.stat(partial).st_size != size:
+            raise TransientError(f"Tamaño remoto incorrecto tras copiar {src_path}")
+        if hasher is not None:
+            with self.metrics.phase("verify"):
+                remote_digest = self._remote_digest(dst_sftp, partial, verify)
+            if remote_digest != hasher.hexdigest():
+                dst_sftp.remove(partial)
+                raise IntegrityError(f"Checksum {verify} no coincide en {dst_path}")
+        self._rename_remote(dst_sftp, partial, dst_path)
+        self.metrics.count_file(size - offset)
+
+    def _pump(self, reader, writer, offset, size, callback, hasher=None, throttle=None):
+        """Copia de ``reader`` a ``writer`` en bloques informando el avance.
+
+        Con ``throttle`` se descuenta cada bloque del límite de ancho de banda;
+        los streams comprimidos lo aplican sobre el canal (``_wire_writer``).
+        """
+        block_size = self._block_size()
+        transferred = offset
+        if callback:
+            callback(transferred, size)
+        while True:
+            block = reader.read(block_size)
+            if not block:
+                break
+            writer.write(block)
+            if hasher is not None:
+                hasher.update(block)
+            if throttle is not None:
+                throttle.consume(len(block))
+            transferred += len(block)
+            if callback:
+                callback(transferred, size)
+
+    def _send_compressed(
+        self, sftp, local_file, partial, offset, size, callback, hasher, codec
+    ):
+        """Sube el resto de ``local_file`` comprimido y lo descomprime en el host.
+
+        Los datos se comprimen a medida que se leen y viajan por un canal exec
+        que los descomprime directo en ``partial`` (``gzip -dc > parcial``); al
+        reanudar se agrega al final del parcial existente.
+        """
+        redirect = ">>" if offset else ">"
+        command = f"{DECOMPRESS_COMMANDS[codec]} {redirect} {shlex.quote(partial)}"
+        channel = self._exec(sftp, command)
+        try:
+            writer = CompressingWriter(
+                self._wire_writer(channel), codec, self.config.get("compression_level")
+            )
+
+            def produce():
+                self._pump(local_file, writer, offset, size, callback, hasher)
+                writer.close()
+
+            self._feed(channel, command, produce)
+        finally:
+            channel.close()
+        logger.debug(
+            f"{codec}: {format_size(writer.bytes_in)} enviados como "
+            f"{format_size(writer.bytes_out)}"
+        )
 
-        if key_file:
-            ssh.connect(host, port=port, username=user, key_filename=key_file)
-        elif password:
-            ssh.connect(host, port=port, username=user, password=password)
+    def _receive_compressed(
+        self, sftp, remote_path, local_file, offset, size, callback, hasher, codec
+    ):
+        """Descarga ``remote_path`` desde ``offset`` comprimido en el host."""
+        q = shlex.quote(remote_path)
+        compress = compress_command(codec, self.config.get("compression_level"))
+        if offset:
+            command = f"tail -c +{offset + 1} {q} | {compress}"
         else:
-            ssh.connect(host, port=port, username=user)
+            command = f"{compress} < {q}"
+        channel = self._exec(sftp, command)
+        try:
+            reader = DecompressingReader(self._wire_reader(channel), codec)
+            self._pump(reader, local_file, offset, size, callback, hasher)
+            self._check_exit(channel, command)
+        finally:
+            channel.close()
+
+    def _wire_writer(self, channel):
+        """``channel.sendall`` limitado por ``self.throttle`` si hay límite.
+
+        En los canales exec el límite se aplica a los bytes que viajan por la
+        red, ya comprimidos.
+        """
+        if self.throttle is None:
+            return channel.sendall
+        return self.throttle.writer(channel.sendall)
+
+    def _wire_reader(self, channel):
+        """``channel.recv`` limitado por ``self.throttle`` si hay límite."""
+        if self.throttle is None:
+            return channel.recv
+        return self.throttle.reader(channel.recv)
+
+    def _tail_matches(self, local_file, remote_file, offset):
+        """Compara los últimos bytes antes de ``offset`` en ambos archivos.
+
+        Detecta parciales de otra versión del archivo sin releerlos completos.
+        """
+        start = max(0, offset - TAIL_CHECK_SIZE)
+        length = offset - start
+        local_file.seek(start)
+        remote_file.seek(start)
+        local_tail = local_file.read(length)
+        remote_tail = b""
+        while len(remote_tail) < length:
+            block = remote_file.read(length - len(remote_tail))
+            if not block:
+                break
+            remote_tail += block
+        return local_tail == remote_tail
+
+    def _rename_remote(self, sftp, source, target):
+        """Renombra atómicamente sobrescribiendo el destino si existe."""
+        try:
+            sftp.posix_rename(source, target)
+        except IOError:
+            # Servidor sin la extensión posix-rename: rename no sobrescribe
+            try:
+                sftp.remove(target)
+            except IOError:
+                pass
+            sftp.rename(source, target)
 
-        return ssh
+    def _is_unchanged(self, ssh, local_path, src_stat, remote_path, dst_stat, sync):
+        """Compara origen y destino para el modo sync.
+
+        ``src_stat``/``dst_stat`` pueden ser ``os.stat_result`` o ``SFTPAttributes``
+        según la dirección; ``dst_stat`` es None si el destino no existe.
+        """
+        if dst_stat is None:
+            return False
+        return not sync.should_copy(
+            src_stat.st_size,
+            src_stat.st_mtime,
+            dst_stat.st_size,
+            dst_stat.st_mtime,
+            src_digest=lambda: file_checksum(local_path),
+            dst_digest=lambda: self._remote_checksum(ssh, remote_path),
+        )
+
+    def _remote_checksum(self, ssh, remote_path):
+        """Calcula sha256 de un archivo remoto vía canal exec (sha256sum)."""
+        return self._exec_digest(ssh.get_transport(), remote_path, "sha256sum")
+
+    def _remote_digest(self, sftp, remote_path, mode):
+        """Checksum remoto de ``mode`` por la misma conexión que el canal SFTP.
+
+        Requiere ``sha256sum`` (coreutils) o ``xxh128sum`` (xxhash) en el host.
+        """
+        transport = sftp.get_channel().get_transport()
+        return self._exec_digest(transport, remote_path, REMOTE_COMMANDS[mode])
+
+    def _exec(self, sftp, command):
+        """Abre un canal exec con ``command`` en la conexión de ``sftp``."""
+        channel = sftp.get_channel().get_transport().open_session()
+        channel.exec_command(command)
+        return channel
+
+    def _check_exit(self, channel, command):
+        """Espera el fin de ``command`` y falla si terminó con error."""
+        status = channel.recv_exit_status()
+        if status == -1:
+            # El canal se cerró sin informar estado: se cortó la conexión
+            raise TransientError(f"Canal cerrado sin estado de salida: {command}")
+        if status != 0:
+            error = channel.makefile_stderr("rb").read().decode(errors="replace")
+            raise ProtocolError(
+                f"Comando remoto falló ({status}): {command}: {error.strip()}"
+            )
+
+    def _exec_with_input(self, sftp, command, data):
+        """Como ``_exec``, enviando ``data`` por stdin desde otro hilo.
+
+        El comando puede empezar a responder antes de leer toda la entrada:
+        escribir desde otro hilo evita el bloqueo mutuo cuando ``data`` no
+        entra en la ventana del canal.
+        """
+        channel = self._exec(sftp, command)
+
+        def send():
+            try:
+                channel.sendall(data)
+                channel.shutdown_write()
+            except OSError:
+                pass  # El error del comando se informa al leer su salida
+
+        threading.Thread(target=send, daemon=True).start()
+        return channel
+
+    def _feed(self, channel, command, produce):
+        """Ejecuta ``produce`` (que escribe en ``channel``), cierra la entrada y
+        espera a que ``command`` termine bien."""
+        try:
+            produce()
+            channel.shutdown_write()
+        except OSError:
+            # Si el comando remoto terminó antes de tiempo, su error explica
+            # mejor la falla que el canal cerrado
+            if channel.exit_status_ready():
+                self._check_exit(channel, command)
+            raise
+        self._check_exit(channel, command)
+
+    def _exec_digest(self, transport, remote_path, command):
+        """Ejecuta ``command ruta`` en el host y retorna el digest de su salida."""
+        channel = transport.open_session()
+        try:
+            channel.exec_command(f"{command} {shlex.quote(remote_path)}")
+            output = channel.makefile("rb").read().decode().strip()
+            error = channel.makefile_stderr("rb").read().decode().strip()
+            status = channel.recv_exit_status()
+        finally:
+            channel.close()
+        if status != 0 or not output:
+            raise ProtocolError(
+                f"No se pudo calcular checksum remoto de {remote_path}: {error}"
+            )
+        return output.split()[0]
+
+    def is_retryable(self, exc):
+        """Reintenta cortes de la conexión SSH o del canal SFTP.
+
+        Los errores de archivo (ruta inexistente, permisos) y de autenticación
+        no se reintentan.
+        """
+        if paramiko is not None:
+            if isinstance(exc, paramiko.AuthenticationException):
+                return False
+            if isinstance(exc, paramiko.SSHException):
+                return True
+        if isinstance(exc, OSError) and exc.errno is None:
+            return any(m in str(exc) for m in CONNECTION_LOST_MESSAGES)
+        return super().is_retryable(exc)
+
+    def _is_connected(self, ssh):
+        transport = ssh.get_transport()
+        return transport is not None and transport.is_active()
+
+    def _close_quietly(self, sftp):
+        try:
+            sftp.close()
+        except Exception:
+            pass
+
+    def _stat_or_none(self, sftp, remote_path):
+        try:
+            return sftp.stat(remote_path)
+        except IOError:
+            return None
+
+    def _open_sftp(self, ssh):
+        """Abre un canal SFTP con la ventana configurada.
+
+        Una ventana grande permite mantener suficientes bytes en vuelo para
+        enlaces con alta latencia (ventana >= ancho de banda x RTT).
+        """
+        return paramiko.SFTPClient.from_transport(
+            ssh.get_transport(),
+            window_size=self.config.get("window_size", DEFAULT_WINDOW_SIZE),
+            max_packet_size=self.config.get("max_packet_size"),
+        )
+
+    def _block_size(self):
+        return int(self.config.get("block_size", DEFAULT_BLOCK_SIZE))
+
+    def _compression(self, options):
+        """Modo de compresión de la copia, validado.
+
+        ``compression`` elige "ssh" (compresión del transporte SSH, sin nada
+        extra en el host) o un codec en streaming (gzip, zstd, lz4) que
+        requiere su comando en el host remoto. ``--compress`` sin
+        ``compression`` equivale a "ssh".
+
+        Returns:
+            str: "ssh", un codec o None si no se comprime
+
+        Raises:
+            ValidationError: Si el codec no existe o falta su biblioteca
+        """
+        mode = options.get("compression", self.config.get("compression"))
+        if not mode and options.get("compress", self.config.get("compress")):
+            mode = "ssh"
+        if mode and mode != "ssh":
+            check_codec(mode)
+        return mode or None
+
+    def _stream_codec(self, compression, nbytes):
+        """Codec para transferir ``nbytes``, o None si no conviene comprimir."""
+        if compression not in CODECS:
+            return None
+        min_size = self.config.get("compress_min_size", DEFAULT_COMPRESS_MIN_SIZE)
+        return compression if nbytes >= min_size else None
+
+    def _connect(self, host, port, user, password, key_file, compress=False):
+        """Obtiene una conexión del pool compartido (reutiliza la de validación)."""
+        with self.metrics.phase("connect"):
+            return connection_pool.acquire(
+                host, port, user, password, key_file, compress=compress
+            )
+
+    def _disconnect(self, ssh):
+        connection_pool.release(ssh)
 
     def _parse_remote(self, path, default_user=None):
         if "@" in path and ":" in path:
@@ -227,6 +1678,11 @@ class SFTPProtocol(Protocol):
             f"Formato inválido: {path}. Usar host:/ruta con --user o usuario@host:/ruta"
         )
 
+    def _is_remote(self, path):
+        """Indica si ``path`` es ``[usuario@]host:ruta`` y no una ruta local."""
+        head, sep, _ = path.partition(":")
+        return bool(sep and head and "/" not in head and not Path(path).exists())
+
     def _is_dir(self, attr):
         import stat
 
@@ -236,3 +1692,66 @@ class SFTPProtocol(Protocol):
         import stat
 
         return stat.S_ISDIR(stat_result.st_mode)
+
+
+class _SFTPSink(Sink):
+    """Destino SFTP de un fan-out."""
+
+    def __init__(self, protocol, settings, ssh, sftp, base):
+        super().__init__(base)
+        self.protocol = protocol
+        self.settings = settings
+        self.ssh = ssh
+        self.sftp = sftp
+
+    def makedirs(self, rels):
+        for path in [self.base] + [self.path(rel) for rel in rels]:
+            try:
+                self.sftp.mkdir(path)
+            except IOError:
+                pass  # Ya existe; si no se pudo crear fallará el archivo
+
+    def open(self, rel, stat):
+        return _SFTPSinkFile(self, self.path(rel), stat)
+
+    def reconnect(self):
+        if self.protocol._is_connected(self.ssh):
+            return
+        logger.warning("Conexión SSH perdida, reconectando")
+        self.protocol._close_quietly(self.sftp)
+        self.protocol._disconnect(self.ssh)
+        self.ssh = self.protocol._connect(*self.settings)
+        self.sftp = self.protocol._open_sftp(self.ssh)
+
+    def close(self):
+        self.protocol._close_quietly(self.sftp)
+        self.protocol._disconnect(self.ssh)
+
+
+class _SFTPSinkFile:
+    def __init__(self, sink, target, stat):
+        self.sink = sink
+        self.target = target
+        self.partial = target + PARTIAL_SUFFIX
+        self.stat = stat
+        self._file = sink.sftp.open(self.partial, "w")
+        self._file.MAX_REQUEST_SIZE = sink.protocol._block_size()
+        self._file.set_pipelined(True)
+
+    def write(self, data):
+        self._file.write(data)
+
+    def commit(self):
+        sftp = self.sink.sftp
+        self._file.close()
+        if sftp.stat(self.partial).st_size != self.stat.st_size:
+            raise TransientError(f"Tamaño remoto incorrecto en {self.target}")
+        self.sink.protocol._rename_remote(sftp, self.partial, self.target)
+        sftp.utime(self.target, (self.stat.st_atime, self.stat.st_mtime))
+
+    def abort(self):
+        try:
+            self._file.close()
+            self.sink.sftp.remove(self.partial)
+        except Exception:
+            pass
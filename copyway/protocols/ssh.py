@@ -1,10 +1,38 @@
+import os
+import re
+import shlex
 import subprocess
+import tempfile
 from pathlib import Path
 from .base import Protocol
-from ..exceptions import ProtocolError
+from ..exceptions import ProtocolError, StallError
+from ..utils.bundle import extract_tar, write_tar
+from ..utils.integrity import verify_mode
 from ..utils.logger import logger
-from ..utils.progress import get_file_size, format_size, format_speed
-import time
+from ..utils.monitor import (
+    LocalSizeMeter,
+    SourceReadMeter,
+    run_monitored,
+    stall_settings,
+)
+from ..utils.progress import AttemptProgress, ProgressCallback, get_file_size
+from ..utils.sync import Synchronizer
+from ..utils.walker import walk_tree
+
+# Mensajes de ssh/scp que indican un corte de red y no un problema del archivo
+TRANSIENT_MESSAGES = (
+    "Connection reset",
+    "Connection timed out",
+    "Connection refused",
+    "Connection closed",
+    "lost connection",
+    "Broken pipe",
+    "Network is unreachable",
+    "No route to host",
+    "Operation timed out",
+)
+# Códigos de salida de rsync por errores de red, protocolo o timeout
+RSYNC_TRANSIENT_CODES = {10, 12, 30, 35, 255}
 
 
 class SSHProtocol(Protocol):
@@ -21,11 +49,29 @@ class SSHProtocol(Protocol):
             key_file = options.get("key_file", self.config.get("key_file"))
             compress = options.get("compress", self.config.get("compress", False))
             show_progress = options.get("progress", True)
+            sync = options.get("sync", self.config.get("sync", False))
+            checksum = options.get("checksum", self.config.get("checksum", False))
+
+            retry = self.retry_policy(options)
+            self.throttle = self.bandwidth_limit(options)
+            if verify_mode(options, self.config):
+                logger.warning(
+                    "--verify no está soportado con scp; usar el protocolo sftp"
+                )
+
+            if sync:
+                self._sync(
+                    source, destination, port, key_file, compress, checksum, retry
+                )
+                return
 
             # Obtener tamaño si es local
-            total_size = 0
-            if Path(source).exists():
-                total_size = get_file_size(source)
+            is_upload = Path(source).exists()
+            total_size = get_file_size(source) if is_upload else 0
+            # Un archivo suelto no gana nada empaquetado
+            bundle = options.get("bundle", self.config.get("bundle", False)) and (
+                not is_upload or Path(source).is_dir()
+            )
 
             cmd = ["scp", "-r"]
 
@@ -35,29 +81,265 @@ class SSHProtocol(Protocol):
                 cmd.extend(["-i", key_file])
             if compress:
                 cmd.append("-C")
+            rate = self.throttle.effective_rate if self.throttle else 0
+            if rate:
+                # scp toma el límite en Kbit/s y no puede cambiarlo en marcha
+                cmd.extend(["-l", str(max(1, rate * 8 // 1000))])
 
             cmd.extend([source, destination])
 
-            logger.info(f"Ejecutando: {' '.join(cmd)}")
+            if not bundle:
+                logger.info(f"Ejecutando: {' '.join(cmd)}")
 
-            if show_progress and total_size > 0:
-                print(f"Copiando {format_size(total_size)}...", flush=True)
-                start_time = time.time()
+            progress = (
+                ProgressCallback(total_size, "Copiando") if show_progress else None
+            )
 
-            subprocess.run(cmd, check=True, capture_output=True, text=True)
+            # scp reenvía todo en cada intento: solo cuenta lo que supera al anterior
+            meter = AttemptProgress(progress.update if progress else None)
 
-            if show_progress and total_size > 0:
-                elapsed = time.time() - start_time
-                speed = total_size / elapsed if elapsed > 0 else 0
-                print(
-                    f"✓ Completado: {format_size(total_size)} en {elapsed:.1f}s ({format_speed(speed)})"
+            def transfer(attempt):
+                callback = meter.attempt()
+                if bundle:
+                    return self._bundle(
+                        source,
+                        destination,
+                        is_upload,
+                        port,
+                        key_file,
+                        compress,
+                        callback,
+                    )
+                # scp no informa bytes: se miden las lecturas del origen (subida)
+                # o el crecimiento del destino local (descarga)
+                if is_upload:
+                    measure = SourceReadMeter(source)
+                elif not self._is_remote(destination):
+                    measure = LocalSizeMeter(self._local_target(source, destination))
+                else:
+                    measure = None
+                run_monitored(
+                    cmd,
+                    measure=measure,
+                    callback=callback,
+                    **stall_settings(self.config, options),
                 )
 
+            # scp copia todo en un solo comando: se reintenta el comando completo
+            # La ruta copiada se resuelve antes: después el destino ya existe
+            if is_upload:
+                copied = source
+            elif not self._is_remote(destination):
+                copied = self._local_target(source, destination)
+            else:
+                copied = None
+            with self.metrics.phase("transfer"):
+                retry.call(transfer, source)
+            if copied:
+                self.metrics.count_path(copied)
+
+            if progress:
+                progress.update(max(0, total_size - progress.copied))
+                progress.finish()
+
             logger.info("Copia SSH completada exitosamente")
 
         except subprocess.CalledProcessError as e:
             logger.error(f"Error en copia SSH: {e.stderr}")
             raise ProtocolError(f"Error en copia SSH: {e.stderr}")
+        except StallError:
+            raise
         except Exception as e:
             logger.error(f"Error en copia SSH: {e}")
             raise ProtocolError(f"Error en copia SSH: {e}")
+
+    def is_retryable(self, exc):
+        """Reintenta cortes de conexión de scp/ssh y errores de red de rsync."""
+        if isinstance(exc, subprocess.CalledProcessError):
+            if exc.cmd and exc.cmd[0] == "rsync":
+                return exc.returncode in RSYNC_TRANSIENT_CODES
+            stderr = exc.stderr or ""
+            if "Permission denied" in stderr:
+                return False
+            # ssh sale con 255 ante errores de conexión
+            return exc.returncode == 255 or any(m in stderr for m in TRANSIENT_MESSAGES)
+        return super().is_retryable(exc)
+
+    def _bundle(
+        self, source, destination, is_upload, port, key_file, compress, callback=None
+    ):
+        """Copia un directorio como un stream tar por ssh en lugar de ``scp -r``.
+
+        Respeta la semántica de scp: si el destino es un directorio existente
+        el árbol se copia dentro de él con su nombre; si no, el destino pasa a
+        ser la copia. Con ``callback`` informa (bytes, ruta) de cada archivo
+        del stream.
+        """
+        if is_upload:
+            host, path = destination.split(":", 1)
+            name = shlex.quote(Path(source).name)
+            remote = (
+                f"T={shlex.quote(path or '.')}; "
+                f'if [ -d "$T" ]; then T="$T"/{name}; fi; '
+                f'mkdir -p "$T" && tar -xf - -C "$T"'
+            )
+            dirs, files = [], []
+            # scp -r sigue los symlinks: se empaqueta su contenido
+            for entry in walk_tree(source, follow_symlinks=True):
+                target = dirs if entry.kind == "dir" else files
+                target.append((entry.rel, entry.stat))
+
+            def feed(write):
+                if self.throttle is not None:
+                    write = self.throttle.writer(write)
+                write_tar(write, source, files, dirs, callback=callback)
+
+            self._run_piped(
+                self._ssh_command(host, remote, port, key_file, compress), feed=feed
+            )
+        else:
+            host, path = source.split(":", 1)
+            remote = f"cd {shlex.quote(path or '.')} && tar -cf - ."
+            target = Path(destination)
+            if target.is_dir():
+                target = target / os.path.basename(path.rstrip("/"))
+            target.mkdir(parents=True, exist_ok=True)
+
+            def consume(read):
+                if self.throttle is not None:
+                    read = self.throttle.reader(read)
+                extract_tar(read, target, callback=callback)
+
+            self._run_piped(
+                self._ssh_command(host, remote, port, key_file, compress),
+                consume=consume,
+            )
+
+    def _ssh_command(self, host, remote, port, key_file, compress):
+        cmd = ["ssh"]
+        if port != 22:
+            cmd.extend(["-p", str(port)])
+        if key_file:
+            cmd.extend(["-i", key_file])
+        if compress:
+            cmd.append("-C")
+        return cmd + [host, remote]
+
+    def _run_piped(self, cmd, feed=None, consume=None):
+        """Ejecuta ``cmd`` escribiendo su stdin con ``feed`` o leyendo su stdout
+        con ``consume`` (funciones que reciben ``write``/``read``).
+
+        Raises:
+            subprocess.CalledProcessError: Si ``cmd`` termina con error (con
+                su stderr, para clasificar el reintento)
+        """
+        logger.info(f"Ejecutando: {shlex.join(cmd)}")
+        with tempfile.TemporaryFile() as stderr:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE if feed else subprocess.DEVNULL,
+                stdout=subprocess.PIPE if consume else subprocess.DEVNULL,
+                stderr=stderr,
+            )
+            error = None
+            try:
+                if feed:
+                    try:
+                        feed(proc.stdin.write)
+                    finally:
+                        proc.stdin.close()
+                if consume:
+                    consume(proc.stdout.read)
+            except Exception as e:
+                error = e
+
+            killed = False
+            try:
+                returncode = proc.wait(timeout=None if error is None else 5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                returncode = proc.wait()
+                killed = True
+            if proc.stdout:
+                proc.stdout.close()
+            stderr.seek(0)
+            output = stderr.read().decode(errors="replace")
+
+        # El error de ssh/tar remoto explica mejor la falla que el pipe cortado
+        if returncode != 0 and not killed:
+            raise subprocess.CalledProcessError(returncode, cmd, stderr=output)
+        if error is not None:
+            raise error
+
+    def _is_remote(self, path):
+        """Detecta rutas scp remotas ([usuario@]host:ruta)."""
+        return ":" in path and not Path(path).exists()
+
+    def _local_target(self, source, destination):
+        """Ruta local que escribe scp al descargar ``source`` en ``destination``."""
+        dest = Path(destination)
+        if dest.is_dir():
+            return str(dest / source.rsplit(":", 1)[-1].rstrip("/").rsplit("/", 1)[-1])
+        return destination
+
+    def _sync(
+        self, source, destination, port, key_file, compress, checksum, retry=None
+    ):
+        """Sincroniza con rsync sobre SSH transfiriendo solo archivos cambiados.
+
+        scp no puede comparar con el destino, así que el modo sync delega en
+        rsync (tamaño + mtime, o ``--checksum``) y arma el resumen desde ``--stats``.
+        Un reintento (``retry``) solo transfiere lo que el intento fallido no
+        llegó a copiar.
+        """
+        ssh_cmd = ["ssh"]
+        if port != 22:
+            ssh_cmd.extend(["-p", str(port)])
+        if key_file:
+            ssh_cmd.extend(["-i", key_file])
+
+        cmd = ["rsync", "-a", "--stats", "-e", shlex.join(ssh_cmd)]
+        if checksum:
+            cmd.append("--checksum")
+        if compress:
+            cmd.append("-z")
+        rate = self.throttle.effective_rate if self.throttle else 0
+        if rate:
+            # rsync toma el límite en KiB/s
+            cmd.append(f"--bwlimit={max(1, rate // 1024)}")
+        cmd.extend([source, destination])
+
+        def run(attempt):
+            return subprocess.run(cmd, check=True, capture_output=True, text=True)
+
+        logger.info(f"Ejecutando: {' '.join(cmd)}")
+        try:
+            with self.metrics.phase("transfer"):
+                result = retry.call(run, source) if retry else run(0)
+        except FileNotFoundError:
+            raise ProtocolError("El modo sync de SSH requiere 'rsync' instalado")
+
+        sync = self._parse_rsync_stats(result.stdout)
+        self.metrics.count_file(sync.copied_bytes, sync.copied_files)
+        print(sync.summary())
+        logger.info(sync.summary())
+
+    def _parse_rsync_stats(self, output):
+        """Convierte la salida de ``rsync --stats`` en un Synchronizer."""
+
+        def stat(label):
+            match = re.search(rf"{label}: ([\d,.]+)", output)
+            return int(re.sub(r"[,.]", "", match.group(1))) if match else 0
+
+        files = stat("Number of regular files transferred")
+        # rsync >= 3.1 desglosa "Number of files: N (reg: R, dir: D)"
+        total_files = stat(r"Number of files: [\d,.]+ \(reg") or stat("Number of files")
+        total_bytes = stat("Total file size")
+        copied_bytes = stat("Total transferred file size")
+
+        sync = Synchronizer()
+        sync.copied_files = files
+        sync.copied_bytes = copied_bytes
+        sync.skipped_files = max(0, total_files - files)
+        sync.skipped_bytes = max(0, total_bytes - copied_bytes)
+        return sync
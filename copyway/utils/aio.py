@@ -0,0 +1,72 @@
+"""Utilidades de asyncio para los protocolos asíncronos.
+
+Los protocolos que heredan de ``AsyncProtocol`` mueven muchos archivos (y
+muchos hosts) en un solo event loop; la CLI y el daemon los usan a través de
+``run_sync``, que ejecuta la corrutina en un loop propio. El módulo se
+importa recién al usar un protocolo asíncrono: asyncio no suma tiempo de
+arranque a las copias sincrónicas.
+"""
+
+import asyncio
+from ..exceptions import ProtocolError
+
+
+def run_sync(coro):
+    """Ejecutar una corrutina hasta el final desde código sincrónico.
+
+    Args:
+        coro (coroutine): Corrutina a ejecutar
+
+    Returns:
+        object: Lo que retorna la corrutina
+
+    Raises:
+        ProtocolError: Si ya hay un event loop corriendo en este hilo (usar
+            la variante ``*_async`` del protocolo)
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    coro.close()
+    raise ProtocolError(
+        "Hay un event loop en curso: usar copy_async/validate_async del protocolo"
+    )
+
+
+async def run_parallel_async(func, items, limit):
+    """Ejecutar ``await func(item)`` para cada elemento con ``limit`` a la vez.
+
+    Es el equivalente asíncrono de ``run_parallel``: consume ``items`` de a
+    poco (puede ser un generador) y aborta ante el primer error cancelando
+    las tareas pendientes.
+
+    Args:
+        func (callable): Función async a aplicar a cada elemento
+        items (iterable): Elementos a procesar
+        limit (int): Tareas concurrentes
+
+    Example:
+        >>> await run_parallel_async(upload_one, files, limit=64)
+    """
+    pending = set()
+    try:
+        for item in items:
+            if len(pending) >= limit:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    task.result()
+            pending.add(asyncio.ensure_future(func(item)))
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                task.result()
+    except BaseException:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        raise
@@ -0,0 +1,178 @@
+"""Transferencia de muchos archivos como un único stream tar (``--bundle``).
+
+Con árboles de miles de archivos chicos el costo está en las idas y vueltas
+por archivo (abrir, escribir, cerrar, renombrar). Este módulo empaqueta los
+archivos en un tar que se escribe mientras se leen, para enviarlo por un solo
+canal y desempaquetarlo del otro lado (``tar -x`` remoto o ``extract_tar``
+local), informando el avance archivo por archivo.
+"""
+
+import os
+import stat
+import tarfile
+from ..exceptions import ProtocolError, TransientError
+from .logger import logger
+
+DEFAULT_BUFFER_SIZE = 256 * 1024
+# Errores de tarfile cuando el stream se corta antes del final del archivo
+TRUNCATED_MESSAGES = (
+    "unexpected end of data",
+    "empty file",
+    "empty header",
+    "truncated header",
+)
+
+
+def write_tar(write, root, files, dirs=(), callback=None):
+    """Escribe un tar con ``dirs`` y ``files`` leyendo cada archivo en bloques.
+
+    Los encabezados se arman con el stat ya obtenido al recorrer el árbol,
+    sin volver a consultar el disco ni resolver nombres de usuario.
+
+    Args:
+        write (callable): Recibe cada bloque del tar
+        root (str | Path): Directorio al que son relativas las rutas
+        files (list): Tuplas (ruta relativa, os.stat_result) de archivos
+        dirs (list): Tuplas (ruta relativa, os.stat_result) de directorios
+        callback (callable, optional): Se llama con (bytes, ruta relativa)
+            a medida que se lee cada archivo
+
+    Raises:
+        OSError: Si un archivo no se puede leer o cambió de tamaño
+    """
+    root = os.fspath(root)
+    with tarfile.open(
+        fileobj=_Writer(write),
+        mode="w|",
+        format=tarfile.PAX_FORMAT,
+        bufsize=DEFAULT_BUFFER_SIZE,
+    ) as tar:
+        for rel, st in dirs:
+            tar.addfile(_tarinfo(rel, st, tarfile.DIRTYPE))
+        for rel, st in files:
+            with open(os.path.join(root, rel), "rb") as f:
+                reader = _ReportingReader(f, callback, str(rel)) if callback else f
+                tar.addfile(_tarinfo(rel, st, tarfile.REGTYPE), reader)
+
+
+def extract_tar(read, dest, callback=None):
+    """Desempaqueta en ``dest`` un tar que se lee en streaming.
+
+    Solo se aceptan archivos regulares y directorios con rutas dentro de
+    ``dest``: un stream remoto no puede escribir fuera del destino ni crear
+    symlinks (que lo harían en un miembro posterior) ni dispositivos.
+
+    Args:
+        read (callable): Recibe una cantidad de bytes y retorna datos del tar
+            (b"" al terminar)
+        dest (str | Path): Directorio destino
+        callback (callable, optional): Se llama con (bytes, ruta) al terminar
+            cada archivo
+
+    Returns:
+        list: Rutas relativas de los archivos extraídos
+
+    Raises:
+        ProtocolError: Si el tar es inválido o contiene rutas inválidas
+        TransientError: Si el stream terminó antes de tiempo (corte de red)
+    """
+    dest = os.fspath(dest)
+    extracted = []
+    try:
+        with tarfile.open(
+            fileobj=_Reader(read), mode="r|", bufsize=DEFAULT_BUFFER_SIZE
+        ) as tar:
+            if hasattr(tarfile, "data_filter"):
+                tar.extraction_filter = tarfile.data_filter
+            for member in tar:
+                name = os.path.normpath(member.name)
+                if os.path.isabs(name) or name == ".." or name.startswith("../"):
+                    raise ProtocolError(f"Ruta inválida en el bundle: {member.name}")
+                if not (member.isreg() or member.isdir()):
+                    logger.warning(f"Miembro omitido en el bundle: {member.name}")
+                    continue
+                tar.extract(member, dest)
+                if member.isreg():
+                    extracted.append(name)
+                    if callback:
+                        callback(member.size, name)
+    except tarfile.ReadError as e:
+        if any(m in str(e) for m in TRUNCATED_MESSAGES):
+            raise TransientError(f"Bundle incompleto: {e}") from e
+        raise ProtocolError(f"Bundle inválido: {e}") from e
+    except tarfile.TarError as e:
+        raise ProtocolError(f"Bundle inválido: {e}") from e
+    return extracted
+
+
+def split_bundles(files, count):
+    """Reparte ``files`` en hasta ``count`` grupos contiguos de tamaño similar.
+
+    Mantener el orden del recorrido conserva la localidad de las lecturas.
+
+    Args:
+        files (list): Tuplas (ruta relativa, os.stat_result)
+        count (int): Cantidad máxima de grupos
+
+    Returns:
+        list: Listas de tuplas, sin grupos vacíos
+    """
+    count = max(1, min(int(count), len(files)))
+    if count == 1:
+        return [list(files)] if files else []
+    target = sum(st.st_size for _, st in files) / count
+    bundles, current, size = [], [], 0
+    for i, (rel, st) in enumerate(files):
+        current.append((rel, st))
+        size += st.st_size
+        remaining = len(files) - i - 1
+        # Cortar al alcanzar el tamaño objetivo, dejando al menos un archivo
+        # para cada grupo restante
+        if len(bundles) < count - 1 and (
+            size >= target or remaining == count - 1 - len(bundles)
+        ):
+            bundles.append(current)
+            current, size = [], 0
+    if current:
+        bundles.append(current)
+    return bundles
+
+
+def _tarinfo(rel, st, kind):
+    info = tarfile.TarInfo(str(rel).replace(os.sep, "/"))
+    info.type = kind
+    info.mode = stat.S_IMODE(st.st_mode)
+    # Con PAX un mtime float conserva los subsegundos
+    info.mtime = st.st_mtime
+    info.uid, info.gid = st.st_uid, st.st_gid
+    info.size = st.st_size if kind == tarfile.REGTYPE else 0
+    return info
+
+
+class _Writer:
+    """Adapta una función ``write`` a la interfaz de archivo de tarfile."""
+
+    def __init__(self, write):
+        self.write = write
+
+
+class _Reader:
+    """Adapta una función ``read`` a la interfaz de archivo de tarfile."""
+
+    def __init__(self, read):
+        self.read = read
+
+
+class _ReportingReader:
+    """Envuelve un archivo para informar los bytes que lee tarfile."""
+
+    def __init__(self, fileobj, callback, name):
+        self._file = fileobj
+        self._callback = callback
+        self._name = name
+
+    def read(self, size=-1):
+        data = self._file.read(size)
+        if data:
+            self._callback(len(data), self._name)
+        return data
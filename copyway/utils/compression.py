@@ -0,0 +1,143 @@
+"""Compresión en streaming para transferencias por red.
+
+Este módulo comprime los datos mientras se leen del origen y los descomprime
+mientras llegan, sin archivos temporales. Cada codec tiene su equivalente de
+línea de comandos (``gzip``, ``zstd``, ``lz4``) para el otro extremo.
+"""
+
+import zlib
+from ..exceptions import ValidationError
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4frame
+except ImportError:
+    lz4frame = None
+
+CODECS = ("gzip", "zstd", "lz4")
+
+# Comandos que comprimen a stdout / descomprimen de stdin en el host remoto
+COMPRESS_COMMANDS = {"gzip": "gzip -c", "zstd": "zstd -c -q", "lz4": "lz4 -c -q"}
+DECOMPRESS_COMMANDS = {"gzip": "gzip -dc", "zstd": "zstd -dc -q", "lz4": "lz4 -dc -q"}
+
+_MODULES = {"zstd": ("zstandard", lambda: zstandard), "lz4": ("lz4", lambda: lz4frame)}
+
+
+def check_codec(codec):
+    """Valida un codec y que su biblioteca esté instalada.
+
+    Raises:
+        ValidationError: Si el codec no existe o falta su dependencia
+    """
+    if codec not in CODECS:
+        raise ValidationError(
+            f"Compresión inválida: {codec} (usar ssh, {', '.join(CODECS)})"
+        )
+    if codec in _MODULES:
+        package, module = _MODULES[codec]
+        if module() is None:
+            raise ValidationError(
+                f"{package} no instalado. Ejecutar: pip install {package}"
+            )
+
+
+def compress_command(codec, level=None):
+    """Comando remoto que comprime a stdout con ``codec`` y ``level``."""
+    command = COMPRESS_COMMANDS[codec]
+    return f"{command} -{int(level)}" if level is not None else command
+
+
+class CompressingWriter:
+    """Comprime lo que se escribe y pasa el resultado a ``write``.
+
+    Example:
+        >>> writer = CompressingWriter(channel.sendall, "zstd", level=3)
+        >>> writer.write(bloque)
+        >>> writer.close()  # Envía el final del stream comprimido
+    """
+
+    def __init__(self, write, codec, level=None):
+        """Inicializa el compresor.
+
+        Args:
+            write (callable): Recibe cada bloque comprimido
+            codec (str): "gzip", "zstd" o "lz4"
+            level (int, optional): Nivel de compresión del codec
+        """
+        self._write = write
+        self.bytes_in = 0
+        self.bytes_out = 0
+        if codec == "gzip":
+            # wbits 31: formato gzip, compatible con `gzip -d`
+            obj = zlib.compressobj(
+                6 if level is None else int(level), zlib.DEFLATED, 31
+            )
+            self._compress, self._flush = obj.compress, obj.flush
+        elif codec == "zstd":
+            obj = zstandard.ZstdCompressor(
+                level=3 if level is None else int(level)
+            ).compressobj()
+            self._compress, self._flush = obj.compress, obj.flush
+        else:
+            obj = lz4frame.LZ4FrameCompressor(
+                compression_level=0 if level is None else int(level)
+            )
+            self._emit(obj.begin())
+            self._compress, self._flush = obj.compress, obj.flush
+
+    def write(self, data):
+        self.bytes_in += len(data)
+        self._emit(self._compress(bytes(data)))
+
+    def close(self):
+        self._emit(self._flush())
+
+    def _emit(self, data):
+        if data:
+            self.bytes_out += len(data)
+            self._write(data)
+
+
+class DecompressingReader:
+    """Lee datos comprimidos de ``read`` y entrega los descomprimidos.
+
+    Example:
+        >>> reader = DecompressingReader(channel.recv, "gzip")
+        >>> bloque = reader.read(32768)
+    """
+
+    def __init__(self, read, codec, chunk_size=256 * 1024):
+        """Inicializa el descompresor.
+
+        Args:
+            read (callable): Recibe una cantidad de bytes y retorna datos
+                comprimidos (b"" al terminar)
+            codec (str): "gzip", "zstd" o "lz4"
+            chunk_size (int): Bytes comprimidos por lectura
+        """
+        self._read = read
+        self._chunk_size = chunk_size
+        self._buffer = b""
+        self._eof = False
+        if codec == "gzip":
+            self._decompress = zlib.decompressobj(47).decompress
+        elif codec == "zstd":
+            self._decompress = zstandard.ZstdDecompressor().decompressobj().decompress
+        else:
+            self._decompress = lz4frame.LZ4FrameDecompressor().decompress
+
+    def read(self, size=-1):
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            chunk = self._read(self._chunk_size)
+            if not chunk:
+                self._eof = True
+                break
+            self._buffer += self._decompress(chunk)
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
@@ -0,0 +1,39 @@
+"""Utilidades de concurrencia compartidas por los protocolos.
+
+Este módulo ejecuta tareas por archivo en un pool de hilos con una ventana
+acotada de tareas pendientes.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+def run_parallel(func, items, workers):
+    """Ejecutar ``func`` sobre cada elemento de ``items`` con ``workers`` hilos.
+
+    Mantiene como máximo ``workers * 4`` tareas encoladas para no crear
+    millones de futures a la vez, y aborta ante el primer error (las tareas
+    pendientes se cancelan y la excepción se propaga).
+
+    Args:
+        func (callable): Función a aplicar a cada elemento
+        items (iterable): Elementos a procesar (puede ser un generador)
+        workers (int): Cantidad de hilos
+
+    Example:
+        >>> run_parallel(copy_one, files, workers=8)
+    """
+    max_pending = workers * 4
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        try:
+            for item in items:
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                pending.add(pool.submit(func, item))
+            for future in pending:
+                future.result()
+        except BaseException:
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
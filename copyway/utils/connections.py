@@ -0,0 +1,142 @@
+"""Pool de conexiones SSH reutilizables.
+
+Este módulo mantiene conexiones paramiko abiertas por (host, puerto, usuario,
+credenciales) para que la validación, la copia y los trabajos siguientes de
+un mismo proceso no repitan el intercambio de claves y la autenticación.
+"""
+
+import atexit
+import hashlib
+import threading
+from .logger import logger
+
+
+class ConnectionPool:
+    """Pool de clientes ``paramiko.SSHClient`` indexados por destino y credenciales.
+
+    ``acquire`` entrega una conexión ociosa con el transporte activo o abre una
+    nueva; ``release`` la devuelve al pool para el siguiente uso. Una misma
+    conexión nunca se entrega a dos usuarios a la vez (aunque cada usuario puede
+    abrir varios canales SFTP sobre ella). Es seguro entre hilos.
+
+    Attributes:
+        max_idle (int): Conexiones ociosas que se conservan por destino
+
+    Example:
+        >>> ssh = connection_pool.acquire("host", 22, "admin", key_file="~/.ssh/id_rsa")
+        >>> sftp = ssh.open_sftp()
+        >>> connection_pool.release(ssh)
+    """
+
+    def __init__(self, max_idle=4):
+        """Inicializa el pool vacío.
+
+        Args:
+            max_idle (int): Conexiones ociosas a conservar por destino. Default: 4
+        """
+        self.max_idle = max_idle
+        self._idle = {}
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def acquire(
+        self,
+        host,
+        port=22,
+        user=None,
+        password=None,
+        key_file=None,
+        timeout=None,
+        compress=False,
+    ):
+        """Obtiene una conexión autenticada, reutilizando una ociosa si existe.
+
+        Args:
+            host (str): Host remoto
+            port (int): Puerto SSH. Default: 22
+            user (str, optional): Usuario
+            password (str, optional): Password
+            key_file (str, optional): Archivo de clave privada
+            timeout (float, optional): Timeout de conexión en segundos
+            compress (bool): Negociar compresión del transporte SSH. Default: False
+
+        Returns:
+            paramiko.SSHClient: Cliente conectado
+
+        Raises:
+            ImportError: Si paramiko no está instalado
+            Exception: Errores de conexión o autenticación de paramiko
+        """
+        key = _pool_key(host, port, user, password, key_file, compress)
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                client = idle.pop()
+                if _is_active(client):
+                    self._keys[id(client)] = key
+                    logger.debug(f"Reutilizando conexión SSH a {host}:{port}")
+                    return client
+                client.close()
+
+        client = _open_client(host, port, user, password, key_file, timeout, compress)
+        with self._lock:
+            self._keys[id(client)] = key
+        return client
+
+    def release(self, client):
+        """Devuelve una conexión al pool (o la cierra si ya no sirve)."""
+        with self._lock:
+            key = self._keys.pop(id(client), None)
+            idle = self._idle.setdefault(key, []) if key else None
+            if idle is not None and _is_active(client) and len(idle) < self.max_idle:
+                idle.append(client)
+                return
+        client.close()
+
+    def discard(self, client):
+        """Cierra una conexión sin devolverla al pool (ej: tras un error de red)."""
+        with self._lock:
+            self._keys.pop(id(client), None)
+        client.close()
+
+    def close_all(self):
+        """Cierra todas las conexiones ociosas."""
+        with self._lock:
+            clients = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for client in clients:
+            client.close()
+
+
+def _pool_key(host, port, user, password, key_file, compress=False):
+    # El password no se guarda en claro en las claves del pool
+    secret = hashlib.sha256(password.encode()).hexdigest() if password else None
+    return (host, int(port), user, key_file, secret, bool(compress))
+
+
+def _is_active(client):
+    transport = client.get_transport()
+    return transport is not None and transport.is_active()
+
+
+def _open_client(host, port, user, password, key_file, timeout, compress=False):
+    import paramiko
+
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+
+    kwargs = {"timeout": timeout, "compress": compress}
+    if key_file:
+        client.connect(host, port=port, username=user, key_filename=key_file, **kwargs)
+    elif password:
+        client.connect(host, port=port, username=user, password=password, **kwargs)
+    else:
+        client.connect(host, port=port, username=user, **kwargs)
+
+    logger.debug(f"Conexión SSH abierta a {host}:{port}")
+    return client
+
+
+# Pool global de la aplicación
+connection_pool = ConnectionPool()
+atexit.register(connection_pool.close_all)
@@ -0,0 +1,94 @@
+"""Verificación de integridad de las copias (``--verify``).
+
+Los checksums se calculan mientras los datos pasan por CopyWay (sin releer el
+origen) y se comparan con el del destino calculado donde está el archivo: en
+disco local o en el host remoto (``sha256sum``/``xxh128sum`` por un canal
+exec). El modo ``size`` solo compara tamaños.
+"""
+
+import hashlib
+from ..exceptions import ValidationError
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+VERIFY_MODES = ("size", "xxhash", "sha256")
+
+# Comando remoto que calcula el mismo digest que ``new_hasher``
+REMOTE_COMMANDS = {"sha256": "sha256sum", "xxhash": "xxh128sum"}
+
+
+def verify_mode(options, config):
+    """Modo de verificación de la copia (``verify``), validado.
+
+    Args:
+        options (dict): Opciones de la copia
+        config (dict): Configuración del protocolo
+
+    Returns:
+        str: "size", "xxhash", "sha256" o None si no se verifica
+
+    Raises:
+        ValidationError: Si el modo no existe o falta la dependencia xxhash
+    """
+    mode = options.get("verify", config.get("verify"))
+    if not mode:
+        return None
+    if mode not in VERIFY_MODES:
+        raise ValidationError(
+            f"Modo de verificación inválido: {mode} (usar {', '.join(VERIFY_MODES)})"
+        )
+    if mode == "xxhash" and xxhash is None:
+        raise ValidationError("xxhash no instalado. Ejecutar: pip install xxhash")
+    return mode
+
+
+def new_hasher(mode):
+    """Objeto hash para un modo con checksum, o None para ``size``/None.
+
+    Example:
+        >>> hasher = new_hasher("sha256")
+        >>> hasher.update(b"datos")
+        >>> hasher.hexdigest()
+    """
+    if mode == "sha256":
+        return hashlib.sha256()
+    if mode == "xxhash":
+        return xxhash.xxh3_128()
+    return None
+
+
+def file_digest(path, mode, chunk_size=1024 * 1024):
+    """Digest de un archivo local con el algoritmo de ``mode``.
+
+    Args:
+        path (str): Ruta al archivo
+        mode (str): "sha256" o "xxhash"
+        chunk_size (int): Tamaño de bloque de lectura
+
+    Returns:
+        str: Digest en hexadecimal
+    """
+    hasher = new_hasher(mode)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def hash_prefix(fileobj, length, hasher, chunk_size=1024 * 1024):
+    """Agrega al hash los primeros ``length`` bytes de ``fileobj``.
+
+    Se usa al reanudar desde un parcial: esos bytes no vuelven a transferirse
+    pero forman parte del archivo a verificar.
+    """
+    fileobj.seek(0)
+    remaining = length
+    while remaining > 0:
+        block = fileobj.read(min(chunk_size, remaining))
+        if not block:
+            break
+        hasher.update(block)
+        remaining -= len(block)
@@ -0,0 +1,347 @@
+"""Métricas estructuradas de las copias.
+
+Cada protocolo acumula en un ``TransferMetrics`` la duración de cada fase
+(carga de configuración, conexión, validación, recorrido, transferencia,
+metadata y verificación) y los contadores de archivos, bytes y errores. Al
+terminar, ``MetricsReporter`` publica un registro por copia como línea JSON,
+en un archivo de texto para el textfile collector de Prometheus y/o por
+StatsD (UDP), según la sección ``metrics`` de la configuración.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from ..exceptions import ConfigError
+from .logger import logger
+from .walker import TreeScan
+
+PHASES = (
+    "config",
+    "connect",
+    "validate",
+    "walk",
+    "transfer",
+    "metadata",
+    "verify",
+)
+DEFAULT_PREFIX = "copyway"
+DEFAULT_STATSD_PORT = 8125
+# Tamaño máximo de un datagrama StatsD sin fragmentar en redes comunes
+STATSD_PACKET_SIZE = 1400
+
+
+class TransferMetrics:
+    """Duraciones por fase y contadores de una copia. Es seguro entre hilos.
+
+    Con varios workers, las fases por archivo (transferencia, metadata,
+    verificación) suman el tiempo de todos los hilos y pueden superar la
+    duración total de la copia.
+
+    Attributes:
+        phases (dict): Segundos acumulados por fase
+        files (int): Archivos transferidos
+        bytes (int): Bytes transferidos
+        errors (int): Archivos u operaciones que fallaron
+
+    Example:
+        >>> metrics = TransferMetrics()
+        >>> with metrics.phase("transfer"):
+        ...     subir(archivo)
+        >>> metrics.count_file(1024)
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.files = 0
+        self.bytes = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """Mide el bloque como parte de la fase ``name`` (también si falla)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - started)
+
+    def add_phase(self, name, seconds):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count_file(self, nbytes=0, files=1):
+        with self._lock:
+            self.files += files
+            self.bytes += nbytes
+
+    def count_path(self, path):
+        """Cuenta los archivos y bytes de una ruta local ya copiada.
+
+        Para los backends que copian un árbol en un solo comando (``scp -r``,
+        ``hdfs dfs -put``) y no informan archivo por archivo. Una ruta que
+        no existe no suma nada: las métricas nunca hacen fallar la copia.
+        """
+        if not os.path.isdir(path):
+            if os.path.isfile(path):
+                self.count_file(os.path.getsize(path))
+            return
+        scan = TreeScan(path, follow_symlinks=True)
+        self.count_file(scan.total_size, len(scan.files))
+
+    def record_error(self, count=1):
+        with self._lock:
+            self.errors += count
+
+    def merge(self, other):
+        """Suma las fases y contadores de ``other`` (ej: total de un batch)."""
+        with self._lock:
+            for name, seconds in other.phases.items():
+                self.phases[name] = self.phases.get(name, 0.0) + seconds
+            self.files += other.files
+            self.bytes += other.bytes
+            self.errors += other.errors
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "phases": {
+                    name: round(self.phases[name], 6)
+                    for name in sorted(self.phases, key=_phase_order)
+                },
+                "files": self.files,
+                "bytes": self.bytes,
+                "errors": self.errors,
+            }
+
+
+def build_record(
+    metrics,
+    protocol,
+    source,
+    destination,
+    status,
+    seconds,
+    retries=0,
+    job_id=None,
+):
+    """Registro de métricas de una copia terminada.
+
+    Args:
+        metrics (TransferMetrics): Métricas acumuladas
+        protocol (str): Protocolo (o "batch" para el total de un batch)
+        source (str): Origen
+        destination (str): Destino
+        status (str): "completed" o "failed"
+        seconds (float): Duración total
+        retries (int): Reintentos realizados
+        job_id (str, optional): Id del trabajo registrado
+
+    Returns:
+        dict: Registro listo para ``MetricsReporter``
+    """
+    return {
+        "timestamp": round(time.time(), 3),
+        "host": socket.gethostname(),
+        "protocol": protocol,
+        "source": source,
+        "destination": destination,
+        "job_id": job_id,
+        "status": status,
+        "seconds": round(seconds, 6),
+        **metrics.as_dict(),
+        "retries": retries,
+    }
+
+
+class MetricsReporter:
+    """Publica registros de métricas en JSON lines, Prometheus y StatsD.
+
+    Los errores al publicar se registran como advertencia: nunca hacen
+    fallar la copia. Es seguro entre hilos.
+
+    Attributes:
+        jsonl (str): Archivo al que se agrega una línea JSON por copia
+        prometheus (str): Archivo para el textfile collector de Prometheus
+        statsd (tuple): (host, puerto) del servidor StatsD
+        prefix (str): Prefijo de las métricas de Prometheus y StatsD
+
+    Example:
+        >>> reporter = MetricsReporter.from_config(cfg.get("metrics"))
+        >>> reporter.report(build_record(protocol.metrics, "sftp", ...))
+    """
+
+    def __init__(self, jsonl=None, prometheus=None, statsd=None, prefix=None):
+        """Inicializa el publicador.
+
+        Args:
+            jsonl (str, optional): Archivo de líneas JSON
+            prometheus (str, optional): Archivo ``.prom`` a reescribir
+            statsd (str, optional): "host:puerto" (puerto default: 8125)
+            prefix (str, optional): Prefijo de las métricas. Default: "copyway"
+
+        Raises:
+            ConfigError: Si la dirección de StatsD es inválida
+        """
+        self.jsonl = os.path.expanduser(jsonl) if jsonl else None
+        self.prometheus = os.path.expanduser(prometheus) if prometheus else None
+        self.statsd = _parse_address(statsd) if statsd else None
+        self.prefix = prefix or DEFAULT_PREFIX
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config=None, jsonl=None):
+        """Publicador según la sección ``metrics`` de la configuración.
+
+        Args:
+            config (dict, optional): Claves ``jsonl``, ``prometheus``,
+                ``statsd`` y ``prefix``
+            jsonl (str, optional): Archivo de líneas JSON; tiene prioridad
+                sobre el de la configuración (opción ``--metrics``)
+        """
+        config = config or {}
+        return cls(
+            jsonl=jsonl or config.get("jsonl"),
+            prometheus=config.get("prometheus"),
+            statsd=config.get("statsd"),
+            prefix=config.get("prefix"),
+        )
+
+    @property
+    def enabled(self):
+        return bool(self.jsonl or self.prometheus or self.statsd)
+
+    def report(self, record, prometheus=True):
+        """Publica el registro de una copia.
+
+        Args:
+            record (dict): Registro de ``build_record``
+            prometheus (bool): Reescribir también el archivo de Prometheus
+                (en un batch se escribe solo el total)
+        """
+        if self.jsonl:
+            self._publish("JSON lines", self._write_jsonl, record)
+        if self.statsd:
+            self._publish("StatsD", self._send_statsd, record)
+        if prometheus and self.prometheus:
+            self._publish("Prometheus", self._write_prometheus, record)
+
+    def _publish(self, name, func, record):
+        try:
+            func(record)
+        except OSError as e:
+            logger.warning(f"No se pudieron publicar las métricas ({name}): {e}")
+
+    def _write_jsonl(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock, open(self.jsonl, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def _write_prometheus(self, record):
+        # Escritura atómica: el collector nunca lee un archivo a medias
+        tmp = f"{self.prometheus}.{os.getpid()}.tmp"
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(prometheus_text(record, self.prefix))
+            os.replace(tmp, self.prometheus)
+
+    def _send_statsd(self, record):
+        lines = statsd_lines(record, self.prefix)
+        packets, current = [], ""
+        for line in lines:
+            if current and len(current) + len(line) + 1 > STATSD_PACKET_SIZE:
+                packets.append(current)
+                current = ""
+            current = f"{current}\n{line}" if current else line
+        if current:
+            packets.append(current)
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            for packet in packets:
+                sock.sendto(packet.encode(), self.statsd)
+
+
+def prometheus_text(record, prefix=DEFAULT_PREFIX):
+    """Métricas de la última copia en el formato de texto de Prometheus.
+
+    Args:
+        record (dict): Registro de ``build_record``
+        prefix (str): Prefijo de los nombres
+
+    Returns:
+        str: Contenido del archivo ``.prom``
+    """
+    labels = f'protocol="{_escape(record["protocol"])}"'
+    gauges = [
+        ("timestamp_seconds", "Fin de la última copia", record["timestamp"]),
+        (
+            "success",
+            "1 si la última copia terminó bien",
+            int(record["status"] == "completed"),
+        ),
+        ("duration_seconds", "Duración de la última copia", record["seconds"]),
+        ("files", "Archivos transferidos", record["files"]),
+        ("bytes", "Bytes transferidos", record["bytes"]),
+        ("errors", "Archivos u operaciones fallidas", record["errors"]),
+        ("retries", "Reintentos realizados", record["retries"]),
+    ]
+    lines = []
+    for name, help_text, value in gauges:
+        metric = f"{prefix}_last_run_{name}"
+        lines += [
+            f"# HELP {metric} {help_text}",
+            f"# TYPE {metric} gauge",
+            f"{metric}{{{labels}}} {value}",
+        ]
+    metric = f"{prefix}_last_run_phase_seconds"
+    lines += [
+        f"# HELP {metric} Segundos por fase de la última copia",
+        f"# TYPE {metric} gauge",
+    ]
+    for phase, seconds in record["phases"].items():
+        lines.append(f'{metric}{{{labels},phase="{_escape(phase)}"}} {seconds}')
+    return "\n".join(lines) + "\n"
+
+
+def statsd_lines(record, prefix=DEFAULT_PREFIX):
+    """Líneas StatsD de un registro: tiempos en ms y contadores.
+
+    Returns:
+        list: Ej: ["copyway.sftp.duration:1520|ms", "copyway.sftp.bytes:1024|c"]
+    """
+    base = f"{prefix}.{_statsd_name(record['protocol'])}"
+    lines = [
+        f"{base}.duration:{round(record['seconds'] * 1000, 3)}|ms",
+        f"{base}.{record['status']}:1|c",
+    ]
+    for phase, seconds in record["phases"].items():
+        lines.append(
+            f"{base}.phase.{_statsd_name(phase)}:{round(seconds * 1000, 3)}|ms"
+        )
+    for counter in ("files", "bytes", "errors", "retries"):
+        lines.append(f"{base}.{counter}:{record[counter]}|c")
+    return lines
+
+
+def _parse_address(address):
+    host, _, port = str(address).rpartition(":")
+    if not host:
+        return (port, DEFAULT_STATSD_PORT)
+    try:
+        return (host.strip("[]"), int(port))
+    except ValueError:
+        raise ConfigError(f"Dirección StatsD inválida: {address} (host:puerto)")
+
+
+def _phase_order(name):
+    return (PHASES.index(name), name) if name in PHASES else (len(PHASES), name)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _statsd_name(value):
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in str(value))
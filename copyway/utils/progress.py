@@ -6,7 +6,8 @@ velocidades y mostrar progreso de transferencias en tiempo real.
 
 import time
 import sys
-from pathlib import Path
+import threading
+from .walker import tree_size
 
 
 def get_file_size(path):
@@ -22,10 +23,7 @@ def get_file_size(path):
         >>> size = get_file_size('/path/to/file.txt')
         >>> print(f"Tamaño: {size} bytes")
     """
-    p = Path(path)
-    if p.is_file():
-        return p.stat().st_size
-    return sum(f.stat().st_size for f in p.rglob("*") if f.is_file())
+    return tree_size(path)
 
 
 def format_size(bytes_size):
@@ -70,7 +68,8 @@ class ProgressCallback:
     """Callback para mostrar progreso de transferencias.
 
     Muestra progreso estilo pip con spinner, porcentaje, tamaño y velocidad.
-    Cada archivo copiado se muestra en una nueva línea.
+    Cada archivo copiado se muestra en una nueva línea. Es seguro llamarlo
+    desde varios hilos a la vez (copias concurrentes).
 
     Attributes:
         total_size (int): Tamaño total a transferir en bytes
@@ -102,6 +101,7 @@ class ProgressCallback:
         self.last_update = 0
         self.spinner_idx = 0
         self.last_file = None
+        self._lock = threading.Lock()
 
     def update(self, bytes_copied, filename=None):
         """Actualizar progreso de transferencia.
@@ -110,6 +110,10 @@ class ProgressCallback:
             bytes_copied (int): Bytes copiados en esta actualización
             filename (str, optional): Nombre del archivo siendo copiado
         """
+        with self._lock:
+            self._update(bytes_copied, filename)
+
+    def _update(self, bytes_copied, filename):
         self.copied += bytes_copied
         current_time = time.time()
 
@@ -144,8 +148,51 @@ class ProgressCallback:
 
         Muestra el tamaño total, tiempo transcurrido y velocidad promedio.
         """
+        with self._lock:
+            self._finish()
+
+    def _finish(self):
         elapsed = time.time() - self.start_time
         avg_speed = self.copied / elapsed if elapsed > 0 else 0
         msg = f"\r✓ {self.label} {format_size(self.copied)} en {elapsed:.1f}s ({format_speed(avg_speed)})\n"
         sys.stdout.write(msg)
         sys.stdout.flush()
+
+
+class AttemptProgress:
+    """Progreso de una unidad que puede reintentarse (archivo, lote o bundle).
+
+    Cada intento informa sus bytes desde cero; el callback de ``attempt()``
+    solo pasa a ``callback`` lo que supera lo informado por los intentos
+    anteriores, así un reintento no lleva el total por encima del 100% ni
+    infla la velocidad.
+
+    Example:
+        >>> meter = AttemptProgress(progress.update)
+        >>> retry.call(lambda n: copy(src, dst, callback=meter.attempt()), src)
+    """
+
+    def __init__(self, callback):
+        """Inicializa el medidor.
+
+        Args:
+            callback (callable): Recibe los bytes nuevos (y los argumentos
+                extra de cada llamada, ej: el nombre del archivo); puede ser None
+        """
+        self.callback = callback
+        self.reported = 0
+
+    def attempt(self):
+        """Callback para un intento nuevo, o None si no hay ``callback``."""
+        if self.callback is None:
+            return None
+        done = 0
+
+        def update(nbytes, *args):
+            nonlocal done
+            done += nbytes
+            if done > self.reported:
+                self.callback(done - self.reported, *args)
+                self.reported = done
+
+        return update
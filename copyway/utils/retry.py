@@ -0,0 +1,242 @@
+"""Reintentos con backoff exponencial para operaciones de transferencia.
+
+Los protocolos envuelven cada operación por archivo (o por comando externo)
+con una ``RetryPolicy``: los errores transitorios (red, timeouts,
+transferencias detenidas) se reintentan con esperas crecientes y aleatorias;
+los permanentes (permisos, rutas inexistentes) se propagan enseguida.
+``RetryStats`` acumula los reintentos para el resumen final.
+"""
+
+import errno
+import random
+import threading
+import time
+from ..exceptions import TransientError
+from .logger import logger
+
+DEFAULT_RETRIES = 2
+DEFAULT_DELAY = 1.0
+DEFAULT_MAX_DELAY = 30.0
+
+# errno de fallas de red o de filesystems remotos (NFS) que suelen ser pasajeras
+TRANSIENT_ERRNOS = {
+    errno.ECONNRESET,
+    errno.ECONNABORTED,
+    errno.ECONNREFUSED,
+    errno.ETIMEDOUT,
+    errno.EPIPE,
+    errno.EHOSTUNREACH,
+    errno.ENETUNREACH,
+    errno.ENETDOWN,
+    errno.EAGAIN,
+    errno.EIO,
+    getattr(errno, "ESTALE", errno.EIO),
+}
+
+
+def is_transient(exc):
+    """Clasificación por defecto de errores reintentables.
+
+    Args:
+        exc (Exception): Error de la operación
+
+    Returns:
+        bool: True para ``TransientError`` (incluye ``StallError``), errores
+            de conexión, timeouts y ``OSError`` con un errno de red
+    """
+    if isinstance(exc, TransientError):
+        return True
+    if isinstance(exc, (ConnectionError, TimeoutError, EOFError)):
+        return True
+    if isinstance(exc, OSError):
+        return exc.errno in TRANSIENT_ERRNOS
+    return False
+
+
+class RetryStats:
+    """Contadores de reintentos de una copia. Es seguro entre hilos.
+
+    Attributes:
+        retries (int): Reintentos realizados
+        recovered (int): Operaciones que terminaron bien tras reintentar
+        exhausted (int): Operaciones que fallaron aun después de reintentar
+
+    Example:
+        >>> stats = RetryStats()
+        >>> RetryPolicy(stats=stats).call(subir, "datos.csv")
+        >>> print(stats.summary())
+        Reintentos: 1 (1 recuperados, 0 agotados)
+    """
+
+    def __init__(self):
+        self.retries = 0
+        self.recovered = 0
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_recovered(self):
+        with self._lock:
+            self.recovered += 1
+
+    def record_exhausted(self):
+        with self._lock:
+            self.exhausted += 1
+
+    def summary(self):
+        """Resumen legible de los contadores.
+
+        Returns:
+            str: Ej: "Reintentos: 3 (2 recuperados, 1 agotados)"
+        """
+        return (
+            f"Reintentos: {self.retries} ({self.recovered} recuperados, "
+            f"{self.exhausted} agotados)"
+        )
+
+    def as_dict(self):
+        return {
+            "retries": self.retries,
+            "recovered": self.recovered,
+            "exhausted": self.exhausted,
+        }
+
+
+class RetryPolicy:
+    """Ejecuta una operación reintentándola ante errores transitorios.
+
+    La espera antes del reintento ``n`` es ``delay * 2**n`` (acotada por
+    ``max_delay``), de la que la mitad es aleatoria para que los hilos y
+    procesos que fallaron juntos no reintenten todos a la vez.
+
+    Attributes:
+        retries (int): Reintentos por operación (0 desactiva)
+        delay (float): Espera base en segundos
+        max_delay (float): Espera máxima en segundos
+        is_retryable (callable): Recibe el error y decide si se reintenta
+        stats (RetryStats): Contadores a actualizar, o None
+
+    Example:
+        >>> policy = RetryPolicy(retries=3, delay=0.5)
+        >>> policy.call(lambda attempt: subir(archivo), archivo)
+    """
+
+    def __init__(
+        self,
+        retries=DEFAULT_RETRIES,
+        delay=DEFAULT_DELAY,
+        max_delay=DEFAULT_MAX_DELAY,
+        is_retryable=is_transient,
+        stats=None,
+    ):
+        """Inicializa la política.
+
+        Args:
+            retries (int): Reintentos por operación. Default: 2
+            delay (float): Espera base en segundos. Default: 1
+            max_delay (float): Espera máxima en segundos. Default: 30
+            is_retryable (callable): Clasificador de errores. Default:
+                ``is_transient``
+            stats (RetryStats, optional): Contadores a actualizar
+        """
+        self.retries = max(0, int(retries))
+        self.delay = float(delay)
+        self.max_delay = float(max_delay)
+        self.is_retryable = is_retryable
+        self.stats = stats
+
+    @classmethod
+    def from_config(cls, config, options, is_retryable=is_transient, stats=None):
+        """Política con ``retries``, ``retry_delay`` y ``retry_max_delay``.
+
+        Las opciones de la copia tienen prioridad sobre la configuración del
+        protocolo.
+
+        Args:
+            config (dict): Configuración del protocolo
+            options (dict): Opciones de la copia
+            is_retryable (callable): Clasificador de errores del protocolo
+            stats (RetryStats, optional): Contadores a actualizar
+
+        Returns:
+            RetryPolicy: Política configurada
+        """
+
+        def setting(key, default):
+            return options.get(key, config.get(key, default))
+
+        return cls(
+            retries=setting("retries", DEFAULT_RETRIES),
+            delay=setting("retry_delay", DEFAULT_DELAY),
+            max_delay=setting("retry_max_delay", DEFAULT_MAX_DELAY),
+            is_retryable=is_retryable,
+            stats=stats,
+        )
+
+    def backoff(self, attempt):
+        """Segundos a esperar antes del reintento número ``attempt + 1``."""
+        ceiling = min(self.max_delay, self.delay * 2**attempt)
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    def call(self, func, what):
+        """Ejecuta ``func(intento)`` reintentando los errores transitorios.
+
+        ``intento`` es 0 en la primera ejecución; con un valor mayor la
+        operación puede reconectar o reemplazar lo que dejó el intento fallido.
+
+        Args:
+            func (callable): Operación a ejecutar
+            what (str): Descripción para los mensajes (ej: ruta del archivo)
+
+        Returns:
+            object: Lo que retorna ``func``
+
+        Raises:
+            Exception: El error del último intento, o el primero que no sea
+                reintentable
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                result = func(attempt)
+            except Exception as e:
+                time.sleep(self._retry_wait(attempt, e, what))
+            else:
+                if attempt and self.stats:
+                    self.stats.record_recovered()
+                return result
+
+    async def call_async(self, func, what):
+        """Como ``call``, para una operación async: ``await func(intento)``.
+
+        La espera entre intentos no bloquea el event loop.
+        """
+        import asyncio
+
+        for attempt in range(self.retries + 1):
+            try:
+                result = await func(attempt)
+            except Exception as e:
+                await asyncio.sleep(self._retry_wait(attempt, e, what))
+            else:
+                if attempt and self.stats:
+                    self.stats.record_recovered()
+                return result
+
+    def _retry_wait(self, attempt, exc, what):
+        """Segundos a esperar antes de reintentar ``exc``; si no, lo relanza."""
+        if attempt == self.retries or not self.is_retryable(exc):
+            if attempt and self.stats:
+                self.stats.record_exhausted()
+            raise exc
+        wait = self.backoff(attempt)
+        detail = getattr(exc, "stderr", None) or exc
+        logger.warning(
+            f"Error en {what} (intento {attempt + 1}/{self.retries + 1}): "
+            f"{detail}; reintentando en {wait:.1f}s"
+        )
+        if self.stats:
+            self.stats.record_retry()
+        return wait
@@ -0,0 +1,205 @@
+"""Estado persistente de trabajos de copia para poder reanudarlos.
+
+Este módulo guarda en una base SQLite el estado de cada archivo transferido
+(tamaño, mtime, checksum) para que ``copyway --resume <job-id>`` continúe
+solo con lo pendiente tras una falla.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from ..exceptions import ConfigError
+
+# Opciones que nunca se guardan en disco
+SECRET_OPTIONS = {"password"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    protocol TEXT NOT NULL,
+    source TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    options TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    job_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    size INTEGER,
+    mtime REAL,
+    checksum TEXT,
+    error TEXT,
+    PRIMARY KEY (job_id, path)
+);
+"""
+
+
+class JobState:
+    """Registro persistente del progreso de un trabajo de copia.
+
+    Los protocolos consultan ``is_done`` antes de transferir cada archivo y
+    llaman a ``mark_done`` al completarlo. Las escrituras se agrupan en
+    transacciones (cada ``commit_interval`` segundos) para no pagar un fsync
+    por archivo; ante una caída se repiten como mucho los últimos archivos.
+    Es seguro usarlo desde varios hilos.
+
+    Attributes:
+        job_id (str): Identificador del trabajo
+        protocol (str): Protocolo usado
+        source (str): Ruta de origen
+        destination (str): Ruta de destino
+        options (dict): Opciones del trabajo (sin secretos)
+
+    Example:
+        >>> state = JobState.create("~/.copyway-jobs.db", "local", "/a", "/b", {})
+        >>> state.mark_done("/a/file.txt", 1024, 1700000000.0)
+        >>> state.finish("completed")
+    """
+
+    def __init__(self, db_path, job_id, commit_interval=1.0):
+        """Abre la base de estado para un trabajo existente.
+
+        Args:
+            db_path (str): Ruta al archivo SQLite
+            job_id (str): Identificador del trabajo
+            commit_interval (float): Segundos entre commits. Default: 1.0
+
+        Raises:
+            ConfigError: Si el trabajo no existe en la base
+        """
+        self.db_path = str(Path(db_path).expanduser())
+        self.job_id = job_id
+        self.commit_interval = commit_interval
+        self._lock = threading.Lock()
+        self._last_commit = time.time()
+        self._conn = _connect(self.db_path)
+
+        row = self._conn.execute(
+            "SELECT protocol, source, destination, options FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            self._conn.close()
+            raise ConfigError(f"Trabajo no encontrado: {job_id}")
+        self.protocol, self.source, self.destination = row[0], row[1], row[2]
+        self.options = json.loads(row[3])
+
+    @classmethod
+    def create(cls, db_path, protocol, source, destination, options, job_id=None):
+        """Registra un trabajo nuevo.
+
+        Args:
+            db_path (str): Ruta al archivo SQLite (se crea si no existe)
+            protocol (str): Nombre del protocolo
+            source (str): Ruta de origen
+            destination (str): Ruta de destino
+            options (dict): Opciones del trabajo; se omiten secretos y valores
+                no serializables
+            job_id (str, optional): Identificador; se genera si no se indica
+
+        Returns:
+            JobState: Estado del trabajo creado
+        """
+        job_id = job_id or uuid.uuid4().hex[:12]
+        stored = {
+            k: v
+            for k, v in options.items()
+            if k not in SECRET_OPTIONS and isinstance(v, (str, int, float, bool))
+        }
+        path = str(Path(db_path).expanduser())
+        conn = _connect(path)
+        now = time.time()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, 'running', ?, ?)",
+                (job_id, protocol, source, destination, json.dumps(stored), now, now),
+            )
+        conn.close()
+        return cls(path, job_id)
+
+    def is_done(self, path, size=None, mtime=None):
+        """Indica si un archivo ya fue transferido en una ejecución anterior.
+
+        Si se pasan ``size``/``mtime`` el archivo debe coincidir con lo
+        registrado; un origen modificado desde entonces se vuelve a copiar.
+
+        Args:
+            path (str): Clave del archivo (ruta de origen)
+            size (int, optional): Tamaño actual del origen
+            mtime (float, optional): mtime actual del origen
+
+        Returns:
+            bool: True si está completado y sin cambios
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, size, mtime FROM files WHERE job_id = ? AND path = ?",
+                (self.job_id, path),
+            ).fetchone()
+        if row is None or row[0] != "done":
+            return False
+        if size is not None and row[1] != size:
+            return False
+        if mtime is not None and row[2] is not None and abs(row[2] - mtime) > 1:
+            return False
+        return True
+
+    def mark_done(self, path, size=None, mtime=None, checksum=None):
+        """Registra un archivo completado."""
+        self._record(path, "done", size, mtime, checksum, None)
+
+    def mark_failed(self, path, error):
+        """Registra un archivo fallido con su error."""
+        self._record(path, "failed", None, None, None, str(error))
+
+    def pending_count(self):
+        """Cantidad de archivos registrados que no están completados."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM files WHERE job_id = ? AND status != 'done'",
+                (self.job_id,),
+            ).fetchone()[0]
+
+    def done_count(self):
+        """Cantidad de archivos completados."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM files WHERE job_id = ? AND status = 'done'",
+                (self.job_id,),
+            ).fetchone()[0]
+
+    def finish(self, status):
+        """Marca el trabajo como terminado ("completed" o "failed") y cierra."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, updated = ? WHERE id = ?",
+                (status, time.time(), self.job_id),
+            )
+            self._conn.commit()
+            self._conn.close()
+
+    def _record(self, path, status, size, mtime, checksum, error):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.job_id, path, status, size, mtime, checksum, error),
+            )
+            now = time.time()
+            if now - self._last_commit >= self.commit_interval:
+                self._conn.commit()
+                self._last_commit = now
+
+
+def _connect(db_path):
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
@@ -0,0 +1,280 @@
+"""Límite de ancho de banda para las transferencias (``--bwlimit``).
+
+Los bucles de transferencia (copia local, SFTP, WebHDFS, bundles SSH) piden
+permiso a un ``Throttle`` por cada bloque que mueven. El ``Throttle`` es un
+token bucket seguro entre hilos: todos los workers de una copia comparten el
+mismo presupuesto y, en un batch, el de cada trabajo puede colgar de uno
+global (``parent``).
+
+El límite se puede cambiar sin reiniciar la copia escribiendo un nuevo valor
+en el archivo de control (``bwlimit_file``), que se relee una vez por segundo
+o al recibir SIGHUP.
+"""
+
+import os
+import re
+import signal
+import threading
+import time
+import weakref
+from ..exceptions import ValidationError
+from .logger import logger
+from .progress import format_speed
+
+# Bloque máximo de las copias limitadas: bloques más grandes harían el
+# caudal muy desparejo con límites bajos
+THROTTLE_CHUNK_SIZE = 256 * 1024
+# Segundos entre lecturas del archivo de control
+CONTROL_INTERVAL = 1.0
+
+_UNITS = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3}
+_RATE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmg]?)(?:i?b)?(?:/s)?\s*$", re.I)
+
+_active = weakref.WeakSet()
+_active_lock = threading.Lock()
+
+
+def parse_rate(value):
+    """Convierte un límite como "10M" o "512K" a bytes por segundo.
+
+    Los sufijos K, M y G son binarios (1 K = 1024 bytes); "0", "off" o vacío
+    significan sin límite.
+
+    Args:
+        value (str | int | float): Límite en bytes por segundo o con sufijo
+
+    Returns:
+        int: Bytes por segundo (0 sin límite)
+
+    Raises:
+        ValidationError: Si el valor no es un límite válido
+
+    Example:
+        >>> parse_rate("10M")
+        10485760
+    """
+    if value is None or isinstance(value, bool):
+        return 0
+    if isinstance(value, (int, float)):
+        if value < 0:
+            raise ValidationError(f"Límite de ancho de banda inválido: {value}")
+        return int(value)
+    text = str(value).strip().lower()
+    if text in ("", "off", "none", "0"):
+        return 0
+    match = _RATE_RE.match(text)
+    if not match:
+        raise ValidationError(
+            f"Límite de ancho de banda inválido: {value} (ej: 500K, 10M, 1G)"
+        )
+    return int(float(match.group(1)) * _UNITS[match.group(2).lower()])
+
+
+class Throttle:
+    """Token bucket que limita los bytes por segundo de una o varias copias.
+
+    ``consume`` descuenta los bytes de un bloque y, si se excedió el
+    presupuesto, duerme lo necesario. Los hilos que consumen a la vez se
+    reparten el límite: cada uno espera en proporción a lo que ya se consumió.
+
+    Attributes:
+        rate (int): Bytes por segundo (0 sin límite)
+        control_file (str): Archivo con el límite a aplicar, o None
+        parent (Throttle): Límite global que también se descuenta, o None
+
+    Example:
+        >>> throttle = Throttle(parse_rate("10M"))
+        >>> for block in bloques:
+        ...     destino.write(block)
+        ...     throttle.consume(len(block))
+    """
+
+    def __init__(self, rate=0, control_file=None, parent=None):
+        """Inicializa el limitador.
+
+        Args:
+            rate (int): Bytes por segundo (0 sin límite)
+            control_file (str, optional): Archivo de control del límite
+            parent (Throttle, optional): Límite global compartido
+        """
+        self.rate = int(rate)
+        self.control_file = os.path.expanduser(control_file) if control_file else None
+        self.parent = parent
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        self._control_mtime = None
+        self._next_check = 0.0
+        with _active_lock:
+            _active.add(self)
+        if self.control_file:
+            self._read_control()
+
+    @classmethod
+    def from_config(cls, config, options, parent=None):
+        """Limitador de una copia según ``bwlimit`` y ``bwlimit_file``.
+
+        Las opciones de la copia tienen prioridad sobre la configuración del
+        protocolo.
+
+        Args:
+            config (dict): Configuración del protocolo
+            options (dict): Opciones de la copia
+            parent (Throttle, optional): Límite global (ej: el del batch)
+
+        Returns:
+            Throttle: El limitador, ``parent`` si la copia no tiene límite
+                propio, o None si no hay ninguno
+        """
+        rate = parse_rate(options.get("bwlimit", config.get("bwlimit")))
+        control_file = options.get("bwlimit_file", config.get("bwlimit_file"))
+        if not rate and not control_file:
+            return parent
+        return cls(rate, control_file, parent)
+
+    @property
+    def effective_rate(self):
+        """Límite más restrictivo entre este limitador y sus ``parent``.
+
+        Es el valor que se pasa a las herramientas externas (``scp -l``,
+        ``rsync --bwlimit``), que no consultan al limitador durante la copia.
+
+        Returns:
+            int: Bytes por segundo (0 sin límite)
+        """
+        rates = []
+        throttle = self
+        while throttle is not None:
+            if throttle.control_file:
+                throttle._read_control()
+            if throttle.rate:
+                rates.append(throttle.rate)
+            throttle = throttle.parent
+        return min(rates, default=0)
+
+    def set_rate(self, rate):
+        """Cambia el límite; se aplica desde el próximo bloque."""
+        rate = int(rate)
+        with self._lock:
+            if rate == self.rate:
+                return
+            self.rate = rate
+            self._tokens = 0.0
+            self._last = time.monotonic()
+        if rate:
+            logger.info(f"Límite de ancho de banda: {format_speed(rate)}")
+        else:
+            logger.info("Límite de ancho de banda desactivado")
+
+    def reload(self):
+        """Fuerza a releer el archivo de control en el próximo bloque."""
+        self._next_check = 0.0
+        self._control_mtime = None
+
+    def consume(self, nbytes):
+        """Descuenta ``nbytes`` y espera si se superó el límite.
+
+        Args:
+            nbytes (int): Bytes transferidos
+        """
+        wait = self._reserve(nbytes)
+        if wait:
+            time.sleep(wait)
+        if self.parent is not None:
+            self.parent.consume(nbytes)
+
+    async def consume_async(self, nbytes):
+        """Como ``consume``, sin bloquear el event loop mientras espera."""
+        import asyncio
+
+        wait = self._reserve(nbytes)
+        if wait:
+            await asyncio.sleep(wait)
+        if self.parent is not None:
+            await self.parent.consume_async(nbytes)
+
+    def _reserve(self, nbytes):
+        """Descuenta ``nbytes`` del presupuesto; retorna los segundos a esperar."""
+        if self.control_file and time.monotonic() >= self._next_check:
+            self._read_control()
+        with self._lock:
+            rate = self.rate
+            if not rate:
+                return 0.0
+            now = time.monotonic()
+            # Se permite acumular hasta un segundo de presupuesto sin usar
+            self._tokens = min(rate, self._tokens + (now - self._last) * rate)
+            self._last = now
+            self._tokens -= nbytes
+            return -self._tokens / rate if self._tokens < 0 else 0.0
+
+    def writer(self, write):
+        """Envuelve una función ``write`` para que respete el límite."""
+
+        def throttled(data):
+            write(data)
+            self.consume(len(data))
+
+        return throttled
+
+    def reader(self, read):
+        """Envuelve una función ``read(size)`` para que respete el límite."""
+
+        def throttled(size=-1):
+            data = read(size)
+            if data:
+                self.consume(len(data))
+            return data
+
+        return throttled
+
+    def callback(self, callback=None):
+        """Envuelve un callback de progreso ``callback(nbytes)``.
+
+        Sirve para los bucles que ya informan los bytes de cada bloque
+        (copia local, WebHDFS): el bloque espera el permiso del límite antes
+        de informarse.
+        """
+
+        def throttled(nbytes):
+            self.consume(nbytes)
+            if callback:
+                callback(nbytes)
+
+        return throttled
+
+    def _read_control(self):
+        self._next_check = time.monotonic() + CONTROL_INTERVAL
+        try:
+            mtime = os.stat(self.control_file).st_mtime_ns
+            if mtime == self._control_mtime:
+                return
+            with open(self.control_file, encoding="utf-8") as f:
+                text = f.read()
+            self._control_mtime = mtime
+        except OSError:
+            return  # Sin archivo de control se mantiene el límite actual
+        try:
+            self.set_rate(parse_rate(text))
+        except ValidationError as e:
+            logger.warning(f"{self.control_file}: {e}")
+
+
+def reload_all():
+    """Relee el archivo de control de todos los limitadores activos."""
+    with _active_lock:
+        throttles = list(_active)
+    for throttle in throttles:
+        throttle.reload()
+
+
+def install_reload_signal():
+    """Relee los archivos de control al recibir SIGHUP.
+
+    Solo tiene efecto en el hilo principal y en sistemas con SIGHUP.
+    """
+    if not hasattr(signal, "SIGHUP"):
+        return
+    if threading.current_thread() is not threading.main_thread():
+        return
+    signal.signal(signal.SIGHUP, lambda signum, frame: reload_all())
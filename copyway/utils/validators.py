@@ -3,6 +3,8 @@ import subprocess
 from pathlib import Path
 from ..exceptions import ValidationError
 from ..utils.logger import logger
+from .connections import connection_pool
+from .walker import tree_size
 
 
 def validate_source(source, protocol="local"):
@@ -26,70 +28,34 @@ def validate_source(source, protocol="local"):
 def validate_destination_sftp(
     destination, password=None, key_file=None, port=22, user=None
 ):
-    """Validación específica para SFTP con credenciales"""
+    """Validación específica para SFTP con credenciales.
+
+    La conexión abierta queda en ``connection_pool`` para que la copia
+    posterior la reutilice sin volver a autenticar.
+    """
     if "@" in destination and ":" in destination:
         host_part = destination.split(":")[0]
-        try:
-            import paramiko
-
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            host = host_part.split("@")[1]
-            remote_user = host_part.split("@")[0]
-
-            if key_file:
-                ssh.connect(
-                    host,
-                    port=port,
-                    username=remote_user,
-                    key_filename=key_file,
-                    timeout=15,
-                )
-            elif password:
-                ssh.connect(
-                    host, port=port, username=remote_user, password=password, timeout=15
-                )
-            else:
-                ssh.connect(host, port=port, username=remote_user, timeout=15)
-
-            ssh.close()
-        except ImportError:
-            raise ValidationError(
-                "paramiko no instalado. Ejecutar: pip install paramiko"
-            )
-        except Exception as e:
-            raise ValidationError(f"No se puede conectar a {host_part}: {e}")
+        remote_user, host = host_part.split("@", 1)
     elif ":" in destination:
         # Formato host:/ruta con --user
         if not user:
             raise ValidationError(
                 "Debe especificar --user o usar formato usuario@host:/ruta"
             )
-        host = destination.split(":")[0]
-        try:
-            import paramiko
-
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-            if key_file:
-                ssh.connect(
-                    host, port=port, username=user, key_filename=key_file, timeout=15
-                )
-            elif password:
-                ssh.connect(
-                    host, port=port, username=user, password=password, timeout=15
-                )
-            else:
-                ssh.connect(host, port=port, username=user, timeout=15)
-
-            ssh.close()
-        except ImportError:
-            raise ValidationError(
-                "paramiko no instalado. Ejecutar: pip install paramiko"
-            )
-        except Exception as e:
-            raise ValidationError(f"No se puede conectar a {host}: {e}")
+        host = host_part = destination.split(":")[0]
+        remote_user = user
+    else:
+        return True
+
+    try:
+        ssh = connection_pool.acquire(
+            host, port, remote_user, password, key_file, timeout=15
+        )
+        connection_pool.release(ssh)
+    except ImportError:
+        raise ValidationError("paramiko no instalado. Ejecutar: pip install paramiko")
+    except Exception as e:
+        raise ValidationError(f"No se puede conectar a {host_part}: {e}")
     return True
 
 
@@ -148,14 +114,9 @@ def validate_destination(destination, protocol="local"):
         if "@" in destination and ":" in destination:
             host_part = destination.split(":")[0]
             try:
-                import paramiko
-
-                ssh = paramiko.SSHClient()
-                ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                host = host_part.split("@")[1]
-                user = host_part.split("@")[0]
-                ssh.connect(host, username=user, timeout=15)
-                ssh.close()
+                user, host = host_part.split("@", 1)
+                ssh = connection_pool.acquire(host, user=user, timeout=15)
+                connection_pool.release(ssh)
             except ImportError:
                 raise ValidationError(
                     "paramiko no instalado. Ejecutar: pip install paramiko"
@@ -181,13 +142,10 @@ def validate_destination(destination, protocol="local"):
     return True
 
 
-def validate_disk_space(source, destination, protocol="local"):
+def validate_disk_space(source, destination, protocol="local", size=None):
     if protocol == "local":
-        src = Path(source)
-        if src.is_file():
-            size = src.stat().st_size
-        else:
-            size = sum(f.stat().st_size for f in src.rglob("*") if f.is_file())
+        if size is None:
+            size = tree_size(source)
 
         dest_stat = os.statvfs(Path(destination).parent)
         available = dest_stat.f_bavail * dest_stat.f_frsize
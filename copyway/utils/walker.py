@@ -0,0 +1,114 @@
+"""Recorrido de árboles de directorios en streaming con ``os.scandir``.
+
+Este módulo recorre un árbol una sola vez, reutilizando el stat que
+``scandir`` ya obtuvo de cada entrada, y comparte el resultado entre la
+validación de espacio, el total de progreso y el plan de copia.
+"""
+
+import os
+from collections import namedtuple
+from pathlib import Path
+
+# rel: ruta relativa a la raíz; kind: "dir", "file" o "link" (symlink no
+# seguido); stat: el de scandir (del propio symlink si kind es "link")
+WalkEntry = namedtuple("WalkEntry", ["rel", "path", "kind", "stat"])
+
+
+def walk_tree(root, follow_symlinks=False):
+    """Recorrer un árbol en orden top-down sin cargarlo en memoria.
+
+    Cada directorio se entrega antes que su contenido. Sin
+    ``follow_symlinks`` los symlinks (a archivos o directorios) se entregan
+    como "link" y no se recorren.
+
+    Args:
+        root (str | Path): Directorio raíz
+        follow_symlinks (bool): Seguir symlinks. Default: False
+
+    Yields:
+        WalkEntry: Una entrada por archivo, directorio o symlink
+
+    Raises:
+        OSError: Si un directorio no se puede listar
+
+    Example:
+        >>> for entry in walk_tree("/datos"):
+        ...     if entry.kind == "file":
+        ...         print(entry.rel, entry.stat.st_size)
+    """
+    root = os.fspath(root)
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        subdirs = []
+        with os.scandir(os.path.join(root, rel_dir) if rel_dir else root) as it:
+            for entry in it:
+                rel = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                if not follow_symlinks and entry.is_symlink():
+                    kind = "link"
+                    st = entry.stat(follow_symlinks=False)
+                elif entry.is_dir():
+                    kind = "dir"
+                    st = entry.stat()
+                    subdirs.append(rel)
+                else:
+                    kind = "file"
+                    st = entry.stat()
+                yield WalkEntry(rel, entry.path, kind, st)
+        # Invertidos para recorrer en el orden en que se listaron
+        stack.extend(reversed(subdirs))
+
+
+def tree_size(path, follow_symlinks=False):
+    """Tamaño total de un archivo o de los archivos de un árbol.
+
+    Args:
+        path (str | Path): Archivo o directorio
+        follow_symlinks (bool): Contar el destino de los symlinks
+
+    Returns:
+        int: Tamaño en bytes
+    """
+    if not os.path.isdir(path):
+        return os.stat(path).st_size
+    return sum(
+        e.stat.st_size for e in walk_tree(path, follow_symlinks) if e.kind == "file"
+    )
+
+
+class TreeScan:
+    """Resultado de recorrer un árbol una vez: plan de copia y tamaño total.
+
+    Attributes:
+        root (Path): Directorio raíz
+        follow_symlinks (bool): Si se siguieron los symlinks
+        dirs (list): Rutas relativas (Path) de directorios, en orden top-down
+        files (list): Tuplas (ruta relativa, os.stat_result) de archivos
+        links (list): Rutas relativas de symlinks no seguidos
+        total_size (int): Suma de tamaños de ``files``
+
+    Example:
+        >>> scan = TreeScan("/datos")
+        >>> print(len(scan.files), scan.total_size)
+    """
+
+    def __init__(self, root, follow_symlinks=False):
+        """Recorre ``root`` con ``walk_tree``.
+
+        Args:
+            root (str | Path): Directorio raíz
+            follow_symlinks (bool): Seguir symlinks. Default: False
+        """
+        self.root = Path(root)
+        self.follow_symlinks = follow_symlinks
+        self.dirs, self.files, self.links = [], [], []
+        self.total_size = 0
+        for entry in walk_tree(root, follow_symlinks):
+            rel = Path(entry.rel)
+            if entry.kind == "dir":
+                self.dirs.append(rel)
+            elif entry.kind == "link":
+                self.links.append(rel)
+            else:
+                self.files.append((rel, entry.stat))
+                self.total_size += entry.stat.st_size
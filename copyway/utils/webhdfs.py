@@ -0,0 +1,370 @@
+"""Cliente WebHDFS/HttpFS con conexiones HTTP persistentes.
+
+Este módulo habla la API REST de WebHDFS usando solo la biblioteca estándar,
+para que HDFSProtocol no tenga que lanzar una JVM (``hdfs dfs``) por cada
+operación. Las conexiones al NameNode y a los DataNodes se reutilizan
+(keep-alive) y los datos se transfieren en bloques sin cargarlos en memoria.
+"""
+
+import http.client
+import json
+import os
+import threading
+from urllib.parse import quote, urlencode, urlsplit
+from ..exceptions import ProtocolError, TransientError
+from .logger import logger
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_TIMEOUT = 60
+# RemoteException que indican un NameNode momentáneamente no disponible
+TRANSIENT_EXCEPTIONS = {"RetriableException", "StandbyException", "SafeModeException"}
+
+
+class WebHDFSClient:
+    """Cliente de la API REST de WebHDFS (también compatible con HttpFS).
+
+    Usa autenticación simple (``user.name``). Las escrituras y lecturas
+    siguen la redirección del NameNode al DataNode que guarda los datos. Es
+    seguro entre hilos: cada petición toma una conexión del pool interno.
+
+    Attributes:
+        url (str): URL base del NameNode o HttpFS (ej: http://namenode:9870)
+        user (str): Usuario HDFS (``user.name``) o None
+        chunk_size (int): Bytes por lectura/escritura al transferir datos
+
+    Example:
+        >>> client = WebHDFSClient("http://namenode:9870", user="hdfs")
+        >>> with open("datos.csv", "rb") as f:
+        ...     client.create("/data/datos.csv", f, replication=2, permission="644")
+    """
+
+    def __init__(
+        self,
+        url,
+        user=None,
+        timeout=DEFAULT_TIMEOUT,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        max_idle=8,
+    ):
+        """Inicializa el cliente sin abrir conexiones.
+
+        Args:
+            url (str): URL base del NameNode o HttpFS
+            user (str, optional): Usuario HDFS
+            timeout (float): Timeout de red en segundos. Default: 60
+            chunk_size (int): Tamaño de bloque de transferencia. Default: 1 MiB
+            max_idle (int): Conexiones ociosas a conservar por host. Default: 8
+        """
+        parts = urlsplit(url if "://" in url else f"http://{url}")
+        if parts.scheme not in ("http", "https"):
+            raise ProtocolError(f"URL WebHDFS inválida: {url}")
+        self.url = url
+        self.user = user
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.max_idle = max_idle
+        self._base = (parts.scheme, parts.hostname, parts.port)
+        self._prefix = parts.path.rstrip("/") + "/webhdfs/v1"
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def status(self, path):
+        """FileStatus de una ruta, o None si no existe.
+
+        Returns:
+            dict: Con ``type`` ("FILE"/"DIRECTORY"), ``length``,
+                ``modificationTime`` (ms), etc.
+        """
+        try:
+            return self._json("GET", path, "GETFILESTATUS")["FileStatus"]
+        except FileNotFoundError:
+            return None
+
+    def list_status(self, path):
+        """FileStatus de cada entrada de un directorio (con ``pathSuffix``)."""
+        return self._json("GET", path, "LISTSTATUS")["FileStatuses"]["FileStatus"]
+
+    def list_files(self, path):
+        """Lista recursivamente los archivos bajo una ruta.
+
+        Returns:
+            dict: {ruta: (tamaño, mtime)}; vacío si la ruta no existe
+        """
+        st = self.status(path)
+        if st is None:
+            return {}
+        if st["type"] == "FILE":
+            return {path: _size_mtime(st)}
+
+        files = {}
+        stack = [path.rstrip("/") or "/"]
+        while stack:
+            current = stack.pop()
+            for entry in self.list_status(current):
+                child = f"{current.rstrip('/')}/{entry['pathSuffix']}"
+                if entry["type"] == "DIRECTORY":
+                    stack.append(child)
+                else:
+                    files[child] = _size_mtime(entry)
+        return files
+
+    def mkdirs(self, path, permission=None):
+        """Crea un directorio y sus padres (como ``mkdir -p``)."""
+        params = {"permission": permission} if permission else {}
+        self._json("PUT", path, "MKDIRS", **params)
+
+    def create(
+        self,
+        path,
+        fileobj,
+        overwrite=False,
+        replication=None,
+        permission=None,
+        callback=None,
+        size=None,
+    ):
+        """Sube el contenido de ``fileobj`` a ``path`` en bloques.
+
+        La replicación y los permisos se aplican en la misma operación CREATE,
+        sin llamadas posteriores a setrep/chmod.
+
+        Args:
+            path (str): Ruta HDFS destino
+            fileobj (file): Archivo abierto en modo binario
+            overwrite (bool): Reemplazar si existe. Default: False
+            replication (int, optional): Factor de replicación
+            permission (str, optional): Permisos en octal (ej: "755")
+            callback (callable, optional): Se llama con los bytes de cada bloque
+            size (int, optional): Bytes a enviar, si ``fileobj`` no admite
+                ``seek`` (ej: un stream)
+
+        Raises:
+            ProtocolError: Si HDFS rechaza la escritura
+            TransientError: Ante errores de conexión o del servidor (5xx)
+        """
+        params = {"overwrite": "true" if overwrite else "false"}
+        if replication:
+            params["replication"] = int(replication)
+        if permission:
+            params["permission"] = permission
+
+        status, location, _ = self._request("PUT", self._url(path, "CREATE", params))
+        if status != 307 or not location:
+            raise ProtocolError(f"WebHDFS CREATE {path}: respuesta inesperada {status}")
+
+        headers = {"Content-Type": "application/octet-stream"}
+        if size is not None:
+            headers["Content-Length"] = str(size)
+        else:
+            try:
+                offset = fileobj.tell()
+                headers["Content-Length"] = str(fileobj.seek(0, os.SEEK_END) - offset)
+                fileobj.seek(offset)
+            except (AttributeError, OSError):
+                pass  # Sin tamaño conocido http.client envía el cuerpo chunked
+        body = _CallbackReader(fileobj, callback) if callback else fileobj
+        self._request("PUT", location, body=body, headers=headers, expect=201)
+
+    def open(self, path, fileobj, callback=None):
+        """Descarga ``path`` escribiéndolo en ``fileobj`` en bloques.
+
+        Args:
+            path (str): Ruta HDFS origen
+            fileobj (file): Archivo abierto en modo binario para escritura
+            callback (callable, optional): Se llama con los bytes de cada bloque
+        """
+
+        def sink(response):
+            while True:
+                chunk = response.read(self.chunk_size)
+                if not chunk:
+                    break
+                fileobj.write(chunk)
+                if callback:
+                    callback(len(chunk))
+
+        url = self._url(path, "OPEN", {})
+        status, location, _ = self._request("GET", url, sink=sink)
+        if status == 307 and location:
+            self._request("GET", location, sink=sink, expect=200)
+
+    def set_replication(self, path, replication):
+        """Cambia el factor de replicación de un archivo."""
+        self._json("PUT", path, "SETREPLICATION", replication=int(replication))
+
+    def set_permission(self, path, permission):
+        """Cambia los permisos de una ruta."""
+        self._json("PUT", path, "SETPERMISSION", permission=permission)
+
+    def close(self):
+        """Cierra las conexiones ociosas."""
+        with self._lock:
+            conns = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for conn in conns:
+            conn.close()
+
+    def _url(self, path, op, params):
+        """URL relativa al NameNode para una operación."""
+        query = {"op": op, **params}
+        if self.user:
+            query["user.name"] = self.user
+        return f"{self._prefix}{quote(_hdfs_path(path))}?{urlencode(query)}"
+
+    def _json(self, method, path, op, **params):
+        _, _, body = self._request(method, self._url(path, op, params), expect=200)
+        return json.loads(body) if body else {}
+
+    def _request(self, method, url, body=None, headers=None, expect=None, sink=None):
+        """Ejecuta una petición con una conexión del pool.
+
+        ``url`` puede ser relativa (NameNode) o absoluta (redirección a un
+        DataNode). Las redirecciones no se siguen: se devuelven al llamador.
+
+        Returns:
+            tuple: (status, location, cuerpo) con cuerpo vacío si se usó ``sink``
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port) if parts.scheme else self._base
+        target = f"{parts.path}?{parts.query}" if parts.scheme else url
+
+        offset = body.tell() if hasattr(body, "tell") else None
+        for attempt in (1, 2):
+            conn, reused = self._acquire(key)
+            try:
+                conn.request(method, target, body=body, headers=headers or {})
+                response = conn.getresponse()
+                break
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                # El servidor pudo cerrar una conexión keep-alive ociosa: se
+                # reintenta una vez con una nueva si el cuerpo se puede rebobinar
+                if reused and attempt == 1 and (body is None or offset is not None):
+                    if offset is not None:
+                        body.seek(offset)
+                    continue
+                raise TransientError(
+                    f"Error de conexión WebHDFS ({key[1]}): {e}"
+                ) from e
+
+        try:
+            location = response.getheader("Location")
+            if sink and response.status == 200:
+                sink(response)
+                data = b""
+            else:
+                data = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            raise TransientError(f"Error de conexión WebHDFS ({key[1]}): {e}") from e
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+
+        if response.status == 404:
+            raise FileNotFoundError(_remote_message(data) or parts.path)
+        if response.status >= 400 or (expect and response.status not in (expect, 307)):
+            transient = (
+                response.status >= 500
+                or _remote_exception(data) in TRANSIENT_EXCEPTIONS
+            )
+            error = TransientError if transient else ProtocolError
+            raise error(
+                f"WebHDFS {method} {parts.path}: {response.status} "
+                f"{_remote_message(data) or response.reason}"
+            )
+        return response.status, location, data
+
+    def _acquire(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        scheme, host, port = key
+        cls = (
+            http.client.HTTPSConnection
+            if scheme == "https"
+            else http.client.HTTPConnection
+        )
+        logger.debug(f"Conexión WebHDFS nueva a {host}:{port}")
+        return cls(host, port, timeout=self.timeout, blocksize=self.chunk_size), False
+
+    def _release(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+
+class _CallbackReader:
+    """Envuelve un archivo para informar los bytes que lee http.client."""
+
+    def __init__(self, fileobj, callback):
+        self._file = fileobj
+        self._callback = callback
+
+    def read(self, size=-1):
+        data = self._file.read(size)
+        if data:
+            self._callback(len(data))
+        return data
+
+    def tell(self):
+        return self._file.tell()
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(url, user=None, **kwargs):
+    """Cliente compartido por (url, usuario) para reutilizar sus conexiones.
+
+    Args:
+        url (str): URL base del NameNode o HttpFS
+        user (str, optional): Usuario HDFS
+        **kwargs: Argumentos de ``WebHDFSClient`` (timeout, chunk_size...)
+
+    Returns:
+        WebHDFSClient: El mismo cliente para la misma url y usuario
+    """
+    with _clients_lock:
+        client = _clients.get((url, user))
+        if client is None:
+            client = _clients[(url, user)] = WebHDFSClient(url, user, **kwargs)
+        return client
+
+
+def _hdfs_path(path):
+    """Quita el esquema/autoridad de rutas ``hdfs://namenode/ruta``."""
+    if path.startswith("hdfs://"):
+        path = urlsplit(path).path
+    return "/" + path.lstrip("/")
+
+
+def _size_mtime(status):
+    return status["length"], status["modificationTime"] / 1000.0
+
+
+def _remote_message(data):
+    """Mensaje de una RemoteException de WebHDFS, si la hay."""
+    return _remote_field(data, "message")
+
+
+def _remote_exception(data):
+    """Nombre de la RemoteException de WebHDFS (ej: "StandbyException")."""
+    return _remote_field(data, "exception")
+
+
+def _remote_field(data, field):
+    try:
+        return json.loads(data)["RemoteException"][field]
+    except (ValueError, KeyError, TypeError):
+        return None
@@ -0,0 +1,535 @@
+import json
+import os
+import subprocess
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+from urllib.parse import parse_qs, urlsplit
+import paramiko
+
+
+class FakeSFTPFile:
+    """Archivo remoto respaldado por un archivo local (imita paramiko.SFTPFile)."""
+
+    MODES = {"r": "rb", "rb": "rb", "w": "wb", "wb": "wb", "r+": "r+b", "a": "ab"}
+
+    def __init__(self, client, path, mode):
+        self.client = client
+        self._f = open(path, self.MODES[mode])
+
+    def read(self, size=-1):
+        return self._f.read(size)
+
+    def write(self, data):
+        self.client.bytes_written += len(data)
+        self._f.write(data)
+
+    def seek(self, offset, whence=0):
+        self._f.seek(offset, whence)
+
+    def tell(self):
+        return self._f.tell()
+
+    def truncate(self, size=None):
+        self._f.truncate(size)
+
+    def stat(self):
+        self._f.flush()
+        return paramiko.SFTPAttributes.from_stat(os.fstat(self._f.fileno()))
+
+    def set_pipelined(self, pipelined=True):
+        pass
+
+    def prefetch(self, file_size=None, max_concurrent_requests=None):
+        self.client.prefetches.append((file_size, max_concurrent_requests))
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FakeExecChannel:
+    """Canal exec que corre el comando con el shell local dentro de ``root``.
+
+    Las rutas absolutas del comando se vuelven relativas a ``root`` (basta con
+    los comandos simples que lanza CopyWay: ``gzip -dc > /ruta``).
+    """
+
+    def __init__(self, root, commands):
+        self.root = root
+        self.commands = commands
+        self.proc = None
+
+    def exec_command(self, command):
+        self.commands.append(command)
+        self.proc = subprocess.Popen(
+            command.replace(" /", " ./"),
+            shell=True,
+            cwd=self.root,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+    def sendall(self, data):
+        self.proc.stdin.write(data)
+        self.proc.stdin.flush()
+
+    def shutdown_write(self):
+        self.proc.stdin.close()
+
+    def recv(self, size):
+        return self.proc.stdout.read1(size)
+
+    def exit_status_ready(self):
+        # En paramiko un canal cerrado ya recibió el estado de salida
+        try:
+            self.proc.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            return False
+        return True
+
+    def recv_exit_status(self):
+        return self.proc.wait()
+
+    def makefile(self, mode="rb"):
+        return self.proc.stdout
+
+    def makefile_stderr(self, mode="rb"):
+        return self.proc.stderr
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.wait()
+        for stream in (self.proc.stdin, self.proc.stdout, self.proc.stderr):
+            try:
+                stream.close()
+            except BrokenPipeError:
+                pass
+
+
+class FakeSFTPClient:
+    """Cliente SFTP en memoria que mapea rutas remotas a un directorio local.
+
+    ``get_channel().get_transport().open_session()`` abre un ``FakeExecChannel``
+    y ``exec_commands`` lista los comandos ejecutados.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.bytes_written = 0
+        self.prefetches = []
+        self.exec_commands = []
+
+    def get_channel(self):
+        channel = MagicMock()
+        channel.get_transport.return_value.open_session.side_effect = (
+            lambda: FakeExecChannel(self.root, self.exec_commands)
+        )
+        return channel
+
+    def local(self, path):
+        return self.root / path.lstrip("/")
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(self.local(path)))
+        except FileNotFoundError:
+            raise IOError(f"No such file: {path}")
+
+    lstat = stat
+
+    def open(self, path, mode="r", bufsize=-1):
+        if mode.startswith("r") and not self.local(path).exists():
+            raise IOError(f"No such file: {path}")
+        return FakeSFTPFile(self, self.local(path), mode)
+
+    def mkdir(self, path, mode=0o777):
+        try:
+            self.local(path).mkdir()
+        except FileExistsError:
+            raise IOError(f"Exists: {path}")
+
+    def listdir_attr(self, path="."):
+        local = self.local(path)
+        if not local.is_dir():
+            raise IOError(f"No such dir: {path}")
+        return [
+            paramiko.SFTPAttributes.from_stat(os.stat(p), p.name)
+            for p in sorted(local.iterdir())
+        ]
+
+    def remove(self, path):
+        try:
+            self.local(path).unlink()
+        except FileNotFoundError:
+            raise IOError(f"No such file: {path}")
+
+    def rename(self, old, new):
+        if self.local(new).exists():
+            raise IOError(f"Exists: {new}")
+        os.rename(self.local(old), self.local(new))
+
+    def posix_rename(self, old, new):
+        os.replace(self.local(old), self.local(new))
+
+    def utime(self, path, times):
+        os.utime(self.local(path), times)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_sftp(tmp_path):
+    remote_root = tmp_path / "remote"
+    remote_root.mkdir()
+    return FakeSFTPClient(remote_root)
+
+
+class FakeSFTPHosts(dict):
+    """``FakeSFTPClient`` por host, cada uno con su raíz, creados al pedirlos."""
+
+    def __init__(self, root):
+        super().__init__()
+        self.root = Path(root)
+
+    def __missing__(self, host):
+        (self.root / host).mkdir(parents=True)
+        client = self[host] = FakeSFTPClient(self.root / host)
+        return client
+
+
+@pytest.fixture
+def fake_sftp_hosts(tmp_path):
+    return FakeSFTPHosts(tmp_path / "hosts")
+
+
+class FakeAsyncSFTPFile:
+    """Archivo remoto de ``FakeAsyncSFTPClient`` (imita asyncssh.SFTPClientFile)."""
+
+    MODES = {"rb": "rb", "wb": "wb"}
+
+    def __init__(self, client, path, mode):
+        self.client = client
+        self._f = open(path, self.MODES[mode])
+
+    async def read(self, size=-1, offset=None):
+        self.client.requests += 1
+        if offset is not None:
+            self._f.seek(offset)
+        return self._f.read(size)
+
+    async def write(self, data, offset=None):
+        self.client.requests += 1
+        self.client.bytes_written += len(data)
+        if offset is not None:
+            self._f.seek(offset)
+        self._f.write(data)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._f.close()
+
+
+class FakeAsyncSFTPClient:
+    """Cliente SFTP asyncssh que mapea las rutas remotas a un directorio local."""
+
+    def __init__(self, module, root):
+        self.module = module
+        self.root = Path(root)
+        self.bytes_written = 0
+        self.requests = 0
+
+    def local(self, path):
+        return self.root / path.lstrip("/")
+
+    async def stat(self, path):
+        try:
+            return self.module.attrs(os.stat(self.local(path)))
+        except FileNotFoundError:
+            raise self.module.SFTPNoSuchFile(f"No such file: {path}")
+
+    async def readdir(self, path):
+        return [
+            MagicMock(filename=p.name, attrs=self.module.attrs(os.lstat(p)))
+            for p in sorted(self.local(path).iterdir())
+        ]
+
+    def open(self, path, mode="rb"):
+        if mode == "rb" and not self.local(path).exists():
+            raise self.module.SFTPNoSuchFile(f"No such file: {path}")
+        return FakeAsyncSFTPFile(self, self.local(path), mode)
+
+    async def mkdir(self, path):
+        try:
+            self.local(path).mkdir()
+        except FileExistsError:
+            raise self.module.SFTPError(f"Exists: {path}")
+
+    async def remove(self, path):
+        self.local(path).unlink()
+
+    async def rename(self, old, new):
+        os.rename(self.local(old), self.local(new))
+
+    async def posix_rename(self, old, new):
+        os.replace(self.local(old), self.local(new))
+
+    async def utime(self, path, times):
+        os.utime(self.local(path), times)
+
+    def exit(self):
+        pass
+
+
+class FakeAsyncSSHConnection:
+    def __init__(self, module, host):
+        self.module = module
+        self.root = module.root / host
+        self.root.mkdir(exist_ok=True)
+        self.sftp = FakeAsyncSFTPClient(module, self.root)
+        self.closed = False
+
+    async def start_sftp_client(self):
+        return self.sftp
+
+    async def run(self, command, check=False):
+        # Las rutas absolutas del comando se vuelven relativas al host
+        proc = subprocess.run(
+            command.replace(" /", " ./"),
+            shell=True,
+            cwd=self.root,
+            capture_output=True,
+            text=True,
+        )
+        self.module.commands.append(command)
+        return MagicMock(
+            stdout=proc.stdout, stderr=proc.stderr, exit_status=proc.returncode
+        )
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        pass
+
+
+class FakeAsyncSSH:
+    """Módulo asyncssh falso: cada host es un subdirectorio de ``root``.
+
+    ``connections`` lista las conexiones abiertas (host, kwargs) y
+    ``failures`` indica cuántos de los próximos ``connect`` fallan.
+    """
+
+    class Error(Exception):
+        pass
+
+    class DisconnectError(Error):
+        pass
+
+    class PermissionDenied(DisconnectError):
+        pass
+
+    class ConnectionLost(DisconnectError):
+        pass
+
+    class SFTPError(Error):
+        pass
+
+    class SFTPNoSuchFile(SFTPError):
+        pass
+
+    class SFTPOpUnsupported(SFTPError):
+        pass
+
+    class SFTPConnectionLost(SFTPError):
+        pass
+
+    class SFTPNoConnection(SFTPError):
+        pass
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.connections = []
+        self.commands = []
+        self.failures = 0
+
+    async def connect(self, host, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise self.ConnectionLost("Connection lost")
+        conn = FakeAsyncSSHConnection(self, host)
+        self.connections.append((host, kwargs, conn))
+        return conn
+
+    @staticmethod
+    def attrs(st):
+        return MagicMock(
+            size=st.st_size,
+            mtime=st.st_mtime,
+            atime=st.st_atime,
+            permissions=st.st_mode,
+        )
+
+
+@pytest.fixture
+def fake_asyncssh(tmp_path):
+    """Reemplaza asyncssh en el protocolo asftp por ``FakeAsyncSSH``."""
+    root = tmp_path / "hosts"
+    root.mkdir()
+    module = FakeAsyncSSH(root)
+    with patch("copyway.protocols.asftp.asyncssh", module):
+        yield module
+
+
+@pytest.fixture
+def mock_popen():
+    """Reemplaza subprocess.Popen por procesos que terminan bien al instante.
+
+    ``mock_popen.commands`` lista los comandos lanzados y
+    ``mock_popen.failures`` indica cuántos de los próximos terminan con error
+    (con ``mock_popen.stderr`` como salida de error).
+    """
+    with patch("subprocess.Popen") as popen:
+        popen.commands = []
+        popen.failures = 0
+        popen.stderr = "DataNode caído"
+
+        def start(cmd, **kwargs):
+            popen.commands.append(cmd)
+            proc = MagicMock(pid=0, returncode=0)
+            proc.communicate.return_value = ("", "")
+            if popen.failures:
+                popen.failures -= 1
+                proc.returncode = 1
+                proc.communicate.return_value = ("", popen.stderr)
+            proc.poll.return_value = proc.returncode
+            return proc
+
+        popen.side_effect = start
+        yield popen
+
+
+class FakeWebHDFSHandler(BaseHTTPRequestHandler):
+    """NameNode + DataNode WebHDFS mínimos respaldados por un directorio local."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_PUT(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        parts = urlsplit(self.path)
+        params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        op = params["op"]
+        datanode = parts.path.startswith("/datanode")
+        hdfs_path = parts.path.split("/v1", 1)[1] or "/"
+        local = self.server.root / hdfs_path.lstrip("/")
+        self.server.ops.append(op)
+
+        if op in ("CREATE", "OPEN") and not datanode:
+            if op == "CREATE" and local.exists() and params.get("overwrite") != "true":
+                return self._error(
+                    403, "FileAlreadyExistsException", f"{hdfs_path} already exists"
+                )
+            if op == "OPEN" and not local.is_file():
+                return self._error(
+                    404, "FileNotFoundException", f"File does not exist: {hdfs_path}"
+                )
+            port = self.server.server_address[1]
+            self.send_response(307)
+            self.send_header(
+                "Location",
+                f"http://127.0.0.1:{port}/datanode/v1{hdfs_path}?{parts.query}",
+            )
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif op == "CREATE":
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            local.parent.mkdir(parents=True, exist_ok=True)
+            local.write_bytes(body)
+            self.server.created[hdfs_path] = params
+            self._reply(201, b"")
+        elif op == "OPEN":
+            self._reply(200, local.read_bytes(), "application/octet-stream")
+        elif op == "MKDIRS":
+            local.mkdir(parents=True, exist_ok=True)
+            self._json({"boolean": True})
+        elif not local.exists():
+            self._error(
+                404, "FileNotFoundException", f"File does not exist: {hdfs_path}"
+            )
+        elif op == "GETFILESTATUS":
+            self._json({"FileStatus": self._status(local, "")})
+        elif op == "LISTSTATUS":
+            entries = [
+                self._status(child, child.name) for child in sorted(local.iterdir())
+            ]
+            self._json({"FileStatuses": {"FileStatus": entries}})
+        else:
+            self._error(400, "IllegalArgumentException", f"Invalid op: {op}")
+
+    def _status(self, path, suffix):
+        st = path.stat()
+        return {
+            "pathSuffix": suffix,
+            "type": "DIRECTORY" if path.is_dir() else "FILE",
+            "length": 0 if path.is_dir() else st.st_size,
+            "modificationTime": int(st.st_mtime * 1000),
+        }
+
+    def _json(self, data):
+        self._reply(200, json.dumps(data).encode(), "application/json")
+
+    def _error(self, code, exception, message):
+        body = {"RemoteException": {"exception": exception, "message": message}}
+        self._reply(code, json.dumps(body).encode(), "application/json")
+
+    def _reply(self, code, body, content_type=None):
+        self.send_response(code)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def webhdfs_server(tmp_path):
+    root = tmp_path / "hdfs"
+    root.mkdir()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeWebHDFSHandler)
+    server.daemon_threads = True
+    server.root = root
+    server.connections = 0
+    server.ops = []
+    server.created = {}
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
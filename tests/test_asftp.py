@@ -0,0 +1,276 @@
+import asyncio
+import threading
+import time
+import pytest
+from copyway.batch import BatchRunner
+from copyway.config import Config
+from copyway.exceptions import ProtocolError, TransientError, ValidationError
+from copyway.protocols import ProtocolFactory
+from copyway.protocols.asftp import PARTIAL_SUFFIX, AsyncSFTPProtocol
+from copyway.protocols.base import AsyncProtocol
+from copyway.utils.aio import run_parallel_async, run_sync
+from copyway.utils.retry import RetryPolicy
+from copyway.utils.throttle import Throttle
+
+
+class SleepyProtocol(AsyncProtocol):
+    """Protocolo async falso que registra en qué hilo y cuántos corren a la vez."""
+
+    running = 0
+    peak = 0
+    threads = set()
+    closed = 0
+
+    async def validate_async(self, source, destination, **options):
+        return True
+
+    async def list_async(self, path, **options):
+        return [(path, 0)]
+
+    async def copy_async(self, source, destination, **options):
+        cls = type(self)
+        cls.threads.add(threading.get_ident())
+        cls.running += 1
+        cls.peak = max(cls.peak, cls.running)
+        await asyncio.sleep(0.05)
+        cls.running -= 1
+        if source == "falla":
+            raise ProtocolError("falla")
+
+    async def aclose(self):
+        type(self).closed += 1
+
+
+@pytest.fixture
+def sleepy(monkeypatch):
+    for name, value in (("peak", 0), ("threads", set()), ("closed", 0)):
+        monkeypatch.setattr(SleepyProtocol, name, value)
+    ProtocolFactory.register("sleepy", SleepyProtocol)
+    return SleepyProtocol
+
+
+class TestAsyncHelpers:
+    def test_sync_wrapper_closes_connections(self, sleepy):
+        SleepyProtocol().copy("/a", "/b")
+
+        assert sleepy.closed == 1
+
+    def test_run_sync_inside_loop_is_rejected(self):
+        async def nested():
+            run_sync(asyncio.sleep(0))
+
+        with pytest.raises(ProtocolError, match="event loop"):
+            asyncio.run(nested())
+
+    def test_run_parallel_async_limits_and_aborts(self):
+        state = {"running": 0, "peak": 0, "done": 0}
+
+        async def work(i):
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+            await asyncio.sleep(0.01)
+            state["running"] -= 1
+            if i == 5:
+                raise ValueError("boom")
+            state["done"] += 1
+
+        with pytest.raises(ValueError):
+            asyncio.run(run_parallel_async(work, iter(range(100)), 3))
+
+        assert state["peak"] == 3
+        assert state["done"] < 100
+
+    def test_retry_call_async(self):
+        policy = RetryPolicy(retries=2, delay=0.01)
+        attempts = []
+
+        async def flaky(attempt):
+            attempts.append(attempt)
+            if attempt < 2:
+                raise TransientError("corte")
+            return "ok"
+
+        assert asyncio.run(policy.call_async(flaky, "x")) == "ok"
+        assert attempts == [0, 1, 2]
+
+    def test_throttle_consume_async(self):
+        throttle = Throttle(rate=100_000)
+
+        async def consume():
+            started = time.monotonic()
+            for _ in range(3):
+                await throttle.consume_async(50_000)
+            return time.monotonic() - started
+
+        assert asyncio.run(consume()) >= 1.0
+
+
+class TestBatchEventLoop:
+    def test_async_jobs_share_one_loop(self, sleepy):
+        jobs = [
+            {"protocol": "sleepy", "source": "/a", "destination": f"edge{i}:/b"}
+            for i in range(60)
+        ]
+        jobs[3]["source"] = "falla"
+        runner = BatchRunner(Config(), concurrency=40)
+
+        started = time.monotonic()
+        results = runner.run(iter(jobs))
+
+        assert len(sleepy.threads) == 1
+        assert sleepy.peak == 40
+        assert sleepy.closed == 60
+        assert time.monotonic() - started < 1.5
+        assert [r["status"] for r in results].count("failed") == 1
+        assert results[3]["error"] == "falla"
+
+    def test_mixed_with_sync_jobs(self, sleepy, tmp_path):
+        (tmp_path / "a.txt").write_text("hola")
+        runner = BatchRunner(Config(), concurrency=2)
+
+        results = runner.run(
+            [
+                {"protocol": "sleepy", "source": "/a", "destination": "h:/b"},
+                {
+                    "protocol": "local",
+                    "source": str(tmp_path / "a.txt"),
+                    "destination": str(tmp_path / "b.txt"),
+                },
+                {"protocol": "no_existe", "source": "/a", "destination": "/b"},
+            ]
+        )
+
+        assert [r["status"] for r in results] == ["completed", "completed", "failed"]
+        assert (tmp_path / "b.txt").read_text() == "hola"
+
+
+class TestAsyncSFTPProtocol:
+    def test_upload_tree(self, fake_asyncssh, tmp_path):
+        src = tmp_path / "src"
+        (src / "sub" / "deep").mkdir(parents=True)
+        (src / "a.txt").write_bytes(b"a" * 100_000)
+        (src / "sub" / "b.txt").write_text("b")
+        (src / "sub" / "deep" / "c.txt").write_text("c")
+        (fake_asyncssh.root / "edge01" / "srv").mkdir(parents=True)
+        protocol = AsyncSFTPProtocol({"block_size": 8192})
+
+        protocol.copy(str(src), "deploy@edge01:/srv", progress=False, verify="sha256")
+
+        remote = fake_asyncssh.root / "edge01" / "srv" / "src"
+        assert (remote / "a.txt").read_bytes() == b"a" * 100_000
+        assert (remote / "sub" / "deep" / "c.txt").read_text() == "c"
+        assert not list(remote.rglob("*" + PARTIAL_SUFFIX))
+        assert len(fake_asyncssh.connections) == 1
+        host, kwargs, conn = fake_asyncssh.connections[0]
+        assert (host, kwargs["username"]) == ("edge01", "deploy")
+        assert conn.closed
+        assert protocol.metrics.files == 3
+        assert len(fake_asyncssh.commands) == 3
+
+    def test_upload_follows_symlinked_dirs(self, fake_asyncssh, tmp_path):
+        (tmp_path / "real").mkdir()
+        (tmp_path / "real" / "b.txt").write_text("b")
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "linkdir").symlink_to("../real")
+        (fake_asyncssh.root / "edge01" / "srv").mkdir(parents=True)
+
+        AsyncSFTPProtocol().copy(str(src), "deploy@edge01:/srv", progress=False)
+
+        remote = fake_asyncssh.root / "edge01" / "srv" / "src"
+        assert (remote / "linkdir" / "b.txt").read_text() == "b"
+
+    def test_download_file_and_verify(self, fake_asyncssh, tmp_path):
+        data = bytes(range(256)) * 1000
+        (fake_asyncssh.root / "nas").mkdir()
+        (fake_asyncssh.root / "nas" / "data.bin").write_bytes(data)
+        protocol = AsyncSFTPProtocol({"block_size": 4096, "max_requests": 8})
+
+        protocol.copy("u@nas:/data.bin", str(tmp_path), progress=False, verify="sha256")
+
+        assert (tmp_path / "data.bin").read_bytes() == data
+        assert protocol.metrics.bytes == len(data)
+        assert fake_asyncssh.commands == ["sha256sum /data.bin"]
+
+    def test_download_tree(self, fake_asyncssh, tmp_path):
+        remote = fake_asyncssh.root / "nas" / "logs"
+        (remote / "2024").mkdir(parents=True)
+        (remote / "vacio").mkdir()
+        (remote / "2024" / "x.log").write_text("x")
+        (remote / "y.log").write_text("yy")
+
+        AsyncSFTPProtocol().copy("u@nas:/logs", str(tmp_path / "dst"), progress=False)
+
+        assert (tmp_path / "dst" / "2024" / "x.log").read_text() == "x"
+        assert (tmp_path / "dst" / "y.log").read_text() == "yy"
+        assert (tmp_path / "dst" / "vacio").is_dir()
+
+    def test_list_async(self, fake_asyncssh):
+        remote = fake_asyncssh.root / "nas" / "logs"
+        (remote / "2024").mkdir(parents=True)
+        (remote / "2024" / "x.log").write_text("x")
+        (remote / "y.log").write_text("yy")
+        protocol = AsyncSFTPProtocol({"user": "u"})
+
+        async def listing():
+            try:
+                return await protocol.list_async("nas:/logs")
+            finally:
+                await protocol.aclose()
+
+        assert sorted(asyncio.run(listing())) == [("2024/x.log", 1), ("y.log", 2)]
+
+    def test_sync_skips_unchanged(self, fake_asyncssh, tmp_path):
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "a.txt").write_text("a")
+        (fake_asyncssh.root / "h" / "dst").mkdir(parents=True)
+        protocol = AsyncSFTPProtocol()
+
+        protocol.copy(str(src), "u@h:/dst", progress=False, sync=True)
+        conn = fake_asyncssh.connections[-1][2]
+        written = conn.sftp.bytes_written
+        protocol.copy(str(src), "u@h:/dst", progress=False, sync=True)
+
+        assert written == 1
+        assert fake_asyncssh.connections[-1][2].sftp.bytes_written == 0
+
+    def test_reconnects_on_connection_loss(self, fake_asyncssh, tmp_path, monkeypatch):
+        (tmp_path / "a.txt").write_text("a")
+        (fake_asyncssh.root / "h").mkdir()
+        protocol = AsyncSFTPProtocol({"retry_delay": 0.01})
+        original = AsyncSFTPProtocol._put_file
+        calls = []
+
+        async def flaky(self, session, *args, **kwargs):
+            calls.append(session)
+            if len(calls) == 1:
+                raise fake_asyncssh.ConnectionLost("Connection lost")
+            return await original(self, session, *args, **kwargs)
+
+        monkeypatch.setattr(AsyncSFTPProtocol, "_put_file", flaky)
+        protocol.copy(str(tmp_path / "a.txt"), "u@h:/a.txt", progress=False)
+
+        assert (fake_asyncssh.root / "h" / "a.txt").read_text() == "a"
+        assert calls[0] is not calls[1]
+        assert protocol.retry_stats.retries == 1
+
+    def test_validate_reports_connection_error(self, fake_asyncssh, tmp_path):
+        fake_asyncssh.failures = 1
+
+        with pytest.raises(ValidationError, match="No se puede conectar a h"):
+            AsyncSFTPProtocol().validate(str(tmp_path), "u@h:/x")
+
+    def test_missing_remote_parent(self, fake_asyncssh, tmp_path):
+        (tmp_path / "a.txt").write_text("a")
+
+        with pytest.raises(ProtocolError, match="Directorio remoto no existe"):
+            AsyncSFTPProtocol().copy(
+                str(tmp_path / "a.txt"), "u@h:/no/existe/a.txt", progress=False
+            )
+
+    def test_requires_asyncssh(self, monkeypatch):
+        monkeypatch.setattr("copyway.protocols.asftp.asyncssh", None)
+
+        with pytest.raises(ProtocolError, match="asyncssh no instalado"):
+            AsyncSFTPProtocol().copy("/a", "u@h:/b")
@@ -0,0 +1,127 @@
+import io
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+from click.testing import CliRunner
+from copyway.batch import BatchRunner, load_manifest
+from copyway.cli import main
+from copyway.config import Config
+from copyway.exceptions import ConfigError
+from copyway.protocols.sftp import SFTPProtocol
+from copyway.utils.connections import connection_pool
+
+
+class TestLoadManifest:
+    def test_yaml_with_defaults(self, tmp_path):
+        manifest = tmp_path / "jobs.yaml"
+        manifest.write_text(
+            "defaults:\n  protocol: sftp\n  port: 2222\n"
+            "jobs:\n"
+            "  - {source: /a, destination: 'host:/a'}\n"
+            "  - {source: /b, destination: /b, protocol: local}\n"
+        )
+
+        jobs = load_manifest(str(manifest))
+
+        assert jobs[0] == {"protocol": "sftp", "port": 2222, "source": "/a", "destination": "host:/a"}
+        assert jobs[1]["protocol"] == "local"
+
+    def test_jsonl_stream(self):
+        stream = io.StringIO('{"protocol": "local", "source": "/a", "destination": "/b"}\n\n# comentario\n')
+
+        assert list(load_manifest(stream)) == [{"protocol": "local", "source": "/a", "destination": "/b"}]
+
+    def test_invalid_jsonl_line(self):
+        with pytest.raises(ConfigError, match="<stdin>:2"):
+            list(load_manifest(io.StringIO('{"source": "/a"}\nno es json\n')))
+
+    def test_invalid_yaml_structure(self, tmp_path):
+        manifest = tmp_path / "jobs.yaml"
+        manifest.write_text("jobs: nada\n")
+
+        with pytest.raises(ConfigError, match="Manifiesto inválido"):
+            load_manifest(str(manifest))
+
+
+class TestBatchRunner:
+    def test_failed_job_does_not_stop_others(self, tmp_path):
+        (tmp_path / "a.txt").write_text("a")
+        (tmp_path / "b.txt").write_text("b")
+        jobs = [
+            {"protocol": "local", "source": str(tmp_path / "a.txt"), "destination": str(tmp_path / "a2.txt")},
+            {"protocol": "local", "source": str(tmp_path / "missing.txt"), "destination": str(tmp_path / "x.txt")},
+            {"protocol": "local", "source": str(tmp_path / "b.txt"), "destination": str(tmp_path / "b2.txt")},
+            {"source": "/a"},
+        ]
+
+        runner = BatchRunner(Config(str(tmp_path / "none.yml")), concurrency=2)
+        results = runner.run(jobs)
+
+        assert [r["status"] for r in results] == ["completed", "failed", "completed", "failed"]
+        assert "protocol, source y destination" in results[3]["error"]
+        assert (tmp_path / "b2.txt").read_text() == "b"
+        assert runner.failed == 2
+        assert "2 completados, 2 fallidos" in runner.summary()
+
+    @patch("copyway.utils.connections._open_client")
+    def test_sftp_jobs_share_connection(self, mock_open, tmp_path, fake_sftp):
+        client = MagicMock()
+        client.get_transport.return_value.is_active.return_value = True
+        mock_open.return_value = client
+        connection_pool.close_all()
+        jobs = []
+        for name in ("a", "b", "c"):
+            (tmp_path / f"{name}.txt").write_text(name)
+            jobs.append(
+                {
+                    "protocol": "sftp",
+                    "source": str(tmp_path / f"{name}.txt"),
+                    "destination": f"admin@host:/{name}.txt",
+                }
+            )
+
+        with patch.object(SFTPProtocol, "_open_sftp", return_value=fake_sftp):
+            results = BatchRunner(Config(str(tmp_path / "none.yml")), concurrency=1).run(jobs)
+
+        assert all(r["status"] == "completed" for r in results)
+        assert fake_sftp.local("/c.txt").read_text() == "c"
+        assert mock_open.call_count == 1
+        connection_pool.close_all()
+
+
+class TestBatchCLI:
+    def test_batch_reports_results(self, tmp_path):
+        (tmp_path / "a.txt").write_text("a")
+        manifest = tmp_path / "jobs.jsonl"
+        jobs = [
+            {
+                "protocol": "local",
+                "source": str(tmp_path / "a.txt"),
+                "destination": str(tmp_path / "b.txt"),
+            },
+            {
+                "protocol": "local",
+                "source": str(tmp_path / "nope"),
+                "destination": str(tmp_path / "c.txt"),
+            },
+        ]
+        manifest.write_text("".join(json.dumps(job) + "\n" for job in jobs))
+        report = tmp_path / "report.jsonl"
+
+        result = CliRunner().invoke(main, ["batch", "-j", "2", "--report", str(report), str(manifest)])
+
+        assert result.exit_code == 1
+        assert "1 completados, 1 fallidos" in result.output
+        assert (tmp_path / "b.txt").read_text() == "a"
+        lines = [json.loads(line) for line in report.read_text().splitlines()]
+        assert sorted(r["status"] for r in lines) == ["completed", "failed"]
+
+    def test_batch_from_stdin_dry_run(self, tmp_path):
+        (tmp_path / "a.txt").write_text("a")
+        job = {"protocol": "local", "source": str(tmp_path / "a.txt"), "destination": str(tmp_path / "b.txt")}
+
+        result = CliRunner().invoke(main, ["batch", "--dry-run", "-"], input=json.dumps(job) + "\n")
+
+        assert result.exit_code == 0
+        assert "1 validados" in result.output
+        assert not (tmp_path / "b.txt").exists()
@@ -0,0 +1,130 @@
+import json
+import pytest
+from click.testing import CliRunner
+from copyway.bench import compare, make_tree, run_benchmarks
+from copyway.bench.runner import FileRecorder, measure, measure_startup, percentile
+from copyway.bench.trees import profile_files
+from copyway.cli import main
+
+
+class TestTrees:
+    def test_profile_scale_keeps_one_file_per_group(self):
+        assert profile_files([(100, 10), (2, 1000)], scale=0.1) == [10] * 10 + [1000]
+
+    def test_make_tree_is_reused(self, tmp_path):
+        files, nbytes = make_tree(tmp_path, [(150, 100)])
+        first = (tmp_path / "d0001" / "f000149.bin").stat().st_mtime_ns
+
+        assert (files, nbytes) == (150, 15000)
+        assert make_tree(tmp_path, [(150, 100)]) == (150, 15000)
+        assert (tmp_path / "d0001" / "f000149.bin").stat().st_mtime_ns == first
+
+
+class TestMeasure:
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([], 50) is None
+
+    def test_counts_files_reported_by_protocol(self):
+        def run(state, workers):
+            for i in range(3):
+                state.mark_done(f"f{i}", 10)
+
+        result = measure(run, files=3, nbytes=30)
+
+        assert result["error"] is None
+        assert result["files_per_s"] > 0
+        assert result["latency_ms"]["p50"] is not None
+
+    def test_missing_files_is_an_error(self):
+        result = measure(lambda state, workers: state.mark_done("a"), 2, 20)
+
+        assert result["error"] == "Se copiaron 1 de 2 archivos"
+        assert "mb_per_s" not in result
+
+    def test_recorder_behaves_as_fresh_job_state(self):
+        assert FileRecorder().is_done("a", 1, 1.0) is False
+
+
+class TestStartup:
+    def test_measures_cli_startup(self, tmp_path):
+        result = measure_startup(runs=2, workdir=tmp_path)
+
+        assert result["error"] is None
+        assert result["startup_ms"] <= result["latency_ms"]["max"]
+        assert (result["protocol"], result["direction"]) == ("cli", "startup")
+
+
+class TestRunBenchmarks:
+    @pytest.mark.parametrize("protocol", ["local", "sftp", "hdfs"])
+    def test_small_tree(self, protocol, tmp_path):
+        if protocol == "sftp":
+            pytest.importorskip("paramiko")
+
+        results = run_benchmarks(
+            protocols=[protocol], profiles=["small"], workdir=tmp_path, scale=0.004
+        )
+
+        directions = ["copy"] if protocol == "local" else ["upload", "download"]
+        assert [r["direction"] for r in results] == directions
+        for result in results:
+            assert result["error"] is None
+            assert result["files"] == 20
+            assert result["latency_ms"]["p99"] >= result["latency_ms"]["p50"]
+
+
+class TestCompare:
+    def result(self, **metrics):
+        return {
+            "protocol": "sftp",
+            "direction": "upload",
+            "profile": "small",
+            "workers": 1,
+            "error": None,
+            **metrics,
+        }
+
+    def test_detects_drop_beyond_tolerance(self):
+        baseline = [self.result(mb_per_s=100.0, files_per_s=1000.0)]
+        current = [self.result(mb_per_s=85.0, files_per_s=950.0)]
+
+        regressions = compare(current, baseline, tolerance=0.10)
+
+        assert len(regressions) == 1
+        assert "mb_per_s 85.0 < 100.0" in regressions[0]
+
+    def test_detects_slower_startup(self):
+        baseline = [self.result(startup_ms=100.0)]
+
+        assert compare([self.result(startup_ms=105.0)], baseline) == []
+        [regression] = compare([self.result(startup_ms=150.0)], baseline)
+        assert "startup_ms 150.0 > 100.0 (+50%)" in regression
+
+    def test_ignores_failed_and_new_scenarios(self):
+        baseline = [self.result(mb_per_s=100.0, error="falló")]
+
+        assert compare([self.result(mb_per_s=1.0)], baseline) == []
+
+
+class TestBenchCommand:
+    def test_writes_json_and_fails_on_regression(self, tmp_path):
+        output = tmp_path / "actual.json"
+        args = ["bench", "-p", "local", "--profile", "small", "--scale", "0.004"]
+        args += ["--startup-runs", "0"]
+
+        result = CliRunner().invoke(main, args + ["-o", str(output)])
+
+        assert result.exit_code == 0, result.output
+        report = json.loads(output.read_text())
+        assert report["environment"]["python"]
+        [scenario] = report["results"]
+        scenario["mb_per_s"] *= 1000
+        baseline = tmp_path / "baseline.json"
+        baseline.write_text(json.dumps(report))
+
+        result = CliRunner().invoke(main, args + ["--baseline", str(baseline)])
+
+        assert result.exit_code == 1
+        assert "Regresión: local/copy/small/1: mb_per_s" in result.output
@@ -0,0 +1,258 @@
+import io
+import os
+import shutil
+import tarfile
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+from copyway.exceptions import IntegrityError, ProtocolError, TransientError
+from copyway.protocols.sftp import SFTPProtocol
+from copyway.protocols.ssh import SSHProtocol
+from copyway.utils.bundle import extract_tar, split_bundles, write_tar
+from copyway.utils.sync import Synchronizer
+from copyway.utils.walker import TreeScan
+
+needs_tar = pytest.mark.skipif(shutil.which("tar") is None, reason="requiere tar")
+
+
+def make_tree(root, count=20):
+    (root / "sub" / "deep").mkdir(parents=True)
+    for i in range(count):
+        folder = (
+            root
+            if i % 3 == 0
+            else root / "sub" if i % 3 == 1 else root / "sub" / "deep"
+        )
+        (folder / f"f{i}.txt").write_text(f"contenido {i}\n" * (i + 1))
+    return root
+
+
+def tree_contents(root):
+    return {
+        p.relative_to(root).as_posix(): p.read_bytes()
+        for p in sorted(Path(root).rglob("*"))
+        if p.is_file()
+    }
+
+
+class TestTarStream:
+    def test_round_trip_reports_every_file(self, tmp_path):
+        src = make_tree(tmp_path / "src")
+        scan = TreeScan(src)
+        buffer = io.BytesIO()
+        sent = []
+
+        write_tar(
+            buffer.write, src, scan.files, callback=lambda n, name: sent.append(name)
+        )
+        buffer.seek(0)
+        received = []
+        extracted = extract_tar(
+            buffer.read, tmp_path / "dst", callback=lambda n, name: received.append(n)
+        )
+
+        assert tree_contents(tmp_path / "dst") == tree_contents(src)
+        assert len(extracted) == 20
+        assert set(sent) == {str(rel) for rel, _ in scan.files}
+        assert sum(received) == scan.total_size
+
+    def test_preserves_mtime(self, tmp_path):
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "a.txt").write_text("a")
+        os.utime(src / "a.txt", (1_600_000_000.5, 1_600_000_000.5))
+        buffer = io.BytesIO()
+
+        write_tar(buffer.write, src, TreeScan(src).files)
+        buffer.seek(0)
+        extract_tar(buffer.read, tmp_path / "dst")
+
+        assert (tmp_path / "dst" / "a.txt").stat().st_mtime == 1_600_000_000.5
+
+    def test_rejects_paths_outside_destination(self, tmp_path):
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            info = tarfile.TarInfo("../evil.txt")
+            info.size = 4
+            tar.addfile(info, io.BytesIO(b"evil"))
+        buffer.seek(0)
+
+        with pytest.raises(ProtocolError, match="inválida"):
+            extract_tar(buffer.read, tmp_path / "dst")
+        assert not (tmp_path / "evil.txt").exists()
+
+    def test_skips_symlink_members(self, tmp_path, monkeypatch):
+        # Sin data_filter (Python < 3.10.12/3.11.4) un symlink a otro
+        # directorio permitiría escribir fuera del destino en el miembro siguiente
+        monkeypatch.delattr(tarfile, "data_filter", raising=False)
+        outside = tmp_path / "fuera"
+        outside.mkdir()
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            link = tarfile.TarInfo("x")
+            link.type = tarfile.SYMTYPE
+            link.linkname = str(outside)
+            tar.addfile(link)
+            info = tarfile.TarInfo("x/passwd")
+            info.size = 4
+            tar.addfile(info, io.BytesIO(b"evil"))
+        buffer.seek(0)
+
+        extract_tar(buffer.read, tmp_path / "dst")
+
+        assert not (tmp_path / "dst" / "x").is_symlink()
+        assert not (outside / "passwd").exists()
+
+    def test_truncated_stream_is_transient(self, tmp_path):
+        src = make_tree(tmp_path / "src")
+        buffer = io.BytesIO()
+        write_tar(buffer.write, src, TreeScan(src).files)
+
+        with pytest.raises(TransientError):
+            extract_tar(io.BytesIO(buffer.getvalue()[:3000]).read, tmp_path / "dst")
+
+    def test_split_bundles_keeps_order_and_balances(self, tmp_path):
+        src = make_tree(tmp_path / "src")
+        files = TreeScan(src).files
+
+        bundles = split_bundles(files, 3)
+
+        assert len(bundles) == 3
+        assert [f for b in bundles for f in b] == files
+        assert split_bundles(files[:2], 8) == [[files[0]], [files[1]]]
+        assert split_bundles([], 4) == []
+
+
+@needs_tar
+class TestSFTPBundle:
+    def test_upload_dir_streams_one_tar(self, tmp_path, fake_sftp):
+        src = make_tree(tmp_path / "src")
+
+        SFTPProtocol()._upload_dir(fake_sftp, src, "/tree", False, bundle=True)
+
+        assert tree_contents(fake_sftp.local("/tree")) == tree_contents(src)
+        assert fake_sftp.exec_commands == ["tar -xf - -C /tree"]
+        assert fake_sftp.bytes_written == 0
+
+    def test_progress_reports_every_file(self, tmp_path, fake_sftp, capsys):
+        src = make_tree(tmp_path / "src")
+        protocol = SFTPProtocol()
+
+        protocol._upload_dir(fake_sftp, src, "/tree", True, bundle=True)
+        protocol._download_dir(fake_sftp, "/tree", tmp_path / "dest", True, bundle=True)
+
+        assert tree_contents(tmp_path / "dest") == tree_contents(src)
+        assert capsys.readouterr().out.count("Copiando 2.6 KB/2.6 KB (100%)") == 2
+
+    def test_upload_with_workers_and_compression(self, tmp_path, fake_sftp):
+        src = make_tree(tmp_path / "src")
+
+        protocol = SFTPProtocol()
+
+        with patch.object(protocol, "_open_sftp", return_value=fake_sftp):
+            protocol._upload_dir(
+                fake_sftp,
+                src,
+                "/tree",
+                False,
+                workers=3,
+                compression="gzip",
+                bundle=True,
+            )
+
+        assert tree_contents(fake_sftp.local("/tree")) == tree_contents(src)
+        assert fake_sftp.exec_commands == ["gzip -dc | tar -xf - -C /tree"] * 3
+
+    def test_sync_only_bundles_changed_files(self, tmp_path, fake_sftp):
+        src = make_tree(tmp_path / "src")
+        protocol = SFTPProtocol()
+        protocol._upload_dir(fake_sftp, src, "/tree", False, bundle=True)
+        (src / "sub" / "f1.txt").write_text("cambiado")
+        sync = Synchronizer()
+
+        protocol._upload_dir(fake_sftp, src, "/tree", False, sync=sync, bundle=True)
+
+        assert sync.copied_files == 1
+        assert fake_sftp.local("/tree/sub/f1.txt").read_text() == "cambiado"
+
+    def test_download_dir_extracts_locally(self, tmp_path, fake_sftp):
+        make_tree(fake_sftp.local("/tree"))
+        dest = tmp_path / "dest"
+
+        SFTPProtocol()._download_dir(
+            fake_sftp, "/tree", dest, False, compression="gzip", bundle=True
+        )
+
+        assert tree_contents(dest) == tree_contents(fake_sftp.local("/tree"))
+        assert fake_sftp.exec_commands == ["tar -chf - -C /tree --null -T - | gzip -c"]
+
+    def test_verify_checksums_in_one_command(self, tmp_path, fake_sftp):
+        if shutil.which("sha256sum") is None:
+            pytest.skip("requiere sha256sum")
+        src = make_tree(tmp_path / "src")
+
+        SFTPProtocol()._upload_dir(
+            fake_sftp, src, "/tree", False, verify="sha256", bundle=True
+        )
+
+        assert fake_sftp.exec_commands[1] == "cd /tree && xargs -0 sha256sum --"
+
+    def test_verify_size_mismatch_raises(self, tmp_path, fake_sftp):
+        src = make_tree(tmp_path / "src")
+        protocol = SFTPProtocol()
+        original = protocol._feed
+
+        def corrupt(channel, command, produce):
+            original(channel, command, produce)
+            fake_sftp.local("/tree/f0.txt").write_text("x")
+
+        with patch.object(protocol, "_feed", side_effect=corrupt):
+            with pytest.raises(IntegrityError, match="f0.txt"):
+                protocol._upload_dir(
+                    fake_sftp, src, "/tree", False, verify="size", bundle=True
+                )
+
+
+@needs_tar
+class TestSSHBundle:
+    def protocol(self):
+        protocol = SSHProtocol()
+        # "ssh host comando" se reemplaza por el comando ejecutado localmente
+        run_local = lambda host, remote, *args: ["sh", "-c", remote]
+        return protocol, patch.object(protocol, "_ssh_command", side_effect=run_local)
+
+    def test_upload_into_existing_directory(self, tmp_path):
+        src = make_tree(tmp_path / "src")
+        (src / "vacio").mkdir()
+        backup = tmp_path / "backup"
+        backup.mkdir()
+        protocol, ssh = self.protocol()
+
+        with ssh:
+            protocol.copy(str(src), f"host:{backup}", bundle=True, progress=False)
+
+        assert tree_contents(backup / "src") == tree_contents(src)
+        assert (backup / "src" / "vacio").is_dir()
+
+    def test_download_to_new_directory(self, tmp_path):
+        remote = make_tree(tmp_path / "remote")
+        protocol, ssh = self.protocol()
+
+        with ssh:
+            protocol.copy(
+                f"host:{remote}", str(tmp_path / "copia"), bundle=True, progress=False
+            )
+
+        assert tree_contents(tmp_path / "copia") == tree_contents(remote)
+
+    def test_remote_failure_is_reported(self, tmp_path):
+        protocol, ssh = self.protocol()
+
+        with ssh, pytest.raises(ProtocolError, match="no_existe"):
+            protocol.copy(
+                f"host:{tmp_path}/no_existe",
+                str(tmp_path / "copia"),
+                bundle=True,
+                progress=False,
+                retries=0,
+            )
@@ -82,3 +82,18 @@ class TestCLI:
             result = runner.invoke(main, ['-p', 'local', '--config', str(config), str(src), str(dest)])
             
             assert result.exit_code == 0
+
+    def test_cli_local_copy_workers(self):
+        runner = CliRunner()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            src = Path(tmpdir) / "src_dir"
+            src.mkdir()
+            (src / "a.txt").write_text("a")
+            (src / "b.txt").write_text("b")
+            dest = Path(tmpdir) / "dest_dir"
+
+            result = runner.invoke(main, ['-p', 'local', '--workers', '2', str(src), str(dest)])
+
+            assert result.exit_code == 0
+            assert (dest / "b.txt").read_text() == "b"
@@ -0,0 +1,165 @@
+import io
+import shutil
+import pytest
+from unittest.mock import MagicMock, patch
+from copyway.exceptions import ProtocolError, ValidationError
+from copyway.protocols.sftp import SFTPProtocol, PARTIAL_SUFFIX
+from copyway.utils.compression import (
+    CompressingWriter,
+    DecompressingReader,
+    check_codec,
+    compress_command,
+)
+from copyway.utils.connections import ConnectionPool
+
+DATA = b"copyway " * 50000 + bytes(range(256)) * 100
+
+
+def codec_param(codec, module=None):
+    marks = []
+    if module:
+        marks.append(
+            pytest.mark.skipif(not _importable(module), reason=f"{module} no instalado")
+        )
+    return pytest.param(codec, marks=marks)
+
+
+def _importable(module):
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+
+ALL_CODECS = [
+    codec_param("gzip"),
+    codec_param("zstd", "zstandard"),
+    codec_param("lz4", "lz4"),
+]
+
+needs_gzip = pytest.mark.skipif(shutil.which("gzip") is None, reason="requiere gzip")
+
+
+class TestStreams:
+    @pytest.mark.parametrize("codec", ALL_CODECS)
+    def test_round_trip(self, codec):
+        out = io.BytesIO()
+        writer = CompressingWriter(out.write, codec, level=1)
+        for i in range(0, len(DATA), 65536):
+            writer.write(DATA[i : i + 65536])
+        writer.close()
+
+        compressed = io.BytesIO(out.getvalue())
+        reader = DecompressingReader(compressed.read, codec, chunk_size=4096)
+        result = b"".join(iter(lambda: reader.read(10000), b""))
+
+        assert result == DATA
+        assert writer.bytes_in == len(DATA)
+        assert writer.bytes_out == len(out.getvalue()) < len(DATA)
+
+    def test_unknown_codec(self):
+        with pytest.raises(ValidationError, match="Compresión inválida"):
+            check_codec("brotli")
+
+    def test_missing_library(self):
+        with patch("copyway.utils.compression.zstandard", None):
+            with pytest.raises(ValidationError, match="pip install zstandard"):
+                check_codec("zstd")
+
+    def test_compress_command_level(self):
+        assert compress_command("zstd", 19) == "zstd -c -q -19"
+        assert compress_command("gzip") == "gzip -c"
+
+
+class TestSFTPStreaming:
+    def protocol(self, **config):
+        protocol = SFTPProtocol()
+        protocol.config = {"compress_min_size": 0, **config}
+        return protocol
+
+    @needs_gzip
+    def test_put_decompresses_on_remote(self, tmp_path, fake_sftp):
+        local = tmp_path / "data.bin"
+        local.write_bytes(DATA)
+
+        self.protocol()._put_file(
+            fake_sftp, str(local), "/data.bin", compression="gzip"
+        )
+
+        assert fake_sftp.local("/data.bin").read_bytes() == DATA
+        assert fake_sftp.exec_commands == ["gzip -dc > /data.bin" + PARTIAL_SUFFIX]
+        assert fake_sftp.bytes_written == 0
+
+    @needs_gzip
+    def test_put_resume_appends_to_partial(self, tmp_path, fake_sftp):
+        local = tmp_path / "data.bin"
+        local.write_bytes(DATA)
+        fake_sftp.local("/data.bin" + PARTIAL_SUFFIX).write_bytes(DATA[:100000])
+
+        self.protocol()._put_file(
+            fake_sftp, str(local), "/data.bin", compression="gzip"
+        )
+
+        assert fake_sftp.local("/data.bin").read_bytes() == DATA
+        assert ">>" in fake_sftp.exec_commands[0]
+
+    @needs_gzip
+    def test_get_compresses_on_remote(self, tmp_path, fake_sftp):
+        fake_sftp.local("/data.bin").write_bytes(DATA)
+        local = tmp_path / "data.bin"
+        local.with_name("data.bin" + PARTIAL_SUFFIX).write_bytes(DATA[:5000])
+
+        self.protocol(compression_level=1)._get_file(
+            fake_sftp, "/data.bin", str(local), compression="gzip"
+        )
+
+        assert local.read_bytes() == DATA
+        assert fake_sftp.exec_commands == ["tail -c +5001 /data.bin | gzip -c -1"]
+
+    def test_small_files_are_not_compressed(self, tmp_path, fake_sftp):
+        local = tmp_path / "small.txt"
+        local.write_text("hola")
+
+        SFTPProtocol()._put_file(
+            fake_sftp, str(local), "/small.txt", compression="gzip"
+        )
+
+        assert fake_sftp.local("/small.txt").read_text() == "hola"
+        assert fake_sftp.exec_commands == []
+
+    def test_remote_failure_is_reported(self, tmp_path, fake_sftp):
+        local = tmp_path / "data.bin"
+        local.write_bytes(DATA)
+        protocol = self.protocol()
+
+        with patch.dict(
+            "copyway.protocols.sftp.DECOMPRESS_COMMANDS", {"gzip": "exit 3;"}
+        ), pytest.raises(ProtocolError, match="Comando remoto falló"):
+            protocol._put_file(fake_sftp, str(local), "/data.bin", compression="gzip")
+
+
+class TestCompressionMode:
+    def test_compress_flag_uses_ssh_transport(self):
+        assert SFTPProtocol()._compression({"compress": True}) == "ssh"
+
+    def test_codec_from_config(self):
+        protocol = SFTPProtocol()
+        protocol.config = {"compression": "gzip"}
+        assert protocol._compression({"compress": True}) == "gzip"
+
+    def test_invalid_codec(self):
+        with pytest.raises(ValidationError):
+            SFTPProtocol()._compression({"compression": "rar"})
+
+    @patch("copyway.utils.connections._open_client")
+    def test_compressed_connections_are_pooled_apart(self, mock_open):
+        mock_open.side_effect = lambda *args: MagicMock()
+        pool = ConnectionPool()
+
+        plain = pool.acquire("host", 22, "user")
+        pool.release(plain)
+        compressed = pool.acquire("host", 22, "user", compress=True)
+
+        assert compressed is not plain
+        assert mock_open.call_args.args[-1] is True
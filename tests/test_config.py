@@ -55,3 +55,15 @@ class TestConfig:
             Config(config_path)
         
         Path(config_path).unlink()
+
+    def test_config_state_db_next_to_config(self, tmp_path):
+        config_path = tmp_path / "copyway.yml"
+        config_path.write_text("protocols: {}\n")
+        config = Config(str(config_path))
+        assert config.get_state_db() == str(tmp_path / ".copyway-jobs.db")
+
+    def test_config_state_db_override(self, tmp_path):
+        config_path = tmp_path / "copyway.yml"
+        config_path.write_text(f"state_db: {tmp_path}/state/jobs.db\n")
+        config = Config(str(config_path))
+        assert config.get_state_db() == str(tmp_path / "state" / "jobs.db")
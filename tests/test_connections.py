@@ -0,0 +1,82 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from copyway.protocols.sftp import SFTPProtocol
+from copyway.utils.connections import ConnectionPool
+from copyway.utils.validators import validate_destination_sftp
+
+
+def make_client(active=True):
+    client = MagicMock()
+    client.get_transport.return_value.is_active.return_value = active
+    return client
+
+
+class TestConnectionPool:
+    @patch("copyway.utils.connections._open_client")
+    def test_reuses_released_connection(self, mock_open):
+        mock_open.side_effect = lambda *a: make_client()
+        pool = ConnectionPool()
+
+        first = pool.acquire("host", 22, "user", password="secret")
+        pool.release(first)
+        second = pool.acquire("host", 22, "user", password="secret")
+
+        assert first is second
+        assert mock_open.call_count == 1
+
+    @patch("copyway.utils.connections._open_client")
+    def test_different_credentials_get_new_connection(self, mock_open):
+        mock_open.side_effect = lambda *a: make_client()
+        pool = ConnectionPool()
+
+        first = pool.acquire("host", 22, "user", password="a")
+        pool.release(first)
+        second = pool.acquire("host", 22, "user", password="b")
+
+        assert first is not second
+
+    @patch("copyway.utils.connections._open_client")
+    def test_in_use_connection_is_not_shared(self, mock_open):
+        mock_open.side_effect = lambda *a: make_client()
+        pool = ConnectionPool()
+
+        first = pool.acquire("host", 22, "user")
+        second = pool.acquire("host", 22, "user")
+
+        assert first is not second
+
+    @patch("copyway.utils.connections._open_client")
+    def test_dead_connection_is_replaced(self, mock_open):
+        dead = make_client(active=False)
+        fresh = make_client()
+        mock_open.side_effect = [dead, fresh]
+        pool = ConnectionPool()
+
+        pool.release(pool.acquire("host", 22, "user"))
+        assert dead.close.called
+        assert pool.acquire("host", 22, "user") is fresh
+
+    @patch("copyway.utils.connections._open_client")
+    def test_close_all(self, mock_open):
+        client = make_client()
+        mock_open.return_value = client
+        pool = ConnectionPool()
+
+        pool.release(pool.acquire("host", 22, "user"))
+        pool.close_all()
+
+        client.close.assert_called_once()
+
+
+class TestValidationReuse:
+    @patch("copyway.utils.connections._open_client")
+    def test_copy_reuses_validation_connection(self, mock_open):
+        client = make_client()
+        mock_open.return_value = client
+
+        validate_destination_sftp("admin@host:/data", password="secret", port=2222)
+        ssh = SFTPProtocol()._connect("host", 2222, "admin", "secret", None)
+
+        assert ssh is client
+        assert mock_open.call_count == 1
+        client.close.assert_not_called()
@@ -0,0 +1,228 @@
+import tempfile
+import threading
+import time
+import pytest
+from pathlib import Path
+from click.testing import CliRunner
+from copyway.cli import main
+from copyway.config import Config
+from copyway.daemon import CopyDaemon, DaemonClient, job_host
+from copyway.exceptions import DaemonError
+from copyway.protocols import ProtocolFactory
+from copyway.protocols.base import Protocol
+
+
+class SlowProtocol(Protocol):
+    """Protocolo falso que registra cuántas copias corren a la vez por host."""
+
+    lock = threading.Lock()
+    running = {}
+    peak = {}
+
+    def validate(self, source, destination):
+        return True
+
+    def copy(self, source, destination, **options):
+        host = destination.split(":")[0]
+        with self.lock:
+            self.running[host] = self.running.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.running[host])
+        time.sleep(0.05)
+        with self.lock:
+            self.running[host] -= 1
+
+
+@pytest.fixture
+def socket_file():
+    # Los sockets Unix admiten rutas cortas: no usar tmp_path
+    with tempfile.TemporaryDirectory(prefix="cw") as tmp:
+        yield str(Path(tmp) / "cw.sock")
+
+
+@pytest.fixture
+def serve(socket_file):
+    daemons = []
+
+    def start(**kwargs):
+        daemon = CopyDaemon(Config(), path=socket_file, **kwargs)
+        daemon.start()
+        thread = threading.Thread(target=daemon.serve_forever)
+        thread.start()
+        daemons.append((daemon, thread))
+        return daemon
+
+    yield start
+    for daemon, thread in daemons:
+        daemon.shutdown()
+        thread.join(5)
+
+
+@pytest.mark.parametrize(
+    "source, destination, expected",
+    [
+        ("/a", "user@srv:/b", "srv"),
+        ("srv2:/a", "/b", "srv2"),
+        ("hdfs://nn:8020/a", "/b", "nn"),
+        ("/a", "/b", "local"),
+    ],
+)
+def test_job_host(source, destination, expected):
+    job = {"protocol": "local", "source": source, "destination": destination}
+    assert job_host(job) == expected
+
+
+def test_job_host_with_destinations():
+    job = {
+        "protocol": "sftp",
+        "source": "/a",
+        "destinations": ["/b", {"destination": "u@edge:/c"}],
+    }
+    assert job_host(job) == "edge"
+
+
+class TestCopyDaemon:
+    def test_submit_and_wait(self, serve, tmp_path):
+        (tmp_path / "a.txt").write_text("hola")
+        daemon = serve()
+        client = DaemonClient(daemon.path)
+
+        job = client.submit(
+            {
+                "protocol": "local",
+                "source": str(tmp_path / "a.txt"),
+                "destination": str(tmp_path / "b.txt"),
+            }
+        )
+        done = client.wait(job["id"])
+
+        assert job["status"] == "queued"
+        assert done["status"] == "completed"
+        assert done["result"]["error"] is None
+        assert (tmp_path / "b.txt").read_text() == "hola"
+        assert [j["id"] for j in client.list_jobs()] == [job["id"]]
+
+    def test_failed_job(self, serve, tmp_path):
+        daemon = serve()
+        client = DaemonClient(daemon.path)
+
+        job = client.submit(
+            {
+                "protocol": "local",
+                "source": str(tmp_path / "no_existe"),
+                "destination": str(tmp_path / "b.txt"),
+            }
+        )
+
+        done = client.wait(job["id"])
+        assert done["status"] == "failed"
+        assert "no existe" in done["result"]["error"]
+        with pytest.raises(DaemonError, match="Trabajo desconocido"):
+            client.status("otro")
+
+    def test_queue_is_bounded(self, socket_file):
+        daemon = CopyDaemon(Config(), path=socket_file, queue_size=1)
+        job = {"protocol": "local", "source": "/a", "destination": "/b"}
+
+        daemon.submit(job)
+
+        with pytest.raises(DaemonError, match="Cola de trabajos llena"):
+            daemon.submit(job)
+
+    def test_shutdown_fails_queued_jobs(self, socket_file):
+        daemon = CopyDaemon(Config(), path=socket_file)
+        record = daemon.submit(
+            {"protocol": "local", "source": "/a", "destination": "/b"}
+        )
+
+        daemon.shutdown()
+
+        assert daemon.status(record["id"])["status"] == "failed"
+        with pytest.raises(DaemonError, match="deteniendo"):
+            daemon.submit({"protocol": "local", "source": "/a", "destination": "/b"})
+
+    def test_max_per_host(self, serve, monkeypatch):
+        monkeypatch.setattr(SlowProtocol, "peak", {})
+        ProtocolFactory.register("slow", SlowProtocol)
+        daemon = serve(workers=4, max_per_host=1)
+        destinations = ["h1:/a", "h1:/b", "h1:/c", "h2:/a", "h2:/b"]
+
+        jobs = [
+            daemon.submit({"protocol": "slow", "source": "/x", "destination": d})
+            for d in destinations
+        ]
+
+        assert all(daemon.wait(j["id"], 5)["status"] == "completed" for j in jobs)
+        assert SlowProtocol.peak == {"h1": 1, "h2": 1}
+
+    def test_second_daemon_is_refused(self, serve, socket_file):
+        serve()
+
+        with pytest.raises(DaemonError, match="Ya hay un daemon"):
+            CopyDaemon(Config(), path=socket_file).start()
+
+    def test_client_without_daemon(self, socket_file):
+        with pytest.raises(DaemonError, match="No hay un daemon"):
+            DaemonClient(socket_file).list_jobs()
+
+
+class TestDaemonCLI:
+    def test_copy_is_forwarded(self, serve, tmp_path):
+        (tmp_path / "a.txt").write_text("hola")
+        daemon = serve()
+        args = ["--daemon", "--socket", daemon.path, "-p", "local"]
+
+        result = CliRunner().invoke(
+            main, args + [str(tmp_path / "a.txt"), str(tmp_path / "b.txt")]
+        )
+
+        assert result.exit_code == 0, result.output
+        assert "✓ Copia completada" in result.output
+        assert (tmp_path / "b.txt").read_text() == "hola"
+
+        result = CliRunner().invoke(main, ["status", "--socket", daemon.path])
+        assert "completed" in result.output
+
+    def test_fanout_is_forwarded(self, serve, tmp_path):
+        (tmp_path / "a.txt").write_text("hola")
+        daemon = serve()
+        args = [
+            "--daemon",
+            "--socket",
+            daemon.path,
+            "-p",
+            "local",
+            str(tmp_path / "a.txt"),
+        ]
+        targets = [str(tmp_path / "b.txt"), str(tmp_path / "c.txt")]
+
+        result = CliRunner().invoke(main, args + targets)
+
+        assert result.exit_code == 0, result.output
+        assert f"-> {targets[0]}, {targets[1]}" in result.output
+        assert (tmp_path / "c.txt").read_text() == "hola"
+
+        result = CliRunner().invoke(main, ["status", "--socket", daemon.path])
+        assert (
+            f"completed: {tmp_path / 'a.txt'} -> {targets[0]}, {targets[1]}"
+            in result.output
+        )
+
+    def test_failed_copy_exits_with_error(self, serve, tmp_path):
+        daemon = serve()
+        args = ["--daemon", "--socket", daemon.path, "-p", "local"]
+
+        result = CliRunner().invoke(
+            main, args + [str(tmp_path / "no_existe"), str(tmp_path / "b")]
+        )
+
+        assert result.exit_code == 1
+        assert "no existe" in result.output
+
+    def test_track_is_rejected(self, socket_file, tmp_path):
+        result = CliRunner().invoke(
+            main,
+            ["--daemon", "--socket", socket_file, "--track", "-p", "local", "/a", "/b"],
+        )
+
+        assert result.exit_code == 2
+        assert "--daemon" in result.output
@@ -1,4 +1,8 @@
+import os
+import subprocess
+import sys
 import pytest
+from unittest.mock import MagicMock, patch
 from copyway.protocols import ProtocolFactory
 from copyway.protocols.local import LocalProtocol
 from copyway.exceptions import ProtocolError
@@ -25,7 +29,95 @@ def test_register_custom_protocol():
     class CustomProtocol:
         def __init__(self, config=None):
             pass
-    
+
     ProtocolFactory.register("custom", CustomProtocol)
     protocol = ProtocolFactory.create("custom")
     assert isinstance(protocol, CustomProtocol)
+
+
+def test_register_by_import_path():
+    ProtocolFactory.register("local_alias", "copyway.protocols.local:LocalProtocol")
+    assert isinstance(ProtocolFactory.create("local_alias"), LocalProtocol)
+
+
+def test_invalid_import_path():
+    ProtocolFactory.register("broken", "copyway.no_existe:Protocolo")
+    with pytest.raises(ProtocolError, match="No se pudo cargar el protocolo broken"):
+        ProtocolFactory.create("broken")
+
+
+def test_entry_points_are_loaded_on_demand(monkeypatch):
+    monkeypatch.setattr(ProtocolFactory, "_protocols", dict(ProtocolFactory._protocols))
+    monkeypatch.setattr(ProtocolFactory, "_entry_points_loaded", False)
+    plugin = MagicMock(value="copyway.protocols.local:LocalProtocol")
+    plugin.name = "plugin"
+
+    with patch("importlib.metadata.entry_points", return_value=[plugin]) as found:
+        assert ProtocolFactory.is_registered("local")
+        found.assert_not_called()
+        assert isinstance(ProtocolFactory.create("plugin"), LocalProtocol)
+        assert "plugin" in ProtocolFactory.list_protocols()
+    found.assert_called_once_with(group="copyway.protocols")
+
+
+def test_protocol_option_lists_registry_lazily(monkeypatch):
+    from click.testing import CliRunner
+    from copyway.cli import ProtocolChoice, main
+
+    monkeypatch.setattr(ProtocolFactory, "_protocols", dict(ProtocolFactory._protocols))
+    ProtocolFactory.register("plugin", LocalProtocol)
+    choice = ProtocolChoice()
+
+    help_text = CliRunner().invoke(main, ["copy", "--help"]).output
+    error = CliRunner().invoke(main, ["-p", "nope", "/a", "/b"]).output
+
+    assert "|plugin]" in help_text
+    assert "'nope' is not one of" in error
+    assert [c.value for c in choice.shell_complete(None, None, "plu")] == ["plugin"]
+    assert "plugin" in choice.to_info_dict()["choices"]
+
+
+def test_local_copy_does_not_import_remote_protocols(tmp_path):
+    # Guarda del arranque: un cron con -p local no debe pagar paramiko ni HTTP
+    source = tmp_path / "origen"
+    source.write_text("x")
+    code = (
+        "import sys\n"
+        "from copyway.cli import main\n"
+        "try:\n"
+        f"    main(['-p', 'local', '--no-progress', {str(source)!r}, "
+        f"{str(tmp_path / 'destino')!r}])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "heavy = ['paramiko', 'copyway.protocols.sftp', 'copyway.protocols.ssh',\n"
+        "         'copyway.protocols.hdfs', 'copyway.protocols.asftp', 'asyncio',\n"
+        "         'http.client']\n"
+        "print([m for m in heavy if m in sys.modules])\n"
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+    assert (tmp_path / "destino").read_text() == "x"
+
+
+def test_cli_startup_skips_state_daemon_and_yaml(tmp_path):
+    # sqlite3, socketserver y yaml solo los cargan los comandos que los usan
+    env = {**os.environ, "COPYWAY_CONFIG": str(tmp_path / "no_existe.yml")}
+    code = (
+        "import sys\n"
+        "import copyway.cli\n"
+        "print([m for m in ('sqlite3', 'socketserver', 'yaml') if m in sys.modules])\n"
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,338 @@
+import os
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from click.testing import CliRunner
+from copyway.batch import BatchRunner
+from copyway.cli import main
+from copyway.config import Config
+from copyway.exceptions import TransientError, ValidationError
+from copyway.fanout import FanOut, fanout_protocol
+from copyway.protocols import ProtocolFactory
+from copyway.protocols.base import PARTIAL_SUFFIX
+from copyway.protocols.local import LocalProtocol, LocalSink
+from copyway.protocols.sftp import SFTPProtocol
+
+
+class SlowSink(LocalSink):
+    """Sink local que tarda en cada bloque y registra cuándo terminó."""
+
+    delay = 0.02
+    finished = {}
+
+    def open(self, rel, stat):
+        out = super().open(rel, stat)
+        write, commit = out.write, out.commit
+
+        def slow_write(data):
+            time.sleep(self.delay)
+            write(data)
+
+        def timed_commit():
+            commit()
+            SlowSink.finished[self.base] = time.monotonic()
+
+        out.write, out.commit = slow_write, timed_commit
+        return out
+
+
+class SlowProtocol(LocalProtocol):
+    def open_sink(self, source, destination, **options):
+        return SlowSink(destination)
+
+
+class FlakySink(LocalSink):
+    """Sink local cuyo primer commit falla con un error transitorio."""
+
+    failures = 1
+
+    def open(self, rel, stat):
+        out = super().open(rel, stat)
+        commit = out.commit
+
+        def flaky_commit():
+            if FlakySink.failures:
+                FlakySink.failures -= 1
+                raise TransientError("conexión cortada")
+            commit()
+
+        out.commit = flaky_commit
+        return out
+
+
+class FlakyProtocol(LocalProtocol):
+    def open_sink(self, source, destination, **options):
+        return FlakySink(destination)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    src = tmp_path / "release"
+    (src / "bin").mkdir(parents=True)
+    (src / "vacio").mkdir()
+    (src / "app.tar").write_bytes(os.urandom(300_000))
+    (src / "bin" / "run.sh").write_text("#!/bin/sh\n")
+    os.chmod(src / "bin" / "run.sh", 0o755)
+    return src
+
+
+@pytest.mark.parametrize(
+    "destination, default, expected",
+    [
+        ("deploy@edge01:/srv", "local", "sftp"),
+        ("edge01:/srv", "sftp", "sftp"),
+        ("hdfs://nn:8020/data", "sftp", "hdfs"),
+        ("/data/raw", "hdfs", "hdfs"),
+        ("/mnt/nfs", "sftp", "local"),
+        ("relativo", "hdfs", "local"),
+    ],
+)
+def test_fanout_protocol(destination, default, expected):
+    assert fanout_protocol(destination, default) == expected
+
+
+class TestFanOut:
+    def test_tree_to_local_destinations(self, tree, tmp_path):
+        destinations = [str(tmp_path / f"dst{i}") for i in range(3)]
+        for destination in destinations:
+            os.mkdir(destination)
+
+        results = FanOut(Config(), block_size=4096).run(str(tree), destinations)
+
+        for destination in destinations:
+            copy = tmp_path / destination / "release"
+            assert (copy / "app.tar").read_bytes() == (tree / "app.tar").read_bytes()
+            assert (copy / "vacio").is_dir()
+            assert os.stat(copy / "bin" / "run.sh").st_mode & 0o777 == 0o755
+            assert not list(copy.rglob("*" + PARTIAL_SUFFIX))
+        assert [r["status"] for r in results] == ["completed"] * 3
+        assert all(r["files"] == 2 for r in results)
+        assert results[0]["bytes"] == 300_000 + len("#!/bin/sh\n")
+
+    def test_single_file_to_new_paths(self, tree, tmp_path):
+        source = str(tree / "app.tar")
+
+        FanOut(Config()).run(source, [str(tmp_path / "a.tar"), str(tmp_path / "b.tar")])
+
+        assert (tmp_path / "b.tar").read_bytes() == (tree / "app.tar").read_bytes()
+
+    def test_failed_destination_is_isolated(self, tree, tmp_path):
+        (tmp_path / "archivo").write_text("no es un directorio")
+        fanout = FanOut(Config(), block_size=4096)
+
+        results = fanout.run(
+            str(tree), [str(tmp_path / "ok"), str(tmp_path / "archivo" / "sub")]
+        )
+
+        assert [r["status"] for r in results] == ["completed", "failed"]
+        assert results[1]["error"]
+        assert fanout.failed == 1
+        assert fanout.metrics.errors == 1
+        assert (tmp_path / "ok" / "app.tar").exists()
+
+    def test_slow_destination_does_not_block(self, tree, tmp_path, monkeypatch):
+        monkeypatch.setattr(SlowSink, "finished", {})
+        ProtocolFactory.register("slowlocal", SlowProtocol)
+        source = str(tree / "app.tar")
+        slow = str(tmp_path / "slow.tar")
+        fast = str(tmp_path / "fast.tar")
+        fanout = FanOut(Config(), block_size=16384, buffer_blocks=2)
+        started = time.monotonic()
+
+        results = fanout.run(
+            source, [{"destination": slow, "protocol": "slowlocal"}, fast]
+        )
+
+        assert open(slow, "rb").read() == open(source, "rb").read()
+        assert open(fast, "rb").read() == open(source, "rb").read()
+        assert results[0]["reread"] > 0
+        assert results[1]["reread"] == 0
+        # El rápido terminó mucho antes que el lento
+        assert results[1]["seconds"] < SlowSink.finished[slow] - started
+
+    def test_retry_rewrites_from_source(self, tree, tmp_path, monkeypatch):
+        monkeypatch.setattr(FlakySink, "failures", 1)
+        ProtocolFactory.register("flakylocal", FlakyProtocol)
+        target = str(tmp_path / "copia.tar")
+        config = Config()
+        config.data["protocols"] = {"flakylocal": {"retry_delay": 0.01}}
+        fanout = FanOut(config)
+
+        results = fanout.run(
+            str(tree / "app.tar"), [{"destination": target, "protocol": "flakylocal"}]
+        )
+
+        assert results[0]["status"] == "completed"
+        assert results[0]["retries"] == 1
+        assert fanout.retry_stats.retries == 1
+        assert open(target, "rb").read() == (tree / "app.tar").read_bytes()
+
+    def test_mixed_local_sftp_and_webhdfs(
+        self, tree, tmp_path, fake_sftp, webhdfs_server
+    ):
+        (fake_sftp.root / "srv").mkdir()
+        (webhdfs_server.root / "data").mkdir()
+        config = Config()
+        config.data["protocols"] = {
+            "hdfs": {
+                "backend": "webhdfs",
+                "url": webhdfs_server.url,
+                "replication": 2,
+            }
+        }
+        destinations = [str(tmp_path / "local"), "u@edge01:/srv", "hdfs:///data"]
+
+        with patch.object(
+            SFTPProtocol, "_connect", return_value=MagicMock()
+        ), patch.object(
+            SFTPProtocol, "_open_sftp", return_value=fake_sftp
+        ), patch.object(
+            SFTPProtocol, "_disconnect"
+        ):
+            results = FanOut(config, block_size=8192).run(
+                str(tree), destinations, "sftp"
+            )
+
+        assert [r["protocol"] for r in results] == ["local", "sftp", "hdfs"]
+        assert [r["status"] for r in results] == ["completed"] * 3, results
+        data = (tree / "app.tar").read_bytes()
+        assert (fake_sftp.root / "srv" / "release" / "app.tar").read_bytes() == data
+        assert (
+            webhdfs_server.root / "data" / "release" / "app.tar"
+        ).read_bytes() == data
+        assert webhdfs_server.created["/data/release/app.tar"]["replication"] == "2"
+        assert not list((fake_sftp.root / "srv").rglob("*" + PARTIAL_SUFFIX))
+
+    @patch("subprocess.run")
+    def test_hdfs_cli_sink(self, mock_run, mock_popen, tree):
+        mock_run.return_value = MagicMock(returncode=1)
+        config = Config()
+        config.data["protocols"] = {"hdfs": {"replication": 3}}
+
+        results = FanOut(config).run(str(tree / "app.tar"), ["/data/app.tar"], "hdfs")
+
+        assert results[0]["status"] == "completed"
+        assert mock_popen.commands == [
+            ["hdfs", "dfs", "-put", "-f", "-", "/data/app.tar"]
+        ]
+        stdin = mock_popen.call_args.kwargs["stdin"]
+        assert stdin is not None
+        assert ["hdfs", "dfs", "-setrep", "3", "/data/app.tar"] in [
+            c.args[0] for c in mock_run.call_args_list
+        ]
+
+    @pytest.mark.parametrize(
+        "options", [{"sync": True}, {"verify": "sha256"}, {"compression": "zstd"}]
+    )
+    def test_unsupported_options(self, tree, tmp_path, options):
+        with pytest.raises(ValidationError, match="varios destinos"):
+            FanOut(Config()).run(str(tree), [str(tmp_path / "a")], **options)
+
+    def test_remote_source_is_rejected(self, tmp_path):
+        with pytest.raises(ValidationError, match="debe ser local"):
+            FanOut(Config()).run("u@h:/datos", [str(tmp_path / "a")])
+
+    def test_validate_names_failed_destination(self, tree, tmp_path):
+        missing = str(tmp_path / "no" / "existe")
+
+        with pytest.raises(ValidationError, match="no/existe: Directorio padre"):
+            FanOut(Config()).validate(str(tree), [str(tmp_path / "a"), missing])
+
+    def test_validate_allows_replacing_a_file(self, tree, tmp_path):
+        (tmp_path / "copia.tar").write_text("viejo")
+
+        FanOut(Config()).validate(str(tree / "app.tar"), [str(tmp_path / "copia.tar")])
+
+    def test_validate_connects_to_sftp_destinations(self, tree):
+        with patch(
+            "copyway.utils.validators.connection_pool.acquire",
+            side_effect=OSError("sin ruta"),
+        ):
+            with pytest.raises(ValidationError, match="u@edge01:/srv: No se puede"):
+                FanOut(Config()).validate(str(tree), ["u@edge01:/srv"], "sftp")
+
+    def test_progress_shows_every_destination(self, tree, tmp_path, capsys):
+        destinations = [str(tmp_path / "a"), str(tmp_path / "b")]
+
+        FanOut(Config(), progress=True).run(str(tree / "app.tar"), destinations)
+
+        line = capsys.readouterr().out.strip().split("\r")[-1]
+        assert f"{destinations[0]} 100% (" in line
+        assert f"{destinations[1]} 100% (" in line
+
+
+class TestFanOutCLI:
+    def test_copy_to_many(self, tree, tmp_path):
+        args = ["-p", "local", "--no-progress", str(tree)]
+        args += [str(tmp_path / "a"), str(tmp_path / "b")]
+
+        result = CliRunner().invoke(main, args)
+
+        assert result.exit_code == 0, result.output
+        assert "-> 2 destinos" in result.output
+        assert (tmp_path / "b" / "bin" / "run.sh").exists()
+
+    def test_failed_destination_exits_with_error(self, tree, tmp_path):
+        (tmp_path / "archivo").write_text("x")
+        args = ["-p", "local", "--no-progress", str(tree)]
+        args += [str(tmp_path / "a"), str(tmp_path / "archivo" / "b")]
+
+        result = CliRunner().invoke(main, args)
+
+        assert result.exit_code == 1
+        assert "✓ " + str(tmp_path / "a") in result.output
+        assert "1 de 2 destinos fallaron" in result.output
+
+    def test_dry_run_validates_destinations(self, tree, tmp_path):
+        args = ["-p", "local", "--dry-run", str(tree)]
+        args += [str(tmp_path / "a"), str(tmp_path / "no" / "b")]
+
+        result = CliRunner().invoke(main, args)
+
+        assert result.exit_code == 1
+        assert "Directorio padre no existe" in result.output
+        assert "Dry-run completado" not in result.output
+
+    def test_unexpected_error_is_reported(self, tree, tmp_path):
+        args = ["-p", "local", "--no-progress", str(tree)]
+        args += [str(tmp_path / "a"), str(tmp_path / "b")]
+
+        with patch.object(FanOut, "run", side_effect=RuntimeError("boom")):
+            result = CliRunner().invoke(main, args)
+
+        assert result.exit_code == 1
+        assert "✗ Error inesperado: boom" in result.output
+
+    def test_track_is_rejected(self, tree, tmp_path):
+        result = CliRunner().invoke(
+            main, ["-p", "local", "--track", str(tree), "/a", "/b"]
+        )
+
+        assert result.exit_code == 2
+        assert "varios destinos" in result.output
+
+    def test_batch_job_with_destinations(self, tree, tmp_path):
+        job = {
+            "protocol": "local",
+            "source": str(tree),
+            "destinations": [str(tmp_path / "a"), str(tmp_path / "b")],
+        }
+
+        [result] = BatchRunner(Config()).run([job])
+
+        assert result["status"] == "completed"
+        assert result["destination"] == f"{tmp_path / 'a'}, {tmp_path / 'b'}"
+        assert [d["status"] for d in result["destinations"]] == ["completed"] * 2
+        assert (tmp_path / "b" / "app.tar").exists()
+
+    def test_batch_dry_run_validates_destinations(self, tree, tmp_path):
+        job = {
+            "protocol": "local",
+            "source": str(tree),
+            "destinations": [str(tmp_path / "a"), str(tmp_path / "no" / "b")],
+        }
+
+        [result] = BatchRunner(Config(), dry_run=True).run([job])
+
+        assert result["status"] == "failed"
+        assert "Directorio padre no existe" in result["error"]
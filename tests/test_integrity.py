@@ -0,0 +1,146 @@
+import hashlib
+import pytest
+from unittest.mock import patch
+from copyway.exceptions import IntegrityError, ProtocolError, ValidationError
+from copyway.protocols import local
+from copyway.protocols.hdfs import HDFSProtocol
+from copyway.protocols.local import LocalProtocol
+from copyway.protocols.sftp import SFTPProtocol, PARTIAL_SUFFIX
+from copyway.utils import integrity
+from copyway.utils.integrity import file_digest, new_hasher, verify_mode
+
+
+class TestVerifyMode:
+    def test_modes(self):
+        assert verify_mode({}, {}) is None
+        assert verify_mode({"verify": "sha256"}, {"verify": "size"}) == "sha256"
+        assert verify_mode({}, {"verify": "size"}) == "size"
+
+    def test_invalid_mode(self):
+        with pytest.raises(ValidationError, match="inválido"):
+            verify_mode({"verify": "md5"}, {})
+
+    def test_xxhash_not_installed(self):
+        with patch.object(integrity, "xxhash", None):
+            with pytest.raises(ValidationError, match="pip install xxhash"):
+                verify_mode({"verify": "xxhash"}, {})
+
+
+class TestLocalVerify:
+    def test_checksum_computed_while_copying(self, tmp_path):
+        source = tmp_path / "a.bin"
+        source.write_bytes(b"abc" * 100000)
+        hasher = new_hasher("sha256")
+
+        method = local.fast_copy(str(source), str(tmp_path / "b.bin"), hasher=hasher)
+
+        assert method == "userspace"
+        assert hasher.hexdigest() == hashlib.sha256(source.read_bytes()).hexdigest()
+
+    @patch("time.sleep")
+    def test_mismatch_is_retried(self, mock_sleep, tmp_path):
+        source = tmp_path / "a.txt"
+        source.write_text("contenido")
+        dest = tmp_path / "b.txt"
+        copy = local.fast_copy
+        corrupt = [True]
+
+        def flaky(src, dst, **kwargs):
+            method = copy(src, dst, **kwargs)
+            if corrupt:
+                corrupt.pop()
+                with open(dst, "r+b") as f:
+                    f.write(b"X")
+            return method
+
+        protocol = LocalProtocol()
+        with patch.object(local, "fast_copy", side_effect=flaky):
+            protocol.copy(str(source), str(dest), progress=False, verify="sha256")
+
+        assert dest.read_text() == "contenido"
+        assert protocol.retry_stats.recovered == 1
+
+    def test_size_mismatch_fails_after_retries(self, tmp_path):
+        source = tmp_path / "a.txt"
+        source.write_text("contenido")
+
+        def truncated(src, dst, **kwargs):
+            open(dst, "wb").close()
+            return "userspace"
+
+        protocol = LocalProtocol({"retries": 0})
+        with patch.object(local, "fast_copy", side_effect=truncated):
+            with pytest.raises(ProtocolError, match="Tamaño incorrecto"):
+                protocol.copy(
+                    str(source), str(tmp_path / "b.txt"), progress=False, verify="size"
+                )
+
+    def test_xxhash(self, tmp_path):
+        pytest.importorskip("xxhash")
+        source = tmp_path / "a.txt"
+        source.write_text("contenido")
+
+        LocalProtocol().copy(
+            str(source), str(tmp_path / "b.txt"), progress=False, verify="xxhash"
+        )
+
+        assert file_digest(tmp_path / "b.txt", "xxhash") == file_digest(source, "xxhash")
+
+
+class TestSFTPVerify:
+    def test_put_compares_remote_digest_before_rename(self, tmp_path, fake_sftp):
+        source = tmp_path / "a.bin"
+        source.write_bytes(b"x" * 100000)
+        protocol = SFTPProtocol()
+        expected = hashlib.sha256(source.read_bytes()).hexdigest()
+
+        with patch.object(protocol, "_remote_digest", return_value=expected) as digest:
+            protocol._put_file(fake_sftp, str(source), "/a.bin", verify="sha256")
+
+        digest.assert_called_once_with(fake_sftp, "/a.bin" + PARTIAL_SUFFIX, "sha256")
+        assert fake_sftp.local("/a.bin").read_bytes() == source.read_bytes()
+
+    def test_put_mismatch_discards_partial(self, tmp_path, fake_sftp):
+        source = tmp_path / "a.bin"
+        source.write_bytes(b"x" * 1000)
+        protocol = SFTPProtocol()
+
+        with patch.object(protocol, "_remote_digest", return_value="otro"):
+            with pytest.raises(IntegrityError):
+                protocol._put_file(fake_sftp, str(source), "/a.bin", verify="sha256")
+
+        assert not fake_sftp.local("/a.bin").exists()
+        assert not fake_sftp.local("/a.bin" + PARTIAL_SUFFIX).exists()
+
+    def test_get_resumed_partial_is_hashed_whole(self, tmp_path, fake_sftp):
+        data = bytes(range(256)) * 1000
+        fake_sftp.local("/a.bin").write_bytes(data)
+        dest = tmp_path / "a.bin"
+        (tmp_path / ("a.bin" + PARTIAL_SUFFIX)).write_bytes(data[:70000])
+        protocol = SFTPProtocol()
+        expected = hashlib.sha256(data).hexdigest()
+
+        with patch.object(protocol, "_remote_digest", return_value=expected):
+            protocol._get_file(fake_sftp, "/a.bin", str(dest), verify="sha256")
+
+        assert dest.read_bytes() == data
+
+
+class TestHDFSVerify:
+    def test_size_mismatch(self):
+        protocol = HDFSProtocol()
+
+        with pytest.raises(IntegrityError, match="/d/b.csv"):
+            protocol._verify_sizes({"/d/a.csv": 1, "/d/b.csv": 2}, {"/d/a.csv": (1, 0.0)})
+
+    def test_upload_verified_by_webhdfs_status(self, webhdfs_server, tmp_path):
+        source = tmp_path / "part"
+        source.mkdir()
+        (source / "a.csv").write_text("abc")
+        (webhdfs_server.root / "data").mkdir()
+        protocol = HDFSProtocol({"backend": "webhdfs", "url": webhdfs_server.url})
+
+        protocol.copy(str(source), "/data/", progress=False, verify="sha256")
+
+        assert webhdfs_server.ops.count("GETFILESTATUS") >= 2
+        assert (webhdfs_server.root / "data" / "part" / "a.csv").read_text() == "abc"
@@ -0,0 +1,211 @@
+import json
+import socket
+import pytest
+from click.testing import CliRunner
+from copyway.batch import BatchRunner
+from copyway.cli import main
+from copyway.config import Config
+from copyway.exceptions import ConfigError
+from copyway.protocols.local import LocalProtocol
+from copyway.utils.metrics import (
+    MetricsReporter,
+    TransferMetrics,
+    build_record,
+    prometheus_text,
+    statsd_lines,
+)
+
+
+def make_record(**fields):
+    metrics = TransferMetrics()
+    metrics.add_phase("transfer", 1.5)
+    metrics.add_phase("connect", 0.25)
+    metrics.count_file(1024)
+    record = build_record(metrics, "sftp", "/datos", "host:/bk", "completed", 2.0)
+    return {**record, **fields}
+
+
+class TestTransferMetrics:
+    def test_phase_is_measured_even_on_error(self):
+        metrics = TransferMetrics()
+
+        with pytest.raises(RuntimeError):
+            with metrics.phase("transfer"):
+                raise RuntimeError("falla")
+
+        assert metrics.phases["transfer"] >= 0
+
+    def test_merge_and_order(self):
+        total, job = TransferMetrics(), TransferMetrics()
+        job.add_phase("verify", 1.0)
+        job.add_phase("connect", 2.0)
+        job.count_file(10, files=3)
+        job.record_error()
+
+        total.merge(job)
+        total.merge(job)
+
+        data = total.as_dict()
+        assert list(data["phases"]) == ["connect", "verify"]
+        assert data == {
+            "phases": {"connect": 4.0, "verify": 2.0},
+            "files": 6,
+            "bytes": 20,
+            "errors": 2,
+        }
+
+    def test_count_path_ignores_missing(self, tmp_path):
+        (tmp_path / "a").write_bytes(b"x" * 5)
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "b").write_bytes(b"y" * 7)
+        metrics = TransferMetrics()
+
+        metrics.count_path(tmp_path)
+        metrics.count_path(tmp_path / "no_existe")
+
+        assert (metrics.files, metrics.bytes) == (2, 12)
+
+
+class TestFormats:
+    def test_prometheus_text(self):
+        text = prometheus_text(make_record(), prefix="cw")
+
+        assert 'cw_last_run_success{protocol="sftp"} 1' in text
+        assert 'cw_last_run_bytes{protocol="sftp"} 1024' in text
+        assert 'cw_last_run_phase_seconds{protocol="sftp",phase="transfer"} 1.5' in text
+        assert "# TYPE cw_last_run_duration_seconds gauge" in text
+
+    def test_statsd_lines(self):
+        lines = statsd_lines(make_record(status="failed"))
+
+        assert "copyway.sftp.duration:2000.0|ms" in lines
+        assert "copyway.sftp.failed:1|c" in lines
+        assert "copyway.sftp.phase.connect:250.0|ms" in lines
+        assert "copyway.sftp.files:1|c" in lines
+
+
+class TestMetricsReporter:
+    def test_disabled_without_outputs(self):
+        assert not MetricsReporter.from_config({}).enabled
+
+    def test_invalid_statsd_address(self):
+        with pytest.raises(ConfigError):
+            MetricsReporter(statsd="localhost:abc")
+
+    def test_writes_jsonl_and_prometheus(self, tmp_path):
+        jsonl, prom = tmp_path / "m.jsonl", tmp_path / "copyway.prom"
+        reporter = MetricsReporter.from_config(
+            {"jsonl": "ignorado.jsonl", "prometheus": str(prom)}, jsonl=str(jsonl)
+        )
+
+        reporter.report(make_record())
+        reporter.report(make_record(protocol="local"), prometheus=False)
+
+        lines = [json.loads(line) for line in jsonl.read_text().splitlines()]
+        assert [r["protocol"] for r in lines] == ["sftp", "local"]
+        assert lines[0]["phases"] == {"connect": 0.25, "transfer": 1.5}
+        assert 'protocol="sftp"' in prom.read_text()
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["copyway.prom", "m.jsonl"]
+
+    def test_sends_statsd(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as server:
+            server.bind(("127.0.0.1", 0))
+            server.settimeout(5)
+            reporter = MetricsReporter(statsd=f"127.0.0.1:{server.getsockname()[1]}")
+
+            reporter.report(make_record())
+
+            packet = server.recv(65536).decode()
+        assert packet.splitlines() == statsd_lines(make_record())
+
+    def test_publish_errors_do_not_raise(self, tmp_path):
+        reporter = MetricsReporter(jsonl=str(tmp_path / "no_existe" / "m.jsonl"))
+
+        reporter.report(make_record())
+
+
+class TestInstrumentation:
+    def test_local_copy_phases(self, tmp_path):
+        src = tmp_path / "src"
+        (src / "sub").mkdir(parents=True)
+        (src / "a.txt").write_bytes(b"a" * 10)
+        (src / "sub" / "b.txt").write_bytes(b"b" * 20)
+        protocol = LocalProtocol()
+
+        protocol.copy(str(src), str(tmp_path / "dst"), progress=False, verify="sha256")
+
+        data = protocol.metrics.as_dict()
+        assert (data["files"], data["bytes"], data["errors"]) == (2, 30, 0)
+        assert {"walk", "transfer", "metadata", "verify"} <= set(data["phases"])
+
+    def test_cli_writes_metrics_line(self, tmp_path):
+        src = tmp_path / "archivo.txt"
+        src.write_bytes(b"x" * 100)
+        metrics = tmp_path / "metrics.jsonl"
+
+        result = CliRunner().invoke(
+            main,
+            [
+                "-p",
+                "local",
+                "--no-progress",
+                "--metrics",
+                str(metrics),
+                str(src),
+                str(tmp_path / "copia.txt"),
+            ],
+        )
+
+        assert result.exit_code == 0, result.output
+        [record] = [json.loads(line) for line in metrics.read_text().splitlines()]
+        assert record["status"] == "completed"
+        assert (record["files"], record["bytes"], record["errors"]) == (1, 100, 0)
+        assert {"config", "validate", "transfer"} <= set(record["phases"])
+
+    def test_cli_failure_counts_error(self, tmp_path):
+        metrics = tmp_path / "metrics.jsonl"
+
+        result = CliRunner().invoke(
+            main,
+            [
+                "-p",
+                "local",
+                "--metrics",
+                str(metrics),
+                str(tmp_path / "no_existe"),
+                str(tmp_path / "copia"),
+            ],
+        )
+
+        assert result.exit_code != 0
+        [record] = [json.loads(line) for line in metrics.read_text().splitlines()]
+        assert (record["status"], record["errors"]) == ("failed", 1)
+
+    def test_batch_reports_jobs_and_total(self, tmp_path):
+        (tmp_path / "a.txt").write_bytes(b"a" * 10)
+        metrics = tmp_path / "metrics.jsonl"
+        runner = BatchRunner(
+            Config(), concurrency=2, reporter=MetricsReporter(jsonl=str(metrics))
+        )
+
+        runner.run(
+            [
+                {
+                    "protocol": "local",
+                    "source": str(tmp_path / "a.txt"),
+                    "destination": str(tmp_path / "b.txt"),
+                },
+                {
+                    "protocol": "local",
+                    "source": str(tmp_path / "no_existe"),
+                    "destination": str(tmp_path / "c.txt"),
+                },
+            ]
+        )
+
+        records = [json.loads(line) for line in metrics.read_text().splitlines()]
+        total = records[-1]
+        assert total["protocol"] == "batch"
+        assert total["status"] == "failed"
+        assert (total["files"], total["bytes"], total["errors"]) == (1, 10, 1)
+        assert sorted(r["status"] for r in records[:-1]) == ["completed", "failed"]
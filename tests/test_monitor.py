@@ -0,0 +1,72 @@
+import subprocess
+import sys
+import time
+import pytest
+from copyway.exceptions import StallError
+from copyway.utils.monitor import LocalSizeMeter, SourceReadMeter, run_monitored
+
+
+def python(code):
+    return [sys.executable, "-c", code]
+
+
+class TestRunMonitored:
+    def test_reports_destination_growth(self, tmp_path):
+        target = tmp_path / "out.bin"
+        code = (
+            "import time\n"
+            f"with open({str(target)!r}, 'wb') as f:\n"
+            "    for _ in range(5):\n"
+            "        f.write(b'x' * 1000); f.flush(); time.sleep(0.1)\n"
+        )
+        updates = []
+
+        run_monitored(
+            python(code),
+            measure=LocalSizeMeter(str(target)),
+            callback=updates.append,
+            poll_interval=0.05,
+        )
+
+        assert len(updates) > 1
+        assert sum(updates) <= 5000
+
+    def test_stalled_process_is_killed(self):
+        start = time.monotonic()
+
+        with pytest.raises(StallError, match="sin avance"):
+            run_monitored(
+                python("import time; time.sleep(30)"),
+                measure=lambda pid: 0,
+                stall_timeout=0.5,
+                poll_interval=0.05,
+            )
+
+        assert time.monotonic() - start < 10
+
+    def test_failure_keeps_stderr(self):
+        with pytest.raises(subprocess.CalledProcessError) as exc:
+            run_monitored(python("import sys; sys.exit('boom')"), poll_interval=0.05)
+
+        assert "boom" in exc.value.stderr
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="requiere /proc")
+class TestSourceReadMeter:
+    def test_counts_bytes_read_by_process(self, tmp_path):
+        source = tmp_path / "src.bin"
+        source.write_bytes(b"x" * 10000)
+        code = (
+            "import time, sys\n"
+            f"f = open({str(source)!r}, 'rb', buffering=0)\n"
+            "f.read(4000)\n"
+            "sys.stdout.write('ready'); sys.stdout.flush()\n"
+            "time.sleep(30)\n"
+        )
+        proc = subprocess.Popen(python(code), stdout=subprocess.PIPE)
+        try:
+            proc.stdout.read(5)
+            assert SourceReadMeter(str(tmp_path))(proc.pid) == 4000
+        finally:
+            proc.kill()
+            proc.wait()
@@ -1,7 +1,8 @@
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from pathlib import Path
-from copyway.protocols.local import LocalProtocol
+import errno
+from copyway.protocols.local import LocalProtocol, fast_copy
 from copyway.protocols.ssh import SSHProtocol
 from copyway.protocols.hdfs import HDFSProtocol
 from copyway.exceptions import ProtocolError, ValidationError
@@ -36,53 +37,174 @@ class TestLocalProtocol:
         assert dest.exists()
         assert (dest / "file.txt").exists()
 
+    def test_copy_directory_parallel(self, tmp_path):
+        source = tmp_path / "source_dir"
+        for i in range(5):
+            sub = source / f"sub{i}"
+            sub.mkdir(parents=True)
+            for j in range(10):
+                (sub / f"file{j}.txt").write_text(f"{i}-{j}")
+        (source / "link.txt").symlink_to("sub0/file0.txt")
+        dest = tmp_path / "dest_dir"
+
+        protocol = LocalProtocol()
+        protocol.copy(str(source), str(dest), workers=4)
+
+        assert (dest / "sub3" / "file7.txt").read_text() == "3-7"
+        assert len(list(dest.rglob("*.txt"))) == 51
+        assert (dest / "link.txt").is_symlink()
+        assert (dest / "sub0").stat().st_mtime == (source / "sub0").stat().st_mtime
+
+
+class TestFastCopy:
+    def test_reports_chunks(self, tmp_path):
+        source = tmp_path / "big.bin"
+        source.write_bytes(b"x" * 10000)
+        dest = tmp_path / "copy.bin"
+        chunks = []
+
+        method = fast_copy(str(source), str(dest), chunk_size=4096, reflink=False, callback=chunks.append)
+
+        assert method in ("copy_file_range", "sendfile", "userspace")
+        assert dest.read_bytes() == source.read_bytes()
+        assert sum(chunks) == 10000
+        assert len(chunks) >= 3
+
+    @patch("copyway.protocols.local.os.sendfile", side_effect=OSError(errno.ENOSYS, "no"))
+    @patch("copyway.protocols.local.os.copy_file_range", side_effect=OSError(errno.EXDEV, "xdev"), create=True)
+    def test_falls_back_to_userspace(self, mock_cfr, mock_sendfile, tmp_path):
+        source = tmp_path / "file.bin"
+        source.write_bytes(b"abc" * 1000)
+        dest = tmp_path / "copy.bin"
+
+        method = fast_copy(str(source), str(dest), reflink=False)
+
+        assert method == "userspace"
+        assert dest.read_bytes() == source.read_bytes()
+
+    def test_copy_preserves_mode_without_metadata(self, tmp_path):
+        source = tmp_path / "script.sh"
+        source.write_text("#!/bin/sh")
+        source.chmod(0o750)
+        dest = tmp_path / "copy.sh"
+
+        LocalProtocol({"chunk_size": 2}).copy(str(source), str(dest), preserve_metadata=False)
+
+        assert dest.stat().st_mode & 0o777 == 0o750
+
 
 class TestSSHProtocol:
-    @patch("subprocess.run")
-    def test_copy_basic(self, mock_run):
-        mock_run.return_value = MagicMock(returncode=0)
-        
+    def test_copy_basic(self, mock_popen):
         protocol = SSHProtocol()
         protocol.copy("file.txt", "user@host:/path/")
         
-        mock_run.assert_called_once()
-        args = mock_run.call_args[0][0]
+        mock_popen.assert_called_once()
+        args = mock_popen.commands[0]
         assert "scp" in args
         assert "-r" in args
 
-    @patch("subprocess.run")
-    def test_copy_with_options(self, mock_run):
-        mock_run.return_value = MagicMock(returncode=0)
-        
+    def test_copy_with_options(self, mock_popen):
         protocol = SSHProtocol()
         protocol.copy("file.txt", "user@host:/path/", port=2222, compress=True)
         
-        args = mock_run.call_args[0][0]
+        args = mock_popen.commands[0]
         assert "-P" in args
         assert "2222" in args
         assert "-C" in args
 
+    @patch("subprocess.run")
+    def test_sync_uses_rsync(self, mock_run, capsys):
+        mock_run.return_value = MagicMock(
+            returncode=0,
+            stdout=(
+                "Number of files: 12 (reg: 10, dir: 2)\n"
+                "Number of regular files transferred: 1\n"
+                "Total file size: 5,000 bytes\n"
+                "Total transferred file size: 500 bytes\n"
+            ),
+        )
+
+        protocol = SSHProtocol()
+        protocol.copy("dir", "user@host:/path/", sync=True, checksum=True)
+
+        args = mock_run.call_args[0][0]
+        assert args[0] == "rsync"
+        assert "--checksum" in args
+        assert "1 copiados (500.0 B), 9 sin cambios" in capsys.readouterr().out
+
 
 class TestHDFSProtocol:
-    @patch("subprocess.run")
-    def test_copy_basic(self, mock_run):
-        mock_run.return_value = MagicMock(returncode=0)
-        
+    def test_copy_basic(self, mock_popen):
         protocol = HDFSProtocol()
         protocol.copy("file.txt", "/hdfs/path/")
         
-        mock_run.assert_called_once()
-        args = mock_run.call_args[0][0]
+        mock_popen.assert_called_once()
+        args = mock_popen.commands[0]
         assert "hdfs" in args
         assert "dfs" in args
         assert "-put" in args
 
-    @patch("subprocess.run")
-    def test_copy_with_overwrite(self, mock_run):
-        mock_run.return_value = MagicMock(returncode=0)
-        
+    def test_copy_with_overwrite(self, mock_popen):
         protocol = HDFSProtocol()
         protocol.copy("file.txt", "/hdfs/path/", overwrite=True)
         
-        args = mock_run.call_args[0][0]
+        args = mock_popen.commands[0]
         assert "-f" in args
+
+    @patch("subprocess.run")
+    def test_sync_upload_skips_unchanged(self, mock_run, mock_popen, tmp_path):
+        source = tmp_path / "part"
+        source.mkdir()
+        (source / "old.csv").write_text("12345")
+        (source / "new.csv").write_text("abc")
+        listing = "-rw-r--r--   3 hdfs hdfs          5 2099-01-01 00:00 /data/part/old.csv\n"
+
+        def run(cmd, **kwargs):
+            if "-ls" in cmd:
+                return MagicMock(returncode=0, stdout=listing)
+            return MagicMock(returncode=0, stdout="")
+
+        mock_run.side_effect = run
+
+        protocol = HDFSProtocol()
+        protocol.copy(str(source), "/data/", sync=True)
+
+        puts = [c for c in mock_popen.commands if "-put" in c]
+        assert len(puts) == 1
+        assert str(source / "new.csv") in puts[0]
+        assert str(source / "old.csv") not in puts[0]
+        assert puts[0][-1] == "/data/part"
+
+    @patch("subprocess.run")
+    def test_parallel_upload_batches_and_bulk_setrep(self, mock_run, mock_popen, tmp_path):
+        source = tmp_path / "part"
+        source.mkdir()
+        for i in range(8):
+            (source / f"f{i}.csv").write_text(str(i))
+        mock_run.return_value = MagicMock(returncode=0, stdout="")
+
+        protocol = HDFSProtocol({"replication": 2})
+        protocol.copy(str(source), "/data/", workers=4)
+
+        calls = [c[0][0] for c in mock_run.call_args_list]
+        puts = mock_popen.commands
+        assert len(puts) == 4
+        assert all(len([a for a in c if a.endswith(".csv")]) == 2 for c in puts)
+        assert len([c for c in calls if "-mkdir" in c]) == 1
+        setreps = [c for c in calls if "-setrep" in c]
+        assert len(setreps) == 1
+        assert len(setreps[0]) == 4 + 8
+
+    @patch("subprocess.run")
+    def test_parallel_upload_retries_failed_batch(self, mock_run, mock_popen, tmp_path):
+        source = tmp_path / "part"
+        source.mkdir()
+        (source / "a.csv").write_text("a")
+        (source / "b.csv").write_text("b")
+        mock_run.return_value = MagicMock(returncode=0, stdout="")
+        mock_popen.failures = 1
+
+        protocol = HDFSProtocol({"retry_delay": 0})
+        protocol.copy(str(source), "/data/", workers=2)
+
+        assert len(mock_popen.commands) == 3
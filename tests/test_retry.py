@@ -0,0 +1,210 @@
+import errno
+import subprocess
+import pytest
+from unittest.mock import patch
+from copyway.exceptions import ProtocolError, StallError, TransientError
+from copyway.protocols.hdfs import HDFSProtocol
+from copyway.protocols.local import LocalProtocol
+from copyway.protocols.ssh import SSHProtocol
+from copyway.utils.progress import AttemptProgress, ProgressCallback
+from copyway.utils.retry import RetryPolicy, RetryStats, is_transient
+from copyway.utils.webhdfs import WebHDFSClient
+
+
+def failing(*errors):
+    """Operación que lanza ``errors`` en orden y luego retorna "ok"."""
+    pending = list(errors)
+    calls = []
+
+    def func(attempt):
+        calls.append(attempt)
+        if pending:
+            raise pending.pop(0)
+        return "ok"
+
+    func.calls = calls
+    return func
+
+
+@patch("time.sleep")
+class TestRetryPolicy:
+    def test_transient_errors_are_retried(self, mock_sleep):
+        stats = RetryStats()
+        func = failing(ConnectionResetError(), TimeoutError())
+
+        assert RetryPolicy(retries=2, stats=stats).call(func, "a.txt") == "ok"
+
+        assert func.calls == [0, 1, 2]
+        assert mock_sleep.call_count == 2
+        assert (stats.retries, stats.recovered, stats.exhausted) == (2, 1, 0)
+
+    def test_permanent_error_is_not_retried(self, mock_sleep):
+        func = failing(FileNotFoundError(errno.ENOENT, "no existe"))
+
+        with pytest.raises(FileNotFoundError):
+            RetryPolicy(retries=3).call(func, "a.txt")
+
+        assert func.calls == [0]
+        mock_sleep.assert_not_called()
+
+    def test_exhausted(self, mock_sleep):
+        stats = RetryStats()
+        func = failing(*[StallError("detenida")] * 3)
+
+        with pytest.raises(StallError):
+            RetryPolicy(retries=2, stats=stats).call(func, "a.txt")
+
+        assert func.calls == [0, 1, 2]
+        assert stats.summary() == "Reintentos: 2 (0 recuperados, 1 agotados)"
+
+    def test_backoff_is_exponential_with_jitter(self, mock_sleep):
+        policy = RetryPolicy(delay=1, max_delay=4)
+
+        for _ in range(20):
+            assert 0.5 <= policy.backoff(0) <= 1
+            assert 1 <= policy.backoff(1) <= 2
+            assert 2 <= policy.backoff(5) <= 4
+
+    def test_options_override_config(self, mock_sleep):
+        policy = RetryPolicy.from_config({"retries": 5, "retry_delay": 3}, {"retries": 0})
+
+        assert (policy.retries, policy.delay) == (0, 3)
+
+
+class TestClassification:
+    def test_default(self):
+        assert is_transient(OSError(errno.ECONNRESET, "reset"))
+        assert is_transient(TransientError("503"))
+        assert not is_transient(PermissionError(errno.EACCES, "denegado"))
+        assert not is_transient(ValueError("x"))
+
+    def test_ssh(self):
+        protocol = SSHProtocol()
+
+        def error(code, stderr, cmd="scp"):
+            return subprocess.CalledProcessError(code, [cmd], "", stderr)
+
+        assert protocol.is_retryable(error(1, "lost connection"))
+        assert protocol.is_retryable(error(255, ""))
+        assert not protocol.is_retryable(error(1, "scp: /x: No such file or directory"))
+        assert not protocol.is_retryable(error(255, "Permission denied (publickey)."))
+        assert protocol.is_retryable(error(12, "", cmd="rsync"))
+        assert not protocol.is_retryable(error(23, "", cmd="rsync"))
+
+    def test_hdfs(self):
+        protocol = HDFSProtocol()
+
+        def error(stderr):
+            return subprocess.CalledProcessError(1, ["hdfs"], "", stderr)
+
+        assert protocol.is_retryable(error("StandbyException: Operation category READ"))
+        assert not protocol.is_retryable(error("put: `/x': No such file or directory"))
+        assert not protocol.is_retryable(ProtocolError("already exists"))
+        assert protocol.is_retryable(TransientError("WebHDFS PUT /x: 503"))
+
+    def test_webhdfs_connection_error_is_transient(self):
+        with pytest.raises(TransientError):
+            WebHDFSClient("http://127.0.0.1:1", timeout=1).status("/")
+
+
+class TestProtocolRetries:
+    @patch("time.sleep")
+    def test_scp_is_retried_after_dropped_connection(self, mock_sleep, mock_popen, tmp_path):
+        source = tmp_path / "a.txt"
+        source.write_text("a")
+        mock_popen.failures = 1
+        mock_popen.stderr = "lost connection"
+        protocol = SSHProtocol()
+
+        protocol.copy(str(source), "host:/tmp/", progress=False)
+
+        assert len(mock_popen.commands) == 2
+        assert protocol.retry_stats.recovered == 1
+
+    def test_scp_permanent_error_is_not_retried(self, mock_popen, tmp_path):
+        source = tmp_path / "a.txt"
+        source.write_text("a")
+        mock_popen.failures = 1
+        mock_popen.stderr = "scp: /tmp/: Permission denied"
+
+        with pytest.raises(ProtocolError, match="Permission denied"):
+            SSHProtocol().copy(str(source), "host:/tmp/", progress=False)
+
+        assert len(mock_popen.commands) == 1
+
+    @patch("time.sleep")
+    def test_hdfs_put_retry_overwrites(self, mock_sleep, mock_popen, tmp_path):
+        source = tmp_path / "a.csv"
+        source.write_text("a")
+        mock_popen.failures = 1
+
+        HDFSProtocol().copy(str(source), "/data/", progress=False)
+
+        first, second = mock_popen.commands
+        assert "-f" not in first
+        assert "-f" in second
+
+    @patch("time.sleep")
+    def test_local_file_retried_on_io_error(self, mock_sleep, tmp_path):
+        source = tmp_path / "src"
+        source.mkdir()
+        (source / "a.txt").write_text("a")
+        (source / "b.txt").write_text("b")
+        dest = tmp_path / "dest"
+        from copyway.protocols import local
+
+        copy = local.fast_copy
+        errors = [OSError(errno.EIO, "Input/output error")]
+
+        def flaky(src, dst, **kwargs):
+            if errors:
+                raise errors.pop()
+            return copy(src, dst, **kwargs)
+
+        protocol = LocalProtocol()
+        with patch.object(local, "fast_copy", side_effect=flaky):
+            protocol.copy(str(source), str(dest), progress=False)
+
+        assert (dest / "a.txt").read_text() == "a"
+        assert (dest / "b.txt").read_text() == "b"
+        assert protocol.retry_stats.retries == 1
+
+    @patch("time.sleep")
+    def test_retried_file_is_counted_once_in_progress(self, mock_sleep, tmp_path):
+        source = tmp_path / "src"
+        source.mkdir()
+        (source / "a.bin").write_bytes(b"a" * 1000)
+        from copyway.protocols import local
+
+        copy = local.fast_copy
+        failures = [OSError(errno.EIO, "Input/output error")]
+
+        def flaky(src, dst, callback=None, **kwargs):
+            if failures:
+                callback(600)
+                raise failures.pop()
+            return copy(src, dst, callback=callback, **kwargs)
+
+        totals = []
+        with patch.object(local, "fast_copy", side_effect=flaky), patch.object(
+            ProgressCallback, "finish", lambda self: totals.append(self.copied)
+        ):
+            LocalProtocol().copy(str(source), str(tmp_path / "dest"), progress=True)
+
+        assert totals == [1000]
+
+
+def test_attempt_progress_reports_only_new_bytes():
+    reported = []
+    meter = AttemptProgress(lambda n, name: reported.append(n))
+
+    first = meter.attempt()
+    first(400, "a")
+    first(300, "a")
+    second = meter.attempt()
+    second(500, "a")
+    second(500, "a")
+
+    assert reported == [400, 300, 300]
+    assert sum(reported) == 1000
+    assert AttemptProgress(None).attempt() is None
@@ -0,0 +1,343 @@
+import pytest
+import paramiko
+from unittest.mock import MagicMock, patch
+from copyway.exceptions import ProtocolError
+from copyway.protocols.sftp import SFTPProtocol, PARTIAL_SUFFIX
+
+
+class TestResumableTransfers:
+    def test_put_resumes_from_partial(self, tmp_path, fake_sftp):
+        data = bytes(range(256)) * 1000
+        local = tmp_path / "big.bin"
+        local.write_bytes(data)
+        fake_sftp.local("/big.bin" + PARTIAL_SUFFIX).write_bytes(data[:100000])
+
+        SFTPProtocol()._put_file(fake_sftp, str(local), "/big.bin")
+
+        assert fake_sftp.local("/big.bin").read_bytes() == data
+        assert not fake_sftp.local("/big.bin" + PARTIAL_SUFFIX).exists()
+        assert fake_sftp.bytes_written == len(data) - 100000
+
+    def test_put_restarts_when_tail_differs(self, tmp_path, fake_sftp):
+        data = b"a" * 5000
+        local = tmp_path / "file.bin"
+        local.write_bytes(data)
+        fake_sftp.local("/file.bin" + PARTIAL_SUFFIX).write_bytes(b"b" * 3000)
+
+        SFTPProtocol()._put_file(fake_sftp, str(local), "/file.bin")
+
+        assert fake_sftp.local("/file.bin").read_bytes() == data
+        assert fake_sftp.bytes_written == len(data)
+
+    def test_put_overwrites_existing_target(self, tmp_path, fake_sftp):
+        local = tmp_path / "file.txt"
+        local.write_text("new")
+        fake_sftp.local("/file.txt").write_text("old content")
+
+        SFTPProtocol()._put_file(fake_sftp, str(local), "/file.txt")
+
+        assert fake_sftp.local("/file.txt").read_text() == "new"
+
+    def test_get_resumes_from_partial(self, tmp_path, fake_sftp):
+        data = bytes(range(256)) * 500
+        fake_sftp.local("/data.bin").write_bytes(data)
+        local = tmp_path / "data.bin"
+        (tmp_path / ("data.bin" + PARTIAL_SUFFIX)).write_bytes(data[:70000])
+        progress = []
+
+        SFTPProtocol()._get_file(
+            fake_sftp, "/data.bin", str(local), callback=lambda done, total: progress.append(done)
+        )
+
+        assert local.read_bytes() == data
+        assert progress[0] == 70000
+        assert progress[-1] == len(data)
+
+    def test_partial_resume_disabled(self, tmp_path, fake_sftp):
+        data = b"x" * 4000
+        local = tmp_path / "file.bin"
+        local.write_bytes(data)
+        fake_sftp.local("/file.bin" + PARTIAL_SUFFIX).write_bytes(data[:2000])
+
+        SFTPProtocol({"partial_resume": False})._put_file(fake_sftp, str(local), "/file.bin")
+
+        assert fake_sftp.bytes_written == len(data)
+
+    def test_empty_file_with_progress(self, tmp_path, fake_sftp, capsys):
+        (tmp_path / "vacio.txt").write_bytes(b"")
+        fake_sftp.local("/remoto.txt").write_bytes(b"")
+        protocol = SFTPProtocol()
+
+        with patch.object(protocol, "_connect", return_value=MagicMock()), patch.object(
+            protocol, "_open_sftp", return_value=fake_sftp
+        ), patch.object(protocol, "_disconnect"):
+            protocol.copy(str(tmp_path / "vacio.txt"), "u@h:/vacio.txt", progress=True)
+            protocol.copy("u@h:/remoto.txt", str(tmp_path / "remoto.txt"), progress=True)
+
+        assert fake_sftp.local("/vacio.txt").read_bytes() == b""
+        assert (tmp_path / "remoto.txt").read_bytes() == b""
+        assert "100.0%" in capsys.readouterr().out
+
+
+class TestPipelining:
+    def test_get_prefetches_with_configured_requests(self, tmp_path, fake_sftp):
+        fake_sftp.local("/data.bin").write_bytes(b"z" * 300000)
+        protocol = SFTPProtocol({"max_requests": 128, "block_size": 65536})
+
+        protocol._get_file(fake_sftp, "/data.bin", str(tmp_path / "data.bin"))
+
+        assert fake_sftp.prefetches == [(300000, 128)]
+        assert (tmp_path / "data.bin").stat().st_size == 300000
+
+    @patch("copyway.protocols.sftp.paramiko.SFTPClient.from_transport")
+    def test_open_sftp_uses_window_size(self, mock_from_transport):
+        ssh = MagicMock()
+        SFTPProtocol({"window_size": 64 * 1024 * 1024})._open_sftp(ssh)
+
+        mock_from_transport.assert_called_once_with(
+            ssh.get_transport(), window_size=64 * 1024 * 1024, max_packet_size=None
+        )
+
+
+class TestConcurrentDirectories:
+    def _tree(self, root):
+        for i in range(3):
+            sub = root / f"sub{i}" / "deep"
+            sub.mkdir(parents=True)
+            for j in range(5):
+                (sub / f"f{j}.txt").write_text(f"{i}{j}")
+
+    def test_upload_dir_with_workers(self, tmp_path, fake_sftp):
+        source = tmp_path / "tree"
+        self._tree(source)
+        protocol = SFTPProtocol()
+        opened = []
+
+        def open_sftp(ssh):
+            opened.append(ssh)
+            return fake_sftp
+
+        with patch.object(protocol, "_open_sftp", side_effect=open_sftp):
+            protocol._upload_dir(fake_sftp, source, "/tree", False, ssh=MagicMock(), workers=4)
+
+        assert fake_sftp.local("/tree/sub2/deep/f4.txt").read_text() == "24"
+        assert len(list(fake_sftp.local("/tree").rglob("*.txt"))) == 15
+        assert 1 < len(opened) <= 4
+
+    def test_upload_follows_symlinked_dirs(self, tmp_path, fake_sftp):
+        (tmp_path / "real").mkdir()
+        (tmp_path / "real" / "b.txt").write_text("b")
+        source = tmp_path / "src"
+        source.mkdir()
+        (source / "a.txt").write_text("a")
+        (source / "linkdir").symlink_to("../real")
+        (source / "link.txt").symlink_to("../real/b.txt")
+
+        SFTPProtocol()._upload_dir(fake_sftp, source, "/src", False, ssh=MagicMock())
+
+        assert fake_sftp.local("/src/linkdir/b.txt").read_text() == "b"
+        assert fake_sftp.local("/src/link.txt").read_text() == "b"
+        assert fake_sftp.local("/src/a.txt").read_text() == "a"
+
+    def test_download_dir_with_workers(self, tmp_path, fake_sftp):
+        self._tree(fake_sftp.local("/tree"))
+        protocol = SFTPProtocol()
+
+        with patch.object(protocol, "_open_sftp", return_value=fake_sftp):
+            protocol._download_dir(fake_sftp, "/tree", tmp_path / "out", False, ssh=MagicMock(), workers=3)
+
+        assert (tmp_path / "out" / "sub1" / "deep" / "f3.txt").read_text() == "13"
+        assert len(list((tmp_path / "out").rglob("*.txt"))) == 15
+
+    def test_extra_connections(self, tmp_path, fake_sftp):
+        source = tmp_path / "tree"
+        self._tree(source)
+        protocol = SFTPProtocol({"connections": 2})
+        extra = MagicMock()
+
+        with patch.object(protocol, "_open_sftp", return_value=fake_sftp):
+            protocol._upload_dir(
+                fake_sftp, source, "/tree", False, ssh=MagicMock(), workers=4, connect=lambda: extra
+            )
+
+        extra.close.assert_called_once()
+
+    def test_empty_tree_with_workers(self, tmp_path, fake_sftp):
+        (tmp_path / "vacio" / "sub").mkdir(parents=True)
+        fake_sftp.local("/remoto/sub").mkdir(parents=True)
+        protocol = SFTPProtocol()
+
+        with patch.object(protocol, "_open_sftp", return_value=fake_sftp):
+            protocol._upload_dir(
+                fake_sftp, tmp_path / "vacio", "/vacio", False, ssh=MagicMock(), workers=4
+            )
+            protocol._download_dir(
+                fake_sftp, "/remoto", tmp_path / "out", False, ssh=MagicMock(), workers=4
+            )
+
+        assert fake_sftp.local("/vacio/sub").is_dir()
+        assert (tmp_path / "out" / "sub").is_dir()
+
+    def test_sync_without_changes(self, tmp_path, fake_sftp):
+        source = tmp_path / "tree"
+        self._tree(source)
+        fake_sftp.local("/backup").mkdir()
+        protocol = SFTPProtocol()
+
+        with patch.object(protocol, "_connect", return_value=MagicMock()), patch.object(
+            protocol, "_open_sftp", return_value=fake_sftp
+        ), patch.object(protocol, "_disconnect"):
+            protocol.copy(str(source), "u@h:/backup", progress=False, workers=4, sync=True)
+            fake_sftp.bytes_written = 0
+            protocol.copy(str(source), "u@h:/backup", progress=False, workers=4, sync=True)
+
+        assert fake_sftp.bytes_written == 0
+        assert fake_sftp.local("/backup/tree/sub0/deep/f0.txt").read_text() == "00"
+
+
+class TestReconnect:
+    def test_retry_reconnects_dropped_connection(self, tmp_path, fake_sftp):
+        source = tmp_path / "tree"
+        source.mkdir()
+        for i in range(3):
+            (source / f"f{i}.txt").write_text(str(i))
+        protocol = SFTPProtocol()
+        dead = MagicMock()
+        dead.get_transport.return_value.is_active.return_value = False
+        fresh = MagicMock()
+        opened = []
+        put_file = protocol._put_file
+        failures = [OSError("Socket is closed")]
+
+        def flaky_put(sftp, local, remote, **kwargs):
+            if failures:
+                raise failures.pop()
+            put_file(sftp, local, remote, **kwargs)
+
+        def open_sftp(ssh):
+            opened.append(ssh)
+            return fake_sftp
+
+        with patch.object(protocol, "_put_file", side_effect=flaky_put), patch.object(
+            protocol, "_open_sftp", side_effect=open_sftp
+        ), patch("time.sleep"):
+            protocol._upload_dir(
+                fake_sftp,
+                source,
+                "/tree",
+                False,
+                ssh=dead,
+                connect=lambda: fresh,
+                retry=protocol.retry_policy({"retries": 1}),
+            )
+
+        assert opened == [fresh]
+        assert len(list(fake_sftp.local("/tree").iterdir())) == 3
+        assert protocol.retry_stats.recovered == 1
+        fresh.close.assert_called_once()
+
+    def test_classifies_connection_errors(self):
+        protocol = SFTPProtocol()
+
+        assert protocol.is_retryable(OSError("Socket is closed"))
+        assert protocol.is_retryable(paramiko.SSHException("Server connection dropped"))
+        assert not protocol.is_retryable(paramiko.AuthenticationException("denied"))
+        assert not protocol.is_retryable(FileNotFoundError(2, "No such file"))
+
+
+class TestRemoteToRemote:
+    @pytest.fixture
+    def hosts(self, fake_sftp_hosts):
+        fake_sftp_hosts["origen"], fake_sftp_hosts["destino"]
+        return fake_sftp_hosts
+
+    @pytest.fixture
+    def protocol(self, hosts):
+        protocol = SFTPProtocol({"block_size": 4096, "max_requests": 8})
+
+        def connect(host, *args):
+            return MagicMock(host=host)
+
+        with patch.object(protocol, "_connect", side_effect=connect), patch.object(
+            protocol, "_open_sftp", side_effect=lambda ssh: hosts[ssh.host]
+        ), patch.object(protocol, "_disconnect"):
+            yield protocol
+
+    def _tree(self, root):
+        (root / "datos" / "sub").mkdir(parents=True)
+        (root / "datos" / "a.bin").write_bytes(bytes(range(256)) * 400)
+        (root / "datos" / "sub" / "b.txt").write_text("b")
+
+    def test_streams_tree_between_servers(self, hosts, protocol):
+        src, dst = hosts["origen"], hosts["destino"]
+        self._tree(src.root)
+        dst.local("/backup").mkdir()
+
+        protocol.copy("u@origen:/datos", "u@destino:/backup", progress=False)
+
+        copied = dst.local("/backup/datos")
+        assert (copied / "a.bin").read_bytes() == bytes(range(256)) * 400
+        assert (copied / "sub" / "b.txt").read_text() == "b"
+        assert not list(copied.rglob("*" + PARTIAL_SUFFIX))
+        assert dst.bytes_written == 102401
+        assert (102400, 8) in src.prefetches
+        assert protocol.metrics.files == 2
+
+    def test_resumes_partial_and_verifies(self, hosts, protocol):
+        src, dst = hosts["origen"], hosts["destino"]
+        data = bytes(range(256)) * 400
+        src.local("/a.bin").write_bytes(data)
+        dst.local("/a.bin" + PARTIAL_SUFFIX).write_bytes(data[:50000])
+
+        protocol.copy(
+            "u@origen:/a.bin", "u@destino:/a.bin", progress=False, verify="sha256"
+        )
+
+        assert dst.local("/a.bin").read_bytes() == data
+        assert dst.bytes_written == len(data) - 50000
+        assert dst.exec_commands == ["sha256sum /a.bin" + PARTIAL_SUFFIX]
+
+    def test_workers_and_sync(self, hosts, protocol):
+        src, dst = hosts["origen"], hosts["destino"]
+        self._tree(src.root)
+        for i in range(6):
+            (src.root / "datos" / f"f{i}.txt").write_text(str(i))
+        dst.local("/backup").mkdir()
+
+        protocol.copy(
+            "u@origen:/datos", "u@destino:/backup", progress=False, workers=3, sync=True
+        )
+        dst.bytes_written = 0
+        protocol.copy(
+            "u@origen:/datos", "u@destino:/backup", progress=False, workers=3, sync=True
+        )
+
+        assert dst.local("/backup/datos/f5.txt").read_text() == "5"
+        assert dst.bytes_written == 0
+
+    def test_retry_opens_new_destination_channel(self, hosts, protocol):
+        src = hosts["origen"]
+        src.local("/a.txt").write_text("hola")
+        relay_file = protocol._relay_file
+        targets = []
+
+        def flaky(src_sftp, dst_sftp, *args, **kwargs):
+            targets.append(dst_sftp)
+            if len(targets) == 1:
+                raise OSError("Socket is closed")
+            relay_file(src_sftp, dst_sftp, *args, **kwargs)
+
+        with patch.object(protocol, "_relay_file", side_effect=flaky), patch(
+            "time.sleep"
+        ):
+            protocol.copy("u@origen:/a.txt", "u@destino:/b.txt", progress=False)
+
+        assert hosts["destino"].local("/b.txt").read_text() == "hola"
+        assert len(targets) == 2
+        assert protocol.retry_stats.recovered == 1
+        # Un canal en cada servidor, y uno nuevo en cada uno al reintentar
+        assert protocol._open_sftp.call_count == 4
+
+    def test_missing_source(self, hosts, protocol):
+        with pytest.raises(ProtocolError, match="Ruta remota no existe"):
+            protocol.copy("u@origen:/no", "u@destino:/x", progress=False)
@@ -0,0 +1,94 @@
+import sqlite3
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+from click.testing import CliRunner
+from copyway.cli import main
+from copyway.exceptions import ConfigError
+from copyway.utils.state import JobState
+
+
+class TestJobState:
+    def test_create_and_load(self, tmp_path):
+        db = tmp_path / "jobs.db"
+        state = JobState.create(str(db), "sftp", "/a", "host:/b", {"port": 2222, "password": "secret"})
+        state.finish("failed")
+
+        loaded = JobState(str(db), state.job_id)
+        assert loaded.protocol == "sftp"
+        assert loaded.destination == "host:/b"
+        assert loaded.options == {"port": 2222}
+
+    def test_unknown_job(self, tmp_path):
+        with pytest.raises(ConfigError, match="no encontrado"):
+            JobState(str(tmp_path / "jobs.db"), "nope")
+
+    def test_is_done_detects_changes(self, tmp_path):
+        state = JobState.create(str(tmp_path / "jobs.db"), "local", "/a", "/b", {})
+        state.mark_done("/a/f.txt", 10, 100.0)
+        state.mark_failed("/a/g.txt", "boom")
+
+        assert state.is_done("/a/f.txt", 10, 100.0) is True
+        assert state.is_done("/a/f.txt", 11, 100.0) is False
+        assert state.is_done("/a/g.txt") is False
+        assert state.done_count() == 1
+        assert state.pending_count() == 1
+        state.finish("completed")
+
+
+class TestResume:
+    def test_resume_skips_completed_files(self, tmp_path):
+        config = tmp_path / "config.yml"
+        config.write_text("protocols: {}\n")
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "done.txt").write_text("done")
+        (src / "todo.txt").write_text("todo")
+        dest = tmp_path / "dest"
+
+        state = JobState.create(
+            str(tmp_path / ".copyway-jobs.db"), "local", str(src), str(dest), {"workers": 2}
+        )
+        st = (src / "done.txt").stat()
+        state.mark_done(str(src / "done.txt"), st.st_size, st.st_mtime)
+        state.finish("failed")
+
+        runner = CliRunner()
+        result = runner.invoke(main, ["--config", str(config), "--resume", state.job_id])
+
+        assert result.exit_code == 0, result.output
+        assert (dest / "todo.txt").read_text() == "todo"
+        assert not (dest / "done.txt").exists()
+        assert JobState(str(tmp_path / ".copyway-jobs.db"), state.job_id).done_count() == 2
+
+    def test_track_registers_job(self, tmp_path):
+        config = tmp_path / "config.yml"
+        config.write_text("protocols: {}\n")
+        src = tmp_path / "a.txt"
+        src.write_text("a")
+
+        runner = CliRunner()
+        result = runner.invoke(
+            main, ["-p", "local", "--config", str(config), "--track", str(src), str(tmp_path / "b.txt")]
+        )
+
+        assert result.exit_code == 0, result.output
+        assert "Trabajo registrado" in result.output
+        assert (tmp_path / ".copyway-jobs.db").exists()
+
+    def test_interrupted_job_is_resumable(self, tmp_path):
+        config = tmp_path / "config.yml"
+        config.write_text("protocols: {}\n")
+        src = tmp_path / "a.txt"
+        src.write_text("a")
+        args = ["-p", "local", "--config", str(config), "--track", "--no-progress"]
+
+        with patch(
+            "copyway.protocols.local.LocalProtocol.copy", side_effect=KeyboardInterrupt
+        ):
+            result = CliRunner().invoke(main, args + [str(src), str(tmp_path / "b.txt")])
+
+        assert result.exit_code == 1
+        assert "Reanudar con: copyway --resume" in result.output
+        db = sqlite3.connect(tmp_path / ".copyway-jobs.db")
+        assert db.execute("SELECT status FROM jobs").fetchall() == [("failed",)]
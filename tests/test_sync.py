@@ -0,0 +1,66 @@
+import os
+import pytest
+from pathlib import Path
+from copyway.protocols.local import LocalProtocol
+from copyway.utils.sync import Synchronizer, file_checksum
+
+
+class TestSynchronizer:
+    def test_new_file_is_copied(self):
+        assert Synchronizer().should_copy(10, 100.0, None, None) is True
+
+    def test_same_size_and_mtime_is_skipped(self):
+        assert Synchronizer().should_copy(10, 100.0, 10, 100.5) is False
+
+    def test_size_change_is_copied(self):
+        assert Synchronizer().should_copy(10, 100.0, 11, 100.0) is True
+
+    def test_newer_mode_accepts_later_destination(self):
+        sync = Synchronizer(mtime_tolerance=60, newer=True)
+        assert sync.should_copy(10, 100.0, 10, 500.0) is False
+        assert sync.should_copy(10, 500.0, 10, 100.0) is True
+
+    def test_checksum_mode(self):
+        sync = Synchronizer(checksum=True)
+        assert sync.should_copy(3, 1.0, 3, 1.0, lambda: "a", lambda: "b") is True
+        assert sync.should_copy(3, 1.0, 3, 9.0, lambda: "a", lambda: "a") is False
+
+    def test_summary(self):
+        sync = Synchronizer()
+        sync.record_copied(2048)
+        sync.record_skipped(1024)
+        sync.record_skipped(1024)
+        assert sync.summary() == "Sync: 1 copiados (2.0 KB), 2 sin cambios (2.0 KB)"
+
+    def test_file_checksum(self, tmp_path):
+        f = tmp_path / "a.txt"
+        f.write_text("abc")
+        assert file_checksum(str(f)).startswith("ba7816bf")
+
+
+class TestLocalSync:
+    def test_only_changed_files_are_copied(self, tmp_path, capsys):
+        source = tmp_path / "src"
+        source.mkdir()
+        (source / "same.txt").write_text("same")
+        (source / "changed.txt").write_text("v1")
+        dest = tmp_path / "dst"
+
+        protocol = LocalProtocol()
+        protocol.copy(str(source), str(dest), sync=True, progress=False)
+        (source / "changed.txt").write_text("v2 longer")
+
+        protocol.copy(str(source), str(dest), sync=True, progress=False)
+
+        assert (dest / "changed.txt").read_text() == "v2 longer"
+        assert "1 copiados" in capsys.readouterr().out.splitlines()[-1]
+
+    def test_sync_without_metadata_keeps_mtime(self, tmp_path):
+        source = tmp_path / "a.txt"
+        source.write_text("data")
+        os.utime(source, (1000000000, 1000000000))
+        dest = tmp_path / "b.txt"
+
+        LocalProtocol().copy(str(source), str(dest), sync=True, preserve_metadata=False, progress=False)
+
+        assert dest.stat().st_mtime == 1000000000
@@ -0,0 +1,192 @@
+import os
+import pytest
+from unittest.mock import patch
+from copyway.batch import BatchRunner
+from copyway.config import Config
+from copyway.exceptions import ValidationError
+from copyway.protocols.local import fast_copy
+from copyway.protocols.sftp import SFTPProtocol
+from copyway.protocols.ssh import SSHProtocol
+from copyway.utils.throttle import Throttle, parse_rate, reload_all
+
+
+class FakeClock:
+    """Reloj simulado: ``sleep`` avanza el tiempo sin esperar."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        self.slept += seconds
+
+
+@pytest.fixture
+def clock():
+    clock = FakeClock()
+    with patch("copyway.utils.throttle.time", clock):
+        yield clock
+
+
+class TestParseRate:
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            ("10M", 10 * 1024**2),
+            ("512k", 512 * 1024),
+            ("1.5G", int(1.5 * 1024**3)),
+            ("2MB/s", 2 * 1024**2),
+            ("4096", 4096),
+            (8192, 8192),
+            ("0", 0),
+            ("off", 0),
+            (None, 0),
+        ],
+    )
+    def test_values(self, value, expected):
+        assert parse_rate(value) == expected
+
+    @pytest.mark.parametrize("value", ["rápido", "10X", "-5"])
+    def test_invalid(self, value):
+        with pytest.raises(ValidationError, match="ancho de banda"):
+            parse_rate(value)
+
+
+class TestThrottle:
+    def test_enforces_rate(self, clock):
+        throttle = Throttle(1000)
+
+        for _ in range(10):
+            throttle.consume(500)
+
+        # 5000 bytes a 1000 B/s: 5 segundos
+        assert clock.slept == pytest.approx(5.0)
+
+    def test_unused_budget_allows_one_second_burst(self, clock):
+        throttle = Throttle(1000)
+        clock.now += 60
+
+        throttle.consume(1000)
+        throttle.consume(1000)
+
+        assert clock.slept == pytest.approx(1.0)
+
+    def test_parent_limits_all_children(self, clock):
+        parent = Throttle(1000)
+        children = [Throttle(10_000, parent=parent), Throttle(0, parent=parent)]
+
+        for child in children * 5:
+            child.consume(500)
+
+        assert clock.slept == pytest.approx(5.0, abs=0.1)
+
+    def test_control_file_changes_rate(self, clock, tmp_path):
+        control = tmp_path / "bw"
+        control.write_text("1000")
+        throttle = Throttle(control_file=str(control))
+        assert throttle.rate == 1000
+
+        control.write_text("2K\n")
+        os.utime(control, ns=(0, 1))
+        reload_all()
+        throttle.consume(100)
+
+        assert throttle.rate == 2048
+
+    def test_invalid_control_file_keeps_rate(self, clock, tmp_path):
+        control = tmp_path / "bw"
+        control.write_text("rápido")
+
+        throttle = Throttle(500, control_file=str(control))
+
+        assert throttle.rate == 500
+
+    def test_from_config_prefers_options(self):
+        parent = Throttle(100)
+
+        throttle = Throttle.from_config({"bwlimit": "1M"}, {"bwlimit": "2M"}, parent)
+
+        assert throttle.rate == 2 * 1024**2
+        assert throttle.parent is parent
+        assert Throttle.from_config({}, {}, parent) is parent
+        assert Throttle.from_config({}, {}) is None
+
+    def test_effective_rate_is_the_lowest(self):
+        throttle = Throttle(0, parent=Throttle(5000, parent=Throttle(9000)))
+
+        assert throttle.effective_rate == 5000
+
+
+class TestProtocols:
+    def test_fast_copy_is_throttled(self, clock, tmp_path):
+        src = tmp_path / "src.bin"
+        src.write_bytes(os.urandom(3000))
+        dst = tmp_path / "dst.bin"
+        reported = []
+
+        fast_copy(
+            str(src),
+            str(dst),
+            chunk_size=1000,
+            reflink=False,
+            callback=reported.append,
+            throttle=Throttle(1000),
+        )
+
+        assert dst.read_bytes() == src.read_bytes()
+        assert sum(reported) == 3000
+        assert clock.slept == pytest.approx(3.0)
+
+    def test_sftp_put_is_throttled(self, clock, tmp_path, fake_sftp):
+        src = tmp_path / "data.bin"
+        src.write_bytes(b"x" * 4096)
+        protocol = SFTPProtocol()
+        protocol.throttle = Throttle(1024)
+
+        protocol._put_file(fake_sftp, str(src), "/data.bin")
+
+        assert fake_sftp.local("/data.bin").read_bytes() == b"x" * 4096
+        assert clock.slept == pytest.approx(4.0)
+
+    def test_scp_receives_static_limit(self, mock_popen):
+        SSHProtocol().copy("file.txt", "user@host:/path/", bwlimit="1M")
+
+        args = mock_popen.commands[0]
+        assert args[args.index("-l") + 1] == str(1024**2 * 8 // 1000)
+
+    @patch("subprocess.run")
+    def test_rsync_receives_static_limit(self, mock_run, capsys):
+        mock_run.return_value.stdout = ""
+
+        SSHProtocol({"bwlimit": "512K"}).copy("dir", "host:/path/", sync=True)
+
+        assert "--bwlimit=512" in mock_run.call_args[0][0]
+
+    def test_batch_jobs_share_global_limit(self, tmp_path):
+        (tmp_path / "a.txt").write_text("a")
+        throttle = Throttle(10 * 1024**2)
+        seen = []
+        original = Throttle.from_config
+
+        def spy(config, options, parent=None):
+            seen.append(parent)
+            return original(config, options, parent)
+
+        runner = BatchRunner(Config(str(tmp_path / "none.yml")), throttle=throttle)
+        with patch.object(Throttle, "from_config", side_effect=spy):
+            runner.run(
+                [
+                    {
+                        "protocol": "local",
+                        "source": str(tmp_path / "a.txt"),
+                        "destination": str(tmp_path / "b.txt"),
+                    }
+                ]
+            )
+
+        assert seen == [throttle]
+        assert (tmp_path / "b.txt").read_text() == "a"
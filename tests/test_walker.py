@@ -0,0 +1,70 @@
+import os
+from unittest.mock import patch
+from copyway.protocols.local import LocalProtocol
+from copyway.utils import walker
+from copyway.utils.walker import TreeScan, tree_size, walk_tree
+
+
+def make_tree(root):
+    (root / "a" / "b").mkdir(parents=True)
+    (root / "top.txt").write_text("12345")
+    (root / "a" / "one.txt").write_text("1")
+    (root / "a" / "b" / "two.txt").write_text("22")
+    os.symlink(root / "top.txt", root / "link.txt")
+    os.symlink(root / "a", root / "link_dir")
+
+
+class TestWalkTree:
+    def test_directories_before_contents(self, tmp_path):
+        make_tree(tmp_path)
+
+        entries = list(walk_tree(tmp_path))
+        order = [e.rel for e in entries]
+
+        assert order.index("a") < order.index(os.path.join("a", "one.txt"))
+        assert order.index(os.path.join("a", "b")) < order.index(os.path.join("a", "b", "two.txt"))
+        kinds = {e.rel: e.kind for e in entries}
+        assert kinds["link.txt"] == "link"
+        assert kinds["link_dir"] == "link"
+        assert not any(rel.startswith("link_dir" + os.sep) for rel in order)
+
+    def test_follow_symlinks(self, tmp_path):
+        make_tree(tmp_path)
+
+        rels = {e.rel: e for e in walk_tree(tmp_path, follow_symlinks=True)}
+
+        assert rels["link.txt"].kind == "file"
+        assert rels["link.txt"].stat.st_size == 5
+        assert os.path.join("link_dir", "one.txt") in rels
+
+    def test_tree_size(self, tmp_path):
+        make_tree(tmp_path)
+
+        assert tree_size(tmp_path) == 8
+        assert tree_size(tmp_path / "top.txt") == 5
+
+    def test_tree_scan(self, tmp_path):
+        make_tree(tmp_path)
+
+        scan = TreeScan(tmp_path)
+
+        assert scan.total_size == 8
+        assert len(scan.files) == 3
+        assert sorted(map(str, scan.links)) == ["link.txt", "link_dir"]
+
+
+class TestSingleWalk:
+    def test_validate_and_copy_walk_source_once(self, tmp_path):
+        src = tmp_path / "src"
+        src.mkdir()
+        make_tree(src)
+        dest = tmp_path / "dest"
+        protocol = LocalProtocol()
+
+        with patch.object(walker, "walk_tree", wraps=walker.walk_tree) as mock_walk:
+            protocol.validate(str(src), str(dest))
+            protocol.copy(str(src), str(dest), progress=True)
+
+        assert mock_walk.call_count == 1
+        assert (dest / "a" / "b" / "two.txt").read_text() == "22"
+        assert os.path.islink(dest / "link.txt")
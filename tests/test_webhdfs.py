@@ -0,0 +1,128 @@
+import io
+import pytest
+from unittest.mock import patch
+from copyway.exceptions import ProtocolError
+from copyway.protocols.hdfs import HDFSProtocol
+from copyway.utils.webhdfs import WebHDFSClient
+
+
+class TestWebHDFSClient:
+    def test_create_and_open_roundtrip(self, webhdfs_server, tmp_path):
+        client = WebHDFSClient(webhdfs_server.url, user="hdfs")
+        local = tmp_path / "data.bin"
+        local.write_bytes(b"x" * 300000)
+
+        with open(local, "rb") as f:
+            client.create("/data/data.bin", f, replication=2, permission="640")
+        out = io.BytesIO()
+        client.open("/data/data.bin", out)
+
+        assert out.getvalue() == local.read_bytes()
+        params = webhdfs_server.created["/data/data.bin"]
+        assert params["replication"] == "2"
+        assert params["permission"] == "640"
+        assert params["user.name"] == "hdfs"
+
+    def test_connections_are_reused(self, webhdfs_server):
+        client = WebHDFSClient(webhdfs_server.url)
+
+        for i in range(5):
+            client.create(f"/f{i}.txt", io.BytesIO(b"abc"))
+
+        assert webhdfs_server.connections == 1
+        assert set(client.list_files("/")) == {f"/f{i}.txt" for i in range(5)}
+
+    def test_status_missing_path(self, webhdfs_server):
+        assert WebHDFSClient(webhdfs_server.url).status("/nope") is None
+
+    def test_remote_exception_message(self, webhdfs_server):
+        client = WebHDFSClient(webhdfs_server.url)
+        client.create("/a.txt", io.BytesIO(b"1"))
+
+        with pytest.raises(ProtocolError, match="already exists"):
+            client.create("/a.txt", io.BytesIO(b"2"))
+
+
+class TestHDFSProtocolWebHDFS:
+    def make_protocol(self, server, **config):
+        return HDFSProtocol({"backend": "webhdfs", "url": server.url, **config})
+
+    @patch("subprocess.run")
+    def test_upload_tree_without_cli(self, mock_run, webhdfs_server, tmp_path):
+        source = tmp_path / "part"
+        (source / "sub").mkdir(parents=True)
+        (source / "a.csv").write_text("a")
+        (source / "sub" / "b.csv").write_text("bb")
+        (webhdfs_server.root / "data").mkdir()
+
+        protocol = self.make_protocol(webhdfs_server, replication=2)
+        protocol.copy(str(source), "/data/", progress=False)
+
+        mock_run.assert_not_called()
+        assert (webhdfs_server.root / "data" / "part" / "sub" / "b.csv").read_text() == "bb"
+        assert webhdfs_server.created["/data/part/a.csv"]["replication"] == "2"
+        assert "SETREPLICATION" not in webhdfs_server.ops
+
+    def test_upload_follows_symlinked_dirs(self, webhdfs_server, tmp_path):
+        (tmp_path / "real").mkdir()
+        (tmp_path / "real" / "b.csv").write_text("b")
+        source = tmp_path / "part"
+        source.mkdir()
+        (source / "linkdir").symlink_to("../real")
+        (webhdfs_server.root / "data").mkdir()
+
+        self.make_protocol(webhdfs_server).copy(str(source), "/data/", progress=False)
+
+        uploaded = webhdfs_server.root / "data" / "part" / "linkdir" / "b.csv"
+        assert uploaded.read_text() == "b"
+
+    def test_sync_skips_unchanged(self, webhdfs_server, tmp_path):
+        source = tmp_path / "part"
+        source.mkdir()
+        (source / "a.csv").write_text("a")
+        (webhdfs_server.root / "data").mkdir()
+        protocol = self.make_protocol(webhdfs_server)
+
+        protocol.copy(str(source), "/data/", progress=False)
+        webhdfs_server.ops.clear()
+        protocol.copy(str(source), "/data/", progress=False, sync=True)
+
+        assert "CREATE" not in webhdfs_server.ops
+
+    def test_download_tree(self, webhdfs_server, tmp_path):
+        remote = webhdfs_server.root / "logs" / "2024"
+        remote.mkdir(parents=True)
+        (remote / "x.log").write_text("x")
+        dest = tmp_path / "out"
+        dest.mkdir()
+
+        self.make_protocol(webhdfs_server).copy("/logs", str(dest), progress=False)
+
+        assert (dest / "logs" / "2024" / "x.log").read_text() == "x"
+
+    def test_download_refuses_to_overwrite(self, webhdfs_server, tmp_path):
+        (webhdfs_server.root / "x.log").write_text("x")
+        dest = tmp_path / "x.log"
+        dest.write_text("local")
+
+        with pytest.raises(ProtocolError, match="ya existe"):
+            self.make_protocol(webhdfs_server).copy("/x.log", str(dest), progress=False)
+
+    def test_missing_url(self):
+        with pytest.raises(ProtocolError, match="url"):
+            HDFSProtocol({"backend": "webhdfs"}).copy("/a", "/b")
+
+    def test_parallel_upload(self, webhdfs_server, tmp_path):
+        source = tmp_path / "part"
+        (source / "sub").mkdir(parents=True)
+        for i in range(10):
+            (source / "sub" / f"{i}.csv").write_text(str(i))
+        (webhdfs_server.root / "data").mkdir()
+
+        protocol = self.make_protocol(webhdfs_server, permission="640")
+        protocol.copy(str(source), "/data/", progress=False, workers=4)
+
+        uploaded = sorted((webhdfs_server.root / "data" / "part" / "sub").iterdir())
+        assert len(uploaded) == 10
+        assert all(p["permission"] == "640" for p in webhdfs_server.created.values())
+        assert webhdfs_server.ops.count("MKDIRS") == 2